@@ -0,0 +1,88 @@
+"""Compare the success-response encoding paths on a 1,000-product listing: the old stdlib JSON path,
+the orjson path (the default) and msgpack (Accept: application/msgpack), by encode time and body size.
+
+Run from the loopit directory:  python benchmarks/response_encoding.py
+"""
+import os
+import sys
+import timeit
+from datetime import datetime, timezone
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from helpers.responses import _response_format
+from helpers.success_handler import write_success_response
+from models.category import Category
+from models.product import Product, ProductResponse
+from models.user import User
+
+PRODUCTS = 1000
+ROUNDS = 20
+
+
+def build_listing():
+    category = Category(id=3, name="Power tools", price=Decimal("149.99"), security=Decimal("500"))
+    lender = User(
+        id=42,
+        full_name="Lender",
+        email="lender@example.com",
+        phone_number="9999999999",
+        address="Block A",
+        password_hash="x",
+        society_id=1,
+    )
+    return [
+        ProductResponse(
+            product=Product(
+                id=i,
+                lender_id=42,
+                category_id=3,
+                name=f"Drill {i}",
+                description="Cordless drill with two batteries and a charger",
+                duration=7,
+                created_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+                image_url=f"https://cdn.example.com/products/{i}.jpg",
+            ),
+            category=category,
+            user=lender,
+        )
+        for i in range(PRODUCTS)
+    ]
+
+
+def old_path(listing):
+    # controllers dump, the handler re-encodes, JSONResponse serializes with stdlib json
+    data = [p.model_dump() for p in listing]
+    return JSONResponse(status_code=200, content={"status": True, "data": jsonable_encoder(data)}).body
+
+
+def new_path(listing):
+    data = [p.model_dump() for p in listing]
+    return write_success_response(status_code=200, data=data).body
+
+
+def msgpack_path(listing):
+    # what the negotiation middleware does for Accept: application/msgpack
+    token = _response_format.set("msgpack")
+    try:
+        return new_path(listing)
+    finally:
+        _response_format.reset(token)
+
+
+def main():
+    listing = build_listing()
+    for name, fn in (
+        ("jsonable_encoder + JSONResponse", old_path),
+        ("FastJSONResponse (orjson)", new_path),
+        ("MsgPackResponse", msgpack_path),
+    ):
+        best = min(timeit.repeat(lambda: fn(listing), number=1, repeat=ROUNDS))
+        print(f"{name:<34} {best * 1000:8.2f} ms  ({len(fn(listing))} bytes)")
+
+
+if __name__ == "__main__":
+    main()
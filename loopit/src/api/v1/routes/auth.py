@@ -1,14 +1,15 @@
-from controller.auth_controller import login_controller, signup_controller
+from controller.auth_controller import login_controller, logout_controller, refresh_controller, signup_controller
 from fastapi import APIRouter, status,Depends
 from helpers.api_paths import ApiPaths
-from schemas.auth import LoginRequest,RegisterRequest 
+from helpers.admission import admit_login
+from schemas.auth import LoginRequest,RefreshRequest,RegisterRequest 
 from service.auth.auth_interface import AuthService
 from setup.dependencies import get_auth_service
 
 router = APIRouter(tags=["Auth"])
 
 
-@router.post(ApiPaths.AUTH_SIGNUP, status_code=status.HTTP_201_CREATED)
+@router.post(ApiPaths.AUTH_SIGNUP, status_code=status.HTTP_201_CREATED, dependencies=[Depends(admit_login)])
 async def signup(payload: RegisterRequest , auth_service: AuthService = Depends(get_auth_service)):
     return await signup_controller(
         payload= payload,
@@ -16,10 +17,26 @@ async def signup(payload: RegisterRequest , auth_service: AuthService = Depends(
     )
 
 
-@router.post(ApiPaths.AUTH_LOGIN, status_code=status.HTTP_200_OK)
+@router.post(ApiPaths.AUTH_LOGIN, status_code=status.HTTP_200_OK, dependencies=[Depends(admit_login)])
 async def login(payload: LoginRequest, auth_service: AuthService = Depends(get_auth_service)):
     return await login_controller(
         email=payload.email,
         password=payload.password,
         auth_service= auth_service
     )
+
+
+@router.post(ApiPaths.AUTH_REFRESH, status_code=status.HTTP_200_OK)
+async def refresh(payload: RefreshRequest, auth_service: AuthService = Depends(get_auth_service)):
+    return await refresh_controller(
+        refresh_token=payload.refresh_token,
+        auth_service=auth_service
+    )
+
+
+@router.post(ApiPaths.AUTH_LOGOUT, status_code=status.HTTP_200_OK)
+async def logout(payload: RefreshRequest, auth_service: AuthService = Depends(get_auth_service)):
+    return await logout_controller(
+        refresh_token=payload.refresh_token,
+        auth_service=auth_service
+    )
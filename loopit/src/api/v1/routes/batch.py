@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Depends, status, Request
+from helpers.auth_helper import AuthHelper
+from helpers.api_paths import ApiPaths
+from controller import batch_controller as controller
+from schemas.batch import BatchRequest
+
+router = APIRouter(dependencies=[Depends(AuthHelper.verify_jwt)])
+
+@router.post(ApiPaths.BATCH, status_code=status.HTTP_200_OK)
+async def run_batch(payload: BatchRequest, request: Request):
+    return await controller.run_batch(
+        payload=payload,
+        request=request,
+    )
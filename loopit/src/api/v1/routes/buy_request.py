@@ -2,12 +2,13 @@
 from fastapi import APIRouter, Depends, status, Request
 from helpers.auth_helper import AuthHelper
 from helpers.api_paths import ApiPaths
+from helpers.streaming import stream_format
 from setup.buy_request_dependencies import get_buyer_request_service
 from setup.product_dependencies import get_product_service
 from service.buy_request_service import BuyRequestService
 from service.product_service import ProductService
 from controller import buy_request_controller as controller
-from schemas.buy_request import BuyRequestPayload, UpdateBuyerRequestStatus
+from schemas.buy_request import BuyRequestPayload, UpdateBuyerRequestStatus, BulkUpdateBuyerRequestStatus
 
 from typing import Optional
 
@@ -24,6 +25,8 @@ async def create_buyer_request(
         product_id=payload.product_id,
         buyer_request_service=buyer_request_service,
         user_ctx=user_ctx,
+        start_date=payload.start_date,
+        end_date=payload.end_date,
     )
 
 @router.get(ApiPaths.GET_BUYER_REQUESTS, status_code=status.HTTP_200_OK)
@@ -37,6 +40,36 @@ async def get_all_buyer_requests(
         status_str = request.query_params.get("status"),
         buyer_request_service=buyer_request_service,
         product_service=product_service,
+        stream_format=stream_format(request),
+        fields=request.query_params.get("fields"),
+        include=request.query_params.get("include"),
+    )
+
+@router.get(ApiPaths.GET_LENDER_BUYER_REQUESTS, status_code=status.HTTP_200_OK)
+async def get_lender_buyer_requests(
+    request: Request,
+    buyer_request_service: BuyRequestService = Depends(get_buyer_request_service),
+    product_service: ProductService = Depends(get_product_service),
+):
+    return await controller.get_lender_buyer_requests(
+        status_str=request.query_params.get("status"),
+        buyer_request_service=buyer_request_service,
+        product_service=product_service,
+        user_ctx=request.state.user,
+        include=request.query_params.get("include"),
+    )
+
+@router.patch(ApiPaths.BULK_UPDATE_BUYER_REQUEST_STATUS, status_code=status.HTTP_200_OK)
+async def bulk_update_buyer_request_status(
+    payload: BulkUpdateBuyerRequestStatus,
+    request: Request,
+    buyer_request_service: BuyRequestService = Depends(get_buyer_request_service),
+):
+    return await controller.bulk_update_buyer_request_status(
+        request_ids=payload.request_ids,
+        status_str=payload.status,
+        buyer_request_service=buyer_request_service,
+        user_ctx=request.state.user,
     )
 
 @router.patch(ApiPaths.UPDATE_BUYER_REQUEST_STATUS, status_code=status.HTTP_200_OK, dependencies=[Depends(AuthHelper.verify_jwt)])
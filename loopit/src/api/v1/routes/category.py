@@ -1,10 +1,11 @@
-from fastapi import Depends,APIRouter,status
+from fastapi import Depends,APIRouter,Request,status
 from helpers.auth_helper import AuthHelper
 from helpers.api_paths import ApiPaths
 from schemas.category import CategoryRequest,CategoryResponse
 import controller.category_controller as controller
 from service.category_service import CategoryService
 from setup.category_dependency import get_category_service
+from helpers.response_cache import response_cache
 
 
 router = APIRouter( dependencies= [Depends(AuthHelper.verify_jwt)])
@@ -19,10 +20,11 @@ async def create_category(category: CategoryRequest, category_service: CategoryS
 
 
 @router.get(ApiPaths.GET_CATEGORY, status_code=status.HTTP_200_OK)
-async def get_all_category(category_service: CategoryService = Depends(get_category_service)):
-    return await controller.get_all_category(
-        category_service = category_service
-    )
+async def get_all_category(request: Request, category_service: CategoryService = Depends(get_category_service)):
+    return await response_cache.serve(request, "public", ("categories",), lambda: controller.get_all_category(
+        category_service = category_service,
+        if_none_match = request.headers.get("if-none-match"),
+    ))
 
 
 @router.put(ApiPaths.UPDATE_CATEGORY, status_code=status.HTTP_200_OK)
@@ -7,6 +7,8 @@ from setup.order_service_dependencies import get_order_service
 from setup.product_dependencies import get_product_service
 from controller import order_controller as controller
 from helpers.api_paths import ApiPaths
+from helpers.streaming import stream_format
+from schemas.orders import BulkReturnOrders
 
 router = APIRouter()
 
@@ -22,6 +24,20 @@ async def get_order_history(
         status_str=request.query_params.get("status"),
         order_service=order_service,
         product_service=product_service,
+        include=request.query_params.get("include"),
+    )
+
+@router.patch(ApiPaths.BULK_RETURN_ORDERS, status_code=status.HTTP_200_OK, dependencies=[Depends(AuthHelper.verify_jwt)])
+async def bulk_mark_orders_as_returned(
+    payload: BulkReturnOrders,
+    request: Request,
+    order_service: OrderService = Depends(get_order_service),
+):
+    user_ctx = request.state.user
+    return await controller.bulk_mark_orders_as_returned(
+        order_ids=payload.order_ids,
+        order_service=order_service,
+        user_ctx=user_ctx,
     )
 
 @router.patch(ApiPaths.RETURN_ORDER, status_code=status.HTTP_200_OK, dependencies=[Depends(AuthHelper.verify_jwt)])
@@ -61,4 +77,7 @@ async def get_lender_orders(
         order_service=order_service,
         product_service=product_service,
         user_ctx=user_ctx,
+        stream_format=stream_format(request),
+        fields=request.query_params.get("fields"),
+        include=request.query_params.get("include"),
     )
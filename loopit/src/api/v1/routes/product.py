@@ -6,6 +6,8 @@ from schemas.product import ProductRequest
 from setup.product_dependencies import get_product_service
 from controller import product_controller as controller
 from helpers.api_paths import ApiPaths
+from helpers.streaming import stream_format
+from helpers.response_cache import response_cache
 
 
 
@@ -13,19 +15,42 @@ router = APIRouter(dependencies=[Depends(AuthHelper.verify_jwt)])
 
 @router.get(ApiPaths.GET_PRODUCTS, status_code=status.HTTP_200_OK)
 async def get_all_products(request: Request, product_service: ProductService = Depends(get_product_service)):
-    return await controller.get_all_products(
+    return await response_cache.serve(request, "public", ("products", "categories"), lambda: controller.get_all_products(
         search=request.query_params.get("search"),
         lender_id=request.query_params.get("lender_id"),
         category_id=request.query_params.get("category_id"),
         is_available=request.query_params.get("is_available"),
         product_service=product_service,
+        stream_format=stream_format(request),
+        fields=request.query_params.get("fields"),
+        include=request.query_params.get("include"),
+    ))
+
+@router.get(ApiPaths.GET_PRODUCT_AVAILABILITY, status_code=status.HTTP_200_OK)
+async def get_product_availability(request: Request, product_service: ProductService = Depends(get_product_service)):
+    return await controller.get_product_availability(
+        product_ids=request.query_params.get("product_ids"),
+        start=request.query_params.get("start"),
+        end=request.query_params.get("end"),
+        product_service=product_service,
+    )
+
+@router.get(ApiPaths.GET_PRODUCT_CHANGES, status_code=status.HTTP_200_OK)
+async def get_product_changes(request: Request, product_service: ProductService = Depends(get_product_service)):
+    return await controller.get_product_changes(
+        since=request.query_params.get("since"),
+        product_service=product_service,
+        include=request.query_params.get("include"),
     )
 
 @router.get(ApiPaths.GET_PRODUCT_BY_ID, status_code=status.HTTP_200_OK)
-async def get_product_by_id(id: int, product_service: ProductService = Depends(get_product_service)):
+async def get_product_by_id(id: int, request: Request, product_service: ProductService = Depends(get_product_service)):
     return await controller.get_product_by_id(
         id=id,
         product_service=product_service,
+        fields=request.query_params.get("fields"),
+        include=request.query_params.get("include"),
+        if_none_match=request.headers.get("if-none-match"),
     )
 
 @router.post(ApiPaths.CREATE_PRODUCT, status_code=status.HTTP_201_CREATED)
@@ -1,11 +1,12 @@
 
-from fastapi import Depends,APIRouter,status
+from fastapi import Depends,APIRouter,Request,status
 from helpers.auth_helper import AuthHelper
 from helpers.api_paths import ApiPaths
 import controller.society_controller as controller
 from service.category_service import CategoryService
 from schemas.society import SocietyRequest,SocietyResponse
 from setup.society_dependency import get_society_service
+from helpers.response_cache import response_cache
 from helpers.auth_helper import AuthHelper
 
 
@@ -19,10 +20,11 @@ async def create_society(society: SocietyRequest, society_service= Depends(get_s
           )
 
 @router.get(ApiPaths.GET_SOCIETY , status_code=status.HTTP_200_OK)
-async def get_all_society(society_service= Depends(get_society_service)):
-    return await controller.get_all_societies(
-        society_service = society_service
-    )
+async def get_all_society(request: Request, society_service= Depends(get_society_service)):
+    return await response_cache.serve(request, "public", ("societies",), lambda: controller.get_all_societies(
+        society_service = society_service,
+        if_none_match = request.headers.get("if-none-match"),
+    ))
 
 @router.put(ApiPaths.UPDATE_SOCIETY ,status_code = status.HTTP_200_OK)
 async def update_society(id, society:SocietyRequest, society_service= Depends(get_society_service)):
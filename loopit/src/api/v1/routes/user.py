@@ -1,9 +1,13 @@
 from fastapi import APIRouter, Depends, status, Request
 from helpers.auth_helper import AuthHelper
 from helpers.api_paths import ApiPaths
+from helpers.streaming import stream_format
 from setup.user_dependencies import get_user_service
 from service.user_service import UserService
+from setup.stats_dependencies import get_stats_service
+from service.stats_service import StatsService
 from controller import user_controller as controller
+from controller import stats_controller
 
 router = APIRouter(dependencies=[Depends(AuthHelper.verify_jwt)])
 
@@ -34,6 +38,28 @@ async def get_all_users(
         society_id=society_id,
         user_service=user_service,
         user_ctx=user_ctx,
+        stream_format=stream_format(request),
+        fields=request.query_params.get("fields"),
+    )
+
+@router.get(ApiPaths.GET_LENDER_DASHBOARD, status_code=status.HTTP_200_OK)
+async def get_lender_dashboard(
+    request: Request,
+    stats_service: StatsService = Depends(get_stats_service),
+):
+    return await stats_controller.get_lender_dashboard(
+        stats_service=stats_service,
+        user_ctx=request.state.user,
+    )
+
+@router.get(ApiPaths.GET_USER_SUMMARY, status_code=status.HTTP_200_OK)
+async def get_user_summary(
+    request: Request,
+    stats_service: StatsService = Depends(get_stats_service),
+):
+    return await stats_controller.get_user_summary(
+        stats_service=stats_service,
+        user_ctx=request.state.user,
     )
 
 @router.get(ApiPaths.GET_USER_BY_ID, status_code=status.HTTP_200_OK)
@@ -47,6 +73,8 @@ async def get_user_by_id(
         id=id,
         user_service=user_service,
         user_ctx=user_ctx,
+        fields=request.query_params.get("fields"),
+        if_none_match=request.headers.get("if-none-match"),
     )
 
 @router.delete(ApiPaths.DELETE_USER_BY_ID, status_code=status.HTTP_200_OK)
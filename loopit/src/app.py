@@ -13,6 +13,14 @@ from api.v1.routes.return_request import router as return_request_router
 from api.v1.routes.feedback import router as feedback_router
 from api.v1.routes.user import router as user_router
 from api.v1.routes.image_upload import router as upload_router
+from api.v1.routes.batch import router as batch_router
+from helpers.password_pool import password_pool
+from helpers.auth_helper import AuthHelper
+from helpers.admission import login_admission
+from helpers.error_handler import auth_service_busy_handler
+from exception.user import AuthServiceBusyError
+from helpers.response_cache import response_cache
+from helpers.responses import ContentNegotiationMiddleware
 
 
 app = FastAPI(
@@ -31,10 +39,24 @@ app.add_middleware(
 )
 
 
+app.add_middleware(ContentNegotiationMiddleware)
+
+
+app.add_exception_handler(AuthServiceBusyError, auth_service_busy_handler)
+
+
+app.add_event_handler("startup", password_pool.start)
+app.add_event_handler("shutdown", password_pool.shutdown)
+
+
 @app.get("/health")
 def health():
     return{
-        'status':'Healthy'
+        'status':'Healthy',
+        'password_pool': password_pool.stats(),
+        'jwt_claims_cache': AuthHelper.claims_cache_stats(),
+        'login_admission': login_admission.stats(),
+        'response_cache': response_cache.stats(),
     }
 
 app.include_router(auth_router, tags=["Auth"])
@@ -46,4 +68,5 @@ app.include_router(buy_request_router, tags=["Buy-Request"])
 app.include_router(return_request_router,tags=["Return-Request"])
 app.include_router(feedback_router,tags=["Feedback"])
 app.include_router(user_router,tags=["User"])
-app.include_router(upload_router)
\ No newline at end of file
+app.include_router(upload_router)
+app.include_router(batch_router, tags=["Batch"])
\ No newline at end of file
@@ -27,7 +27,8 @@ async def signup_controller(
         society_id=payload.society_id,
     )
     try:
-        await auth_service.register(user = user)
+        token, user_db = await auth_service.register(user = user)
+        refresh_token = await auth_service.create_session(user_db)
 
     except UserAlreadyExistsError:
         raise HTTPException(
@@ -41,22 +42,9 @@ async def signup_controller(
             detail="Failed to register user",
         )
 
-    try:
-        token,user_db = await auth_service.login(user.email,payload.password)
-    except InvalidCredentialsError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid email or password",
-        )
-
-    except AuthServiceError as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e),
-        )
-
     return {
         "token":token,
+        "refresh_token": refresh_token,
         "user":{
             "id": user_db.id,
             "name": user_db.full_name,
@@ -73,6 +61,7 @@ async def login_controller(
 ):
     try:
         token, user = await auth_service.login(email, password)
+        refresh_token = await auth_service.create_session(user)
     except InvalidCredentialsError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -87,9 +76,60 @@ async def login_controller(
 
     return {
         "token": token,
+        "refresh_token": refresh_token,
         "user": {
             "id": user.id,
             "name": user.full_name,
             "role": user.role.value,
         },
     }
+
+
+async def refresh_controller(
+    refresh_token: str,
+    auth_service: AuthService,
+):
+    try:
+        token, new_refresh_token, user = await auth_service.refresh(refresh_token)
+    except InvalidCredentialsError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+        )
+
+    except AuthServiceError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e),
+        )
+
+    return {
+        "token": token,
+        "refresh_token": new_refresh_token,
+        "user": {
+            "id": user.id,
+            "name": user.full_name,
+            "role": user.role.value,
+        },
+    }
+
+
+async def logout_controller(
+    refresh_token: str,
+    auth_service: AuthService,
+):
+    try:
+        await auth_service.logout(refresh_token)
+    except InvalidCredentialsError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+        )
+
+    except AuthServiceError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e),
+        )
+
+    return {"message": "logged out"}
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import orjson
+from fastapi import Request, status
+from helpers.api_paths import ApiPaths
+from helpers.auth_helper import BATCH_CLAIMS_SCOPE_KEY
+from helpers.error_handler import write_error_response
+from helpers.request_scope import close_memo, open_memo
+from helpers.success_handler import write_success_response
+from schemas.batch import BatchRequest, BatchSubRequest
+
+logger = logging.getLogger(__name__)
+
+# sub-request headers that are passed back in the combined response
+FORWARDED_HEADERS = ("etag", "x-cache")
+
+
+def _error_entry(sub: BatchSubRequest, status_code: int, error: str) -> dict:
+    return {"id": sub.id, "status": status_code, "headers": {}, "body": {"status": False, "error": error}}
+
+
+def _decode_body(body: bytes, content_type: str):
+    if not body:
+        return None
+    if content_type.startswith("application/json"):
+        return orjson.loads(body)
+    return body.decode(errors="replace")
+
+
+async def _dispatch(app, parent: Request, sub: BatchSubRequest) -> dict:
+    # runs one sub-request through the app in-process; the parent's verified claims ride along in the scope,
+    # so verify_jwt does not decode the token again, and the body is always JSON so it can be embedded
+    if sub.method.upper() != "GET":
+        return _error_entry(sub, status.HTTP_405_METHOD_NOT_ALLOWED, "only GET sub-requests can be batched")
+    path, _, query = sub.path.partition("?")
+    if not path.startswith("/") or path.rstrip("/") == ApiPaths.BATCH:
+        return _error_entry(sub, status.HTTP_400_BAD_REQUEST, "invalid sub-request path")
+
+    headers = [
+        (name.lower().encode("latin-1"), value.encode("latin-1"))
+        for name, value in sub.headers.items()
+        if name.lower() not in ("accept", "authorization", "content-length", "host")
+    ]
+    headers.append((b"accept", b"application/json"))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": parent.scope.get("scheme", "http"),
+        "server": parent.scope.get("server"),
+        "client": parent.scope.get("client"),
+        "root_path": parent.scope.get("root_path", ""),
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": headers,
+        BATCH_CLAIMS_SCOPE_KEY: parent.state.user,
+    }
+
+    done = asyncio.Event()
+    received = False
+    response = {"status": status.HTTP_500_INTERNAL_SERVER_ERROR, "headers": {}, "body": bytearray()}
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in message.get("headers", [])}
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    try:
+        await app(scope, receive, send)
+    except Exception:
+        logger.exception("batched sub-request %s failed", sub.path)
+        return _error_entry(sub, status.HTTP_500_INTERNAL_SERVER_ERROR, "sub-request failed")
+    finally:
+        done.set()
+
+    return {
+        "id": sub.id,
+        "status": response["status"],
+        "headers": {name: response["headers"][name] for name in FORWARDED_HEADERS if name in response["headers"]},
+        "body": _decode_body(bytes(response["body"]), response["headers"].get("content-type", "")),
+    }
+
+
+async def run_batch(payload: BatchRequest, request: Request):
+    # one auth check for the whole batch; sub-requests run concurrently and share a memo,
+    # so reads they have in common (versions, category lists, ...) hit DynamoDB once
+    token = open_memo()
+    try:
+        results = await asyncio.gather(*(_dispatch(request.app, request, sub) for sub in payload.requests))
+    except Exception as e:
+        return write_error_response(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            error="Failed to run the batch",
+            details=str(e)
+        )
+    finally:
+        close_memo(token)
+    return write_success_response(
+        status_code=status.HTTP_200_OK,
+        data=list(results),
+    )
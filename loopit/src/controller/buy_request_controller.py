@@ -1,8 +1,12 @@
 
 from fastapi import status
 from typing import Optional, List
+from datetime import datetime
 from helpers.error_handler import write_error_response
 from helpers.success_handler import write_success_response
+from helpers.streaming import stream_response
+from helpers.fields import dump, nested_include, own_fields, parse_fields, parse_include
+from models.buy_request import BuyingRequest
 from service.buy_request_service import BuyRequestService
 from service.product_service import ProductService
 from models.enums.buy_request import BuyRequestStatus
@@ -13,10 +17,12 @@ async def create_buyer_request(
     product_id: int,
     buyer_request_service: BuyRequestService,
     user_ctx,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
 ):
    
     try:
-        await buyer_request_service.create_buyer_request(product_id, user_ctx)
+        await buyer_request_service.create_buyer_request(product_id, user_ctx, start_date, end_date)
     except Exception as e:
         return write_error_response(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -61,33 +67,97 @@ async def update_buyer_request_status(
     )
 
 
+async def bulk_update_buyer_request_status(
+    request_ids: List[int],
+    status_str: str,
+    buyer_request_service: BuyRequestService,
+    user_ctx,
+):
+
+    try:
+        BuyRequestStatus(status_str)
+    except Exception as e:
+        return write_error_response(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            error=f"invalid status value= {status_str}",
+            details=str(e),
+        )
+
+    try:
+        results = await buyer_request_service.bulk_update_buyer_request_status(request_ids, status_str, user_ctx)
+    except Exception as e:
+        return write_error_response(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            error="failed to update status",
+            details=str(e),
+        )
+    return write_success_response(
+        status_code=status.HTTP_200_OK,
+        data=results,
+        message="buyer request statuses processed",
+    )
+
+
+BUY_REQUEST_RELATIONS = ("product", "product.category", "product.lender")
+
+
+async def _attach_products(requests, product_service: ProductService, selection=None, include=frozenset()) -> list:
+    # the product is only read when included, with one batched read for the whole page; rows whose product is gone keep product=None
+    fields = own_fields(selection, BuyingRequest) if selection else None
+    if "product" not in include:
+        if selection:
+            return [{"buy_request": dump(r, fields)} for r in requests]
+        return [{"buy_request": dump(r), "product": None} for r in requests]
+    products = await product_service.get_products_by_ids(list({r.product_id for r in requests}), include=nested_include(include, "product"))
+    responses = []
+    for r in requests:
+        product = products.get(r.product_id)
+        responses.append({
+            "buy_request": dump(r, fields),
+            "product": product.model_dump() if hasattr(product, "model_dump") else product,
+        })
+    return responses
+
+
+async def _buyer_request_pages(pages, product_service: ProductService, selection=None, include=frozenset()):
+    async for requests in pages:
+        yield await _attach_products(requests, product_service, selection, include)
+
+
+def _read_fields(selection, include):
+    # the product id has to be read to hydrate the product, even when it was not asked for
+    if selection and "product" in include:
+        return selection | {"product_id"}
+    return selection
+
+
 async def get_all_buyer_requests(
     product_id: Optional[int],
     status_str: Optional[str],
     buyer_request_service: BuyRequestService,
     product_service: ProductService,
+    stream_format: Optional[str] = None,
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
 ):
    
+    try:
+        selection = parse_fields(fields, BuyingRequest)
+        relations = parse_include(include, BUY_REQUEST_RELATIONS)
+    except ValueError as e:
+        return write_error_response(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            error="invalid query",
+            details=str(e),
+        )
+    read = _read_fields(selection, relations)
     try:
         status_filter: List[str] = status_str.split(",") if status_str else []
-        requests = await buyer_request_service.get_all_buyer_requests(product_id, status_filter)
-
-        responses = []
-        for r in requests:
-            try:
-                product = await product_service.get_product_by_id(r.product_id)
-                buy_request_data = r.model_dump() if hasattr(r, "model_dump") else r
-                product_data = product.model_dump() if hasattr(product, "model_dump") else product
-                responses.append({
-                    "buy_request": buy_request_data,
-                    "product": product_data,
-                })
-            except Exception as e:
-                return write_error_response(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                error="failed to fetch buyer requests",
-                details=str(e),
-        )          
+        if stream_format:
+            pages = _buyer_request_pages(buyer_request_service.iter_buyer_requests(product_id, status_filter, fields=read), product_service, selection, relations)
+            return await stream_response(pages, stream_format, message="buyer request fetched successfully")
+        requests = await buyer_request_service.get_all_buyer_requests(product_id, status_filter, fields=read)
+        responses = await _attach_products(requests, product_service, selection, relations)
 
     except Exception as e:
         return write_error_response(
@@ -101,3 +171,37 @@ async def get_all_buyer_requests(
         data= responses,
         message="buyer request fetched successfully",
     )
+
+
+async def get_lender_buyer_requests(
+    status_str: Optional[str],
+    buyer_request_service: BuyRequestService,
+    product_service: ProductService,
+    user_ctx,
+    include: Optional[str] = None,
+):
+    try:
+        relations = parse_include(include, BUY_REQUEST_RELATIONS)
+    except ValueError as e:
+        return write_error_response(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            error="invalid include",
+            details=str(e),
+        )
+    try:
+        status_filter: List[str] = status_str.split(",") if status_str else []
+        requests = await buyer_request_service.get_lender_buyer_requests(user_ctx, status_filter)
+        responses = await _attach_products(requests, product_service, include=relations)
+
+    except Exception as e:
+        return write_error_response(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            error="failed to fetch lender buyer requests",
+            details=str(e),
+        )
+
+    return write_success_response(
+        status_code=status.HTTP_200_OK,
+        data=responses,
+        message="buyer request fetched successfully",
+    )
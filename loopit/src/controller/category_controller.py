@@ -4,6 +4,8 @@ from schemas.category import CategoryRequest, CategoryResponse
 from fastapi import HTTPException,status
 from helpers.error_handler import write_error_response
 from helpers.success_handler import write_success_response
+from helpers.etag import etag_matches, make_etag, not_modified, tagged
+from typing import Optional
 
 async def create_category(category: CategoryRequest, category_service :CategoryService):
     category_payload:Category = Category(**category.model_dump())
@@ -21,8 +23,12 @@ async def create_category(category: CategoryRequest, category_service :CategoryS
         message = "category created successfully"
     )
 
-async def get_all_category(category_service :CategoryService):
+async def get_all_category(category_service :CategoryService, if_none_match: Optional[str] = None):
     try:
+        # the version is read first: a write landing in between can only make the tag older than the body, never newer
+        etag = make_etag("categories", await category_service.get_version())
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
         categories = await category_service.get_all_categories()
     except Exception as e:
         return write_error_response(
@@ -30,10 +36,10 @@ async def get_all_category(category_service :CategoryService):
             error="Failed to fetch the categories",
             details=str(e)
         )
-    return write_success_response(
+    return tagged(write_success_response(
         status_code=status.HTTP_200_OK,
         data= categories
-    )    
+    ), etag)
 
 async def update_category(id, category:CategoryRequest, category_service :CategoryService):
     try:
@@ -1,5 +1,7 @@
 
 from fastapi import status
+from typing import Optional
+from database.pagination import MAX_PAGE_SIZE
 from helpers.error_handler import write_error_response
 from helpers.success_handler import write_success_response
 from service.feedback_service import FeedbackService
@@ -24,32 +26,77 @@ async def give_feedback(feedback: FeedbackRequest, feedback_service: FeedbackSer
         message="Feedback given successfully",
     )
 
-async def get_all_given_feedbacks(feedback_service: FeedbackService, user_ctx):
+def _page(feedbacks, next_cursor) -> dict:
+    return {
+        "feedbacks": [f.model_dump() if hasattr(f, "model_dump") else f for f in feedbacks],
+        "next_cursor": next_cursor,
+    }
+
+def _parse_limit(limit: Optional[str]) -> Optional[int]:
+    if not limit:
+        return None
+    try:
+        value = int(limit)
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if not 1 <= value <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return value
+
+async def get_all_given_feedbacks(feedback_service: FeedbackService, user_ctx, limit: Optional[str] = None, cursor: Optional[str] = None):
+    try:
+        page_limit = _parse_limit(limit)
+    except ValueError as e:
+        return write_error_response(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            error="invalid query",
+            details=str(e),
+        )
     try:
-        feedbacks = await feedback_service.get_all_given_feedbacks(user_ctx)
+        feedbacks, next_cursor = await feedback_service.get_all_given_feedbacks(user_ctx, page_limit, cursor)
     except Exception as e:
         return write_error_response(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             error="failed to fetch given feedbacks",
             details=str(e),
         )
-    data = feedbacks if not hasattr(feedbacks, "model_dump") else [f.model_dump() for f in feedbacks]
     return write_success_response(
         status_code=status.HTTP_200_OK,
-        data=data,
+        data=_page(feedbacks, next_cursor),
     )
 
-async def get_all_received_feedbacks(feedback_service: FeedbackService, user_ctx):
+async def get_all_received_feedbacks(feedback_service: FeedbackService, user_ctx, limit: Optional[str] = None, cursor: Optional[str] = None):
     try:
-        feedbacks = await feedback_service.get_all_received_feedbacks(user_ctx)
+        page_limit = _parse_limit(limit)
+    except ValueError as e:
+        return write_error_response(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            error="invalid query",
+            details=str(e),
+        )
+    try:
+        feedbacks, next_cursor = await feedback_service.get_all_received_feedbacks(user_ctx, page_limit, cursor)
     except Exception as e:
         return write_error_response(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             error="failed to fetch received feedbacks",
             details=str(e),
         )
-    data = feedbacks if not hasattr(feedbacks, "model_dump") else [f.model_dump() for f in feedbacks]
     return write_success_response(
         status_code=status.HTTP_200_OK,
-        data=data,
+        data=_page(feedbacks, next_cursor),
+    )
+
+async def get_lender_rating(lender_id: int, feedback_service: FeedbackService):
+    try:
+        rating = await feedback_service.get_lender_rating(lender_id)
+    except Exception as e:
+        return write_error_response(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            error="failed to fetch lender rating",
+            details=str(e),
+        )
+    return write_success_response(
+        status_code=status.HTTP_200_OK,
+        data=rating.model_dump() if hasattr(rating, "model_dump") else rating,
     )
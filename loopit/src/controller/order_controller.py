@@ -3,12 +3,58 @@ from fastapi import status
 from typing import Optional, List
 from helpers.error_handler import write_error_response
 from helpers.success_handler import write_success_response
+from helpers.streaming import stream_response
+from helpers.fields import dump, own_fields, parse_fields, parse_include
 from service.order_service import OrderService
 from service.product_service import ProductService
 from models.enums.order_status import OrderStatus
-from schemas.orders import OrderResponse,OrderSchema,order_to_schema,product_to_response
+from models.orders import Order
+from schemas.orders import OrderResponse,order_to_schema,product_to_response
 
-async def get_order_history(user_ctx, status_str: Optional[str], order_service: OrderService, product_service: ProductService):
+ORDER_RELATIONS = ("product",)
+
+
+async def _order_rows(orders, product_service: ProductService, selection=None, include=frozenset()) -> list:
+    # the product is only read when included, with one batched read for all the orders;
+    # rows that cannot be built (e.g. the product is gone) are skipped
+    products = await product_service.get_products_by_ids([o.product_id for o in orders]) if "product" in include else {}
+    rows = []
+    for o in orders:
+        try:
+            product = product_to_response(products[o.product_id]) if "product" in include else None
+            if selection:
+                row = {"order": dump(o, own_fields(selection, Order))}
+                if product is not None:
+                    row["product"] = product.model_dump()
+            else:
+                row = OrderResponse(order=order_to_schema(o), product=product).model_dump()
+            rows.append(row)
+        except Exception:
+            continue
+    return rows
+
+
+async def _order_pages(pages, product_service: ProductService, selection=None, include=frozenset()):
+    async for orders in pages:
+        yield await _order_rows(orders, product_service, selection, include)
+
+
+def _read_fields(selection, include):
+    # the product id has to be read to hydrate the product, even when it was not asked for
+    if selection and "product" in include:
+        return selection | {"product_id"}
+    return selection
+
+
+async def get_order_history(user_ctx, status_str: Optional[str], order_service: OrderService, product_service: ProductService, include: Optional[str] = None):
+    try:
+        relations = parse_include(include, ORDER_RELATIONS)
+    except ValueError as e:
+        return write_error_response(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            error="invalid include",
+            details=str(e),
+        )
     try:
         filter_status: List[OrderStatus] = []
         if status_str:
@@ -21,23 +67,13 @@ async def get_order_history(user_ctx, status_str: Optional[str], order_service:
                     details=str(e),
                 )
         orders = await order_service.get_order_history(user_ctx=user_ctx, filter_statuses =filter_status)
-        responses = []
-        for o in orders:
-            try:
-                p = await product_service.get_product_by_id(o.product_id)
-                responses.append(OrderResponse(
-                        order=order_to_schema(o),
-                        product=product_to_response(p),
-                    ))
-            except Exception:
-                continue
+        data = await _order_rows(orders, product_service, include=relations)
     except Exception as e:
         return write_error_response(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             error="failed to fetch order history",
             details=str(e),
         )
-    data = [r.model_dump() if hasattr(r, "model_dump") else r for r in responses]
     return write_success_response(
         status_code=status.HTTP_200_OK,
         data=data,
@@ -57,6 +93,21 @@ async def mark_order_as_returned(order_id: int, order_service: OrderService, use
         message="order status updated successfully",
     )
 
+async def bulk_mark_orders_as_returned(order_ids: List[int], order_service: OrderService, user_ctx):
+    try:
+        results = await order_service.bulk_mark_orders_as_returned(order_ids=order_ids, user_ctx=user_ctx)
+    except Exception as e:
+        return write_error_response(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            error="failed to update order status",
+            details=str(e),
+        )
+    return write_success_response(
+        status_code=status.HTTP_200_OK,
+        data=results,
+        message="order statuses processed",
+    )
+
 # async def get_all_approved_awaiting_orders(order_service: OrderService, product_service: ProductService, user_ctx):
 #     try:
 #         orders = await order_service.get_all_approved_awaiting_orders(user_ctx=user_ctx)
@@ -79,30 +130,30 @@ async def mark_order_as_returned(order_id: int, order_service: OrderService, use
 #         data=data,
 #     )
 
-async def get_lender_orders(order_service: OrderService, product_service: ProductService, user_ctx):
+async def get_lender_orders(order_service: OrderService, product_service: ProductService, user_ctx, stream_format: Optional[str] = None, fields: Optional[str] = None, include: Optional[str] = None):
     try:
-        orders:OrderSchema = await order_service.get_lender_orders(user_ctx=user_ctx)
-        responses:List[OrderResponse] = []
-        for o in orders:
-            try:
-                p = await product_service.get_product_by_id(o.product_id)
-                responses.append(
-                    OrderResponse(
-                        order=order_to_schema(o),
-                        product=product_to_response(p),
-                    )
-                )
-
-            except Exception:
-                continue
+        selection = parse_fields(fields, Order)
+        relations = parse_include(include, ORDER_RELATIONS)
+    except ValueError as e:
+        return write_error_response(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            error="invalid query",
+            details=str(e),
+        )
+    read = _read_fields(selection, relations)
+    try:
+        if stream_format:
+            pages = _order_pages(order_service.iter_lender_orders(user_ctx=user_ctx, fields=read), product_service, selection, relations)
+            return await stream_response(pages, stream_format)
+        orders = await order_service.get_lender_orders(user_ctx=user_ctx, fields=read)
+        data = await _order_rows(orders, product_service, selection, relations)
     except Exception as e:
         return write_error_response(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             error="failed to fetch lender orders",
             details=str(e),
         )
-    data = [r.model_dump() if hasattr(r, "model_dump") else r for r in responses]
     return write_success_response(
         status_code=status.HTTP_200_OK,
-        data= data,
+        data=data,
     )
@@ -2,19 +2,58 @@
 from fastapi import status
 from helpers.error_handler import write_error_response
 from helpers.success_handler import write_success_response
+from helpers.streaming import stream_response
+from helpers.etag import conditional, etag_matches, make_etag, not_modified, tagged
+from helpers.fields import dump, dump_pages, own_fields, parse_fields, parse_include
+from helpers.watermark import parse_watermark
 from service.product_service import ProductService
 from schemas.product import ProductRequest
 from typing import Optional
+from datetime import datetime, timezone
 from models.enums.user import Role
+from models.product import Product
+from exception.product import ProductChangesExpiredError
 
-async def get_all_products(search: Optional[str], lender_id: Optional[str], category_id: Optional[str], is_available: Optional[str], product_service: ProductService):
+PRODUCT_RELATIONS = ("category", "lender")
+
+
+def _product_include(selection) -> dict:
+    return {"product": own_fields(selection, Product), "category": True, "user": True}
+
+
+async def get_all_products(search: Optional[str], lender_id: Optional[str], category_id: Optional[str], is_available: Optional[str], product_service: ProductService, stream_format: Optional[str] = None, fields: Optional[str] = None, include: Optional[str] = None):
     try:
+        selection = parse_fields(fields, Product)
+        relations = parse_include(include, PRODUCT_RELATIONS)
+    except ValueError as e:
+        return write_error_response(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            error="invalid query",
+            details=str(e),
+        )
+    try:
+        if stream_format:
+            pages = product_service.iter_products(
+                search=search,
+                lender_id=lender_id,
+                category_id=category_id,
+                is_available=is_available,
+                fields=selection,
+                include=relations,
+            )
+            if selection:
+                pages = dump_pages(pages, _product_include(selection), by_alias=True)
+            return await stream_response(pages, stream_format)
         products = await product_service.get_all_products(
             search=search,
             lender_id=lender_id,
             category_id=category_id,
             is_available=is_available,
+            fields=selection,
+            include=relations,
         )
+        if selection:
+            products = [dump(p, _product_include(selection), by_alias=True) for p in products]
     except Exception as e:
         return write_error_response(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -26,20 +65,103 @@ async def get_all_products(search: Optional[str], lender_id: Optional[str], cate
         data=products if not hasattr(products, "model_dump") else [p.model_dump() for p in products],
     )
 
-async def get_product_by_id(id: int, product_service: ProductService):
+async def get_product_by_id(id: int, product_service: ProductService, fields: Optional[str] = None, include: Optional[str] = None, if_none_match: Optional[str] = None):
+    try:
+        selection = parse_fields(fields, Product)
+        relations = parse_include(include, PRODUCT_RELATIONS)
+    except ValueError as e:
+        return write_error_response(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            error="invalid query",
+            details=str(e),
+        )
+    etag = None
     try:
-        product = await product_service.get_product_by_id(id)
+        if not relations:
+            # the product's own version covers the body, so a match skips the read, hydration and encoding;
+            # included category/lender rows have versions of their own and are tagged by content instead.
+            # A booking starting or ending changes is_available without a write, so that state is tagged too
+            version = await product_service.get_product_version(id)
+            if version is not None:
+                etag = make_etag("product", id, version, await product_service.booked_now(id), sorted(selection or ()))
+                if etag_matches(if_none_match, etag):
+                    return not_modified(etag)
+        product = await product_service.get_product_by_id(id, fields=selection, include=relations)
     except Exception as e:
         return write_error_response(
             status_code=status.HTTP_404_NOT_FOUND,
             error="product not found",
             details=str(e),
         )
-    data = product.model_dump() if hasattr(product, "model_dump") else product
-    return write_success_response(
+    data = dump(product, _product_include(selection) if selection else None)
+    response = write_success_response(
         status_code=status.HTTP_200_OK,
         data=data,
     )
+    if etag is None:
+        return conditional(response, if_none_match)
+    return tagged(response, etag)
+
+async def get_product_availability(product_ids: Optional[str], start: Optional[str], end: Optional[str], product_service: ProductService):
+    try:
+        ids = [int(i) for i in (product_ids or "").split(",") if i.strip()]
+        if not ids:
+            raise ValueError("product_ids is required")
+        start_dt = datetime.fromisoformat(start) if start else None
+        end_dt = datetime.fromisoformat(end) if end else None
+        if start_dt is None or end_dt is None:
+            raise ValueError("start and end are required")
+        start_dt = start_dt if start_dt.tzinfo else start_dt.replace(tzinfo=timezone.utc)
+        end_dt = end_dt if end_dt.tzinfo else end_dt.replace(tzinfo=timezone.utc)
+    except Exception as e:
+        return write_error_response(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            error="invalid availability query",
+            details=str(e),
+        )
+    try:
+        availability = await product_service.get_availability(ids, start_dt, end_dt)
+    except Exception as e:
+        return write_error_response(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            error="failed to fetch availability",
+            details=str(e),
+        )
+    return write_success_response(
+        status_code=status.HTTP_200_OK,
+        data=[{"product_id": pid, "available": free} for pid, free in availability.items()],
+    )
+
+async def get_product_changes(since: Optional[str], product_service: ProductService, include: Optional[str] = None):
+    try:
+        watermark = since or None
+        if watermark is not None:
+            parse_watermark(watermark)
+        relations = parse_include(include, PRODUCT_RELATIONS)
+    except ValueError as e:
+        return write_error_response(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            error="invalid query",
+            details=str(e),
+        )
+    try:
+        changes = await product_service.get_product_changes(watermark, include=relations)
+    except ProductChangesExpiredError as e:
+        return write_error_response(
+            status_code=status.HTTP_410_GONE,
+            error="watermark expired",
+            details=str(e),
+        )
+    except Exception as e:
+        return write_error_response(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            error="failed to fetch product changes",
+            details=str(e),
+        )
+    return write_success_response(
+        status_code=status.HTTP_200_OK,
+        data=changes,
+    )
 
 async def create_product(product: ProductRequest, product_service: ProductService, user_ctx):
     try:
@@ -3,6 +3,8 @@ from schemas.society import SocietyRequest,SocietyResponse
 from service.society_service import SocietyService
 from helpers.error_handler import write_error_response
 from helpers.success_handler import write_success_response
+from helpers.etag import etag_matches, make_etag, not_modified, tagged
+from typing import Optional
 
 
 async def create_society(society: SocietyRequest, society_service: SocietyService):
@@ -26,9 +28,13 @@ async def create_society(society: SocietyRequest, society_service: SocietyServic
     )
 
 
-async def get_all_societies(society_service: SocietyService):
+async def get_all_societies(society_service: SocietyService, if_none_match: Optional[str] = None):
    
     try:
+        # the version is read first: a write landing in between can only make the tag older than the body, never newer
+        etag = make_etag("societies", await society_service.get_version())
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
         societies = await society_service.get_all_societies()
         if societies and hasattr(societies[0], "model_dump"):
             societies = [s.model_dump() for s in societies]
@@ -39,10 +45,10 @@ async def get_all_societies(society_service: SocietyService):
             details=str(e),
         )
 
-    return write_success_response(
+    return tagged(write_success_response(
         status_code=status.HTTP_200_OK,
         data=societies,
-    )
+    ), etag)
 
 
 async def update_society(id: int, society: SocietyRequest, society_service: SocietyService):
@@ -0,0 +1,35 @@
+
+from fastapi import status
+from helpers.error_handler import write_error_response
+from helpers.success_handler import write_success_response
+from service.stats_service import StatsService
+
+
+async def get_lender_dashboard(stats_service: StatsService, user_ctx):
+    try:
+        dashboard = await stats_service.get_lender_dashboard(user_ctx)
+    except Exception as e:
+        return write_error_response(
+            status_code=status.HTTP_403_FORBIDDEN,
+            error="failed to fetch dashboard",
+            details=str(e),
+        )
+    return write_success_response(
+        status_code=status.HTTP_200_OK,
+        data=dashboard.model_dump() if hasattr(dashboard, "model_dump") else dashboard,
+    )
+
+
+async def get_user_summary(stats_service: StatsService, user_ctx):
+    try:
+        summary = await stats_service.get_user_summary(user_ctx)
+    except Exception as e:
+        return write_error_response(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            error="failed to fetch summary",
+            details=str(e),
+        )
+    return write_success_response(
+        status_code=status.HTTP_200_OK,
+        data=summary.model_dump() if hasattr(summary, "model_dump") else summary,
+    )
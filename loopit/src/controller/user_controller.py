@@ -2,6 +2,10 @@
 from fastapi import status
 from helpers.error_handler import write_error_response
 from helpers.success_handler import write_success_response
+from helpers.streaming import stream_response
+from helpers.etag import etag_matches, make_etag, not_modified, tagged
+from helpers.fields import dump, dump_pages, own_fields, parse_fields
+from models.user import User
 from service.user_service import UserService
 
 
@@ -43,7 +47,7 @@ async def become_lender(user_service: UserService, user_ctx):
         data={"user": user_ctx},
     )
 
-async def get_all_users(search: str, role: str, society_id: str, user_service: UserService, user_ctx):
+async def get_all_users(search: str, role: str, society_id: str, user_service: UserService, user_ctx, stream_format: str | None = None, fields: str | None = None):
  
     if user_ctx is None:
         return write_error_response(
@@ -57,18 +61,27 @@ async def get_all_users(search: str, role: str, society_id: str, user_service: U
             error="forbidden",
             details="only admins can view all users",
         )
+    try:
+        selection = parse_fields(fields, User)
+    except ValueError as e:
+        return write_error_response(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            error="invalid fields",
+            details=str(e),
+        )
+    include = own_fields(selection, User) if selection else None
     try:
         filters = {
             "search": search,
             "role": role,
             "society_id": society_id,
         }
-        users = await user_service.get_all_users(filters)
+        if stream_format:
+            pages = dump_pages(user_service.iter_users(filters, fields=selection), include)
+            return await stream_response(pages, stream_format, message="Users fetched successfully")
+        users = await user_service.get_all_users(filters, fields=selection)
         if isinstance(users, list):
-            data = [
-                u.model_dump() if hasattr(u, "model_dump") else u
-                for u in users
-            ]
+            data = [dump(u, include) for u in users]
         else:
             data = users
     except Exception as e:
@@ -83,7 +96,7 @@ async def get_all_users(search: str, role: str, society_id: str, user_service: U
         data=data,
     )
 
-async def get_user_by_id(id: int, user_service: UserService, user_ctx):
+async def get_user_by_id(id: int, user_service: UserService, user_ctx, fields: str | None = None, if_none_match: str | None = None):
     """
     GET /users/{id}
     Admin-only: fetch user by ID.
@@ -101,25 +114,37 @@ async def get_user_by_id(id: int, user_service: UserService, user_ctx):
             details="only admins can view a user",
         )
     try:
-        user = await user_service.get_user_by_id(id)
+        selection = parse_fields(fields, User)
+    except ValueError as e:
+        return write_error_response(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            error="invalid fields",
+            details=str(e),
+        )
+    try:
+        version = await user_service.get_user_version(id)
+        etag = make_etag("user", id, version, sorted(selection or ()))
+        if version is not None and etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        user = await user_service.get_user_by_id(id, fields=selection)
         if user is None:
             return write_error_response(
                 status_code=status.HTTP_404_NOT_FOUND,
                 error="user not found",
                 details=f"user id={id}",
             )
-        data = user.model_dump() if hasattr(user, "model_dump") else user
+        data = dump(user, own_fields(selection, User) if selection else None)
     except Exception as e:
         return write_error_response(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             error="internal server error",
             details=str(e),
         )
-    return write_success_response(
+    return tagged(write_success_response(
         status_code=status.HTTP_200_OK,
         message="User fetched successfully",
         data=data,
-    )
+    ), etag)
 
 async def delete_user_by_id(id: int, user_service: UserService, user_ctx):
     """
@@ -0,0 +1,55 @@
+import asyncio
+import logging
+import sys
+from database.connection import get_dynamodb
+from repository.feedback_repository import FeedbackRepo
+from repository.buy_request_repository import BuyRequestRepo
+from repository.stats_repository import StatsRepo
+
+logger = logging.getLogger(__name__)
+
+
+async def backfill_feedback() -> int:
+    return await FeedbackRepo(get_dynamodb()).backfill_user_partitions()
+
+
+async def backfill_ratings() -> int:
+    return await FeedbackRepo(get_dynamodb()).backfill_lender_ratings()
+
+
+async def backfill_pending_sentinels() -> int:
+    return await BuyRequestRepo(get_dynamodb()).backfill_pending_sentinels()
+
+
+async def backfill_buy_request_copies() -> int:
+    return await BuyRequestRepo(get_dynamodb()).backfill_scoped_copies()
+
+
+async def backfill_counters() -> int:
+    return await StatsRepo(get_dynamodb()).backfill_lender_counters()
+
+
+async def backfill_summaries() -> int:
+    return await StatsRepo(get_dynamodb()).backfill_user_summaries()
+
+
+BACKFILLS = {
+    "feedback": backfill_feedback,
+    "ratings": backfill_ratings,
+    "pending": backfill_pending_sentinels,
+    "buy_requests": backfill_buy_request_copies,
+    "counters": backfill_counters,
+    "summaries": backfill_summaries,
+}
+
+
+async def run(names) -> None:
+    for name in names:
+        written = await BACKFILLS[name]()
+        logger.info(f"backfill {name}: wrote {written} items")
+
+
+if __name__ == "__main__":
+    # from src/: python -m database.backfill feedback
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run(sys.argv[1:] or list(BACKFILLS)))
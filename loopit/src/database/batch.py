@@ -0,0 +1,66 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, List
+
+logger = logging.getLogger(__name__)
+
+BATCH_GET_LIMIT = 100
+BATCH_WRITE_LIMIT = 25
+MAX_UNPROCESSED_RETRIES = 5
+TRANSACTION_CONCURRENCY = 10
+
+
+def chunked(items: list, size: int) -> List[list]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+async def _batch_get_chunk(dynamodb, table_name: str, keys: List[dict]) -> List[dict]:
+    items: List[dict] = []
+    request = {table_name: {"Keys": keys}}
+    attempt = 0
+    while request:
+        resp = await asyncio.to_thread(dynamodb.batch_get_item, RequestItems=request)
+        items.extend(resp.get("Responses", {}).get(table_name, []))
+        request = resp.get("UnprocessedKeys") or {}
+        if request:
+            attempt += 1
+            if attempt > MAX_UNPROCESSED_RETRIES:
+                raise RuntimeError("batch_get_item left keys unprocessed after retries")
+            await asyncio.sleep(0.05 * (2 ** attempt))
+    return items
+
+
+async def batch_get_items(dynamodb, table_name: str, keys: List[dict]) -> List[dict]:
+    # de-duplicate keys, split into 100-key requests and fetch them concurrently
+    unique = list({(k["pk"]["S"], k["sk"]["S"]): k for k in keys}.values())
+    if not unique:
+        return []
+    pages = await asyncio.gather(*(_batch_get_chunk(dynamodb, table_name, c) for c in chunked(unique, BATCH_GET_LIMIT)))
+    return [item for page in pages for item in page]
+
+
+async def _batch_write_chunk(dynamodb, table_name: str, requests: List[dict]) -> None:
+    request = {table_name: requests}
+    attempt = 0
+    while request:
+        resp = await asyncio.to_thread(dynamodb.batch_write_item, RequestItems=request)
+        request = resp.get("UnprocessedItems") or {}
+        if request:
+            attempt += 1
+            if attempt > MAX_UNPROCESSED_RETRIES:
+                raise RuntimeError("batch_write_item left items unprocessed after retries")
+            await asyncio.sleep(0.05 * (2 ** attempt))
+
+
+async def batch_put_items(dynamodb, table_name: str, items: List[dict]) -> None:
+    # items are already serialized; written 25 at a time
+    for chunk in chunked(items, BATCH_WRITE_LIMIT):
+        await _batch_write_chunk(dynamodb, table_name, [{"PutRequest": {"Item": item}} for item in chunk])
+
+
+async def run_in_chunks(calls: List[Callable[[], Awaitable]], size: int = TRANSACTION_CONCURRENCY) -> list:
+    # run independent writes a chunk at a time; each result is either the return value or the raised exception
+    results = []
+    for chunk in chunked(calls, size):
+        results.extend(await asyncio.gather(*(call() for call in chunk), return_exceptions=True))
+    return results
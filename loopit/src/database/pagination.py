@@ -0,0 +1,44 @@
+import asyncio
+import base64
+import json
+from typing import AsyncIterator, List, Optional
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+STREAM_PAGE_SIZE = 100
+
+
+def encode_cursor(last_evaluated_key: Optional[dict]) -> Optional[str]:
+    if not last_evaluated_key:
+        return None
+    raw = json.dumps(last_evaluated_key, separators=(",", ":"), sort_keys=True).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[dict]:
+    if not cursor:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("invalid cursor")
+    if not isinstance(key, dict):
+        raise ValueError("invalid cursor")
+    return key
+
+
+def page_size(limit: Optional[int]) -> int:
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+
+async def query_pages(dynamodb, **kwargs) -> AsyncIterator[List[dict]]:
+    # follows LastEvaluatedKey lazily, so the caller can work on one page before the next one is read
+    while True:
+        resp = await asyncio.to_thread(dynamodb.query, **kwargs)
+        yield resp.get("Items", [])
+        last_key = resp.get("LastEvaluatedKey")
+        if not last_key:
+            return
+        kwargs = {**kwargs, "ExclusiveStartKey": last_key}
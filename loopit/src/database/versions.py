@@ -0,0 +1,42 @@
+import asyncio
+from typing import Optional
+
+# entity items carry a Version counter bumped by every write; collections (categories, societies)
+# keep theirs on a VERSION#<name> item. ETags are derived from these, so a conditional GET only reads one attribute.
+
+
+def collection_version_key(name: str) -> dict:
+    return {"pk": {"S": "VERSION"}, "sk": {"S": name}}
+
+
+def with_version_bump(update: dict) -> dict:
+    # adds the bump to an Update transact item body; ADD starts a missing counter at 0
+    return {
+        **update,
+        "UpdateExpression": f"{update['UpdateExpression']} ADD Version :versionStep",
+        "ExpressionAttributeValues": {**update.get("ExpressionAttributeValues", {}), ":versionStep": {"N": "1"}},
+    }
+
+
+async def read_version(dynamodb, table_name: str, key: dict) -> Optional[int]:
+    # None when the item does not exist; items written before versioning count as version 0
+    resp = await asyncio.to_thread(
+        dynamodb.get_item,
+        TableName=table_name,
+        Key=key,
+        ProjectionExpression="pk, Version",
+    )
+    item = resp.get("Item")
+    if not item:
+        return None
+    return int(item.get("Version", {}).get("N", 0))
+
+
+async def bump_collection_version(dynamodb, table_name: str, name: str) -> None:
+    await asyncio.to_thread(
+        dynamodb.update_item,
+        TableName=table_name,
+        Key=collection_version_key(name),
+        UpdateExpression="ADD Version :versionStep",
+        ExpressionAttributeValues={":versionStep": {"N": "1"}},
+    )
@@ -0,0 +1,3 @@
+
+class BuyRequestAlreadyExistsError(Exception):
+    pass
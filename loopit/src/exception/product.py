@@ -0,0 +1,3 @@
+
+class ProductChangesExpiredError(Exception):
+    pass
@@ -16,4 +16,10 @@ class InvalidCredentialsError(Exception):
 
 
 class AuthServiceError(Exception):
-    pass
\ No newline at end of file
+    pass
+
+
+class AuthServiceBusyError(Exception):
+    def __init__(self, message: str, retry_after: float = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
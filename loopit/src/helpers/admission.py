@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import os
+import time
+from exception.user import AuthServiceBusyError
+from helpers.app_settings import AppSettings
+
+logger = logging.getLogger(__name__)
+
+SERVICE_TIME_SMOOTHING = 0.2
+
+
+class AdmissionController:
+    # caps concurrent requests on an expensive route and turns callers away up front when the
+    # queue ahead of them means they would not be served before the deadline anyway
+    def __init__(self, name: str, concurrency: int, max_queue: int, deadline: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.deadline = deadline
+        self._slots: asyncio.Semaphore | None = None
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.service_time = 0.0
+
+    def _expected_wait(self) -> float:
+        if self.active < self.concurrency:
+            return 0.0
+        return (self.waiting + 1) / self.concurrency * self.service_time
+
+    def _reject(self, retry_after: float) -> AuthServiceBusyError:
+        self.rejected += 1
+        return AuthServiceBusyError(f"{self.name} is busy, please retry", retry_after=retry_after)
+
+    async def acquire(self) -> float:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        expected = self._expected_wait()
+        if self.active >= self.concurrency and (self.waiting >= self.max_queue or expected > self.deadline):
+            raise self._reject(expected)
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.deadline)
+        except asyncio.TimeoutError:
+            raise self._reject(self._expected_wait())
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        self.admitted += 1
+        return time.monotonic()
+
+    def release(self, started: float) -> None:
+        elapsed = time.monotonic() - started
+        self.service_time = elapsed if not self.service_time else (
+            SERVICE_TIME_SMOOTHING * elapsed + (1 - SERVICE_TIME_SMOOTHING) * self.service_time
+        )
+        self.active -= 1
+        self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "service_time_ms": round(self.service_time * 1000, 1),
+        }
+
+
+_cpus = os.cpu_count() or 1
+login_admission = AdmissionController(
+    name="login",
+    # below the core count, so admitted logins leave headroom for the rest of the API
+    concurrency=int(AppSettings.LOGIN_CONCURRENCY or max(1, _cpus - 1)),
+    max_queue=int(AppSettings.LOGIN_MAX_QUEUE or _cpus * 16),
+    deadline=float(AppSettings.LOGIN_QUEUE_DEADLINE_SECONDS or 2),
+)
+
+
+async def admit_login():
+    started = await login_admission.acquire()
+    try:
+        yield
+    finally:
+        login_admission.release(started)
@@ -1,7 +1,10 @@
 class ApiPaths:
     HEALTH = "/health"
+    BATCH = "/batch"
     AUTH_SIGNUP = "/auth/register"
     AUTH_LOGIN = "/auth/login"
+    AUTH_REFRESH = "/auth/refresh"
+    AUTH_LOGOUT = "/auth/logout"
 
     CREATE_CATEGORY= "/categories"
     GET_CATEGORY= "/categories"
@@ -14,6 +17,8 @@ class ApiPaths:
     DELETE_SOCIETY= "/societies/{id}"
     
     GET_PRODUCTS = "/products"
+    GET_PRODUCT_AVAILABILITY = "/products/availability"
+    GET_PRODUCT_CHANGES = "/products/changes"
     GET_PRODUCT_BY_ID = "/products/{id}"
     CREATE_PRODUCT = "/products/create"
     UPDATE_PRODUCT = "/products/{id}/update"
@@ -23,10 +28,13 @@ class ApiPaths:
     RETURN_ORDER = "/orders/{orderId}/return"
     GET_APPROVED_AWAITING_ORDERS = "/orders/approved-awaiting"
     GET_LENDER_ORDERS = "/orders/lender"
+    BULK_RETURN_ORDERS = "/orders/bulk-return"
 
     CREATE_BUYER_REQUEST = "/buyer-requests"
     GET_BUYER_REQUESTS = "/buyer-requests"
+    GET_LENDER_BUYER_REQUESTS = "/buyer-requests/lender"
     UPDATE_BUYER_REQUEST_STATUS = "/buyer-requests/{requestId}/update"
+    BULK_UPDATE_BUYER_REQUEST_STATUS = "/buyer-requests/bulk-update"
 
     CREATE_RETURN_REQUEST = "/return-requests"
     GET_RETURN_REQUESTS = "/return-requests"
@@ -35,9 +43,12 @@ class ApiPaths:
     CREATE_FEEDBACK = "/feedbacks"
     GET_GIVEN_FEEDBACKS = "/feedbacks/given"
     GET_RECEIVED_FEEDBACKS = "/feedbacks/received"
+    GET_LENDER_RATING = "/users/{id}/rating"
 
     BECOME_LENDER = "/users/become-lender"
     GET_USERS = "/users"
+    GET_LENDER_DASHBOARD = "/users/me/dashboard"
+    GET_USER_SUMMARY = "/users/me/summary"
     GET_USER_BY_ID = "/users/{id}"
     DELETE_USER_BY_ID = "/users/{id}"
 
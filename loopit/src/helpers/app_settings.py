@@ -4,4 +4,17 @@ class AppSettings:
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
     JWT_ALGORITHM = os.getenv("JWT_ALGORITHM")
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES = os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES")
-    DDB_TABLE_NAME = os.getenv("DDB_TABLE_NAME")
\ No newline at end of file
+    DDB_TABLE_NAME = os.getenv("DDB_TABLE_NAME")
+    PASSWORD_POOL_WORKERS = os.getenv("PASSWORD_POOL_WORKERS")
+    PASSWORD_POOL_MAX_PENDING = os.getenv("PASSWORD_POOL_MAX_PENDING")
+    PASSWORD_POOL_ADMISSION_TIMEOUT_SECONDS = os.getenv("PASSWORD_POOL_ADMISSION_TIMEOUT_SECONDS")
+    BCRYPT_ROUNDS = os.getenv("BCRYPT_ROUNDS")
+    JWT_CLAIMS_CACHE_SIZE = os.getenv("JWT_CLAIMS_CACHE_SIZE")
+    REFRESH_TOKEN_EXPIRE_DAYS = os.getenv("REFRESH_TOKEN_EXPIRE_DAYS")
+    LOGIN_CONCURRENCY = os.getenv("LOGIN_CONCURRENCY")
+    LOGIN_MAX_QUEUE = os.getenv("LOGIN_MAX_QUEUE")
+    LOGIN_QUEUE_DEADLINE_SECONDS = os.getenv("LOGIN_QUEUE_DEADLINE_SECONDS")
+    RESPONSE_CACHE_TTL_SECONDS = os.getenv("RESPONSE_CACHE_TTL_SECONDS")
+    RESPONSE_CACHE_STALE_SECONDS = os.getenv("RESPONSE_CACHE_STALE_SECONDS")
+    RESPONSE_CACHE_MAX_ENTRIES = os.getenv("RESPONSE_CACHE_MAX_ENTRIES")
+    PRODUCT_CHANGES_RETENTION_DAYS = os.getenv("PRODUCT_CHANGES_RETENTION_DAYS")
\ No newline at end of file
@@ -1,20 +1,82 @@
 from datetime import datetime, timedelta, timezone
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
 import bcrypt
 from fastapi import HTTPException, status,Request
 from fastapi.security import OAuth2PasswordBearer
 from jose import ExpiredSignatureError, JWTError, jwt
 from helpers.app_settings import AppSettings
+from helpers.password_pool import password_pool
 
 oauth2_bearer = OAuth2PasswordBearer(tokenUrl="/api/v1/login")
 
+DEFAULT_BCRYPT_ROUNDS = 12
+DEFAULT_CLAIMS_CACHE_SIZE = 10000
+DEFAULT_REFRESH_TOKEN_EXPIRE_DAYS = 30
+
+# ASGI scope key carrying the claims POST /batch already verified; only in-process dispatch can set scope keys
+BATCH_CLAIMS_SCOPE_KEY = "loopit.batch_claims"
+
+# token digest -> verified claims; verify_jwt is a sync dependency and runs on the threadpool, hence the lock
+_claims_cache: "OrderedDict[str, dict]" = OrderedDict()
+_claims_lock = threading.Lock()
+_claims_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def _token_digest(token: str) -> str:
+    # the secret is part of the digest so rotating it invalidates every cached entry
+    return hashlib.sha256(f"{AppSettings.JWT_SECRET_KEY}\0{AppSettings.JWT_ALGORITHM}\0{token}".encode("utf-8")).hexdigest()
+
+
+def _cached_claims(digest: str) -> dict | None:
+    with _claims_lock:
+        claims = _claims_cache.get(digest)
+        if claims is not None and int(claims.get("exp", 0)) > time.time():
+            _claims_cache.move_to_end(digest)
+            _claims_stats["hits"] += 1
+            return dict(claims)
+        if claims is not None:
+            del _claims_cache[digest]
+        _claims_stats["misses"] += 1
+        return None
+
+
+def _cache_claims(digest: str, claims: dict) -> None:
+    # tokens without exp would never age out, so only expiring tokens are cached
+    if "exp" not in claims:
+        return
+    size = int(AppSettings.JWT_CLAIMS_CACHE_SIZE or DEFAULT_CLAIMS_CACHE_SIZE)
+    with _claims_lock:
+        _claims_cache[digest] = dict(claims)
+        _claims_cache.move_to_end(digest)
+        while len(_claims_cache) > size:
+            _claims_cache.popitem(last=False)
+            _claims_stats["evictions"] += 1
+
 class AuthHelper:
 
     @staticmethod
-    def hash_password(password: str) -> str:
+    def bcrypt_rounds() -> int:
+        return int(AppSettings.BCRYPT_ROUNDS or DEFAULT_BCRYPT_ROUNDS)
+
+    @staticmethod
+    def hash_password(password: str, rounds: int | None = None) -> str:
         password_bytes = password.encode("utf-8")
-        hashed = bcrypt.hashpw(password_bytes, bcrypt.gensalt())
+        hashed = bcrypt.hashpw(password_bytes, bcrypt.gensalt(rounds=rounds or AuthHelper.bcrypt_rounds()))
         return hashed.decode("utf-8")
 
+    @staticmethod
+    def needs_rehash(hashed_password: str) -> bool:
+        # bcrypt hashes look like $2b$<cost>$..., so the cost a hash was made with is readable without checkpw
+        try:
+            return int(hashed_password.split("$")[2]) != AuthHelper.bcrypt_rounds()
+        except (IndexError, ValueError):
+            return False
+
     @staticmethod
     def verify_password(password: str, hashed_password: str) -> bool:
         return bcrypt.checkpw(
@@ -22,6 +84,14 @@ class AuthHelper:
             hashed_password.encode("utf-8"),
         ) 
 
+    @staticmethod
+    async def hash_password_async(password: str) -> str:
+        return await password_pool.run(AuthHelper.hash_password, password, AuthHelper.bcrypt_rounds())
+
+    @staticmethod
+    async def verify_password_async(password: str, hashed_password: str) -> bool:
+        return await password_pool.run(AuthHelper.verify_password, password, hashed_password)
+
     @staticmethod
     def create_token(user_id: str, role: str) -> str:
         now = datetime.now(timezone.utc)
@@ -33,18 +103,63 @@ class AuthHelper:
         }
         return jwt.encode(payload, AppSettings.JWT_SECRET_KEY, algorithm=AppSettings.JWT_ALGORITHM)
 
+    @staticmethod
+    def new_refresh_token(session_id: str) -> tuple[str, str]:
+        # returns (token for the client, hash to store); only the hash ever reaches the database
+        secret = secrets.token_urlsafe(32)
+        return f"{session_id}.{secret}", AuthHelper.hash_refresh_secret(secret)
+
+    @staticmethod
+    def hash_refresh_secret(secret: str) -> str:
+        return hashlib.sha256(secret.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def parse_refresh_token(token: str) -> tuple[str, str]:
+        session_id, _, secret = (token or "").partition(".")
+        if not session_id or not secret:
+            raise ValueError("malformed refresh token")
+        return session_id, secret
+
+    @staticmethod
+    def refresh_secret_matches(secret: str, stored_hash: str) -> bool:
+        return hmac.compare_digest(AuthHelper.hash_refresh_secret(secret), stored_hash)
+
+    @staticmethod
+    def refresh_token_expiry() -> int:
+        days = int(AppSettings.REFRESH_TOKEN_EXPIRE_DAYS or DEFAULT_REFRESH_TOKEN_EXPIRE_DAYS)
+        return int((datetime.now(timezone.utc) + timedelta(days=days)).timestamp())
+
     @staticmethod
     def verify_jwt(request: Request):
+        batch_claims = request.scope.get(BATCH_CLAIMS_SCOPE_KEY)
+        if isinstance(batch_claims, dict):
+            request.state.user = batch_claims
+            return
+
         header = request.headers.get("Authorization")
         if not header or not header.startswith("Bearer "):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Authorization header is missing or invalid")
 
         token = header.split(" ")[1]
-        try:
-            claims = jwt.decode(token, AppSettings.JWT_SECRET_KEY, algorithms=[AppSettings.JWT_ALGORITHM])
-        except ExpiredSignatureError:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="invalid or token expired")
-        except JWTError as e:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(e))
+        digest = _token_digest(token)
+        claims = _cached_claims(digest)
+        if claims is None:
+            try:
+                claims = jwt.decode(token, AppSettings.JWT_SECRET_KEY, algorithms=[AppSettings.JWT_ALGORITHM])
+            except ExpiredSignatureError:
+                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="invalid or token expired")
+            except JWTError as e:
+                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(e))
+            _cache_claims(digest, claims)
 
         request.state.user = claims
+
+    @staticmethod
+    def claims_cache_stats() -> dict:
+        with _claims_lock:
+            lookups = _claims_stats["hits"] + _claims_stats["misses"]
+            return {
+                **_claims_stats,
+                "size": len(_claims_cache),
+                "hit_rate": round(_claims_stats["hits"] / lookups, 4) if lookups else 0.0,
+            }
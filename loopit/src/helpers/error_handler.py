@@ -1,7 +1,15 @@
-from fastapi.responses import JSONResponse
+import math
+from fastapi import Request, Response, status
+from exception.user import AuthServiceBusyError
+from helpers.responses import negotiated_response
 
 
-def write_error_response(status_code: int, error: str, details: str | None = None) -> JSONResponse:
+def write_error_response(
+    status_code: int,
+    error: str,
+    details: str | None = None,
+    headers: dict[str, str] | None = None,
+) -> Response:
     payload = {
         "status": False,
         "status_code": status_code,
@@ -11,7 +19,17 @@ def write_error_response(status_code: int, error: str, details: str | None = Non
     if details:
         payload["details"] = details
 
-    return JSONResponse(
+    return negotiated_response(
         status_code=status_code,
         content=payload,
+        headers=headers,
+    )
+
+
+async def auth_service_busy_handler(request: Request, exc: AuthServiceBusyError) -> Response:
+    # admission rejections and password pool saturation share one overload contract
+    return write_error_response(
+        status.HTTP_429_TOO_MANY_REQUESTS,
+        str(exc),
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
     )
@@ -0,0 +1,48 @@
+import hashlib
+from typing import Any, Optional
+from fastapi import Response, status
+from helpers.responses import response_format
+
+# clients must revalidate every time; the 304 is what keeps polling cheap
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    # strong validator over the entity version and everything else that shapes the body (fields, include, ...);
+    # the negotiated format is part of it, since JSON and msgpack bodies are different representations
+    return '"' + hashlib.blake2b(repr((response_format(), parts)).encode(), digest_size=12).hexdigest() + '"'
+
+
+def body_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match uses the weak comparison, so a W/ prefix added by a proxy still matches
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept"})
+
+
+def tagged(response: Response, etag: str) -> Response:
+    if response.status_code == status.HTTP_200_OK:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = CACHE_CONTROL
+        response.headers["Vary"] = "Accept"
+    return response
+
+
+def conditional(response: Response, if_none_match: Optional[str]) -> Response:
+    # for bodies whose inputs have no single version: tag by content, which still saves the transfer
+    if response.status_code != status.HTTP_200_OK:
+        return response
+    etag = body_etag(response.body)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return tagged(response, etag)
@@ -0,0 +1,80 @@
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Type
+from pydantic import BaseModel, TypeAdapter
+
+Fields = Optional[FrozenSet[str]]
+
+
+def _names(raw: Optional[str]) -> set:
+    return {name.strip() for name in (raw or "").split(",") if name.strip()}
+
+
+def parse_fields(raw: Optional[str], model: Type[BaseModel]) -> Fields:
+    # None means the full object; unknown names are rejected so a typo is a 400 rather than an empty row
+    if not raw:
+        return None
+    names = _names(raw)
+    unknown = sorted(names - set(model.model_fields))
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+    return frozenset(names | {"id"})
+
+
+def parse_include(raw: Optional[str], relations: Iterable[str]) -> FrozenSet[str]:
+    # related entities are opt-in; "product.category" also implies "product"
+    names = _names(raw)
+    unknown = sorted(names - set(relations))
+    if unknown:
+        raise ValueError(f"unknown include: {', '.join(unknown)}")
+    return frozenset(names | {name.split(".", 1)[0] for name in names})
+
+
+def nested_include(include: FrozenSet[str], relation: str) -> FrozenSet[str]:
+    prefix = f"{relation}."
+    return frozenset(name[len(prefix):] for name in include if name.startswith(prefix))
+
+
+def own_fields(fields: Fields, model: Type[BaseModel]) -> FrozenSet[str]:
+    return frozenset(f for f in (fields or ()) if f in model.model_fields)
+
+
+def with_projection(kwargs: dict, model: Type[BaseModel], fields: Iterable[str]) -> dict:
+    # maps model field names to their stored attribute names (the aliases) and adds them as a ProjectionExpression
+    attributes = sorted({model.model_fields[f].alias or f for f in fields if f in model.model_fields})
+    names = {f"#f{i}": attribute for i, attribute in enumerate(attributes)}
+    return {
+        **kwargs,
+        "ProjectionExpression": ", ".join(names),
+        "ExpressionAttributeNames": {**kwargs.get("ExpressionAttributeNames", {}), **names},
+    }
+
+
+@lru_cache(maxsize=None)
+def _adapter(model: Type[BaseModel], name: str) -> TypeAdapter:
+    return TypeAdapter(model.model_fields[name].annotation)
+
+
+def partial(model: Type[BaseModel], doc: Dict[str, Any], fields: Iterable[str]):
+    # builds the model from a projected item; only the projected fields are set, so exclude_unset dumps leave the rest out
+    values = {}
+    for name in fields:
+        info = model.model_fields.get(name)
+        if info is None:
+            continue
+        key = info.alias or name
+        if key in doc:
+            values[name] = _adapter(model, name).validate_python(doc[key])
+    return model.model_construct(**values)
+
+
+def dump(obj: Any, include: Any = None, by_alias: bool = False) -> Any:
+    if not hasattr(obj, "model_dump"):
+        return obj
+    if include is None:
+        return obj.model_dump(by_alias=by_alias)
+    return obj.model_dump(mode="json", by_alias=by_alias, include=include, exclude_unset=True)
+
+
+async def dump_pages(pages, include: Any, by_alias: bool = False):
+    async for rows in pages:
+        yield [dump(row, include, by_alias) for row in rows]
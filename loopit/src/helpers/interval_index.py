@@ -0,0 +1,33 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from itertools import accumulate
+from typing import Iterable, List, Tuple
+
+
+class IntervalIndex:
+    # static index over half-open [start, end) intervals: starts sorted, plus the running max of ends,
+    # so "does anything overlap [a, b)" is one bisect and one lookup
+    def __init__(self, intervals: Iterable[Tuple[datetime, datetime]] = ()):
+        ordered = sorted(intervals)
+        self._intervals: List[Tuple[datetime, datetime]] = ordered
+        self._starts: List[datetime] = [s for s, _ in ordered]
+        self._max_ends: List[datetime] = list(accumulate((e for _, e in ordered), max))
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        # intervals starting before `end` are a prefix; one of them overlaps iff its end is after `start`
+        k = bisect_left(self._starts, end)
+        return k > 0 and self._max_ends[k - 1] > start
+
+    def covers(self, moment: datetime) -> bool:
+        # some interval has start <= moment < end
+        k = bisect_right(self._starts, moment)
+        return k > 0 and self._max_ends[k - 1] > moment
+
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        return not self.overlaps(start, end)
+
+    def intervals(self) -> List[Tuple[datetime, datetime]]:
+        return list(self._intervals)
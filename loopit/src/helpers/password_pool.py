@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+from helpers.app_settings import AppSettings
+from exception.user import AuthServiceBusyError
+
+logger = logging.getLogger(__name__)
+
+# workers are never forked from the app process: it already runs boto3 and to_thread threads,
+# and a fork taken while one of them holds a lock can deadlock the child
+_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class PasswordPool:
+    # bcrypt is pure CPU, so it runs in worker processes; the semaphore caps how much work is
+    # queued behind them and callers that cannot get a slot in time are turned away
+    def __init__(self, workers: int, max_pending: int, admission_timeout: float):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.admission_timeout = admission_timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.waiting = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def start(self) -> None:
+        # called at app startup, so no request pays for creating the pool
+        self._ensure_started()
+
+    def _ensure_started(self) -> None:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context(_START_METHOD))
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+
+    async def run(self, fn: Callable, *args):
+        self._ensure_started()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.admission_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            logger.warning("password pool saturated: %s", self.stats())
+            raise AuthServiceBusyError("authentication is busy, please retry", retry_after=self.admission_timeout)
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._executor, fn, *args)
+            self.completed += 1
+            return result
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# one core is always left to the event loop, so logins cannot starve product browsing
+_workers = int(AppSettings.PASSWORD_POOL_WORKERS or max(1, (os.cpu_count() or 1) - 1))
+password_pool = PasswordPool(
+    workers=_workers,
+    max_pending=int(AppSettings.PASSWORD_POOL_MAX_PENDING or _workers * 4),
+    admission_timeout=float(AppSettings.PASSWORD_POOL_ADMISSION_TIMEOUT_SECONDS or 2),
+)
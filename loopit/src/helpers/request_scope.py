@@ -0,0 +1,25 @@
+import asyncio
+from contextvars import ContextVar, Token
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+# reads shared by the sub-requests of one POST /batch; outside a batch there is no memo and every read goes through
+_memo: ContextVar[Optional[Dict[Hashable, asyncio.Future]]] = ContextVar("request_memo", default=None)
+
+
+def open_memo() -> Token:
+    return _memo.set({})
+
+
+def close_memo(token: Token) -> None:
+    _memo.reset(token)
+
+
+async def memoized(key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+    # concurrent callers with the same key await the same read; results are shared, so callers must not mutate them
+    memo = _memo.get()
+    if memo is None:
+        return await load()
+    future = memo.get(key)
+    if future is None:
+        future = memo[key] = asyncio.ensure_future(load())
+    return await future
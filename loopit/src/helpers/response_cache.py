@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+from fastapi import Request, Response, status
+from helpers.app_settings import AppSettings
+from helpers.etag import etag_matches, not_modified
+from helpers.streaming import stream_format
+
+logger = logging.getLogger(__name__)
+
+Build = Callable[[], Awaitable[Response]]
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    status_code: int
+    media_type: Optional[str]
+    headers: Dict[str, str]
+    tags: Tuple[str, ...]
+    stored_at: float
+
+
+class ResponseCache:
+    # per-worker cache of encoded GET responses; routes opt in through serve() and repository writes
+    # call invalidate() with the tags they touch. Other workers only see a write once their TTL runs out.
+    def __init__(self, ttl: float, stale: float, max_entries: int):
+        self.ttl = ttl
+        self.stale = stale
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, CachedResponse]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._refreshing: Set[tuple] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def _key(self, request: Request, scope: str) -> tuple:
+        # route, normalized query (order of parameters does not matter) and the representation asked for
+        query = tuple(sorted(request.query_params.multi_items()))
+        return (request.url.path, query, scope_key(request, scope), request.headers.get("accept", ""))
+
+    def _generation(self, tags: Iterable[str]) -> tuple:
+        return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def _store(self, key: tuple, tags: Tuple[str, ...], generation: tuple, response: Response) -> None:
+        # only plain 200 bodies, and never one built from data a write has invalidated since
+        if response.status_code != status.HTTP_200_OK or not hasattr(response, "body"):
+            return
+        if self._generation(tags) != generation:
+            return
+        headers = {k: v for k, v in response.headers.items() if k not in ("content-length", "content-type")}
+        self._entries[key] = CachedResponse(bytes(response.body), response.status_code, response.media_type, headers, tags, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _respond(self, entry: CachedResponse, if_none_match: Optional[str], state: str) -> Response:
+        etag = entry.headers.get("etag")
+        if etag and etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        return Response(
+            content=entry.body,
+            status_code=entry.status_code,
+            media_type=entry.media_type,
+            headers={**entry.headers, "X-Cache": state},
+        )
+
+    async def _refresh(self, key: tuple, tags: Tuple[str, ...], build: Build) -> None:
+        try:
+            generation = self._generation(tags)
+            self._store(key, tags, generation, await build())
+        except Exception:
+            logger.exception("background refresh of a cached response failed")
+        finally:
+            self._refreshing.discard(key)
+
+    async def serve(self, request: Request, scope: str, tags: Tuple[str, ...], build: Build) -> Response:
+        if stream_format(request):
+            return await build()
+        key = self._key(request, scope)
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry.stored_at
+            if age < self.ttl:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._respond(entry, request.headers.get("if-none-match"), "HIT")
+            if age < self.ttl + self.stale:
+                # serve the stale body now and rebuild it once in the background
+                self.stale_hits += 1
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    task = asyncio.create_task(self._refresh(key, tags, build))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+                return self._respond(entry, request.headers.get("if-none-match"), "STALE")
+            self._entries.pop(key, None)
+        self.misses += 1
+        generation = self._generation(tags)
+        response = await build()
+        self._store(key, tags, generation, response)
+        if response.status_code == status.HTTP_200_OK:
+            response.headers["X-Cache"] = "MISS"
+        return response
+
+    def invalidate(self, *tags: str) -> None:
+        for tag in tags:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+        for key in [k for k, entry in self._entries.items() if set(entry.tags) & set(tags)]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+        }
+
+
+def scope_key(request: Request, scope: str) -> str:
+    # public bodies are shared by every caller; society falls back to the user when the token carries no society
+    if scope == "public":
+        return "public"
+    user = getattr(request.state, "user", None) or {}
+    if scope == "society" and user.get("society_id") is not None:
+        return f"society:{user['society_id']}"
+    return f"user:{user.get('user_id')}"
+
+
+response_cache = ResponseCache(
+    ttl=float(AppSettings.RESPONSE_CACHE_TTL_SECONDS or 5),
+    stale=float(AppSettings.RESPONSE_CACHE_STALE_SECONDS or 30),
+    max_entries=int(AppSettings.RESPONSE_CACHE_MAX_ENTRIES or 1000),
+)
@@ -0,0 +1,123 @@
+from contextvars import ContextVar
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from typing import Any, List, Tuple
+from uuid import UUID
+import msgpack
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from starlette.datastructures import Headers
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+# set per request by ContentNegotiationMiddleware; JSON unless the client asked for msgpack
+_response_format: ContextVar[str] = ContextVar("response_format", default="json")
+
+
+def _default(value: Any) -> Any:
+    # only types orjson does not know natively land here; output matches jsonable_encoder
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", by_alias=True)
+    if isinstance(value, Decimal):
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _msgpack_default(value: Any) -> Any:
+    # the types orjson handles natively but msgpack does not, rendered the way the JSON body has them
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, UUID):
+        return str(value)
+    return _default(value)
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+def packb(content: Any) -> bytes:
+    return msgpack.packb(content, default=_msgpack_default, use_bin_type=True)
+
+
+def _accept_ranges(accept: str) -> List[Tuple[str, float]]:
+    # (media range, q) pairs; a missing q is 1 and an unreadable one counts as a refusal
+    ranges = []
+    for part in accept.split(","):
+        media, *params = [p.strip() for p in part.split(";")]
+        if not media:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        ranges.append((media.lower(), q))
+    return ranges
+
+
+def _quality(ranges: List[Tuple[str, float]], media_type: str) -> float:
+    # the most specific range matching the type decides its q; no match means not acceptable
+    wildcards = {media_type: 2, media_type.split("/")[0] + "/*": 1, "*/*": 0}
+    matches = [(wildcards[media], q) for media, q in ranges if media in wildcards]
+    return max(matches)[1] if matches else 0.0
+
+
+def prefers_msgpack(accept: str) -> bool:
+    # msgpack only when the client rates it above JSON; ties, wildcards and q=0 keep the JSON default
+    ranges = _accept_ranges(accept)
+    msgpack_q = max(_quality(ranges, t) for t in MSGPACK_MEDIA_TYPES)
+    return msgpack_q > 0 and msgpack_q > _quality(ranges, "application/json")
+
+
+def response_format() -> str:
+    return _response_format.get()
+
+
+class FastJSONResponse(JSONResponse):
+    # one orjson pass straight to bytes instead of jsonable_encoder followed by stdlib json
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPES[0]
+
+    def render(self, content: Any) -> bytes:
+        return packb(content)
+
+
+def negotiated_response(status_code: int, content: Any, headers: dict[str, str] | None = None) -> Response:
+    if _response_format.get() == "msgpack":
+        return MsgPackResponse(status_code=status_code, content=content, headers=headers)
+    return FastJSONResponse(status_code=status_code, content=content, headers=headers)
+
+
+class ContentNegotiationMiddleware:
+    # pure ASGI rather than BaseHTTPMiddleware, so the context var is still set inside the endpoint
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = Headers(scope=scope).get("accept", "")
+        token = _response_format.set("msgpack" if prefers_msgpack(accept) else "json")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _response_format.reset(token)
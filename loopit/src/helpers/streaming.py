@@ -0,0 +1,74 @@
+import logging
+from typing import Any, AsyncIterator, List, Optional
+from fastapi import Request, status
+from fastapi.responses import StreamingResponse
+from helpers.responses import dumps
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_FLUSH_BYTES = 64 * 1024
+
+
+def stream_format(request: Request) -> Optional[str]:
+    # NDJSON when the client asks for it, a streamed JSON array with ?stream=true, otherwise the buffered response
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return "ndjson"
+    if str(request.query_params.get("stream", "")).lower() in ("1", "true"):
+        return "json"
+    return None
+
+
+async def _encode(first: Optional[List[Any]], pages: AsyncIterator[List[Any]], ndjson: bool, message: Optional[str]) -> AsyncIterator[bytes]:
+    # rows are encoded one at a time and flushed at the end of every page, so only one page is ever held in memory
+    buf = bytearray() if ndjson else bytearray(b'{"data":[')
+    count = 0
+    failed = False
+    try:
+        page = first
+        while page is not None:
+            for row in page:
+                if ndjson:
+                    buf += dumps(row) + b"\n"
+                else:
+                    if count:
+                        buf += b","
+                    buf += dumps(row)
+                count += 1
+                if len(buf) >= STREAM_FLUSH_BYTES:
+                    yield bytes(buf)
+                    buf.clear()
+            if buf:
+                yield bytes(buf)
+                buf.clear()
+            page = await anext(pages, None)
+    except Exception:
+        # the status line is already sent; the trailer is the only way left to tell the client the list is short
+        logger.exception("list stream failed after %d rows", count)
+        failed = True
+    finally:
+        await pages.aclose()
+
+    if ndjson:
+        if failed:
+            buf += dumps({"status": False, "error": "stream interrupted"}) + b"\n"
+    else:
+        trailer = {"status": not failed}
+        if failed:
+            trailer["error"] = "stream interrupted"
+        elif message:
+            trailer["message"] = message
+        buf += b"]," + dumps(trailer)[1:]
+    if buf:
+        yield bytes(buf)
+
+
+async def stream_response(pages: AsyncIterator[List[Any]], fmt: str, message: Optional[str] = None, status_code: int = status.HTTP_200_OK) -> StreamingResponse:
+    # the first page is read before the response starts, so auth and query errors still get a normal error response
+    first = await anext(pages, None)
+    ndjson = fmt == "ndjson"
+    return StreamingResponse(
+        _encode(first, pages, ndjson, message),
+        status_code=status_code,
+        media_type=NDJSON_MEDIA_TYPE if ndjson else "application/json",
+    )
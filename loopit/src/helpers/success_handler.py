@@ -1,15 +1,15 @@
-from fastapi.responses import JSONResponse
-from fastapi.encoders import jsonable_encoder
+from fastapi import Response
+from helpers.responses import negotiated_response
 
-def write_success_response(status_code: int, data: any = None, message: str | None = None) -> JSONResponse:
+def write_success_response(status_code: int, data: any = None, message: str | None = None) -> Response:
     payload = {
         "status": True,
-        "data": jsonable_encoder(data)
+        "data": data
     }
 
     if message:
         payload["message"] = message
-    return JSONResponse(
+    return negotiated_response(
         status_code=status_code,
         content=payload,
     )
@@ -0,0 +1,10 @@
+from typing import Optional, Tuple
+
+
+def parse_watermark(watermark: str) -> Tuple[int, Optional[int]]:
+    # either a change-log timestamp (ns), or mid-log the "{timestamp}#{product_id}" sk of the last entry
+    # served, so the next page resumes right after it even when later entries share its timestamp
+    timestamp, sep, product_id = watermark.partition("#")
+    if not timestamp.isdigit() or (sep and not product_id.isdigit()):
+        raise ValueError("since must be a watermark returned by this endpoint")
+    return int(timestamp), (int(product_id) if sep else None)
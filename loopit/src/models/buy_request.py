@@ -15,5 +15,8 @@ class BuyingRequest(BaseModel):
     id: Optional[int] = Field(default=None, alias="ID")
     product_id: int = Field(alias="ProductId", gt=0)
     requested_by: int = Field(alias="RequestedBy", gt=0)
+    lender_id: Optional[int] = Field(default=None, alias="LenderID")
     status: BuyRequestStatus = Field(alias="Status")
+    start_date: Optional[datetime] = Field(default=None, alias="StartDate")
+    end_date: Optional[datetime] = Field(default=None, alias="EndDate")
     created_at: datetime = Field(default_factory=datetime.now, alias="CreatedAt")
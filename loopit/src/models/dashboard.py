@@ -0,0 +1,29 @@
+
+from pydantic import BaseModel, Field
+
+
+class LenderDashboard(BaseModel):
+    model_config = {
+        "populate_by_name": True,
+        "extra": "forbid",
+    }
+
+    lender_id: int = Field(alias="LenderID", gt=0)
+    product_count: int = Field(default=0, alias="ProductCount")
+    pending_buy_requests: int = Field(default=0, alias="PendingBuyRequests")
+    active_rentals: int = Field(default=0, alias="ActiveRentals")
+    pending_returns: int = Field(default=0, alias="PendingReturns")
+    lifetime_earnings: float = Field(default=0.0, alias="LifetimeEarnings")
+
+
+class UserSummary(BaseModel):
+    model_config = {
+        "populate_by_name": True,
+        "extra": "forbid",
+    }
+
+    user_id: int = Field(alias="UserID", gt=0)
+    active_rentals: int = Field(default=0, alias="ActiveRentals")
+    pending_buy_requests: int = Field(default=0, alias="PendingBuyRequests")
+    pending_returns: int = Field(default=0, alias="PendingReturns")
+    feedback_to_give: int = Field(default=0, alias="FeedbackToGive")
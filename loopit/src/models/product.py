@@ -1,7 +1,7 @@
 
 
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from models.category import Category
 from models.user import User
@@ -35,3 +35,9 @@ class ProductResponse(BaseModel):
     product: Product
     category: Optional[Category] = None
     user: Optional[User] = None
+
+class ProductChanges(BaseModel):
+    products: List[ProductResponse] = []
+    deleted: List[int] = []
+    watermark: str
+    has_more: bool = False
@@ -0,0 +1,16 @@
+
+from pydantic import BaseModel, Field
+from typing import Dict
+
+
+class LenderRating(BaseModel):
+    model_config = {
+        "populate_by_name": True,
+        "extra": "forbid",
+    }
+
+    lender_id: int = Field(alias="LenderID", gt=0)
+    count: int = Field(default=0, alias="RatingCount", ge=0)
+    total: int = Field(default=0, alias="RatingSum", ge=0)
+    average: float = Field(default=0.0, alias="Average")
+    histogram: Dict[int, int] = Field(default_factory=dict, alias="Histogram")
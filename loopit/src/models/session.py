@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+
+
+class Session(BaseModel):
+    model_config = {
+        "populate_by_name": True,
+        "extra": "forbid",
+    }
+
+    id: str = Field(alias="ID", min_length=1)
+    user_id: int = Field(alias="UserID", gt=0)
+    token_hash: str = Field(alias="TokenHash")
+    expires_at: int = Field(alias="ExpiresAt")
+    revoked: bool = Field(default=False, alias="Revoked")
@@ -0,0 +1,163 @@
+
+import asyncio
+import logging
+import botocore
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+from boto3.dynamodb.types import TypeSerializer, TypeDeserializer
+from database.batch import batch_get_items
+from helpers.app_settings import AppSettings
+from helpers.interval_index import IntervalIndex
+
+logger = logging.getLogger(__name__)
+settings = AppSettings()
+
+CALENDAR_CACHE_SIZE = 10000
+
+# per-worker cache: product id -> (calendar version, index); validated against the stored version on every read
+_calendar_cache: "OrderedDict[int, Tuple[int, IntervalIndex]]" = OrderedDict()
+
+
+def _fmt(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _parse(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+
+
+class BookingRepo:
+    def __init__(self, dynamodb):
+        self.dynamodb = dynamodb
+        self.table_name = settings.DDB_TABLE_NAME
+        self.serializer = TypeSerializer()
+        self.deserializer = TypeDeserializer()
+
+    def _version_key(self, product_id: int) -> dict:
+        return {"pk": {"S": f"PRODUCT#{int(product_id)}"}, "sk": {"S": "CALENDAR#VERSION"}}
+
+    def _cache_put(self, product_id: int, version: int, index: IntervalIndex) -> None:
+        _calendar_cache[int(product_id)] = (version, index)
+        _calendar_cache.move_to_end(int(product_id))
+        while len(_calendar_cache) > CALENDAR_CACHE_SIZE:
+            _calendar_cache.popitem(last=False)
+
+    def _cached(self, product_id: int, version: int):
+        entry = _calendar_cache.get(int(product_id))
+        if entry is not None and entry[0] == version:
+            _calendar_cache.move_to_end(int(product_id))
+            return entry[1]
+        return None
+
+    async def _load_calendar(self, product_id: int) -> Tuple[int, IntervalIndex]:
+        # version item and bookings share the CALENDAR# prefix, so one query reads a consistent pair
+        kwargs = {
+            "TableName": self.table_name,
+            "KeyConditionExpression": "pk = :pk AND begins_with(sk, :skPrefix)",
+            "ExpressionAttributeValues": {":pk": {"S": f"PRODUCT#{int(product_id)}"}, ":skPrefix": {"S": "CALENDAR#"}},
+        }
+        version = 0
+        intervals = []
+        while True:
+            resp = await asyncio.to_thread(self.dynamodb.query, **kwargs)
+            for item in resp.get("Items", []):
+                doc = {k: self.deserializer.deserialize(v) for k, v in item.items()}
+                if doc.get("sk") == "CALENDAR#VERSION":
+                    version = int(doc.get("Version", 0))
+                else:
+                    intervals.append((_parse(doc.get("StartDate")), _parse(doc.get("EndDate"))))
+            last_key = resp.get("LastEvaluatedKey")
+            if not last_key:
+                break
+            kwargs["ExclusiveStartKey"] = last_key
+        index = IntervalIndex(intervals)
+        self._cache_put(product_id, version, index)
+        return version, index
+
+    async def get_calendar(self, product_id: int) -> Tuple[int, IntervalIndex]:
+        try:
+            resp = await asyncio.to_thread(self.dynamodb.get_item, TableName=self.table_name, Key=self._version_key(product_id))
+            item = resp.get("Item")
+            version = int(item["Version"]["N"]) if item else 0
+            index = self._cached(product_id, version)
+            if index is not None:
+                return version, index
+            return await self._load_calendar(product_id)
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to get product calendar")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while getting product calendar")
+            raise RuntimeError(e)
+
+    async def get_calendars(self, product_ids: List[int]) -> Dict[int, Tuple[int, IntervalIndex]]:
+        try:
+            product_ids = list(dict.fromkeys(int(i) for i in product_ids))
+            items = await batch_get_items(self.dynamodb, self.table_name, [self._version_key(pid) for pid in product_ids])
+            versions = {int(item["pk"]["S"].split("#")[1]): int(item["Version"]["N"]) for item in items}
+            calendars = {}
+            stale = []
+            for pid in product_ids:
+                version = versions.get(pid, 0)
+                index = self._cached(pid, version)
+                if index is None:
+                    stale.append(pid)
+                else:
+                    calendars[pid] = (version, index)
+            loaded = await asyncio.gather(*(self._load_calendar(pid) for pid in stale))
+            calendars.update(zip(stale, loaded))
+            return calendars
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to get product calendars")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while getting product calendars")
+            raise RuntimeError(e)
+
+    def release_items(self, product_id: int, order_id: int, start: datetime) -> List[dict]:
+        # a returned order frees the rest of its window; bumping the version makes approvals re-read the calendar
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+        return [
+            {
+                "Delete": {
+                    "TableName": self.table_name,
+                    "Key": {"pk": {"S": f"PRODUCT#{int(product_id)}"}, "sk": {"S": f"CALENDAR#BOOKING#{_fmt(start)}#ORDER#{int(order_id)}"}},
+                }
+            },
+            {
+                "Update": {
+                    "TableName": self.table_name,
+                    "Key": self._version_key(product_id),
+                    "UpdateExpression": "ADD Version :one",
+                    "ExpressionAttributeValues": {":one": {"N": "1"}},
+                }
+            },
+        ]
+
+    def booking_items(self, product_id: int, order_id: int, start: datetime, end: datetime, expected_version: int) -> List[dict]:
+        # the booking is only written if nobody else booked this product since `expected_version` was read
+        booking = {
+            "pk": f"PRODUCT#{int(product_id)}",
+            "sk": f"CALENDAR#BOOKING#{_fmt(start)}#ORDER#{int(order_id)}",
+            "ProductID": int(product_id),
+            "OrderID": int(order_id),
+            "StartDate": _fmt(start),
+            "EndDate": _fmt(end),
+        }
+        return [
+            {"Put": {"TableName": self.table_name, "Item": self.serializer.serialize(booking)["M"]}},
+            {
+                "Update": {
+                    "TableName": self.table_name,
+                    "Key": self._version_key(product_id),
+                    "UpdateExpression": "SET Version = :next",
+                    "ConditionExpression": "attribute_not_exists(Version) OR Version = :expected",
+                    "ExpressionAttributeValues": {
+                        ":next": {"N": str(int(expected_version) + 1)},
+                        ":expected": {"N": str(int(expected_version))},
+                    },
+                }
+            },
+        ]
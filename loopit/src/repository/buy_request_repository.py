@@ -3,12 +3,18 @@ import asyncio
 import time
 import logging
 import botocore
-from typing import Optional, List
+from typing import AsyncIterator, Dict, Optional, List
+from database.batch import batch_get_items, batch_put_items
+from database.pagination import STREAM_PAGE_SIZE, query_pages
+from repository.stats_repository import lender_counters_update, merge_counter_updates, user_summary_update
 from datetime import datetime,timezone
 from helpers.app_settings import AppSettings
+from helpers.fields import Fields, own_fields, partial, with_projection
+from helpers.response_cache import response_cache
 from boto3.dynamodb.types import TypeSerializer, TypeDeserializer
 from models.buy_request import BuyingRequest
 from models.enums.buy_request import BuyRequestStatus
+from exception.buy_request import BuyRequestAlreadyExistsError
 
 logger = logging.getLogger(__name__)
 settings = AppSettings()
@@ -20,10 +26,69 @@ class BuyRequestRepo:
         self.serializer = TypeSerializer()
         self.deserializer = TypeDeserializer()
 
+    def _pending_sentinel_key(self, product_id: int, requester_id: int) -> dict:
+        return {"pk": {"S": f"PRODUCT#{int(product_id)}"}, "sk": {"S": f"BUYREQUEST#PENDING#USER#{int(requester_id)}"}}
+
+    def _scoped_keys(self, req: BuyingRequest, status: str) -> List[dict]:
+        # per-product and per-lender copies, status first in the sort key so each status is a range
+        keys = [{"pk": f"PRODUCT#{int(req.product_id)}", "sk": f"BUYREQUEST#STATUS#{status}#ID#{req.id}"}]
+        if req.lender_id:
+            keys.append({"pk": f"LENDER#{int(req.lender_id)}", "sk": f"BUYREQUEST#STATUS#{status}#ID#{req.id}"})
+        return keys
+
+    def _window_attributes(self, req: BuyingRequest) -> dict:
+        attrs = {}
+        if req.start_date:
+            attrs["StartDate"] = req.start_date.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        if req.end_date:
+            attrs["EndDate"] = req.end_date.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        return attrs
+
+    def _to_buying_request(self, item: dict) -> BuyingRequest:
+        doc = {k: self.deserializer.deserialize(v) for k, v in item.items()}
+        return BuyingRequest.model_validate({
+            "ID": int(doc.get("ID")),
+            "ProductId": int(doc.get("ProductId")),
+            "RequestedBy": int(doc.get("RequestedBy")),
+            "LenderID": int(doc.get("LenderID")) if doc.get("LenderID") is not None else None,
+            "Status": str(doc.get("Status")),
+            "StartDate": doc.get("StartDate"),
+            "EndDate": doc.get("EndDate"),
+            "CreatedAt": doc.get("CreatedAt"),
+        })
+
+    async def _query_all(self, pk: str, sk_prefix: str) -> List[dict]:
+        items: List[dict] = []
+        kwargs = {
+            "TableName": self.table_name,
+            "KeyConditionExpression": "pk = :pk AND begins_with(sk, :skPrefix)",
+            "ExpressionAttributeValues": {":pk": {"S": pk}, ":skPrefix": {"S": sk_prefix}},
+        }
+        while True:
+            resp = await asyncio.to_thread(self.dynamodb.query, **kwargs)
+            items.extend(resp.get("Items", []))
+            last_key = resp.get("LastEvaluatedKey")
+            if not last_key:
+                return items
+            kwargs["ExclusiveStartKey"] = last_key
+
+    async def _query_by_statuses(self, pk: str, status_prefix: str, filter_statuses: Optional[List[str]], default_prefix: str) -> List[BuyingRequest]:
+        statuses = list(dict.fromkeys(s for s in (filter_statuses or []) if s))
+        if statuses:
+            # one range query per status, issued concurrently
+            pages = await asyncio.gather(*(self._query_all(pk, f"{status_prefix}{s}#") for s in statuses))
+            items = [item for page in pages for item in page]
+        else:
+            items = await self._query_all(pk, default_prefix)
+        requests = [self._to_buying_request(item) for item in items]
+        requests.sort(key=lambda r: int(r.id))
+        return requests
+
     async def create_buyer_request(self, req: BuyingRequest) -> None:
         try:
             rid = req.id if req.id else time.time_ns()
             created_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+            req.id = int(rid)
             base = {
                 "ID": int(rid),
                 "ProductId": int(req.product_id),
@@ -31,48 +96,122 @@ class BuyRequestRepo:
                 "Status": req.status.value,
                 "CreatedAt": created_at,
             }
+            if req.lender_id:
+                base["LenderID"] = int(req.lender_id)
+            base.update(self._window_attributes(req))
             items = [
                 {**base, "pk": "BUYREQUEST", "sk": f"ID#{rid}"},
                 {**base, "pk": "BUYREQUEST", "sk": f"STATUS#{req.status.value}#ID#{rid}"},
             ]
+            items += [{**base, **k} for k in self._scoped_keys(req, req.status.value)]
             transact_items = [{"Put": {"TableName": self.table_name, "Item": self.serializer.serialize(i)["M"]}} for i in items]
+            # one pending request per (product, requester); the sentinel only exists while the request is Pending
+            if req.status == BuyRequestStatus.Pending:
+                transact_items.append({
+                    "Put": {
+                        "TableName": self.table_name,
+                        "Item": {
+                            **self._pending_sentinel_key(req.product_id, req.requested_by),
+                            "ID": {"N": str(int(rid))},
+                        },
+                        "ConditionExpression": "attribute_not_exists(pk) AND attribute_not_exists(sk)",
+                    }
+                })
+                if req.lender_id:
+                    transact_items += lender_counters_update(self.table_name, req.lender_id, {"PendingBuyRequests": 1})
+                transact_items += user_summary_update(self.table_name, req.requested_by, {"PendingBuyRequests": 1})
             await asyncio.to_thread(self.dynamodb.transact_write_items, TransactItems=transact_items)
         except botocore.exceptions.ClientError as e:
+            reasons = e.response.get("CancellationReasons", [])
+            if e.response["Error"]["Code"] == "TransactionCanceledException" and any(r.get("Code") == "ConditionalCheckFailed" for r in reasons):
+                raise BuyRequestAlreadyExistsError("a pending request already exists for this product")
             logger.exception("failed to create buyer request")
             raise RuntimeError(e)
+        except BuyRequestAlreadyExistsError:
+            raise
         except Exception as e:
             logger.exception("unexpected error while creating buyer request")
             raise RuntimeError(e)
 
-    async def get_all_buyer_requests(self, product_id: Optional[int] = None, filter_statuses: Optional[List[str]]=None) -> List[BuyingRequest]:
+    async def backfill_pending_sentinels(self) -> int:
+        # sentinels for requests left Pending before the one-pending-request rule; the oldest request per
+        # (product, requester) claims it, so a pair that already has two pending requests cannot gain a third
         try:
-            sk_prefix = f"STATUS#{filter_statuses[0]}" if filter_statuses else "ID#"
-            resp = await asyncio.to_thread(
-                self.dynamodb.query,
-                TableName=self.table_name,
-                KeyConditionExpression="pk = :pk AND begins_with(sk, :skPrefix)",
-                ExpressionAttributeValues={":pk": {"S": "BUYREQUEST"}, ":skPrefix": {"S": sk_prefix}},
-            )
-            items = resp.get("Items", [])
-            requests: List[BuyingRequest] = []
-
-            for item in items:
-                doc = {k: self.deserializer.deserialize(v) for k, v in item.items()}
-                status_val = str(doc.get("Status"))
-                
-                if product_id and int(doc.get("ProductId")) != int(product_id):
-                    continue
-                if filter_statuses and status_val != filter_statuses[0]:
-                    continue
-                req = BuyingRequest.model_validate({
-                    "ID": int(doc.get("ID")),
-                    "ProductId": int(doc.get("ProductId")),
-                    "RequestedBy": int(doc.get("RequestedBy")),
-                    "Status": status_val,
-                    "CreatedAt": doc.get("CreatedAt"),
-                })
-                requests.append(req)
+            written = 0
+            kwargs = {
+                "TableName": self.table_name,
+                "KeyConditionExpression": "pk = :pk AND begins_with(sk, :skPrefix)",
+                "ExpressionAttributeValues": {":pk": {"S": "BUYREQUEST"}, ":skPrefix": {"S": f"STATUS#{BuyRequestStatus.Pending.value}#"}},
+            }
+            async for items in query_pages(self.dynamodb, **kwargs):
+                for req in sorted((self._to_buying_request(item) for item in items), key=lambda r: int(r.id)):
+                    try:
+                        await asyncio.to_thread(
+                            self.dynamodb.put_item,
+                            TableName=self.table_name,
+                            Item={**self._pending_sentinel_key(req.product_id, req.requested_by), "ID": {"N": str(int(req.id))}},
+                            ConditionExpression="attribute_not_exists(pk) AND attribute_not_exists(sk)",
+                        )
+                        written += 1
+                    except botocore.exceptions.ClientError as e:
+                        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                            raise
+            return written
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to backfill pending request sentinels")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while backfilling pending request sentinels")
+            raise RuntimeError(e)
+
+    async def backfill_scoped_copies(self) -> int:
+        # PRODUCT#/LENDER# copies for requests written before those partitions existed; the LenderID they lack
+        # is resolved from the product and stored on the global items too. Safe to re-run
+        try:
+            written = 0
+            kwargs = {
+                "TableName": self.table_name,
+                "KeyConditionExpression": "pk = :pk AND begins_with(sk, :skPrefix)",
+                "ExpressionAttributeValues": {":pk": {"S": "BUYREQUEST"}, ":skPrefix": {"S": "ID#"}},
+            }
+            async for items in query_pages(self.dynamodb, **kwargs):
+                docs = [{k: self.deserializer.deserialize(v) for k, v in item.items()} for item in items]
+                missing = {int(d["ProductId"]) for d in docs if d.get("LenderID") is None}
+                products = await batch_get_items(self.dynamodb, self.table_name, [
+                    {"pk": {"S": "PRODUCT"}, "sk": {"S": f"PRODUCT#{pid}"}} for pid in missing
+                ])
+                lenders = {int(p["ID"]["N"]): int(p["LenderID"]["N"]) for p in products if "LenderID" in p}
+                copies = []
+                for doc in docs:
+                    if doc.get("LenderID") is None and int(doc["ProductId"]) in lenders:
+                        doc["LenderID"] = lenders[int(doc["ProductId"])]
+                    base = {k: v for k, v in doc.items() if k not in ("pk", "sk")}
+                    req = self._to_buying_request(self.serializer.serialize(base)["M"])
+                    status = str(doc["Status"])
+                    copies += [
+                        {**base, "pk": "BUYREQUEST", "sk": f"ID#{req.id}"},
+                        {**base, "pk": "BUYREQUEST", "sk": f"STATUS#{status}#ID#{req.id}"},
+                    ]
+                    copies += [{**base, **k} for k in self._scoped_keys(req, status)]
+                await batch_put_items(self.dynamodb, self.table_name, [self.serializer.serialize(c)["M"] for c in copies])
+                written += len(copies)
+            return written
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to backfill buyer request copies")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while backfilling buyer request copies")
+            raise RuntimeError(e)
+
+    async def get_all_buyer_requests(self, product_id: Optional[int] = None, filter_statuses: Optional[List[str]]=None, fields: Fields = None) -> List[BuyingRequest]:
+        if fields:
+            requests = [r async for page in self.iter_buyer_requests(product_id, filter_statuses, fields) for r in page]
+            requests.sort(key=lambda r: int(r.id))
             return requests
+        try:
+            if product_id:
+                return await self._query_by_statuses(f"PRODUCT#{int(product_id)}", "BUYREQUEST#STATUS#", filter_statuses, "BUYREQUEST#STATUS#")
+            return await self._query_by_statuses("BUYREQUEST", "STATUS#", filter_statuses, "ID#")
         except botocore.exceptions.ClientError as e:
             logger.exception("failed to query buyer requests")
             raise RuntimeError(e)
@@ -80,53 +219,122 @@ class BuyRequestRepo:
             logger.exception("unexpected error while querying buyer requests")
             raise RuntimeError(e)
 
-    async def update_status_buyer_request(self, req_id: int, new_status: str) -> None:
+    async def iter_buyer_requests(self, product_id: Optional[int] = None, filter_statuses: Optional[List[str]] = None, fields: Fields = None) -> AsyncIterator[List[BuyingRequest]]:
+        # unlike get_all_buyer_requests there is no global sort: a status filter streams one status after another
+        if product_id:
+            pk, status_prefix, default_prefix = f"PRODUCT#{int(product_id)}", "BUYREQUEST#STATUS#", "BUYREQUEST#STATUS#"
+        else:
+            pk, status_prefix, default_prefix = "BUYREQUEST", "STATUS#", "ID#"
+        statuses = list(dict.fromkeys(s for s in (filter_statuses or []) if s))
+        prefixes = [f"{status_prefix}{s}#" for s in statuses] or [default_prefix]
+        read = own_fields(fields, BuyingRequest) if fields else None
         try:
-            key = {"pk": {"S": "BUYREQUEST"}, "sk": {"S": f"ID#{req_id}"}}
-            resp = await asyncio.to_thread(self.dynamodb.get_item, TableName=self.table_name, Key=key)
-            item = resp.get("Item")
-            if not item:
-                raise RuntimeError("buyer request not found")
-            doc = {k: self.deserializer.deserialize(v) for k, v in item.items()}
-            old_status = str(doc.get("Status"))
-            update_expr = "SET #s = :status"
-            expr_attr_names = {"#s": "Status"}
-            expr_attr_values = {":status": {"S": new_status}}
-            deletes = [{
-                "Delete": {
-                    "TableName": self.table_name,
-                    "Key": {"pk": {"S": "BUYREQUEST"}, "sk": {"S": f"STATUS#{old_status}#ID#{req_id}"}},
-                }
-            }]
-            update = {
-                "Update": {
+            for sk_prefix in prefixes:
+                kwargs = {
                     "TableName": self.table_name,
-                    "Key": key,
-                    "UpdateExpression": update_expr,
-                    "ExpressionAttributeNames": expr_attr_names,
-                    "ExpressionAttributeValues": expr_attr_values,
+                    "KeyConditionExpression": "pk = :pk AND begins_with(sk, :skPrefix)",
+                    "ExpressionAttributeValues": {":pk": {"S": pk}, ":skPrefix": {"S": sk_prefix}},
+                    "Limit": STREAM_PAGE_SIZE,
                 }
+                if read:
+                    kwargs = with_projection(kwargs, BuyingRequest, read)
+                async for items in query_pages(self.dynamodb, **kwargs):
+                    if not items:
+                        continue
+                    if read:
+                        yield [partial(BuyingRequest, {k: self.deserializer.deserialize(v) for k, v in item.items()}, read) for item in items]
+                    else:
+                        yield [self._to_buying_request(item) for item in items]
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to stream buyer requests")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while streaming buyer requests")
+            raise RuntimeError(e)
+
+    async def get_lender_buyer_requests(self, lender_id: int, filter_statuses: Optional[List[str]] = None) -> List[BuyingRequest]:
+        try:
+            return await self._query_by_statuses(f"LENDER#{int(lender_id)}", "BUYREQUEST#STATUS#", filter_statuses, "BUYREQUEST#STATUS#")
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to query lender buyer requests")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while querying lender buyer requests")
+            raise RuntimeError(e)
+
+    def _status_change_items(self, req: BuyingRequest, new_status: str) -> List[dict]:
+        old_status = req.status.value
+        key = {"pk": {"S": "BUYREQUEST"}, "sk": {"S": f"ID#{req.id}"}}
+        deletes = [{
+            "Delete": {
+                "TableName": self.table_name,
+                "Key": {"pk": {"S": "BUYREQUEST"}, "sk": {"S": f"STATUS#{old_status}#ID#{req.id}"}},
             }
-            put_new = {
-                "Put": {
+        }]
+        if old_status == BuyRequestStatus.Pending.value and new_status != BuyRequestStatus.Pending.value:
+            deletes.append({
+                "Delete": {
                     "TableName": self.table_name,
-                    "Item": {
-                        "pk": {"S": "BUYREQUEST"},
-                        "sk": {"S": f"STATUS#{new_status}#ID#{req_id}"},
-                        "Status": {"S": new_status},
-                        "ID": {"N": str(req_id)},
-                    },
+                    "Key": self._pending_sentinel_key(req.product_id, req.requested_by),
                 }
+            })
+        update = {
+            "Update": {
+                "TableName": self.table_name,
+                "Key": key,
+                "UpdateExpression": "SET #s = :status",
+                "ConditionExpression": "#s = :oldStatus",
+                "ExpressionAttributeNames": {"#s": "Status"},
+                "ExpressionAttributeValues": {":status": {"S": new_status}, ":oldStatus": {"S": old_status}},
             }
-            txn = deletes + [update] + [put_new]
+        }
+        deletes += [
+            {"Delete": {"TableName": self.table_name, "Key": self.serializer.serialize(k)["M"]}}
+            for k in self._scoped_keys(req, old_status)
+        ]
+        base = {
+            "ID": int(req.id),
+            "ProductId": int(req.product_id),
+            "RequestedBy": int(req.requested_by),
+            "Status": new_status,
+            "CreatedAt": req.created_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+        if req.lender_id:
+            base["LenderID"] = int(req.lender_id)
+        base.update(self._window_attributes(req))
+        new_items = [{**base, "pk": "BUYREQUEST", "sk": f"STATUS#{new_status}#ID#{req.id}"}]
+        new_items += [{**base, **k} for k in self._scoped_keys(req, new_status)]
+        puts = [{"Put": {"TableName": self.table_name, "Item": self.serializer.serialize(i)["M"]}} for i in new_items]
+        pending_delta = int(new_status == BuyRequestStatus.Pending.value) - int(old_status == BuyRequestStatus.Pending.value)
+        counters = user_summary_update(self.table_name, req.requested_by, {"PendingBuyRequests": pending_delta})
+        if req.lender_id:
+            counters += lender_counters_update(self.table_name, req.lender_id, {"PendingBuyRequests": pending_delta})
+        return deletes + [update] + puts + counters
+
+    async def change_status(self, req: BuyingRequest, new_status: str, related_items: Optional[List[dict]] = None) -> None:
+        # related_items (order puts, product flips, ...) commit or fail together with the status change
+        try:
+            txn = merge_counter_updates(self._status_change_items(req, new_status) + list(related_items or []))
             await asyncio.to_thread(self.dynamodb.transact_write_items, TransactItems=txn)
+            if related_items:
+                # approvals can flip the product's availability
+                response_cache.invalidate("products")
         except botocore.exceptions.ClientError as e:
-            logger.exception("failed to update buyer request status")
+            reasons = e.response.get("CancellationReasons", [])
+            if e.response["Error"]["Code"] == "TransactionCanceledException" and any(r.get("Code") == "ConditionalCheckFailed" for r in reasons):
+                raise RuntimeError("buyer request or product changed concurrently, please retry")
+            logger.exception("failed to change buyer request status")
             raise RuntimeError(e)
         except Exception as e:
-            logger.exception("unexpected error while updating buyer request status")
+            logger.exception("unexpected error while changing buyer request status")
             raise RuntimeError(e)
 
+    async def update_status_buyer_request(self, req_id: int, new_status: str) -> None:
+        req = await self.get_buyer_request_by_id(req_id)
+        if req is None:
+            raise RuntimeError("buyer request not found")
+        await self.change_status(req, new_status)
+
     async def get_buyer_request_by_id(self, req_id: int) -> Optional[BuyingRequest]:
         try:
             key = {"pk": {"S": "BUYREQUEST"}, "sk": {"S": f"ID#{req_id}"}}
@@ -134,14 +342,7 @@ class BuyRequestRepo:
             item = resp.get("Item")
             if not item:
                 return None
-            doc = {k: self.deserializer.deserialize(v) for k, v in item.items()}
-            return BuyingRequest.model_validate({
-                "ID": int(doc.get("ID")),
-                "ProductId": int(doc.get("ProductId")),
-                "RequestedBy": int(doc.get("RequestedBy")),
-                "Status": str(doc.get("Status")),
-                "CreatedAt": doc.get("CreatedAt"),
-            })
+            return self._to_buying_request(item)
         except botocore.exceptions.ClientError as e:
             logger.exception("failed to get buyer request by id")
             raise RuntimeError(e)
@@ -149,11 +350,52 @@ class BuyRequestRepo:
             logger.exception("unexpected error while getting buyer request by id")
             raise RuntimeError(e)
 
+    async def get_buyer_requests_by_ids(self, req_ids: List[int]) -> Dict[int, BuyingRequest]:
+        keys = [{"pk": {"S": "BUYREQUEST"}, "sk": {"S": f"ID#{int(i)}"}} for i in req_ids]
+        try:
+            items = await batch_get_items(self.dynamodb, self.table_name, keys)
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to batch get buyer requests")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while batch getting buyer requests")
+            raise RuntimeError(e)
+        requests = [self._to_buying_request(item) for item in items]
+        return {int(r.id): r for r in requests}
+
     async def delete_buyer_request(self, req_id: int) -> None:
+        req = await self.get_buyer_request_by_id(req_id)
+        if req is None:
+            return
         try:
-            key = {"pk": {"S": "BUYREQUEST"}, "sk": {"S": f"ID#{req_id}"}}
-            await asyncio.to_thread(self.dynamodb.delete_item, TableName=self.table_name, Key=key)
+            status = req.status.value
+            keys = [
+                {"pk": {"S": "BUYREQUEST"}, "sk": {"S": f"STATUS#{status}#ID#{req.id}"}},
+                *(self.serializer.serialize(k)["M"] for k in self._scoped_keys(req, status)),
+            ]
+            if req.status == BuyRequestStatus.Pending:
+                # the sentinel would otherwise block the requester from asking for this product again
+                keys.append(self._pending_sentinel_key(req.product_id, req.requested_by))
+            # every copy goes with the primary item, which must still hold the status the copies were read under
+            transact_items = [{
+                "Delete": {
+                    "TableName": self.table_name,
+                    "Key": {"pk": {"S": "BUYREQUEST"}, "sk": {"S": f"ID#{req.id}"}},
+                    "ConditionExpression": "#s = :status",
+                    "ExpressionAttributeNames": {"#s": "Status"},
+                    "ExpressionAttributeValues": {":status": {"S": status}},
+                }
+            }]
+            transact_items += [{"Delete": {"TableName": self.table_name, "Key": k}} for k in keys]
+            pending_delta = -int(req.status == BuyRequestStatus.Pending)
+            transact_items += user_summary_update(self.table_name, req.requested_by, {"PendingBuyRequests": pending_delta})
+            if req.lender_id:
+                transact_items += lender_counters_update(self.table_name, req.lender_id, {"PendingBuyRequests": pending_delta})
+            await asyncio.to_thread(self.dynamodb.transact_write_items, TransactItems=transact_items)
         except botocore.exceptions.ClientError as e:
+            reasons = e.response.get("CancellationReasons", [])
+            if e.response["Error"]["Code"] == "TransactionCanceledException" and any(r.get("Code") == "ConditionalCheckFailed" for r in reasons):
+                raise RuntimeError("buyer request changed concurrently, please retry")
             logger.exception("failed to delete buyer request")
             raise RuntimeError(e)
         except Exception as e:
@@ -3,7 +3,11 @@ from boto3.dynamodb.types import TypeDeserializer
 from boto3.dynamodb.types import TypeSerializer
 from models.category import Category
 import botocore.exceptions
-from typing import List,Optional
+from typing import Dict, List, Optional
+from database.batch import batch_get_items
+from database.versions import bump_collection_version, collection_version_key, read_version
+from helpers.response_cache import response_cache
+from helpers.request_scope import memoized
 import time
 import asyncio
 import logging
@@ -38,6 +42,8 @@ class CategoryRepo:
                 TableName=self.table_name,
                 Item=item_db,
             )
+            await bump_collection_version(self.dynamodb, self.table_name, "CATEGORY")
+            response_cache.invalidate("categories")
         
         except Exception as e:
             logger.exception("failed to create the category")
@@ -45,7 +51,24 @@ class CategoryRepo:
 
 
 
+    async def get_version(self) -> int:
+        return await memoized("categories:version", self._load_version)
+
+    async def _load_version(self) -> int:
+        # bumped after every category write, so it must be read before the list it tags
+        try:
+            return await read_version(self.dynamodb, self.table_name, collection_version_key("CATEGORY")) or 0
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to read the categories version")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while reading the categories version")
+            raise RuntimeError(e)
+
     async def get_all_categories(self) -> List[Category]:
+        return await memoized("categories:all", self._load_all_categories)
+
+    async def _load_all_categories(self) -> List[Category]:
         try:
             response = await asyncio.to_thread(
                 self.dynamodb.query,
@@ -124,6 +147,30 @@ class CategoryRepo:
             raise RuntimeError(e)
         
 
+    async def find_by_ids(self, ids: List[int]) -> Dict[int, Category]:
+        ids = sorted({int(i) for i in ids})
+        return await memoized(("categories:ids", tuple(ids)), lambda: self._load_by_ids(ids))
+
+    async def _load_by_ids(self, ids: List[int]) -> Dict[int, Category]:
+        keys = [{"pk": {"S": "CATEGORY"}, "sk": {"S": f"ID#{int(i)}"}} for i in ids]
+        try:
+            items = await batch_get_items(self.dynamodb, self.table_name, keys)
+        except Exception as e:
+            logger.exception("failed to batch get categories")
+            raise RuntimeError(e)
+
+        categories: Dict[int, Category] = {}
+        for item in items:
+            doc = {k: self.deserializer.deserialize(v) for k, v in item.items()}
+            category = Category.model_validate({
+                "ID": doc.get("ID"),
+                "Name": doc.get("Name"),
+                "Price": doc.get("Price"),
+                "Security": doc.get("Security"),
+            })
+            categories[int(category.id)] = category
+        return categories
+
     async def update_category(self, category: Category) -> None:
         if category.id is None:
             raise RuntimeError("category id must not be None for update")
@@ -144,6 +191,8 @@ class CategoryRepo:
                 Item=item,
                 ConditionExpression="attribute_exists(pk) AND attribute_exists(sk)",
             )
+            await bump_collection_version(self.dynamodb, self.table_name, "CATEGORY")
+            response_cache.invalidate("categories")
         except botocore.exceptions.ClientError as e:
             logger.exception("failed to update category ")
             raise RuntimeError("e")
@@ -164,6 +213,8 @@ class CategoryRepo:
                 },
                 ConditionExpression="attribute_exists(pk) AND attribute_exists(sk)",
             )
+            await bump_collection_version(self.dynamodb, self.table_name, "CATEGORY")
+            response_cache.invalidate("categories")
         except botocore.exceptions.ClientError as e:
             logger.exception("failed to delete category ")
             raise RuntimeError(e)
@@ -3,13 +3,17 @@ import asyncio
 import time
 import logging
 import botocore
-from typing import List
+from typing import Dict, List, Optional, Tuple
 from boto3.dynamodb.types import TypeSerializer, TypeDeserializer
+from database.batch import batch_get_items, batch_put_items
+from database.pagination import decode_cursor, encode_cursor, page_size
 from models.feedback import Feedback
+from models.rating import LenderRating
+from repository.stats_repository import feedback_due_key, user_summary_update
 from helpers.app_settings import AppSettings
 
 logger = logging.getLogger(__name__)
-settings = AppSettings() 
+settings = AppSettings()
 
 class FeedbackRepo:
     def __init__(self, dynamodb):
@@ -18,7 +22,63 @@ class FeedbackRepo:
         self.serializer = TypeSerializer()
         self.deserializer = TypeDeserializer()
 
-    async def create_feedback(self, feedback: Feedback) -> None:
+    def _user_copies(self, item: dict) -> List[dict]:
+        # per-user partitions so profile reads only touch that user's feedback
+        return [
+            {**item, "pk": f"GIVENBY#{int(item['GivenBy'])}", "sk": f"FEEDBACK#{int(item['ID'])}"},
+            {**item, "pk": f"GIVENTO#{int(item['GivenTo'])}", "sk": f"FEEDBACK#{int(item['ID'])}"},
+        ]
+
+    def _rating_key(self, lender_id: int) -> dict:
+        return {"pk": {"S": f"LENDER#{int(lender_id)}"}, "sk": {"S": "RATING"}}
+
+    def _rating_update_item(self, lender_id: int, rating: int) -> dict:
+        # ADD creates missing attributes, so the first feedback initialises the aggregate
+        return {
+            "Update": {
+                "TableName": self.table_name,
+                "Key": self._rating_key(lender_id),
+                "UpdateExpression": "ADD RatingCount :one, RatingSum :rating, #star :one",
+                "ExpressionAttributeNames": {"#star": f"Star{int(rating)}"},
+                "ExpressionAttributeValues": {":one": {"N": "1"}, ":rating": {"N": str(int(rating))}},
+            }
+        }
+
+    def _to_rating(self, lender_id: int, item: Optional[dict]) -> LenderRating:
+        doc = {k: self.deserializer.deserialize(v) for k, v in (item or {}).items()}
+        count = int(doc.get("RatingCount", 0))
+        total = int(doc.get("RatingSum", 0))
+        return LenderRating(
+            lender_id=int(lender_id),
+            count=count,
+            total=total,
+            average=round(total / count, 2) if count else 0.0,
+            histogram={star: int(doc.get(f"Star{star}", 0)) for star in range(1, 6)},
+        )
+
+    def _to_feedback(self, item: dict) -> Feedback:
+        doc = {k: self.deserializer.deserialize(v) for k, v in item.items()}
+        return Feedback.model_validate({
+            "ID": int(doc.get("ID")),
+            "GivenBy": int(doc.get("GivenBy")),
+            "GivenTo": int(doc.get("GivenTo")),
+            "Text": doc.get("Text"),
+            "Rating": int(doc.get("Rating")),
+            "CreatedAt": doc.get("CreatedAt"),
+        })
+
+    async def is_feedback_due(self, user_id: int, order_id: int) -> bool:
+        try:
+            resp = await asyncio.to_thread(self.dynamodb.get_item, TableName=self.table_name, Key=feedback_due_key(user_id, order_id))
+            return "Item" in resp
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to check feedback due marker")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while checking feedback due marker")
+            raise RuntimeError(e)
+
+    async def create_feedback(self, feedback: Feedback, due_order_id: Optional[int] = None) -> None:
         try:
             fid = feedback.id if feedback.id else time.time_ns()
             created_at = feedback.created_at.isoformat()
@@ -32,12 +92,22 @@ class FeedbackRepo:
                 "Rating": int(feedback.rating),
                 "CreatedAt": created_at,
             }
-            serialized_item = self.serializer.serialize(item)["M"]
-            await asyncio.to_thread(
-                self.dynamodb.put_item,
-                TableName=self.table_name,
-                Item=serialized_item,
-            )
+            transact_items = [
+                {"Put": {"TableName": self.table_name, "Item": self.serializer.serialize(i)["M"]}}
+                for i in [item] + self._user_copies(item)
+            ]
+            transact_items.append(self._rating_update_item(feedback.given_to, feedback.rating))
+            if due_order_id:
+                # settles the borrower's pending review; the condition stops a double submit counting twice
+                transact_items.append({
+                    "Delete": {
+                        "TableName": self.table_name,
+                        "Key": feedback_due_key(feedback.given_by, due_order_id),
+                        "ConditionExpression": "attribute_exists(pk)",
+                    }
+                })
+                transact_items += user_summary_update(self.table_name, feedback.given_by, {"FeedbackToGive": -1})
+            await asyncio.to_thread(self.dynamodb.transact_write_items, TransactItems=transact_items)
         except botocore.exceptions.ClientError as e:
             logger.exception("failed to create feedback")
             raise RuntimeError(e)
@@ -54,19 +124,7 @@ class FeedbackRepo:
                 ExpressionAttributeValues={":pk": {"S": "FEEDBACK"}},
             )
             items = resp.get("Items", [])
-            feedbacks: List[Feedback] = []
-            for item in items:
-                doc = {k: self.deserializer.deserialize(v) for k, v in item.items()}
-                fb = Feedback.model_validate({
-                    "ID": int(doc.get("ID")),
-                    "GivenBy": int(doc.get("GivenBy")),
-                    "GivenTo": int(doc.get("GivenTo")),
-                    "Text": doc.get("Text"),
-                    "Rating": int(doc.get("Rating")),
-                    "CreatedAt": doc.get("CreatedAt"),
-                })
-                feedbacks.append(fb)
-            return feedbacks
+            return [self._to_feedback(item) for item in items]
         except botocore.exceptions.ClientError as e:
             logger.exception("failed to query feedbacks")
             raise RuntimeError(e)
@@ -74,5 +132,126 @@ class FeedbackRepo:
             logger.exception("unexpected error while querying feedbacks")
             raise RuntimeError(e)
 
+    async def _query_page(self, pk: str, limit: Optional[int], cursor: Optional[str]) -> Tuple[List[Feedback], Optional[str]]:
+        kwargs = {
+            "TableName": self.table_name,
+            "KeyConditionExpression": "pk = :pk AND begins_with(sk, :skPrefix)",
+            "ExpressionAttributeValues": {":pk": {"S": pk}, ":skPrefix": {"S": "FEEDBACK#"}},
+            "ScanIndexForward": False,
+            "Limit": page_size(limit),
+        }
+        start_key = decode_cursor(cursor)
+        if start_key:
+            kwargs["ExclusiveStartKey"] = start_key
+        resp = await asyncio.to_thread(self.dynamodb.query, **kwargs)
+        feedbacks = [self._to_feedback(item) for item in resp.get("Items", [])]
+        return feedbacks, encode_cursor(resp.get("LastEvaluatedKey"))
+
+    async def get_feedbacks_given_by(self, user_id: int, limit: Optional[int] = None, cursor: Optional[str] = None) -> Tuple[List[Feedback], Optional[str]]:
+        try:
+            return await self._query_page(f"GIVENBY#{int(user_id)}", limit, cursor)
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to query given feedbacks")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while querying given feedbacks")
+            raise RuntimeError(e)
+
+    async def get_feedbacks_given_to(self, user_id: int, limit: Optional[int] = None, cursor: Optional[str] = None) -> Tuple[List[Feedback], Optional[str]]:
+        try:
+            return await self._query_page(f"GIVENTO#{int(user_id)}", limit, cursor)
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to query received feedbacks")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while querying received feedbacks")
+            raise RuntimeError(e)
+
+    async def get_lender_rating(self, lender_id: int) -> LenderRating:
+        try:
+            resp = await asyncio.to_thread(self.dynamodb.get_item, TableName=self.table_name, Key=self._rating_key(lender_id))
+            return self._to_rating(lender_id, resp.get("Item"))
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to get lender rating")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while getting lender rating")
+            raise RuntimeError(e)
+
+    async def get_lender_ratings(self, lender_ids: List[int]) -> Dict[int, LenderRating]:
+        try:
+            items = await batch_get_items(self.dynamodb, self.table_name, [self._rating_key(i) for i in lender_ids])
+            by_lender = {int(item["pk"]["S"].split("#")[1]): item for item in items}
+            return {int(i): self._to_rating(i, by_lender.get(int(i))) for i in lender_ids}
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to batch get lender ratings")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while batch getting lender ratings")
+            raise RuntimeError(e)
+
+    async def backfill_user_partitions(self) -> int:
+        # copies feedback written before the GIVENBY#/GIVENTO# partitions existed; safe to re-run
+        try:
+            written = 0
+            kwargs = {
+                "TableName": self.table_name,
+                "KeyConditionExpression": "pk = :pk",
+                "ExpressionAttributeValues": {":pk": {"S": "FEEDBACK"}},
+            }
+            while True:
+                resp = await asyncio.to_thread(self.dynamodb.query, **kwargs)
+                copies = []
+                for item in resp.get("Items", []):
+                    doc = {k: self.deserializer.deserialize(v) for k, v in item.items()}
+                    copies += [self.serializer.serialize(c)["M"] for c in self._user_copies(doc)]
+                await batch_put_items(self.dynamodb, self.table_name, copies)
+                written += len(copies)
+                last_key = resp.get("LastEvaluatedKey")
+                if not last_key:
+                    return written
+                kwargs["ExclusiveStartKey"] = last_key
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to backfill feedback partitions")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while backfilling feedback partitions")
+            raise RuntimeError(e)
+
+    async def backfill_lender_ratings(self) -> int:
+        # recomputes every lender aggregate from the global partition; run while feedback writes are quiet
+        try:
+            totals: Dict[int, Dict[str, int]] = {}
+            kwargs = {
+                "TableName": self.table_name,
+                "KeyConditionExpression": "pk = :pk",
+                "ExpressionAttributeValues": {":pk": {"S": "FEEDBACK"}},
+            }
+            while True:
+                resp = await asyncio.to_thread(self.dynamodb.query, **kwargs)
+                for item in resp.get("Items", []):
+                    doc = {k: self.deserializer.deserialize(v) for k, v in item.items()}
+                    rating = int(doc["Rating"])
+                    agg = totals.setdefault(int(doc["GivenTo"]), {"RatingCount": 0, "RatingSum": 0})
+                    agg["RatingCount"] += 1
+                    agg["RatingSum"] += rating
+                    agg[f"Star{rating}"] = agg.get(f"Star{rating}", 0) + 1
+                last_key = resp.get("LastEvaluatedKey")
+                if not last_key:
+                    break
+                kwargs["ExclusiveStartKey"] = last_key
+            items = [
+                self.serializer.serialize({"pk": f"LENDER#{lender_id}", "sk": "RATING", **agg})["M"]
+                for lender_id, agg in totals.items()
+            ]
+            await batch_put_items(self.dynamodb, self.table_name, items)
+            return len(items)
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to backfill lender ratings")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while backfilling lender ratings")
+            raise RuntimeError(e)
+
     async def save(self) -> None:
         return
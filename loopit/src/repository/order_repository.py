@@ -4,17 +4,24 @@ import time
 import logging
 import botocore
 from datetime import datetime,timezone
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 from decimal import Decimal
 from boto3.dynamodb.types import TypeSerializer, TypeDeserializer
 from models.orders import Order
 from models.enums.order_status import OrderStatus
 from repository.product_repository import ProductRepo
+from database.batch import batch_get_items
+from database.pagination import STREAM_PAGE_SIZE, query_pages
+from repository.stats_repository import feedback_due_key, lender_counters_update, merge_counter_updates, user_summary_update
 from helpers.app_settings import AppSettings
+from helpers.fields import Fields, own_fields, partial, with_projection
+from helpers.response_cache import response_cache
 
 logger = logging.getLogger(__name__)
 settings = AppSettings()
 
+ACTIVE_STATUSES = (OrderStatus.InUse.value, OrderStatus.ReturnRequested.value)
+
 class OrderRepo:
     def __init__(self, dynamodb, product_repo:ProductRepo):
         self.dynamodb = dynamodb
@@ -23,35 +30,63 @@ class OrderRepo:
         self.serializer = TypeSerializer()
         self.deserializer = TypeDeserializer()
 
-    async def create_order(self, order: Order) -> None:
-        try:
-            oid = order.id if order.id else time.time_ns()
+    def _to_order(self, item: dict) -> Order:
+        doc = {k: self.deserializer.deserialize(v) for k, v in item.items()}
+        return Order.model_validate({
+            "ID": int(doc.get("ID")),
+            "ProductID": int(doc.get("ProductID")),
+            "UserID": int(doc.get("UserID")),
+            "StartDate": doc.get("StartDate"),
+            "EndDate": doc.get("EndDate"),
+            "TotalAmount": float(doc.get("TotalAmount")),
+            "SecurityAmount": float(doc.get("SecurityAmount")),
+            "Status": str(doc.get("Status")),
+            "CreatedAt": doc.get("CreatedAt"),
+        })
 
-            start_date = order.start_date.strftime("%Y-%m-%dT%H:%M:%SZ")
-            end_date = order.end_date.strftime("%Y-%m-%dT%H:%M:%SZ")
+    def order_put_items(self, order: Order, lender_id: int) -> List[dict]:
+        if not order.id:
+            order.id = time.time_ns()
+        oid = order.id
+
+        start_date = order.start_date.strftime("%Y-%m-%dT%H:%M:%SZ")
+        end_date = order.end_date.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+        created_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        base = {
+            "ID": int(oid),
+            "ProductID": int(order.product_id),
+            "UserID": int(order.user_id),
+            "StartDate": start_date,
+            "EndDate": end_date,
+            "TotalAmount": Decimal(str(order.total_amount)),
+            "SecurityAmount": Decimal(str(order.security_amount)),
+            "Status": order.status.value,
+            "CreatedAt": created_at,
+        }
+        items = [
+            {**base, "pk": f"USER#{order.user_id}", "sk": f"ORDER#ID#{oid}"},
+            {**base, "pk": f"LENDER#{lender_id}", "sk": f"ORDER#ID#{oid}"},
+            {**base, "pk": "ORDER", "sk": f"ID#{oid}"},
+        ]
+        puts = [{"Put": {"TableName": self.table_name, "Item": self.serializer.serialize(i)["M"]}} for i in items]
+        active = int(order.status in ACTIVE_STATUSES)
+        return (
+            puts
+            + lender_counters_update(self.table_name, lender_id, {
+                "ActiveRentals": active,
+                "LifetimeEarnings": Decimal(str(order.total_amount)),
+            })
+            + user_summary_update(self.table_name, order.user_id, {"ActiveRentals": active})
+        )
 
-            created_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    async def create_order(self, order: Order) -> None:
+        try:
             product_resp = await self.product_repo.find_by_id(order.product_id)
             if product_resp is None:
                 raise RuntimeError("failed to fetch product for lender info")
             lender_id = int(product_resp.product.lender_id)
-            base = {
-                "ID": int(oid),
-                "ProductID": int(order.product_id),
-                "UserID": int(order.user_id),
-                "StartDate": start_date,
-                "EndDate": end_date,
-                "TotalAmount": Decimal(str(order.total_amount)),
-                "SecurityAmount": Decimal(str(order.security_amount)),
-                "Status": order.status.value,
-                "CreatedAt": created_at,
-            }
-            items = [
-                {**base, "pk": f"USER#{order.user_id}", "sk": f"ORDER#ID#{oid}"},
-                {**base, "pk": f"LENDER#{lender_id}", "sk": f"ORDER#ID#{oid}"},
-                {**base, "pk": "ORDER", "sk": f"ID#{oid}"},
-            ]
-            transact_items = [{"Put": {"TableName": self.table_name, "Item": self.serializer.serialize(i)["M"]}} for i in items]
+            transact_items = self.order_put_items(order, lender_id)
             await asyncio.to_thread(self.dynamodb.transact_write_items, TransactItems=transact_items)
         except botocore.exceptions.ClientError as e:
             logger.exception("failed to create order")
@@ -60,6 +95,71 @@ class OrderRepo:
             logger.exception("unexpected error while creating order")
             raise RuntimeError(e)
 
+    def status_update_items(self, order: Order, lender_id: int, new_status: str) -> List[dict]:
+        keys = [
+            {"pk": {"S": f"USER#{order.user_id}"}, "sk": {"S": f"ORDER#ID#{order.id}"}},
+            {"pk": {"S": f"LENDER#{lender_id}"}, "sk": {"S": f"ORDER#ID#{order.id}"}},
+            {"pk": {"S": "ORDER"}, "sk": {"S": f"ID#{order.id}"}},
+        ]
+        old_status = order.status.value if isinstance(order.status, OrderStatus) else order.status
+        update_expr = "SET #s = :status"
+        expr_attr_names = {"#s": "Status"}
+        expr_attr_values = {":status": {"S": new_status}}
+        updates = [
+            {
+                "Update": {
+                    "TableName": self.table_name,
+                    "Key": key,
+                    "UpdateExpression": update_expr,
+                    "ExpressionAttributeNames": expr_attr_names,
+                    "ExpressionAttributeValues": expr_attr_values,
+                }
+            }
+            for key in keys
+        ]
+        # the deltas below assume old_status; a transition that raced ahead of this one cancels the whole transaction
+        updates[2]["Update"]["ConditionExpression"] = "#s = :old"
+        updates[2]["Update"]["ExpressionAttributeValues"] = {**expr_attr_values, ":old": {"S": str(old_status)}}
+        active_delta = int(new_status in ACTIVE_STATUSES) - int(old_status in ACTIVE_STATUSES)
+        returned = new_status == OrderStatus.Returned.value and old_status != OrderStatus.Returned.value
+        if returned:
+            # the borrower owes feedback for every returned order; the marker is consumed when they give it
+            updates.append({
+                "Put": {
+                    "TableName": self.table_name,
+                    "Item": {**feedback_due_key(order.user_id, order.id), "OrderID": {"N": str(int(order.id))}},
+                }
+            })
+        return (
+            updates
+            + lender_counters_update(self.table_name, lender_id, {
+                "ActiveRentals": active_delta,
+                "PendingReturns": int(new_status == OrderStatus.ReturnRequested.value) - int(old_status == OrderStatus.ReturnRequested.value),
+            })
+            + user_summary_update(self.table_name, order.user_id, {
+                "ActiveRentals": active_delta,
+                "FeedbackToGive": int(returned),
+            })
+        )
+
+    async def apply_status_change(self, order: Order, lender_id: int, new_status: str, related_items: Optional[List[dict]] = None) -> None:
+        # caller already holds the order and its lender, so nothing is re-read here;
+        # related_items (product availability, ...) commit or fail together with the status change
+        try:
+            transact_items = merge_counter_updates(self.status_update_items(order, lender_id, new_status) + list(related_items or []))
+            await asyncio.to_thread(self.dynamodb.transact_write_items, TransactItems=transact_items)
+            if related_items:
+                response_cache.invalidate("products")
+        except botocore.exceptions.ClientError as e:
+            reasons = e.response.get("CancellationReasons", [])
+            if e.response["Error"]["Code"] == "TransactionCanceledException" and any(r.get("Code") == "ConditionalCheckFailed" for r in reasons):
+                raise RuntimeError("order status changed concurrently, please retry")
+            logger.exception("failed to update order status")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while updating order status")
+            raise RuntimeError(e)
+
     async def update_order_status(self, order_id: int, new_status: str) -> None:
         try:
             order = await self.get_order_by_id(order_id)
@@ -69,33 +169,10 @@ class OrderRepo:
             if product_resp is None:
                 raise RuntimeError("failed to fetch product for order")
             lender_id = int(product_resp.product.lender_id)
-            keys = [
-                {"pk": {"S": f"USER#{order.user_id}"}, "sk": {"S": f"ORDER#ID#{order_id}"}},
-                {"pk": {"S": f"LENDER#{lender_id}"}, "sk": {"S": f"ORDER#ID#{order_id}"}},
-                {"pk": {"S": "ORDER"}, "sk": {"S": f"ID#{order_id}"}},
-            ]
-            update_expr = "SET #s = :status"
-            expr_attr_names = {"#s": "Status"}
-            expr_attr_values = {":status": {"S": new_status}}
-            transact_items = [
-                {
-                    "Update": {
-                        "TableName": self.table_name,
-                        "Key": key,
-                        "UpdateExpression": update_expr,
-                        "ExpressionAttributeNames": expr_attr_names,
-                        "ExpressionAttributeValues": expr_attr_values,
-                    }
-                }
-                for key in keys
-            ]
-            await asyncio.to_thread(self.dynamodb.transact_write_items, TransactItems=transact_items)
-        except botocore.exceptions.ClientError as e:
-            logger.exception("failed to update order status")
-            raise RuntimeError(e)
         except Exception as e:
             logger.exception("unexpected error while updating order status")
             raise RuntimeError(e)
+        await self.apply_status_change(order, lender_id, new_status)
 
     async def get_order_history(self, user_id: int, filter_statuses: List[str]) -> List[Order]:
         try:
@@ -133,7 +210,9 @@ class OrderRepo:
             logger.exception("unexpected error while querying order history")
             raise RuntimeError(e)
 
-    async def get_lender_orders(self, lender_id: int) -> List[Order]:
+    async def get_lender_orders(self, lender_id: int, fields: Fields = None) -> List[Order]:
+        if fields:
+            return [order async for page in self.iter_lender_orders(lender_id, fields) for order in page]
         try:
             resp = await asyncio.to_thread(
                 self.dynamodb.query,
@@ -165,6 +244,31 @@ class OrderRepo:
             logger.exception("unexpected error while querying lender orders")
             raise RuntimeError(e)
 
+    async def iter_lender_orders(self, lender_id: int, fields: Fields = None) -> AsyncIterator[List[Order]]:
+        kwargs = {
+            "TableName": self.table_name,
+            "KeyConditionExpression": "pk = :pk AND begins_with(sk, :skPrefix)",
+            "ExpressionAttributeValues": {":pk": {"S": f"LENDER#{lender_id}"}, ":skPrefix": {"S": "ORDER#"}},
+            "Limit": STREAM_PAGE_SIZE,
+        }
+        read = own_fields(fields, Order) if fields else None
+        if read:
+            kwargs = with_projection(kwargs, Order, read)
+        try:
+            async for items in query_pages(self.dynamodb, **kwargs):
+                if not items:
+                    continue
+                if read:
+                    yield [partial(Order, {k: self.deserializer.deserialize(v) for k, v in item.items()}, read) for item in items]
+                else:
+                    yield [self._to_order(item) for item in items]
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to stream lender orders")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while streaming lender orders")
+            raise RuntimeError(e)
+
     async def get_order_by_id(self, order_id: int) -> Optional[Order]:
         try:
             key = {"pk": {"S": "ORDER"}, "sk": {"S": f"ID#{order_id}"}}
@@ -172,21 +276,23 @@ class OrderRepo:
             item = resp.get("Item")
             if not item:
                 return None
-            doc = {k: self.deserializer.deserialize(v) for k, v in item.items()}
-            return Order.model_validate({
-                "ID": int(doc.get("ID")),
-                "ProductID": int(doc.get("ProductID")),
-                "UserID": int(doc.get("UserID")),
-                "StartDate": doc.get("StartDate"),
-                "EndDate": doc.get("EndDate"),
-                "TotalAmount": float(doc.get("TotalAmount")),
-                "SecurityAmount": float(doc.get("SecurityAmount")),
-                "Status": str(doc.get("Status")),
-                "CreatedAt": doc.get("CreatedAt"),
-            })
+            return self._to_order(item)
         except botocore.exceptions.ClientError as e:
             logger.exception("failed to get order by id")
             raise RuntimeError(e)
         except Exception as e:
             logger.exception("unexpected error while getting order by id")
             raise RuntimeError(e)
+
+    async def get_orders_by_ids(self, order_ids: List[int]) -> Dict[int, Order]:
+        keys = [{"pk": {"S": "ORDER"}, "sk": {"S": f"ID#{int(i)}"}} for i in order_ids]
+        try:
+            items = await batch_get_items(self.dynamodb, self.table_name, keys)
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to batch get orders")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while batch getting orders")
+            raise RuntimeError(e)
+        orders = [self._to_order(item) for item in items]
+        return {int(o.id): o for o in orders}
@@ -3,17 +3,36 @@ import asyncio
 import time
 import logging
 import botocore
-from typing import Optional, List
+from typing import AsyncIterator, Dict, FrozenSet, Iterable, Optional, List
+from database.batch import batch_get_items
+from database.pagination import STREAM_PAGE_SIZE, query_pages
+from database.versions import read_version, with_version_bump
+from repository.stats_repository import lender_counters_update
 from repository.category_repository import CategoryRepo
 from repository.user.user_interface import UserRepo
-from models.user import User
 from helpers.app_settings import AppSettings
-from models.product import Product,ProductFilter,ProductResponse 
+from helpers.fields import Fields, own_fields, partial, with_projection
+from helpers.response_cache import response_cache
+from helpers.watermark import parse_watermark
+from models.product import Product,ProductChanges,ProductFilter,ProductResponse 
 from boto3.dynamodb.types import TypeSerializer, TypeDeserializer
 
 logger = logging.getLogger(__name__)
 settings = AppSettings()
 
+# every product write also puts a PRODUCTCHANGE item keyed by its write time (ns), deletes included as tombstones,
+# so a client holding a watermark reads only what changed since. Entries expire through the table's TTL.
+CHANGE_LOG_PK = "PRODUCTCHANGE"
+CHANGE_LOG_RETENTION_SECONDS = int(settings.PRODUCT_CHANGES_RETENTION_DAYS or 30) * 86400
+# the newest entries are held back this long: a transaction stamped earlier may still be committing,
+# and a watermark handed out past it would skip that change for good
+CHANGE_LOG_SETTLE_NS = 2 * 10**9
+CHANGES_PAGE_SIZE = 100
+
+
+def _change_sk(changed_at: int, product_id: int) -> str:
+    return f"{changed_at:020d}#{product_id}"
+
 class ProductRepo:
     def __init__(self, dynamodb, category_repo: CategoryRepo | None, user_repo:UserRepo |None):
         self.dynamodb = dynamodb
@@ -44,8 +63,11 @@ class ProductRepo:
             {**base, "pk": f"CATEGORY#{product.category_id}", "sk": f"PRODUCT#{pid}"},
         ]
         transact_items = [{"Put": {"TableName": self.table_name, "Item": self.serializer.serialize(i)["M"]}} for i in items]
+        transact_items += lender_counters_update(self.table_name, product.lender_id, {"ProductCount": 1})
+        transact_items.append(self.change_log_item(pid))
         try:
             await asyncio.to_thread(self.dynamodb.transact_write_items, TransactItems=transact_items)
+            response_cache.invalidate("products")
         except botocore.exceptions.ClientError as e:
             logger.exception("failed to create product items")
             raise RuntimeError(e)
@@ -53,23 +75,11 @@ class ProductRepo:
             logger.exception("unexpected error while creating product items")
             raise RuntimeError(e)
 
-    async def find_by_id(self, id: int) -> Optional[ProductResponse]:
-        key = {"pk": {"S": "PRODUCT"}, "sk": {"S": f"PRODUCT#{id}"}}
-        try:
-            response = await asyncio.to_thread(self.dynamodb.get_item, TableName=self.table_name, Key=key)
-        except botocore.exceptions.ClientError as e:
-            logger.exception("failed to get product")
-            raise RuntimeError(e)
-        except Exception as e:
-            logger.exception("unexpected error while getting product")
-            raise RuntimeError(e)
-        item = response.get("Item")
-        if not item:
-            return None
+    def _to_product(self, item: dict) -> Product:
         doc = {k: self.deserializer.deserialize(v) for k, v in item.items()}
         lender_id = int(doc.get("LenderID")) if not isinstance(doc.get("LenderID"), int) else doc.get("LenderID")
         category_id = int(doc.get("CategoryID")) if not isinstance(doc.get("CategoryID"), int) else doc.get("CategoryID")
-        product = Product.model_validate(
+        return Product.model_validate(
             {
                 "ID": int(doc.get("ID")),
                 "LenderID": lender_id,
@@ -82,94 +92,151 @@ class ProductRepo:
                 "ImageUrl": doc.get("ImageUrl"),
             }
         )
-        category = None
-        if self.category_repo:
-            try:
-                category = await self.category_repo.find_by_id(category_id)
-            except Exception:
-                category = None
-        user = None
-        if self.user_repo:
-            try:
-                user = await self.user_repo.find_by_id(lender_id)
-            except Exception:
-                user = None
-        return ProductResponse(product=product, category=category, user=user)
 
-    async def find_all(self, filters: ProductFilter) -> List[ProductResponse]:
-        if filters.category_id:
-            pk = f"CATEGORY#{filters.category_id}"
-            sk_prefix = "PRODUCT#"
-        else:
-            pk = "PRODUCT"
-            if filters.lender_id:
-                sk_prefix = f"LENDER#{filters.lender_id}"
-            elif filters.search:
-                sk_prefix = f"NAME#{filters.search.lower()}"
-            else:
-                sk_prefix = "PRODUCT#"
+    def _read_fields(self, fields: Fields, filters: Optional[ProductFilter] = None, include: Iterable[str] = ()) -> FrozenSet[str]:
+        # the requested product fields plus the attributes hydration and the search filter rely on
+        read = set(own_fields(fields, Product))
+        if "category" in include:
+            read.add("category_id")
+        if "lender" in include:
+            read.add("lender_id")
+        if filters is not None and filters.search:
+            read |= {"name", "description"}
+        if filters is not None and filters.is_available is not None:
+            read.add("is_available")
+        return frozenset(read)
+
+    def _to_partial_product(self, item: dict, read: FrozenSet[str]) -> Product:
+        return partial(Product, {k: self.deserializer.deserialize(v) for k, v in item.items()}, read)
+
+    async def find_product(self, id: int, read: Optional[FrozenSet[str]] = None) -> Optional[Product]:
+        key = {"pk": {"S": "PRODUCT"}, "sk": {"S": f"PRODUCT#{id}"}}
+        kwargs = {"TableName": self.table_name, "Key": key}
+        if read:
+            kwargs = with_projection(kwargs, Product, read)
         try:
-            response = await asyncio.to_thread(
-                self.dynamodb.query,
-                TableName=self.table_name,
-                KeyConditionExpression="pk = :pk AND begins_with(sk, :skPrefix)",
-                ExpressionAttributeValues={":pk": {"S": pk}, ":skPrefix": {"S": sk_prefix}},
-            )
+            response = await asyncio.to_thread(self.dynamodb.get_item, **kwargs)
         except botocore.exceptions.ClientError as e:
-            logger.exception("failed to query products")
+            logger.exception("failed to get product")
             raise RuntimeError(e)
-        
         except Exception as e:
-            logger.exception("unexpected error while querying products")
+            logger.exception("unexpected error while getting product")
             raise RuntimeError(e)
-        
-        items = response.get("Items", [])
-        responses: List[ProductResponse] = []
+        item = response.get("Item")
+        if not item:
+            return None
+        if read:
+            return self._to_partial_product(item, read)
+        return self._to_product(item)
 
-        for item in items:
-            doc = {k: self.deserializer.deserialize(v) for k, v in item.items()}
-            
-            #if lender cand category id is not number in ddb than coerce it  into int
-            Lender_id = int(doc.get("LenderID")) if not isinstance(doc.get("LenderID"), int) else doc.get("LenderID")
-            Category_id = int(doc.get("CategoryID")) if not isinstance(doc.get("CategoryID"), int) else doc.get("CategoryID")
-           
+    async def get_version(self, id: int) -> Optional[int]:
+        # only the primary copy is versioned; None when the product does not exist
+        try:
+            return await read_version(self.dynamodb, self.table_name, {"pk": {"S": "PRODUCT"}, "sk": {"S": f"PRODUCT#{int(id)}"}})
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to read product version")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while reading product version")
+            raise RuntimeError(e)
 
-            product = Product.model_validate(
-                {
-                    "ID": int(doc.get("ID")),
-                    "LenderID": int(doc.get("LenderID")),
-                    "CategoryID": int(doc.get("CategoryID")),
-                    "Name": doc.get("Name"),
-                    "Description": doc.get("Description"),
-                    "Duration": int(doc.get("Duration")),
-                    "IsAvailable": bool(doc.get("IsAvailable")),
-                    "CreatedAt": doc.get("CreatedAt"),
-                    "ImageUrl": doc.get("ImageUrl"),
-                }
-            )
-            
+    async def find_by_id(self, id: int, fields: Fields = None, include: Iterable[str] = ()) -> Optional[ProductResponse]:
+        # category and lender are only read when asked for; most callers just need the product itself
+        product = await self.find_product(id, self._read_fields(fields, include=include) if fields else None)
+        if product is None:
+            return None
+        return (await self._hydrate([product], fields, include))[0]
+
+    async def find_products_by_ids(self, ids: List[int]) -> Dict[int, Product]:
+        keys = [{"pk": {"S": "PRODUCT"}, "sk": {"S": f"PRODUCT#{int(i)}"}} for i in ids]
+        try:
+            items = await batch_get_items(self.dynamodb, self.table_name, keys)
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to batch get products")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while batch getting products")
+            raise RuntimeError(e)
+        products = [self._to_product(item) for item in items]
+        return {int(p.id): p for p in products}
+
+    async def _hydrate(self, products: List[Product], fields: Fields = None, include: Iterable[str] = ()) -> List[ProductResponse]:
+        # the included relations for a whole set of products, each resolved with one batched read
+        category_ids = list({p.category_id for p in products}) if "category" in include else []
+        lender_ids = list({p.lender_id for p in products}) if "lender" in include else []
+
+        async def no_rows():
+            return {}
 
-            if self.category_repo:
-                try:
-                    category = await self.category_repo.find_by_id(Category_id)
-                except Exception as e:
-                    raise RuntimeError(e)
-                
-            user = Optional[User]
+        categories, users = await asyncio.gather(
+            self.category_repo.find_by_ids(category_ids) if self.category_repo and category_ids else no_rows(),
+            self.user_repo.find_by_ids(lender_ids) if self.user_repo and lender_ids else no_rows(),
+        )
+        if fields is None:
+            return [
+                ProductResponse(product=p, category=categories.get(p.category_id), user=users.get(p.lender_id))
+                for p in products
+            ]
+        rows = []
+        for p in products:
+            related = {}
+            if "category" in include:
+                related["category"] = categories.get(p.category_id)
+            if "lender" in include:
+                related["user"] = users.get(p.lender_id)
+            rows.append(ProductResponse.model_construct(product=p, **related))
+        return rows
 
-            if self.user_repo:
-                try:
-                    user = await self.user_repo.find_by_id(Lender_id)
-                except Exception as e:
-                    raise RuntimeError(e)
-                
-            responses.append(ProductResponse(product= product, category= category, user= user))
+    async def find_by_ids(self, ids: List[int], include: Iterable[str] = ()) -> Dict[int, ProductResponse]:
+        products = await self.find_products_by_ids(ids)
+        responses = await self._hydrate(list(products.values()), include=include)
+        return {int(r.product.id): r for r in responses}
 
+    def _list_key(self, filters: ProductFilter):
+        if filters.category_id:
+            return f"CATEGORY#{filters.category_id}", "PRODUCT#"
+        if filters.lender_id:
+            return "PRODUCT", f"LENDER#{filters.lender_id}"
         if filters.search:
-            s = filters.search.lower()
-            return [p for p in responses if (p.product.name and s in p.product.name.lower()) or (p.product.description and s in p.product.description.lower())]
-        
-        return responses
+            return "PRODUCT", f"NAME#{filters.search.lower()}"
+        return "PRODUCT", "PRODUCT#"
+
+    def _matches_search(self, product: Product, search: str) -> bool:
+        s = search.lower()
+        return bool((product.name and s in product.name.lower()) or (product.description and s in product.description.lower()))
+
+    async def find_all(self, filters: ProductFilter, fields: Fields = None, include: Iterable[str] = ()) -> List[ProductResponse]:
+        return [row async for page in self.iter_all(filters, fields, include, limit=None) for row in page]
+
+    async def iter_all(self, filters: ProductFilter, fields: Fields = None, include: Iterable[str] = (), limit: Optional[int] = STREAM_PAGE_SIZE) -> AsyncIterator[List[ProductResponse]]:
+        # a page at a time, each page hydrated with batched reads for the included relations only
+        pk, sk_prefix = self._list_key(filters)
+        kwargs = {
+            "TableName": self.table_name,
+            "KeyConditionExpression": "pk = :pk AND begins_with(sk, :skPrefix)",
+            "ExpressionAttributeValues": {":pk": {"S": pk}, ":skPrefix": {"S": sk_prefix}},
+        }
+        if limit:
+            kwargs["Limit"] = limit
+        read = self._read_fields(fields, filters, include) if fields else None
+        if read:
+            kwargs = with_projection(kwargs, Product, read)
+        try:
+            async for items in query_pages(self.dynamodb, **kwargs):
+                if read:
+                    products = [self._to_partial_product(item, read) for item in items]
+                else:
+                    products = [self._to_product(item) for item in items]
+                if filters.search:
+                    products = [p for p in products if self._matches_search(p, filters.search)]
+                if products:
+                    yield await self._hydrate(products, fields, include)
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to query products")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while querying products")
+            raise RuntimeError(e)
 
     async def update(self, product: Product) -> None:
         existing = await self.find_by_id(int(product.id))
@@ -222,9 +289,11 @@ class ProductRepo:
             }
             for k in keys
         ]
-        transact_items = deletes + updates
+        updates[0]["Update"] = with_version_bump(updates[0]["Update"])
+        transact_items = deletes + updates + [self.change_log_item(int(product.id))]
         try:
             await asyncio.to_thread(self.dynamodb.transact_write_items, TransactItems=transact_items)
+            response_cache.invalidate("products")
         except botocore.exceptions.ClientError as e:
             logger.exception("failed to update product records")
             raise RuntimeError(e)
@@ -232,6 +301,103 @@ class ProductRepo:
             logger.exception("unexpected error while updating product records")
             raise RuntimeError(e)
 
+    def change_log_item(self, product_id: int, deleted: bool = False) -> dict:
+        # a transact Put recording the write in the change log; it commits or fails with the write itself
+        changed_at = time.time_ns()
+        return {
+            "Put": {
+                "TableName": self.table_name,
+                "Item": {
+                    "pk": {"S": CHANGE_LOG_PK},
+                    "sk": {"S": _change_sk(changed_at, int(product_id))},
+                    "ProductID": {"N": str(int(product_id))},
+                    "Deleted": {"BOOL": bool(deleted)},
+                    "TTL": {"N": str(changed_at // 10**9 + CHANGE_LOG_RETENTION_SECONDS)},
+                },
+            }
+        }
+
+    def current_watermark(self) -> int:
+        return time.time_ns() - CHANGE_LOG_SETTLE_NS
+
+    def oldest_watermark(self) -> int:
+        # watermarks before this may point at entries the TTL already removed
+        return time.time_ns() - CHANGE_LOG_RETENTION_SECONDS * 10**9
+
+    async def find_changes(self, since: str, include: Iterable[str] = (), limit: int = CHANGES_PAGE_SIZE) -> ProductChanges:
+        # one page of the change log after `since`, collapsed to the latest write per product;
+        # changed products are read in one batch, deletes come back as ids only
+        timestamp, after = parse_watermark(since)
+        start = _change_sk(timestamp, after) if after is not None else f"{timestamp + 1:020d}"
+        until = self.current_watermark()
+        end = f"{until:020d}#~"
+        if end <= start:
+            return ProductChanges(watermark=since)
+        query = {
+            "TableName": self.table_name,
+            "KeyConditionExpression": "pk = :pk AND sk BETWEEN :from AND :until",
+            "ExpressionAttributeValues": {
+                ":pk": {"S": CHANGE_LOG_PK},
+                ":from": {"S": start},
+                ":until": {"S": end},
+            },
+            "Limit": limit,
+        }
+        if after is not None:
+            # resume after the entry the last page ended on, not after its whole timestamp
+            query["ExclusiveStartKey"] = {"pk": {"S": CHANGE_LOG_PK}, "sk": {"S": start}}
+        try:
+            resp = await asyncio.to_thread(self.dynamodb.query, **query)
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to query product changes")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while querying product changes")
+            raise RuntimeError(e)
+        items = resp.get("Items", [])
+        has_more = bool(resp.get("LastEvaluatedKey")) and bool(items)
+        latest: Dict[int, bool] = {}
+        for item in items:
+            pid = int(item["ProductID"]["N"])
+            latest.pop(pid, None)
+            latest[pid] = bool(item.get("Deleted", {}).get("BOOL", False))
+        changed = [pid for pid, deleted in latest.items() if not deleted]
+        rows = await self.find_by_ids(changed, include=include) if changed else {}
+        # changed in this window but deleted since: report it gone now, its tombstone only repeats that later
+        deleted = [pid for pid, gone in latest.items() if gone or pid not in rows]
+        # mid-log the watermark is the sk of the last entry read; once caught up it is the settled timestamp
+        watermark = items[-1]["sk"]["S"] if has_more else str(until)
+        return ProductChanges(
+            products=[rows[pid] for pid in changed if pid in rows],
+            deleted=deleted,
+            watermark=watermark,
+            has_more=has_more,
+        )
+
+    def availability_update_items(self, product: Product, is_available: bool) -> List[dict]:
+        # transact items flipping IsAvailable on every copy; conditional on the primary copy still holding the old value
+        keys = [
+            {"pk": {"S": "PRODUCT"}, "sk": {"S": f"PRODUCT#{int(product.id)}"}},
+            {"pk": {"S": "PRODUCT"}, "sk": {"S": f"LENDER#{int(product.lender_id)}#ID#{int(product.id)}"}},
+            {"pk": {"S": "PRODUCT"}, "sk": {"S": f"NAME#{product.name.lower()}#ID#{int(product.id)}"}},
+            {"pk": {"S": f"CATEGORY#{int(product.category_id)}"}, "sk": {"S": f"PRODUCT#{int(product.id)}"}},
+        ]
+        items = []
+        for i, k in enumerate(keys):
+            update = {
+                "TableName": self.table_name,
+                "Key": k,
+                "UpdateExpression": "SET IsAvailable = :isAvailable",
+                "ExpressionAttributeValues": {":isAvailable": {"BOOL": bool(is_available)}},
+            }
+            if i == 0:
+                update = with_version_bump(update)
+                update["ConditionExpression"] = "IsAvailable = :wasAvailable"
+                update["ExpressionAttributeValues"][":wasAvailable"] = {"BOOL": not bool(is_available)}
+            items.append({"Update": update})
+        items.append(self.change_log_item(int(product.id)))
+        return items
+
     async def delete(self, id: int) -> None:
         key = {"pk": {"S": "PRODUCT"}, "sk": {"S": f"PRODUCT#{int(id)}"}}
         try:
@@ -249,14 +415,18 @@ class ProductRepo:
         name = str(doc.get("Name"))
         lender_id = int(doc.get("LenderID")) if not isinstance(doc.get("LenderID"), int) else doc.get("LenderID")
         category_id = int(doc.get("CategoryID")) if not isinstance(doc.get("CategoryID"), int) else doc.get("CategoryID")
+        # conditional so a concurrent double delete cannot decrement the lender's product count twice
         deletes = [
-            {"Delete": {"TableName": self.table_name, "Key": {"pk": {"S": "PRODUCT"}, "sk": {"S": f"PRODUCT#{int(id)}"}}}},
+            {"Delete": {"TableName": self.table_name, "Key": {"pk": {"S": "PRODUCT"}, "sk": {"S": f"PRODUCT#{int(id)}"}}, "ConditionExpression": "attribute_exists(pk)"}},
             {"Delete": {"TableName": self.table_name, "Key": {"pk": {"S": "PRODUCT"}, "sk": {"S": f"LENDER#{int(lender_id)}#ID#{int(id)}"}}}},
             {"Delete": {"TableName": self.table_name, "Key": {"pk": {"S": "PRODUCT"}, "sk": {"S": f"NAME#{name.lower()}#ID#{int(id)}"}}}},
             {"Delete": {"TableName": self.table_name, "Key": {"pk": {"S": f"CATEGORY#{int(category_id)}"}, "sk": {"S": f"PRODUCT#{int(id)}"}}}},
         ]
+        deletes += lender_counters_update(self.table_name, lender_id, {"ProductCount": -1})
+        deletes.append(self.change_log_item(int(id), deleted=True))
         try:
             await asyncio.to_thread(self.dynamodb.transact_write_items, TransactItems=deletes)
+            response_cache.invalidate("products")
         except botocore.exceptions.ClientError as e:
             logger.exception("failed to delete product records")
             raise RuntimeError(e)
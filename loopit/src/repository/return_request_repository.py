@@ -8,6 +8,7 @@ from typing import List, Optional
 from boto3.dynamodb.types import TypeSerializer, TypeDeserializer
 from models.return_request import ReturnRequest
 from models.enums.return_req_status import ReturnStatus
+from repository.stats_repository import user_summary_update
 from helpers.app_settings import AppSettings
 
 
@@ -22,7 +23,7 @@ class ReturnRequestRepo:
         self.serializer = TypeSerializer()
         self.deserializer = TypeDeserializer()
 
-    async def create_return_request(self, req: ReturnRequest) -> None:
+    async def create_return_request(self, req: ReturnRequest, borrower_id: Optional[int] = None) -> None:
         try:
             rid = req.id if req.id else time.time_ns()
             created_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
@@ -36,6 +37,16 @@ class ReturnRequestRepo:
                 "CreatedAt": created_at,
             }
             serialized_item = self.serializer.serialize(item)["M"]
+            counters = []
+            if borrower_id and req.status == ReturnStatus.Pending:
+                # the borrower has to approve the return, so it shows up on their summary
+                counters = user_summary_update(self.table_name, borrower_id, {"PendingReturns": 1})
+            if counters:
+                await asyncio.to_thread(
+                    self.dynamodb.transact_write_items,
+                    TransactItems=[{"Put": {"TableName": self.table_name, "Item": serialized_item}}] + counters,
+                )
+                return
             await asyncio.to_thread(
                 self.dynamodb.put_item,
                 TableName=self.table_name,
@@ -48,9 +59,28 @@ class ReturnRequestRepo:
             logger.exception("unexpected error while creating return request")
             raise RuntimeError(e)
 
-    async def update_return_request_status(self, req_id: int, new_status: str) -> None:
+    async def update_return_request_status(self, req_id: int, new_status: str, borrower_id: Optional[int] = None) -> None:
         try:
             key = {"pk": {"S": "RETURNREQUEST"}, "sk": {"S": f"ID#{req_id}"}}
+            if borrower_id and new_status != ReturnStatus.Pending.value:
+                # only a Pending request may be resolved, so the borrower's count drops exactly once
+                await asyncio.to_thread(
+                    self.dynamodb.transact_write_items,
+                    TransactItems=[{
+                        "Update": {
+                            "TableName": self.table_name,
+                            "Key": key,
+                            "UpdateExpression": "SET #s = :status",
+                            "ConditionExpression": "#s = :pending",
+                            "ExpressionAttributeNames": {"#s": "Status"},
+                            "ExpressionAttributeValues": {
+                                ":status": {"S": new_status},
+                                ":pending": {"S": ReturnStatus.Pending.value},
+                            },
+                        }
+                    }] + user_summary_update(self.table_name, borrower_id, {"PendingReturns": -1}),
+                )
+                return
             await asyncio.to_thread(
                 self.dynamodb.update_item,
                 TableName=self.table_name,
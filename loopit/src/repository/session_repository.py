@@ -0,0 +1,113 @@
+
+import asyncio
+import logging
+import botocore
+from typing import Optional
+from boto3.dynamodb.types import TypeSerializer, TypeDeserializer
+from models.session import Session
+from helpers.app_settings import AppSettings
+
+logger = logging.getLogger(__name__)
+settings = AppSettings()
+
+
+class SessionRepo:
+    def __init__(self, dynamodb):
+        self.dynamodb = dynamodb
+        self.table_name = settings.DDB_TABLE_NAME
+        self.serializer = TypeSerializer()
+        self.deserializer = TypeDeserializer()
+
+    def _key(self, session_id: str) -> dict:
+        return {"pk": {"S": f"SESSION#{session_id}"}, "sk": {"S": "SESSION"}}
+
+    async def create_session(self, session: Session) -> None:
+        try:
+            item = {
+                "pk": f"SESSION#{session.id}",
+                "sk": "SESSION",
+                "ID": session.id,
+                "UserID": int(session.user_id),
+                "TokenHash": session.token_hash,
+                "ExpiresAt": int(session.expires_at),
+                # DynamoDB TTL attribute, so expired sessions clean themselves up
+                "TTL": int(session.expires_at),
+            }
+            await asyncio.to_thread(
+                self.dynamodb.put_item,
+                TableName=self.table_name,
+                Item=self.serializer.serialize(item)["M"],
+                ConditionExpression="attribute_not_exists(pk)",
+            )
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to create session")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while creating session")
+            raise RuntimeError(e)
+
+    async def get_session(self, session_id: str) -> Optional[Session]:
+        try:
+            resp = await asyncio.to_thread(self.dynamodb.get_item, TableName=self.table_name, Key=self._key(session_id))
+            item = resp.get("Item")
+            if not item:
+                return None
+            doc = {k: self.deserializer.deserialize(v) for k, v in item.items()}
+            return Session.model_validate({
+                "ID": doc.get("ID"),
+                "UserID": int(doc.get("UserID")),
+                "TokenHash": doc.get("TokenHash"),
+                "ExpiresAt": int(doc.get("ExpiresAt")),
+                "Revoked": bool(doc.get("Revoked", False)),
+            })
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to get session")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while getting session")
+            raise RuntimeError(e)
+
+    async def rotate_session(self, session_id: str, old_hash: str, new_hash: str, expires_at: int) -> bool:
+        # compare-and-swap on the token hash: of two refreshes racing with the same token only one wins
+        try:
+            await asyncio.to_thread(
+                self.dynamodb.update_item,
+                TableName=self.table_name,
+                Key=self._key(session_id),
+                UpdateExpression="SET TokenHash = :new, ExpiresAt = :exp, #ttl = :exp",
+                ConditionExpression="TokenHash = :old AND attribute_not_exists(Revoked)",
+                ExpressionAttributeNames={"#ttl": "TTL"},
+                ExpressionAttributeValues={
+                    ":new": {"S": new_hash},
+                    ":old": {"S": old_hash},
+                    ":exp": {"N": str(int(expires_at))},
+                },
+            )
+            return True
+        except botocore.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                return False
+            logger.exception("failed to rotate session")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while rotating session")
+            raise RuntimeError(e)
+
+    async def revoke_session(self, session_id: str) -> None:
+        try:
+            await asyncio.to_thread(
+                self.dynamodb.update_item,
+                TableName=self.table_name,
+                Key=self._key(session_id),
+                UpdateExpression="SET Revoked = :true",
+                ConditionExpression="attribute_exists(pk)",
+                ExpressionAttributeValues={":true": {"BOOL": True}},
+            )
+        except botocore.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                return
+            logger.exception("failed to revoke session")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while revoking session")
+            raise RuntimeError(e)
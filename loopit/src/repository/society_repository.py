@@ -4,6 +4,9 @@ from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
 from models.society import Society  
 import botocore.exceptions
 from typing import List, Optional
+from database.versions import bump_collection_version, collection_version_key, read_version
+from helpers.response_cache import response_cache
+from helpers.request_scope import memoized
 import time
 import asyncio
 import logging
@@ -38,6 +41,8 @@ class SocietyRepo:
                 TableName=self.table_name,
                 Item=item_db,
             )
+            await bump_collection_version(self.dynamodb, self.table_name, "SOCIETY")
+            response_cache.invalidate("societies")
         except botocore.exceptions.ClientError as e:
             logger.exception("failed to create society ")
             raise RuntimeError(e)
@@ -45,7 +50,24 @@ class SocietyRepo:
             logger.exception("failed to create society ")
             raise RuntimeError(e)
 
+    async def get_version(self) -> int:
+        return await memoized("societies:version", self._load_version)
+
+    async def _load_version(self) -> int:
+        # bumped after every society write, so it must be read before the list it tags
+        try:
+            return await read_version(self.dynamodb, self.table_name, collection_version_key("SOCIETY")) or 0
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to read the societies version")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("failed to read the societies version")
+            raise RuntimeError(e)
+
     async def find_all(self) -> List[Society]:
+        return await memoized("societies:all", self._load_all)
+
+    async def _load_all(self) -> List[Society]:
         try:
             response = await asyncio.to_thread(
                 self.dynamodb.query,
@@ -141,6 +163,8 @@ class SocietyRepo:
                 Item=item,
                 ConditionExpression="attribute_exists(pk) AND attribute_exists(sk)",
             )
+            await bump_collection_version(self.dynamodb, self.table_name, "SOCIETY")
+            response_cache.invalidate("societies")
         except botocore.exceptions.ClientError as e:
             logger.exception("failed to update society (ClientError)")
             raise RuntimeError( e)
@@ -159,6 +183,8 @@ class SocietyRepo:
                 },
                  ConditionExpression="attribute_exists(pk) AND attribute_exists(sk)",
             )
+            await bump_collection_version(self.dynamodb, self.table_name, "SOCIETY")
+            response_cache.invalidate("societies")
         except botocore.exceptions.ClientError as e:
             logger.exception("failed to delete society ")
             raise RuntimeError(e)
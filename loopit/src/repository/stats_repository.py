@@ -0,0 +1,210 @@
+
+import asyncio
+import logging
+import botocore
+from decimal import Decimal
+from typing import AsyncIterator, Dict, List, Tuple
+from boto3.dynamodb.types import TypeSerializer, TypeDeserializer
+from database.batch import batch_put_items
+from database.pagination import query_pages
+from helpers.app_settings import AppSettings
+from models.dashboard import LenderDashboard, UserSummary
+from models.enums.buy_request import BuyRequestStatus
+from models.enums.order_status import OrderStatus
+from models.enums.return_req_status import ReturnStatus
+
+logger = logging.getLogger(__name__)
+settings = AppSettings()
+
+ACTIVE_ORDER_STATUSES = (OrderStatus.InUse.value, OrderStatus.ReturnRequested.value)
+LENDER_COUNTERS = ("ProductCount", "PendingBuyRequests", "ActiveRentals", "PendingReturns", "LifetimeEarnings")
+USER_COUNTERS = ("ActiveRentals", "PendingBuyRequests", "PendingReturns", "FeedbackToGive")
+COUNTER_SKS = ("COUNTERS", "SUMMARY")
+
+
+def lender_counters_key(lender_id: int) -> dict:
+    return {"pk": {"S": f"LENDER#{int(lender_id)}"}, "sk": {"S": "COUNTERS"}}
+
+
+def user_summary_key(user_id: int) -> dict:
+    return {"pk": {"S": f"USER#{int(user_id)}"}, "sk": {"S": "SUMMARY"}}
+
+
+def feedback_due_key(user_id: int, order_id: int) -> dict:
+    # marker for a returned order the borrower has not reviewed yet
+    return {"pk": {"S": f"USER#{int(user_id)}"}, "sk": {"S": f"FEEDBACKDUE#ORDER#{int(order_id)}"}}
+
+
+def _counters_update(table_name: str, key: dict, deltas: Dict[str, float]) -> List[dict]:
+    # transact item ADDing each non-zero delta; empty when there is nothing to change
+    deltas = {k: v for k, v in deltas.items() if v}
+    if not deltas:
+        return []
+    names = {f"#c{i}": name for i, name in enumerate(deltas)}
+    values = {f":c{i}": {"N": str(Decimal(str(v)))} for i, v in enumerate(deltas.values())}
+    return [{
+        "Update": {
+            "TableName": table_name,
+            "Key": key,
+            "UpdateExpression": "ADD " + ", ".join(f"#c{i} :c{i}" for i in range(len(deltas))),
+            "ExpressionAttributeNames": names,
+            "ExpressionAttributeValues": values,
+        }
+    }]
+
+
+def lender_counters_update(table_name: str, lender_id: int, deltas: Dict[str, float]) -> List[dict]:
+    return _counters_update(table_name, lender_counters_key(lender_id), deltas)
+
+
+def user_summary_update(table_name: str, user_id: int, deltas: Dict[str, float]) -> List[dict]:
+    return _counters_update(table_name, user_summary_key(user_id), deltas)
+
+
+def merge_counter_updates(transact_items: List[dict]) -> List[dict]:
+    # a transaction may touch an item only once, so fold several counter ADDs on one item together
+    merged: Dict[Tuple[str, str], Dict[str, Decimal]] = {}
+    table_names: Dict[Tuple[str, str], str] = {}
+    rest = []
+    for item in transact_items:
+        update = item.get("Update")
+        if not update or update["Key"].get("sk", {}).get("S") not in COUNTER_SKS:
+            rest.append(item)
+            continue
+        key = (update["Key"]["pk"]["S"], update["Key"]["sk"]["S"])
+        table_names[key] = update["TableName"]
+        deltas = merged.setdefault(key, {})
+        for placeholder, name in update["ExpressionAttributeNames"].items():
+            value = Decimal(update["ExpressionAttributeValues"][":" + placeholder[1:]]["N"])
+            deltas[name] = deltas.get(name, Decimal(0)) + value
+    for (pk, sk), deltas in merged.items():
+        rest += _counters_update(table_names[(pk, sk)], {"pk": {"S": pk}, "sk": {"S": sk}}, deltas)
+    return rest
+
+
+class StatsRepo:
+    def __init__(self, dynamodb):
+        self.dynamodb = dynamodb
+        self.table_name = settings.DDB_TABLE_NAME
+        self.serializer = TypeSerializer()
+        self.deserializer = TypeDeserializer()
+
+    async def _docs(self, pk: str, sk_prefix: str) -> AsyncIterator[dict]:
+        kwargs = {
+            "TableName": self.table_name,
+            "KeyConditionExpression": "pk = :pk AND begins_with(sk, :skPrefix)",
+            "ExpressionAttributeValues": {":pk": {"S": pk}, ":skPrefix": {"S": sk_prefix}},
+        }
+        async for items in query_pages(self.dynamodb, **kwargs):
+            for item in items:
+                yield {k: self.deserializer.deserialize(v) for k, v in item.items()}
+
+    async def _put_counters(self, sk: str, prefix: str, totals: Dict[int, Dict[str, Decimal]], names: Tuple[str, ...]) -> int:
+        # absolute values, so every counter named is reset even when it comes out at zero
+        items = [
+            self.serializer.serialize({"pk": f"{prefix}#{owner}", "sk": sk, **{name: counts.get(name, Decimal(0)) for name in names}})["M"]
+            for owner, counts in totals.items()
+        ]
+        await batch_put_items(self.dynamodb, self.table_name, items)
+        return len(items)
+
+    async def backfill_lender_counters(self) -> int:
+        # recomputes every lender's COUNTERS item from the global partitions; run while writes are quiet
+        try:
+            totals: Dict[int, Dict[str, Decimal]] = {}
+
+            def add(lender_id, name, value=1):
+                counts = totals.setdefault(int(lender_id), {})
+                counts[name] = counts.get(name, Decimal(0)) + Decimal(str(value))
+
+            async for doc in self._docs("USER", "ID#"):
+                if str(doc.get("Role", "")).lower() == "lender":
+                    totals.setdefault(int(doc["ID"]), {})
+            lenders: Dict[int, int] = {}
+            async for doc in self._docs("PRODUCT", "PRODUCT#"):
+                lenders[int(doc["ID"])] = int(doc["LenderID"])
+                add(doc["LenderID"], "ProductCount")
+            async for doc in self._docs("ORDER", "ID#"):
+                lender_id = lenders.get(int(doc["ProductID"]))
+                if lender_id is None:
+                    continue
+                add(lender_id, "LifetimeEarnings", doc.get("TotalAmount", 0))
+                if doc.get("Status") in ACTIVE_ORDER_STATUSES:
+                    add(lender_id, "ActiveRentals")
+                if doc.get("Status") == OrderStatus.ReturnRequested.value:
+                    add(lender_id, "PendingReturns")
+            async for doc in self._docs("BUYREQUEST", f"STATUS#{BuyRequestStatus.Pending.value}#"):
+                lender_id = doc.get("LenderID") or lenders.get(int(doc["ProductId"]))
+                if lender_id is not None:
+                    add(lender_id, "PendingBuyRequests")
+            return await self._put_counters("COUNTERS", "LENDER", totals, LENDER_COUNTERS)
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to backfill lender counters")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while backfilling lender counters")
+            raise RuntimeError(e)
+
+    async def backfill_user_summaries(self) -> int:
+        # recomputes every user's SUMMARY item; FeedbackToGive counts the FEEDBACKDUE markers, since feedback
+        # does not record its order and returns older than the markers cannot be told apart. Run while writes are quiet
+        try:
+            totals: Dict[int, Dict[str, Decimal]] = {}
+
+            def add(user_id, name):
+                counts = totals.setdefault(int(user_id), {})
+                counts[name] = counts.get(name, Decimal(0)) + 1
+
+            async for doc in self._docs("USER", "ID#"):
+                totals.setdefault(int(doc["ID"]), {})
+            borrowers: Dict[int, int] = {}
+            async for doc in self._docs("ORDER", "ID#"):
+                borrowers[int(doc["ID"])] = int(doc["UserID"])
+                if doc.get("Status") in ACTIVE_ORDER_STATUSES:
+                    add(doc["UserID"], "ActiveRentals")
+            async for doc in self._docs("BUYREQUEST", f"STATUS#{BuyRequestStatus.Pending.value}#"):
+                add(doc["RequestedBy"], "PendingBuyRequests")
+            async for doc in self._docs("RETURNREQUEST", "ID#"):
+                borrower = borrowers.get(int(doc["OrderID"]))
+                if doc.get("Status") == ReturnStatus.Pending.value and borrower is not None:
+                    add(borrower, "PendingReturns")
+            for user_id in list(totals):
+                async for _ in self._docs(f"USER#{user_id}", "FEEDBACKDUE#"):
+                    add(user_id, "FeedbackToGive")
+            return await self._put_counters("SUMMARY", "USER", totals, USER_COUNTERS)
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to backfill user summaries")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while backfilling user summaries")
+            raise RuntimeError(e)
+
+    async def get_lender_dashboard(self, lender_id: int) -> LenderDashboard:
+        try:
+            resp = await asyncio.to_thread(self.dynamodb.get_item, TableName=self.table_name, Key=lender_counters_key(lender_id))
+            doc = {k: self.deserializer.deserialize(v) for k, v in resp.get("Item", {}).items()}
+            return LenderDashboard.model_validate({
+                "LenderID": int(lender_id),
+                **{name: doc.get(name, 0) for name in LENDER_COUNTERS},
+            })
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to get lender dashboard")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while getting lender dashboard")
+            raise RuntimeError(e)
+
+    async def get_user_summary(self, user_id: int) -> UserSummary:
+        try:
+            resp = await asyncio.to_thread(self.dynamodb.get_item, TableName=self.table_name, Key=user_summary_key(user_id))
+            doc = {k: self.deserializer.deserialize(v) for k, v in resp.get("Item", {}).items()}
+            return UserSummary.model_validate({
+                "UserID": int(user_id),
+                **{name: doc.get(name, 0) for name in USER_COUNTERS},
+            })
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to get user summary")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while getting user summary")
+            raise RuntimeError(e)
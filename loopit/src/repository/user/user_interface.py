@@ -1,23 +1,36 @@
 from abc import ABC,abstractmethod
 from models.user import User
-from typing import List
+from typing import AsyncIterator, Dict, List, Optional
+from helpers.fields import Fields
 
 
 
 class UserRepo(ABC):
 
     @abstractmethod
-    def create(self,user:User) ->None:
+    async def create(self,user:User) ->None:
         ...
 
     @abstractmethod
-    def find_by_email(self, email: str) -> User:
+    async def find_by_email(self, email: str) -> User:
         ...    
 
     @abstractmethod
-    async def find_by_id(self, id:int)->User:
+    async def update_password_hash(self, user: User, new_hash: str) -> None:
+        ...
+
+    @abstractmethod
+    async def find_by_id(self, id:int, fields: Fields = None)->User:
         ...     
 
+    @abstractmethod
+    async def get_version(self, user_id: int) -> Optional[int]:
+        ...
+
+    @abstractmethod
+    async def find_by_ids(self, ids: List[int]) -> Dict[int, User]:
+        ...
+
     @abstractmethod
     async def delete_by_id(self, user_id: int) -> None:  
         ...
@@ -27,7 +40,9 @@ class UserRepo(ABC):
         ...
 
     @abstractmethod
-    async def find_all(self, filters: dict) -> List[User]:
+    async def find_all(self, filters: dict, fields: Fields = None) -> List[User]:
+        ...
+
+    @abstractmethod
+    def iter_all(self, filters: dict, fields: Fields = None) -> AsyncIterator[List[User]]:
         ...
-        
-                  
\ No newline at end of file
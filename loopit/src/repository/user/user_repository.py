@@ -2,12 +2,17 @@ import time
 import logging
 import asyncio
 from datetime import datetime
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 from models.user import User
 from models.enums.user import Role
 import botocore.exceptions
 from repository.user.user_interface import UserRepo
 from helpers.app_settings import AppSettings
+from database.batch import batch_get_items
+from helpers.fields import Fields, own_fields, partial, with_projection
+from database.pagination import STREAM_PAGE_SIZE, query_pages
+from database.versions import read_version, with_version_bump
+from helpers.request_scope import memoized
 from boto3.dynamodb.types import TypeDeserializer
 from exception.user import UserNotFoundError, UserRepositoryError , UserAlreadyExistsError
 
@@ -28,9 +33,10 @@ class UserDynamoRepo(UserRepo):
         self.deserializer = TypeDeserializer()
 
 
-    def find_by_email(self, email: str) -> User:
+    async def find_by_email(self, email: str) -> User:
         try:
-            resp = self.dynamodb.get_item(
+            resp = await asyncio.to_thread(
+                self.dynamodb.get_item,
                 TableName=self.table_name,
                 Key={
                     "pk": {"S": "USER"},
@@ -62,7 +68,7 @@ class UserDynamoRepo(UserRepo):
         )
 
     
-    def create(self, user: User) -> None:
+    async def create(self, user: User) -> None:
         user.id = int(time.time_ns())
         role = user.role.value
         created_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
@@ -127,7 +133,8 @@ class UserDynamoRepo(UserRepo):
         ]
 
         try:
-            self.dynamodb.transact_write_items(
+            await asyncio.to_thread(
+                self.dynamodb.transact_write_items,
                 TransactItems=transact_items
             )
 
@@ -141,6 +148,27 @@ class UserDynamoRepo(UserRepo):
             raise UserRepositoryError("failed to create user") from e
         
 
+    async def update_password_hash(self, user: User, new_hash: str) -> None:
+        # only the items login reads; the condition keeps a concurrent password change from being overwritten
+        updates = [
+            {
+                "Update": {
+                    "TableName": self.table_name,
+                    "Key": {"pk": {"S": "USER"}, "sk": {"S": sk}},
+                    "UpdateExpression": "SET PasswordHash = :new",
+                    "ConditionExpression": "PasswordHash = :old",
+                    "ExpressionAttributeValues": {":new": {"S": new_hash}, ":old": {"S": user.password_hash}},
+                }
+            }
+            for sk in (f"ID#{user.id}", f"EMAIL#{user.email}")
+        ]
+        updates[0]["Update"] = with_version_bump(updates[0]["Update"])
+        try:
+            await asyncio.to_thread(self.dynamodb.transact_write_items, TransactItems=updates)
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to update password hash")
+            raise UserRepositoryError("failed to update password hash") from e
+
     async def become_lender(self, user_id: int) -> None:
         try:
             key = {
@@ -159,13 +187,13 @@ class UserDynamoRepo(UserRepo):
            
 
             update = {
-                "Update": {
+                "Update": with_version_bump({
                     "TableName": self.table_name,
                     "Key": key,
                     "UpdateExpression": "SET #r = :role",
                     "ExpressionAttributeNames": {"#r": "Role"},
                     "ExpressionAttributeValues": {":role": {"S": "lender"}},
-                }
+                })
             }
             deletes = []
             if old_role:
@@ -197,47 +225,43 @@ class UserDynamoRepo(UserRepo):
             logger.exception("unexpected error in become_lender")
             raise RuntimeError(e)
 
-    async def find_all(self, filters: dict) -> List[User]:
+    def _list_key(self, filters: dict):
+        search = (filters or {}).get("search") or ""
+        role = (filters or {}).get("role") or ""
+        society_id = (filters or {}).get("society_id") or ""
+        if society_id:
+            return f"SOCIETY#{society_id}", "USER#"
+        if role:
+            return "USER", f"ROLE#{str(role).lower()}"
+        if search:
+            return "USER", f"NAME#{str(search).lower()}"
+        return "USER", "ID#"
+
+    def _name_search(self, filters: dict) -> str:
+        # only the NAME# listing needs the substring pass; role and society listings ignore search
+        filters = filters or {}
+        if filters.get("role") or filters.get("society_id"):
+            return ""
+        return str(filters.get("search") or "").lower()
+
+    def _to_partial_user(self, item: dict, fields) -> User:
+        return partial(User, {k: self.deserializer.deserialize(v) for k, v in item.items()}, fields)
+
+    async def find_all(self, filters: dict, fields: Fields = None) -> List[User]:
+        if fields:
+            return [u async for page in self.iter_all(filters, fields) for u in page]
         try:
-            search = (filters or {}).get("search") or ""
-            role = (filters or {}).get("role") or ""
-            society_id = (filters or {}).get("society_id") or ""
-            if society_id:
-                pk = f"SOCIETY#{society_id}"
-                sk_prefix = "USER#"
-            else:
-                pk = "USER"
-                if role:
-                    sk_prefix = f"ROLE#{str(role).lower()}"
-                elif search:
-                    sk_prefix = f"NAME#{str(search).lower()}"
-                else:
-                    sk_prefix = "ID#"
+            pk, sk_prefix = self._list_key(filters)
             resp = await asyncio.to_thread(
                 self.dynamodb.query,
                 TableName=self.table_name,
                 KeyConditionExpression="pk = :pk AND begins_with(sk, :sk)",
                 ExpressionAttributeValues={":pk": {"S": pk}, ":sk": {"S": sk_prefix}},
             )
-            items = resp.get("Items", [])
-            users: List[User] = []
-            for it in items:
-                doc = {k: self.deserializer.deserialize(v) for k, v in it.items()}
-                u = User.model_validate({
-                    "ID": int(doc.get("ID")),
-                    "FullName": doc.get("FullName"),
-                    "Role": doc.get("Role"),
-                    "PhoneNumber":doc.get("PhoneNumber"),
-                    "Address":doc.get("Address"),
-                    "PasswordHash":doc.get("PasswordHash"),
-                    "SocietyID": int(doc.get("SocietyID")) if doc.get("SocietyID") not in (None, "") else None,
-                    "Email": doc.get("Email"),
-                    "CreatedAt": doc.get("CreatedAt"),
-                })
-                users.append(u)
-            if search and not role and not society_id:
-                s = str(search).lower()
-                users = [u for u in users if u.name and s in u.name.lower()]
+            users = [self._to_user(it) for it in resp.get("Items", [])]
+            search = self._name_search(filters)
+            if search:
+                users = [u for u in users if u.full_name and search in u.full_name.lower()]
             return users
         except botocore.exceptions.ClientError as e:
             logger.exception("failed to find all users")
@@ -246,34 +270,91 @@ class UserDynamoRepo(UserRepo):
             logger.exception("unexpected error in find_all")
             raise RuntimeError(e)
 
-    async def find_by_id(self, user_id: int) -> Optional[User]:
+    async def iter_all(self, filters: dict, fields: Fields = None) -> AsyncIterator[List[User]]:
+        pk, sk_prefix = self._list_key(filters)
+        search = self._name_search(filters)
+        kwargs = {
+            "TableName": self.table_name,
+            "KeyConditionExpression": "pk = :pk AND begins_with(sk, :sk)",
+            "ExpressionAttributeValues": {":pk": {"S": pk}, ":sk": {"S": sk_prefix}},
+            "Limit": STREAM_PAGE_SIZE,
+        }
+        read = own_fields(fields, User) | ({"full_name"} if search else set()) if fields else None
+        if read:
+            kwargs = with_projection(kwargs, User, read)
+        try:
+            async for items in query_pages(self.dynamodb, **kwargs):
+                users = [self._to_partial_user(it, read) if read else self._to_user(it) for it in items]
+                if search:
+                    users = [u for u in users if u.full_name and search in u.full_name.lower()]
+                if users:
+                    yield users
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to stream users")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error while streaming users")
+            raise RuntimeError(e)
+
+    def _to_user(self, item: dict) -> User:
+        doc = {k: self.deserializer.deserialize(v) for k, v in item.items()}
+        return User.model_validate({
+            "ID": int(doc.get("ID")),
+            "FullName": doc.get("FullName"),
+            "Address": doc.get("Address"),
+            "Role": doc.get("Role"),
+            "PhoneNumber":doc.get("PhoneNumber"),
+            "PasswordHash":doc.get("PasswordHash"),
+            "SocietyID": int(doc.get("SocietyID")),
+            "Email": doc.get("Email"),
+            "CreatedAt": doc.get("CreatedAt"),
+        })
+
+    async def find_by_ids(self, ids: List[int]) -> Dict[int, User]:
+        ids = sorted({int(i) for i in ids})
+        return await memoized(("users:ids", tuple(ids)), lambda: self._load_by_ids(ids))
+
+    async def _load_by_ids(self, ids: List[int]) -> Dict[int, User]:
+        try:
+            keys = [{"pk": {"S": "USER"}, "sk": {"S": f"ID#{int(i)}"}} for i in ids]
+            items = await batch_get_items(self.dynamodb, self.table_name, keys)
+            users = [self._to_user(item) for item in items]
+            return {int(u.id): u for u in users}
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to batch get users")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error in find_by_ids")
+            raise RuntimeError(e)
+
+    async def get_version(self, user_id: int) -> Optional[int]:
+        try:
+            return await read_version(self.dynamodb, self.table_name, {"pk": {"S": "USER"}, "sk": {"S": f"ID#{int(user_id)}"}})
+        except botocore.exceptions.ClientError as e:
+            logger.exception("failed to read user version")
+            raise RuntimeError(e)
+        except Exception as e:
+            logger.exception("unexpected error in get_version")
+            raise RuntimeError(e)
+
+    async def find_by_id(self, user_id: int, fields: Fields = None) -> Optional[User]:
         try:
             key = {
                 "pk": {"S": "USER"},
                 "sk": {"S": f"ID#{user_id}"}
                 }
-            response = await asyncio.to_thread(
-                self.dynamodb.get_item,
-                TableName=self.table_name, 
-                Key=key
-                )
+            kwargs = {"TableName": self.table_name, "Key": key}
+            if fields:
+                kwargs = with_projection(kwargs, User, own_fields(fields, User))
+            response = await asyncio.to_thread(self.dynamodb.get_item, **kwargs)
             
             item = response.get("Item")
 
             if not item:
                 return None
-            doc = {k: self.deserializer.deserialize(v) for k, v in item.items()}
-            return User.model_validate({
-                "ID": int(doc.get("ID")),
-                "FullName": doc.get("FullName"),
-                "Address": doc.get("Address"),
-                "Role": doc.get("Role"),
-                "PhoneNumber":doc.get("PhoneNumber"),
-                "PasswordHash":doc.get("PasswordHash"),
-                "SocietyID": int(doc.get("SocietyID")),
-                "Email": doc.get("Email"),
-                "CreatedAt": doc.get("CreatedAt"),
-            })
+            if fields:
+                return self._to_partial_user(item, own_fields(fields, User))
+            return self._to_user(item)
         except botocore.exceptions.ClientError as e:
             logger.exception("failed to find user by id")
             raise RuntimeError(e)
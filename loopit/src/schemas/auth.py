@@ -13,3 +13,5 @@ class RegisterRequest(BaseModel):
     address: str | None = None
     society_id: int
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
@@ -0,0 +1,15 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+
+MAX_BATCH_REQUESTS = 20
+
+
+class BatchSubRequest(BaseModel):
+    id: Optional[str] = None
+    method: str = "GET"
+    path: str = Field(min_length=1)
+    headers: Dict[str, str] = Field(default_factory=dict)
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchSubRequest] = Field(min_length=1, max_length=MAX_BATCH_REQUESTS)
@@ -1,10 +1,13 @@
 
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
+from datetime import datetime
 from schemas.product import ProductResponse
 
 class BuyRequestPayload(BaseModel):
     product_id: int = Field(gt=0)
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
 
 class BuyRequest(BaseModel):
     id: int
@@ -16,6 +19,10 @@ class BuyRequest(BaseModel):
 class UpdateBuyerRequestStatus(BaseModel):
     status: str    
 
+class BulkUpdateBuyerRequestStatus(BaseModel):
+    request_ids: List[int] = Field(min_length=1, max_length=100)
+    status: str
+
 class BuyRequestResponse(BaseModel):
     buy_request: BuyRequest
     product: ProductResponse
@@ -1,7 +1,7 @@
 
 
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from decimal import Decimal
 from models.enums.order_status import OrderStatus
 from schemas.product import ProductResponse
@@ -17,6 +17,9 @@ class OrderRequest(BaseModel):
     security_amount: float
     status: OrderStatus
 
+class BulkReturnOrders(BaseModel):
+    order_ids: List[int] = Field(min_length=1, max_length=100)
+
 class OrderSchema(BaseModel):
     id: int
     product_id: int
@@ -31,7 +34,7 @@ class OrderSchema(BaseModel):
 
 class OrderResponse(BaseModel):
     order: OrderSchema
-    product: ProductResponse
+    product: Optional[ProductResponse] = None
 
 def order_to_schema(o: Order) -> OrderSchema:
     return OrderSchema(
@@ -5,9 +5,21 @@ from typing import Tuple
 class AuthService(ABC):
 
     @abstractmethod
-    def login(self, email: str, password: str)-> None:
+    async def login(self, email: str, password: str)-> None:
         ...
 
     @abstractmethod
-    def register(self, user: User)->  Tuple[str, User]:
+    async def register(self, user: User)->  Tuple[str, User]:
+        ...
+
+    @abstractmethod
+    async def create_session(self, user: User) -> str:
+        ...
+
+    @abstractmethod
+    async def refresh(self, refresh_token: str) -> Tuple[str, str, User]:
+        ...
+
+    @abstractmethod
+    async def logout(self, refresh_token: str) -> None:
         ...
@@ -1,8 +1,13 @@
 from service.auth.auth_interface import AuthService
 from repository.user.user_interface import UserRepo
+from repository.session_repository import SessionRepo
 from models.user import User
+from models.session import Session
 from helpers.auth_helper import AuthHelper
 import logging
+import time
+import uuid
+from typing import Tuple
 from exception.user import (
     UserAlreadyExistsError,
     InvalidCredentialsError,
@@ -14,12 +19,13 @@ logger = logging.getLogger(__name__)
 
 class AuthServiceImple(AuthService):
 
-    def __init__(self, user_repo: UserRepo):
+    def __init__(self, user_repo: UserRepo, session_repo: SessionRepo = None):
         self.user_repo = user_repo
+        self.session_repo = session_repo
 
-    async def register(self, user: User) -> None:
+    async def register(self, user: User) -> Tuple[str, User]:
         try:
-            user_db = self.user_repo.find_by_email(user.email)
+            user_db = await self.user_repo.find_by_email(user.email)
 
             if user_db:
                 raise UserAlreadyExistsError("user already exists")
@@ -33,17 +39,37 @@ class AuthServiceImple(AuthService):
         except Exception as e:
             raise AuthServiceError("failed to verify existing user") from e
 
-        user.password_hash = AuthHelper.hash_password(user.password_hash)
+        user.password_hash = await AuthHelper.hash_password_async(user.password_hash)
 
         try:
-            self.user_repo.create(user)
+            await self.user_repo.create(user)
         except Exception as e:
             raise AuthServiceError("failed to register user") from e
-        
+
+        # the user was just created with this password, so there is nothing to verify again
+        return self._issue_token(user), user
+
+    def _issue_token(self, user: User) -> str:
+        try:
+            return AuthHelper.create_token(user.id, user.role.value)
+        except Exception as e:
+            logger.exception(f"jwt in service={e}")
+            raise AuthServiceError("failed to generate token") from e
+
+    async def _rehash_if_needed(self, user: User, password: str) -> None:
+        # moves stored hashes to the configured cost one login at a time; failure only delays that
+        if not AuthHelper.needs_rehash(user.password_hash):
+            return
+        try:
+            new_hash = await AuthHelper.hash_password_async(password)
+            await self.user_repo.update_password_hash(user, new_hash)
+            user.password_hash = new_hash
+        except Exception:
+            logger.exception("failed to rehash password")
 
     async def login(self, email: str, password: str):
         try:
-            user = self.user_repo.find_by_email(email)
+            user = await self.user_repo.find_by_email(email)
         except UserNotFoundError:
             raise InvalidCredentialsError("invalid credentials")
 
@@ -51,14 +77,75 @@ class AuthServiceImple(AuthService):
             logger.exception("real error during login")
             raise 
 
-        if not AuthHelper.verify_password(password, user.password_hash):
+        if not await AuthHelper.verify_password_async(password, user.password_hash):
             logger.info("password invalid")
             raise InvalidCredentialsError("invalid credentials")
 
+        token = self._issue_token(user)
+        await self._rehash_if_needed(user, password)
+        return token, user
+
+    async def create_session(self, user: User) -> str:
         try:
-            token = AuthHelper.create_token(user.id, user.role.value)
+            session_id = uuid.uuid4().hex
+            refresh_token, token_hash = AuthHelper.new_refresh_token(session_id)
+            await self.session_repo.create_session(Session(
+                id=session_id,
+                user_id=int(user.id),
+                token_hash=token_hash,
+                expires_at=AuthHelper.refresh_token_expiry(),
+            ))
+            return refresh_token
         except Exception as e:
-            logger.exception(f"jwt in service={e}")
-            raise AuthServiceError("failed to generate token") from e
+            logger.exception("failed to create session")
+            raise AuthServiceError("failed to create session") from e
 
-        return token, user
+    async def refresh(self, refresh_token: str) -> Tuple[str, str, User]:
+        # renews the access token from the session store; no password, so no bcrypt
+        try:
+            session_id, secret = AuthHelper.parse_refresh_token(refresh_token)
+        except ValueError:
+            raise InvalidCredentialsError("invalid refresh token")
+        try:
+            session = await self.session_repo.get_session(session_id)
+        except Exception as e:
+            raise AuthServiceError("failed to load session") from e
+        if session is None or session.revoked or session.expires_at <= int(time.time()):
+            raise InvalidCredentialsError("invalid refresh token")
+        if not AuthHelper.refresh_secret_matches(secret, session.token_hash):
+            # an already-rotated token came back: treat the session as stolen and end it
+            logger.warning(f"refresh token reuse on session {session_id}, revoking")
+            await self.session_repo.revoke_session(session_id)
+            raise InvalidCredentialsError("invalid refresh token")
+
+        new_token, new_hash = AuthHelper.new_refresh_token(session_id)
+        try:
+            rotated = await self.session_repo.rotate_session(session_id, session.token_hash, new_hash, AuthHelper.refresh_token_expiry())
+        except Exception as e:
+            raise AuthServiceError("failed to rotate session") from e
+        if not rotated:
+            raise InvalidCredentialsError("invalid refresh token")
+
+        try:
+            user = await self.user_repo.find_by_id(session.user_id)
+        except Exception as e:
+            raise AuthServiceError("failed to load user") from e
+        if user is None:
+            await self.session_repo.revoke_session(session_id)
+            raise InvalidCredentialsError("invalid refresh token")
+        return self._issue_token(user), new_token, user
+
+    async def logout(self, refresh_token: str) -> None:
+        try:
+            session_id, secret = AuthHelper.parse_refresh_token(refresh_token)
+        except ValueError:
+            raise InvalidCredentialsError("invalid refresh token")
+        try:
+            session = await self.session_repo.get_session(session_id)
+            if session is None or not AuthHelper.refresh_secret_matches(secret, session.token_hash):
+                raise InvalidCredentialsError("invalid refresh token")
+            await self.session_repo.revoke_session(session_id)
+        except InvalidCredentialsError:
+            raise
+        except Exception as e:
+            raise AuthServiceError("failed to revoke session") from e
@@ -1,7 +1,9 @@
 
+import asyncio
 import logging
-from typing import Optional, List
-from datetime import datetime,timezone
+from functools import partial
+from typing import AsyncIterator, Optional, List, Tuple
+from datetime import datetime, timedelta, timezone
 from models.buy_request import BuyingRequest
 from models.orders import Order
 from models.enums.buy_request import BuyRequestStatus
@@ -10,10 +12,17 @@ from repository.product_repository import ProductRepo
 from repository.order_repository import OrderRepo
 from repository.category_repository import CategoryRepo
 from repository.buy_request_repository import BuyRequestRepo
+from repository.booking_repository import BookingRepo
+from helpers.interval_index import IntervalIndex
+from database.batch import run_in_chunks
+from helpers.fields import Fields
 
 
 logger = logging.getLogger(__name__)
 
+# tolerated clock skew between client and server for an explicit start date
+START_DATE_GRACE = timedelta(minutes=5)
+
 
 class BuyRequestService:
     def __init__(
@@ -22,20 +31,45 @@ class BuyRequestService:
         buyer_request_repo:BuyRequestRepo,
         category_repo:CategoryRepo,
         order_repo: OrderRepo,
+        booking_repo: BookingRepo,
     ):
         self.product_repo = product_repo
         self.buyer_request_repo = buyer_request_repo
         self.category_repo = category_repo
         self.order_repo = order_repo
+        self.booking_repo = booking_repo
+
+    def _rental_window(self, product, start_date: Optional[datetime], end_date: Optional[datetime]) -> Tuple[datetime, datetime]:
+        # defaults: starts now and runs for the product's duration in days
+        start = start_date or datetime.now(timezone.utc)
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+        end = end_date or start + timedelta(days=int(product.duration))
+        if end.tzinfo is None:
+            end = end.replace(tzinfo=timezone.utc)
+        if end <= start:
+            raise RuntimeError("end date must be after start date")
+        return start, end
+
+    def _booking_conflict(self, product, index: IntervalIndex, start: datetime, end: datetime) -> Optional[str]:
+        # rentals starting now also need the product back from its current (possibly undated) order
+        if start <= datetime.now(timezone.utc) and not bool(product.is_available):
+            return "product not available"
+        if index.overlaps(start, end):
+            return "product is already booked for the requested dates"
+        return None
 
-    async def create_buyer_request(self, product_id: int, user_ctx) -> None:
+    async def create_buyer_request(
+        self,
+        product_id: int,
+        user_ctx,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+    ) -> None:
         try:
             product_resp = await self.product_repo.find_by_id(product_id)
             if product_resp is None:
                 raise RuntimeError("product not found")
-            
-            if not bool(product_resp.product.is_available):
-                raise RuntimeError("product not available")
 
             requester_id = user_ctx.get("user_id")
             
@@ -45,28 +79,51 @@ class BuyRequestService:
             if int(product_resp.product.lender_id) == int(requester_id):
                 raise RuntimeError("lender cannot create a buying request for their own product")
 
-            #checking if biy request already exist on this product
-            statuses = [BuyRequestStatus.Pending.value]
-            existing_requests: List[BuyingRequest] = await self.buyer_request_repo.get_all_buyer_requests(
-                product_id, statuses
-            )
-            for req in existing_requests:
-     
-                if int(req.requested_by) == int(requester_id):
-                    raise RuntimeError("a pending or approved request already exists")
+            start, end = self._rental_window(product_resp.product, start_date, end_date)
+            if start < datetime.now(timezone.utc) - START_DATE_GRACE:
+                raise RuntimeError("start date must not be in the past")
+            _, index = await self.booking_repo.get_calendar(product_id)
+            conflict = self._booking_conflict(product_resp.product, index, start, end)
+            if conflict:
+                raise RuntimeError(conflict)
 
             new_request = BuyingRequest(
                 product_id=product_id,
                 requested_by=int(requester_id),
+                lender_id=int(product_resp.product.lender_id),
                 status=BuyRequestStatus.Pending.value,
-                created_at=datetime.now,
+                start_date=start,
+                end_date=end,
             )
+            # duplicate pending requests are rejected by the repository's conditional write
             await self.buyer_request_repo.create_buyer_request(new_request)
 
         except Exception as e:
             logger.exception("failed in service create_buyer_request")
             raise e
 
+    async def _apply_status(self, req: BuyingRequest, product, category, updated_status: str, calendar_version: int = 0) -> None:
+        if updated_status == BuyRequestStatus.Rejected.value:
+            await self.buyer_request_repo.change_status(req, BuyRequestStatus.Rejected.value)
+            return
+
+        start, end = self._rental_window(product, req.start_date, req.end_date)
+        new_order = Order(
+            product_id=req.product_id,
+            user_id=req.requested_by,
+            start_date=start,
+            end_date=end,
+            total_amount=float(getattr(category, "price", 0.0)),
+            security_amount=float(getattr(category, "security", 0.0)),
+            status=OrderStatus.InUse.value,
+        )
+
+        # order copies, booking and request status commit in one transaction; whether the product is out
+        # right now is read off the calendar, so a future booking needs nothing to flip when it starts
+        related_items = self.order_repo.order_put_items(new_order, int(product.lender_id))
+        related_items += self.booking_repo.booking_items(product.id, new_order.id, start, end, calendar_version)
+        await self.buyer_request_repo.change_status(req, BuyRequestStatus.Approved.value, related_items)
+
     async def update_buyer_request_status(self, request_id: int, updated_status: str, user_ctx) -> None:
         try:
             role_val = user_ctx.get("role")
@@ -77,49 +134,159 @@ class BuyRequestService:
             if updated_status not in (BuyRequestStatus.Approved.value, BuyRequestStatus.Rejected.value):
                 raise RuntimeError("invalid status: only 'approved' or 'rejected' allowed")
 
-            all_requests: List[BuyingRequest] = await self.buyer_request_repo.get_all_buyer_requests()
-            req: Optional[BuyingRequest] = next((r for r in all_requests if int(getattr(r, "id", 0)) == int(request_id)), None)
+            req: Optional[BuyingRequest] = await self.buyer_request_repo.get_buyer_request_by_id(request_id)
             if req is None:
                 raise RuntimeError("buyer request not found")
+            if req.status != BuyRequestStatus.Pending:
+                raise RuntimeError("buyer request is not pending")
 
-            if updated_status == BuyRequestStatus.Rejected.value:
-                await self.buyer_request_repo.update_status_buyer_request(request_id, BuyRequestStatus.Rejected.value)
-                return
-
-            product_resp = await self.product_repo.find_by_id(req.product_id)
-            if product_resp is None:
+            product = await self.product_repo.find_product(req.product_id)
+            if product is None:
                 raise RuntimeError("product not found")
 
-            category = await self.category_repo.find_by_id(int(product_resp.category.id))
-            if category is None:
-                raise RuntimeError("category not found")
-
-            new_order = Order(
-                product_id=req.product_id,
-                user_id=req.requested_by,
-                start_date=datetime.now(timezone.utc),
-                end_date=datetime.fromtimestamp(0, tz=timezone.utc),
-                total_amount=float(getattr(category, "price", 0.0)),
-                security_amount=float(getattr(category, "security", 0.0)),
-                status=OrderStatus.InUse.value,
-                created_at=datetime.now,
-            )
+            lender_id = user_ctx.get("user_id")
+            if lender_id is None or int(product.lender_id) != int(lender_id):
+                raise RuntimeError("you can only update requests for your own products")
+
+            category = None
+            version = 0
+            if updated_status == BuyRequestStatus.Approved.value:
+                start, end = self._rental_window(product, req.start_date, req.end_date)
+                version, index = await self.booking_repo.get_calendar(int(product.id))
+                conflict = self._booking_conflict(product, index, start, end)
+                if conflict:
+                    raise RuntimeError(conflict)
+                category = await self.category_repo.find_by_id(int(product.category_id))
+                if category is None:
+                    raise RuntimeError("category not found")
 
-            await self.order_repo.create_order(new_order)
-            await self.buyer_request_repo.update_status_buyer_request(request_id, BuyRequestStatus.Approved.value)
+            await self._apply_status(req, product, category, updated_status, version)
 
         except Exception as e:
             logger.exception("failed in service update_buyer_request_status")
             raise e
 
+    async def _apply_product_batch(self, items: list, updated_status: str, calendar) -> List[Tuple[int, Optional[str]]]:
+        # one product's requests, applied in order: every approval bumps the calendar version the next one expects
+        version, index = calendar if calendar else (0, IntervalIndex())
+        booked = []
+        outcomes = []
+        for rid, req, product, category in items:
+            try:
+                if updated_status == BuyRequestStatus.Approved.value:
+                    start, end = self._rental_window(product, req.start_date, req.end_date)
+                    conflict = self._booking_conflict(product, index, start, end)
+                    if conflict is None and IntervalIndex(booked).overlaps(start, end):
+                        conflict = "product is already booked for the requested dates"
+                    if conflict:
+                        outcomes.append((rid, conflict))
+                        continue
+                await self._apply_status(req, product, category, updated_status, version)
+                if updated_status == BuyRequestStatus.Approved.value:
+                    version += 1
+                    booked.append((start, end))
+                outcomes.append((rid, None))
+            except Exception as e:
+                outcomes.append((rid, str(e)))
+        return outcomes
+
+    async def bulk_update_buyer_request_status(self, request_ids: List[int], updated_status: str, user_ctx) -> List[dict]:
+        try:
+            if user_ctx.get("role") not in ("lender",):
+                raise RuntimeError("unauthorized: only lenders can update request status")
+
+            if updated_status not in (BuyRequestStatus.Approved.value, BuyRequestStatus.Rejected.value):
+                raise RuntimeError("invalid status: only 'approved' or 'rejected' allowed")
+
+            lender_id = user_ctx.get("user_id")
+            if lender_id is None or int(lender_id) <= 0:
+                raise RuntimeError("invalid lender")
+
+            approving = updated_status == BuyRequestStatus.Approved.value
+            request_ids = list(dict.fromkeys(int(i) for i in request_ids))
+            requests = await self.buyer_request_repo.get_buyer_requests_by_ids(request_ids)
+            products = await self.product_repo.find_products_by_ids(list({r.product_id for r in requests.values()}))
+            categories = {}
+            calendars = {}
+            if approving:
+                categories, calendars = await asyncio.gather(
+                    self.category_repo.find_by_ids(list({p.category_id for p in products.values()})),
+                    self.booking_repo.get_calendars(list(products.keys())),
+                )
+
+            errors = {}
+            by_product = {}
+            for rid in request_ids:
+                req = requests.get(rid)
+                product = products.get(req.product_id) if req else None
+                category = categories.get(product.category_id) if product else None
+                if req is None:
+                    errors[rid] = "buyer request not found"
+                elif req.status != BuyRequestStatus.Pending:
+                    errors[rid] = "buyer request is not pending"
+                elif product is None:
+                    errors[rid] = "product not found"
+                elif int(product.lender_id) != int(lender_id):
+                    errors[rid] = "you can only update requests for your own products"
+                elif approving and category is None:
+                    errors[rid] = "category not found"
+                else:
+                    by_product.setdefault(product.id, []).append((rid, req, product, category))
+
+            # products are independent, so their batches run in parallel chunks
+            batches = await run_in_chunks([
+                partial(self._apply_product_batch, items, updated_status, calendars.get(pid))
+                for pid, items in by_product.items()
+            ])
+            for items, batch in zip(by_product.values(), batches):
+                if isinstance(batch, Exception):
+                    errors.update({rid: str(batch) for rid, *_ in items})
+                    continue
+                errors.update({rid: error for rid, error in batch if error})
+
+            return [
+                {"id": rid, "success": rid not in errors, "error": errors.get(rid)}
+                for rid in request_ids
+            ]
+
+        except Exception as e:
+            logger.exception("failed in service bulk_update_buyer_request_status")
+            raise e
+
     async def get_all_buyer_requests(
         self,
         product_id: Optional[int],
         filter_statuses: Optional[List[str]],
+        fields: Fields = None,
     ) -> List[BuyingRequest]:
         try:
-            requests = await self.buyer_request_repo.get_all_buyer_requests(product_id, filter_statuses)
+            requests = await self.buyer_request_repo.get_all_buyer_requests(product_id, filter_statuses, fields=fields)
             return requests
         except Exception as e:
             logger.exception("failed in service get_all_buyer_requests")
             raise e
+
+    async def iter_buyer_requests(
+        self,
+        product_id: Optional[int],
+        filter_statuses: Optional[List[str]],
+        fields: Fields = None,
+    ) -> AsyncIterator[List[BuyingRequest]]:
+        try:
+            async for page in self.buyer_request_repo.iter_buyer_requests(product_id, filter_statuses, fields=fields):
+                yield page
+        except Exception as e:
+            logger.exception("failed in service iter_buyer_requests")
+            raise e
+
+    async def get_lender_buyer_requests(self, user_ctx, filter_statuses: Optional[List[str]]) -> List[BuyingRequest]:
+        try:
+            if user_ctx.get("role") not in ("lender",):
+                raise RuntimeError("unauthorized: only lenders can view their buyer requests")
+            lender_id = user_ctx.get("user_id")
+            if lender_id is None or int(lender_id) <= 0:
+                raise RuntimeError("invalid lender")
+            return await self.buyer_request_repo.get_lender_buyer_requests(int(lender_id), filter_statuses)
+        except Exception as e:
+            logger.exception("failed in service get_lender_buyer_requests")
+            raise e
@@ -17,6 +17,13 @@ class CategoryService:
             logger.exception("failed in service in create category=")
             raise e
 
+    async def get_version(self) -> int:
+        try:
+            return await self.category_repo.get_version()
+        except Exception as e:
+            logger.exception("failed in service in get category version")
+            raise e
+
     async def get_all_categories(self):
         try:
             categories = await self.category_repo.get_all_categories()
@@ -1,7 +1,9 @@
 
 import logging
 from datetime import datetime
+from typing import List, Optional, Tuple
 from models.feedback import Feedback
+from models.rating import LenderRating
 
 logger = logging.getLogger(__name__)
 
@@ -31,31 +33,41 @@ class FeedbackService:
                 given_to=given_to,
                 rating=int(rating),
                 text=feedback_text,
-                created_at=datetime.now,
+                created_at=datetime.now(),
             )
-            await self.feedback_repo.create_feedback(feedback)
+            due_order_id = None
+            if int(order.user_id) == int(user_id) and await self.feedback_repo.is_feedback_due(int(user_id), int(order_id)):
+                due_order_id = int(order_id)
+            await self.feedback_repo.create_feedback(feedback, due_order_id=due_order_id)
         except Exception as e:
             logger.exception("failed in service give_feedback")
             raise e
 
-    async def get_all_given_feedbacks(self, user_ctx):
+    async def get_all_given_feedbacks(self, user_ctx, limit: Optional[int] = None, cursor: Optional[str] = None) -> Tuple[List[Feedback], Optional[str]]:
         try:
             user_id = getattr(user_ctx, "user_id", None) if not isinstance(user_ctx, dict) else user_ctx.get("user_id")
             if user_id is None or int(user_id) <= 0:
                 raise RuntimeError("invalid user")
-            feedbacks = await self.feedback_repo.get_all_feedbacks()
-            return [f for f in feedbacks if int(f.given_by) == int(user_id)]
+            return await self.feedback_repo.get_feedbacks_given_by(int(user_id), limit, cursor)
         except Exception as e:
             logger.exception("failed in service get_all_given_feedbacks")
             raise e
 
-    async def get_all_received_feedbacks(self, user_ctx):
+    async def get_all_received_feedbacks(self, user_ctx, limit: Optional[int] = None, cursor: Optional[str] = None) -> Tuple[List[Feedback], Optional[str]]:
         try:
             user_id = getattr(user_ctx, "user_id", None) if not isinstance(user_ctx, dict) else user_ctx.get("user_id")
             if user_id is None or int(user_id) <= 0:
                 raise RuntimeError("invalid user")
-            feedbacks = await self.feedback_repo.get_all_feedbacks()
-            return [f for f in feedbacks if int(f.given_to) == int(user_id)]
+            return await self.feedback_repo.get_feedbacks_given_to(int(user_id), limit, cursor)
         except Exception as e:
             logger.exception("failed in service get_all_received_feedbacks")
             raise e
+
+    async def get_lender_rating(self, lender_id: int) -> LenderRating:
+        try:
+            if lender_id is None or int(lender_id) <= 0:
+                raise RuntimeError("invalid lender")
+            return await self.feedback_repo.get_lender_rating(int(lender_id))
+        except Exception as e:
+            logger.exception("failed in service get_lender_rating")
+            raise e
@@ -1,21 +1,35 @@
 
 import logging
-from typing import List
+from functools import partial
+from typing import AsyncIterator, List, Optional, Tuple
+from database.batch import run_in_chunks
+from helpers.fields import Fields
 from models.enums.order_status import OrderStatus
 from repository.order_repository import OrderRepo
 from repository.product_repository import ProductRepo
 from repository.return_request_repository import ReturnRequestRepo
+from repository.booking_repository import BookingRepo
 from models.enums.user import Role
 from models.orders import Order
+from models.product import Product
 from schemas.orders import OrderSchema,OrderResponse
 
 logger = logging.getLogger(__name__)
 
 class OrderService:
-    def __init__(self, order_repo:OrderRepo , product_repo:ProductRepo, return_request_repo:ReturnRequestRepo,):
+    def __init__(self, order_repo:OrderRepo , product_repo:ProductRepo, return_request_repo:ReturnRequestRepo, booking_repo: BookingRepo):
         self.order_repo = order_repo
         self.product_repo = product_repo
         self.return_request_repo = return_request_repo
+        self.booking_repo = booking_repo
+
+    def _return_items(self, order: Order, product: Optional[Product]) -> List[dict]:
+        # the return frees the order's booked window and, when approving it took the product off the shelf,
+        # puts the product back; both commit with the status change
+        items = self.booking_repo.release_items(order.product_id, order.id, order.start_date)
+        if product is not None and not bool(product.is_available):
+            items = items + self.product_repo.availability_update_items(product, True)
+        return items
 
     async def update_order_status(self, order_id: int, new_status: OrderStatus) -> None:
         try:
@@ -24,6 +38,12 @@ class OrderService:
                 raise RuntimeError("order not found")
             if new_status == OrderStatus.Returned and order.status != OrderStatus.ReturnRequested:
                 raise RuntimeError("order must be in return_requested status to mark as returned")
+            if new_status == OrderStatus.Returned:
+                product = await self.product_repo.find_product(order.product_id)
+                if product is None:
+                    raise RuntimeError("product not found")
+                await self.order_repo.apply_status_change(order, int(product.lender_id), new_status.value, self._return_items(order, product))
+                return
             await self.order_repo.update_order_status(order_id, new_status.value)
         except Exception as e:
             logger.exception("failed in service update_order_status")
@@ -40,24 +60,36 @@ class OrderService:
             logger.exception("failed in service get_order_history")
             raise e
 
-    async def get_lender_orders(self, user_ctx) -> List:
+    def _lender_id(self, user_ctx) -> int:
+        role_val = getattr(user_ctx, "role", None) if not isinstance(user_ctx, dict) else user_ctx.get("role")
+        if Role:
+            allowed = role_val in (Role.lender, "lender")
+        else:
+            allowed = role_val in ("lender",)
+        if not allowed:
+            raise RuntimeError("only lender can get orders")
+        lender_id = getattr(user_ctx, "user_id", None) if not isinstance(user_ctx, dict) else user_ctx.get("user_id")
+        if lender_id is None or int(lender_id) <= 0:
+            raise RuntimeError("invalid lender")
+        return int(lender_id)
+
+    async def get_lender_orders(self, user_ctx, fields: Fields = None) -> List:
         try:
-            role_val = getattr(user_ctx, "role", None) if not isinstance(user_ctx, dict) else user_ctx.get("role")
-            if Role:
-                allowed = role_val in (Role.lender, "lender")
-            else:
-                allowed = role_val in ("lender",)
-            if not allowed:
-                raise RuntimeError("only lender can get orders")
-            lender_id = getattr(user_ctx, "user_id", None) if not isinstance(user_ctx, dict) else user_ctx.get("user_id")
-            if lender_id is None or int(lender_id) <= 0:
-                raise RuntimeError("invalid lender")
-            orders = await self.order_repo.get_lender_orders(int(lender_id))
+            orders = await self.order_repo.get_lender_orders(self._lender_id(user_ctx), fields=fields)
             return orders
         except Exception as e:
             logger.exception("failed in service get_lender_orders")
             raise e
 
+    async def iter_lender_orders(self, user_ctx, fields: Fields = None) -> AsyncIterator[List[Order]]:
+        try:
+            lender_id = self._lender_id(user_ctx)
+            async for page in self.order_repo.iter_lender_orders(lender_id, fields=fields):
+                yield page
+        except Exception as e:
+            logger.exception("failed in service iter_lender_orders")
+            raise e
+
     async def mark_order_as_returned(self, order_id: int, user_ctx) -> None:
         try:
             order = await self.order_repo.get_order_by_id(order_id)
@@ -69,11 +101,73 @@ class OrderService:
             lender_id = getattr(user_ctx, "user_id", None) if not isinstance(user_ctx, dict) else user_ctx.get("user_id")
             if int(product_resp.product.lender_id) != int(lender_id):
                 raise RuntimeError("unauthorized lender")
-            await self.order_repo.update_order_status(order_id, OrderStatus.Returned.value)
+            await self.order_repo.apply_status_change(
+                order, int(lender_id), OrderStatus.Returned.value, self._return_items(order, product_resp.product)
+            )
         except Exception as e:
             logger.exception("failed in service mark_order_as_returned")
             raise e
 
+    async def _return_product_batch(self, items: list, lender_id: int, product: Product) -> List[Tuple[int, Optional[str]]]:
+        # one product's returns, applied in order: every return bumps the same calendar version, so concurrent
+        # ones would cancel each other; the restock rides on whichever return commits first
+        outcomes = []
+        for oid, order in items:
+            try:
+                await self.order_repo.apply_status_change(order, lender_id, OrderStatus.Returned.value, self._return_items(order, product))
+                product.is_available = True
+                outcomes.append((oid, None))
+            except Exception as e:
+                outcomes.append((oid, str(e)))
+        return outcomes
+
+    async def bulk_mark_orders_as_returned(self, order_ids: List[int], user_ctx) -> List[dict]:
+        try:
+            lender_id = getattr(user_ctx, "user_id", None) if not isinstance(user_ctx, dict) else user_ctx.get("user_id")
+            if lender_id is None or int(lender_id) <= 0:
+                raise RuntimeError("invalid lender")
+
+            order_ids = list(dict.fromkeys(int(i) for i in order_ids))
+            orders = await self.order_repo.get_orders_by_ids(order_ids)
+            products = await self.product_repo.find_products_by_ids(list({o.product_id for o in orders.values()}))
+
+            errors = {}
+            by_product = {}
+            for oid in order_ids:
+                order = orders.get(oid)
+                product = products.get(order.product_id) if order else None
+                if order is None:
+                    errors[oid] = "order not found"
+                elif product is None:
+                    errors[oid] = "product not found"
+                elif int(product.lender_id) != int(lender_id):
+                    errors[oid] = "unauthorized lender"
+                elif order.status == OrderStatus.Returned:
+                    errors[oid] = "order already returned"
+                elif order.status != OrderStatus.ReturnRequested:
+                    errors[oid] = "order must be in return_requested status to mark as returned"
+                else:
+                    by_product.setdefault(order.product_id, []).append((oid, order))
+
+            # products are independent, so their batches run in parallel chunks
+            batches = await run_in_chunks([
+                partial(self._return_product_batch, items, int(lender_id), products[pid])
+                for pid, items in by_product.items()
+            ])
+            for items, batch in zip(by_product.values(), batches):
+                if isinstance(batch, Exception):
+                    errors.update({oid: str(batch) for oid, _ in items})
+                    continue
+                errors.update({oid: error for oid, error in batch if error})
+
+            return [
+                {"id": oid, "success": oid not in errors, "error": errors.get(oid)}
+                for oid in order_ids
+            ]
+        except Exception as e:
+            logger.exception("failed in service bulk_mark_orders_as_returned")
+            raise e
+
     # async def get_all_approved_awaiting_orders(self, user_ctx) -> List:
     #     try:
     #         role_val = user_ctx.get("role")
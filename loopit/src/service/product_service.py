@@ -1,22 +1,54 @@
 
 import logging
-from datetime import datetime
+import asyncio
+from datetime import datetime, timezone
 import time
 from repository.user.user_interface import UserRepo 
 from repository.product_repository import ProductRepo
+from repository.booking_repository import BookingRepo
 from schemas.product import ProductRequest, ProductResponse
-from models.product import Product,ProductFilter
+from models.product import Product,ProductChanges,ProductFilter
+from exception.product import ProductChangesExpiredError
+from helpers.watermark import parse_watermark
 from models.enums.user import Role
-from typing import Optional
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+from helpers.fields import Fields
 
 logger = logging.getLogger(__name__)
 
 class ProductService:
-    def __init__(self, product_repo: ProductRepo , user_repo:UserRepo):
+    def __init__(self, product_repo: ProductRepo , user_repo:UserRepo, booking_repo: BookingRepo):
         self.product_repo = product_repo
         self.user_repo = user_repo
+        self.booking_repo = booking_repo
 
-    async def get_all_products(self, search: Optional[str], lender_id: Optional[str], category_id: Optional[str], is_available: Optional[str]):
+    async def _with_live_availability(self, rows: List[ProductResponse], fields: Fields = None, is_available: Optional[str] = None) -> List[ProductResponse]:
+        # IsAvailable is the stored flag; a product is also out while one of its bookings covers the current time,
+        # which the calendar index answers without any write when a future booking starts or another one ends
+        if fields is not None and "is_available" not in fields and is_available is None:
+            return rows
+        listed = [int(r.product.id) for r in rows if r.product.is_available]
+        if listed:
+            calendars = await self.booking_repo.get_calendars(listed)
+            now = datetime.now(timezone.utc)
+            for r in rows:
+                calendar = calendars.get(int(r.product.id))
+                if r.product.is_available and calendar and calendar[1].covers(now):
+                    r.product.is_available = False
+        if is_available is not None:
+            wanted = is_available.strip().lower() == "true"
+            rows = [r for r in rows if bool(r.product.is_available) == wanted]
+        return rows
+
+    async def booked_now(self, id: int) -> bool:
+        try:
+            _, index = await self.booking_repo.get_calendar(id)
+            return index.covers(datetime.now(timezone.utc))
+        except Exception as e:
+            logger.exception("failed in service booked_now")
+            raise e
+
+    async def get_all_products(self, search: Optional[str], lender_id: Optional[str], category_id: Optional[str], is_available: Optional[str], fields: Fields = None, include: Iterable[str] = ()):
         try:
             filters : ProductFilter = ProductFilter(
                 category_id= category_id,
@@ -24,26 +56,98 @@ class ProductService:
                 is_available= is_available,
                 lender_id= lender_id
             )
-            products = await self.product_repo.find_all(filters)
-            return products
+            products = await self.product_repo.find_all(filters, fields=fields, include=include)
+            return await self._with_live_availability(products, fields, is_available)
         
         except Exception as e:
             logger.exception("failed in service get_all_products")
             raise e
 
-    async def get_product_by_id(self, id: int) -> ProductResponse | None:
+    async def iter_products(self, search: Optional[str], lender_id: Optional[str], category_id: Optional[str], is_available: Optional[str], fields: Fields = None, include: Iterable[str] = ()) -> AsyncIterator[List[ProductResponse]]:
+        try:
+            filters = ProductFilter(
+                category_id=category_id,
+                search=search,
+                is_available=is_available,
+                lender_id=lender_id,
+            )
+            async for page in self.product_repo.iter_all(filters, fields=fields, include=include):
+                page = await self._with_live_availability(page, fields, is_available)
+                if page:
+                    yield page
+        except Exception as e:
+            logger.exception("failed in service iter_products")
+            raise e
+
+    async def get_product_version(self, id: int) -> Optional[int]:
         try:
             if id <= 0:
                 raise RuntimeError("product ID must be a positive integer")
-            product = await self.product_repo.find_by_id(id)
+            return await self.product_repo.get_version(id)
+        except Exception as e:
+            logger.exception("failed in service get_product_version")
+            raise e
+
+    async def get_product_changes(self, since: Optional[str], include: Iterable[str] = ()) -> ProductChanges:
+        try:
+            if since is None:
+                # a new client only gets a starting watermark, taken before it downloads the full catalog
+                return ProductChanges(watermark=str(self.product_repo.current_watermark()))
+            timestamp, _ = parse_watermark(since)
+            if timestamp < self.product_repo.oldest_watermark():
+                raise ProductChangesExpiredError("watermark is older than the change log; download the full catalog again")
+            return await self.product_repo.find_changes(since, include=include)
+        except Exception as e:
+            logger.exception("failed in service get_product_changes")
+            raise e
+
+    async def get_product_by_id(self, id: int, fields: Fields = None, include: Iterable[str] = ()) -> ProductResponse | None:
+        try:
+            if id <= 0:
+                raise RuntimeError("product ID must be a positive integer")
+            product = await self.product_repo.find_by_id(id, fields=fields, include=include)
             if product is None:
                 raise RuntimeError("product not found")
-            return product
+            return (await self._with_live_availability([product], fields))[0]
         
         except Exception as e:
             logger.exception("failed in service get_product_by_id")
             raise e
 
+    async def get_products_by_ids(self, ids: List[int], include: Iterable[str] = ()) -> Dict[int, ProductResponse]:
+        try:
+            unique_ids = list({int(i) for i in ids if int(i) > 0})
+            if not unique_ids:
+                return {}
+            return await self.product_repo.find_by_ids(unique_ids, include=include)
+        except Exception as e:
+            logger.exception("failed in service get_products_by_ids")
+            raise e
+
+    async def get_availability(self, ids: List[int], start: datetime, end: datetime) -> Dict[int, bool]:
+        try:
+            if end <= start:
+                raise RuntimeError("end date must be after start date")
+            unique_ids = list(dict.fromkeys(int(i) for i in ids if int(i) > 0))
+            if not unique_ids:
+                return {}
+            products, calendars = await asyncio.gather(
+                self.product_repo.find_products_by_ids(unique_ids),
+                self.booking_repo.get_calendars(unique_ids),
+            )
+            starts_now = start <= datetime.now(timezone.utc)
+            availability = {}
+            for pid in unique_ids:
+                product = products.get(pid)
+                if product is None:
+                    continue
+                _, index = calendars[pid]
+                availability[pid] = index.is_free(start, end) and (bool(product.is_available) or not starts_now)
+            return availability
+        except Exception as e:
+            logger.exception("failed in service get_availability")
+            raise e
+
     async def create_product(self, product: ProductRequest, user_ctx) -> None:
         try:
             if user_ctx is None:
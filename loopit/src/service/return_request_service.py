@@ -40,7 +40,7 @@ class ReturnRequestService:
             )
 
             await self.order_repo.update_order_status(order_id, OrderStatus.ReturnRequested.value)
-            await self.return_request_repo.create_return_request(rr)
+            await self.return_request_repo.create_return_request(rr, borrower_id=int(order.user_id))
         except Exception as e:
             logger.exception("failed in service create_return_request")
             raise e
@@ -62,7 +62,7 @@ class ReturnRequestService:
             if int(order.user_id) != int(user_id):
                 raise RuntimeError("user does not own this order")
 
-            await self.return_request_repo.update_return_request_status(req.id, new_status.value)
+            await self.return_request_repo.update_return_request_status(req.id, new_status.value, borrower_id=int(order.user_id))
         except Exception as e:
             logger.exception("failed in service update_return_request_status")
             raise e
@@ -12,6 +12,13 @@ class SocietyService:
     def __init__(self, society_repo: SocietyRepo):
         self.society_repo = society_repo
 
+    async def get_version(self) -> int:
+        try:
+            return await self.society_repo.get_version()
+        except Exception as e:
+            logger.exception("failed in service: get_version")
+            raise e
+
     async def get_all_societies(self) -> List[Society]:
         try:
             societies: List[Society] = await self.society_repo.find_all()
@@ -0,0 +1,33 @@
+
+import logging
+from models.dashboard import LenderDashboard, UserSummary
+from repository.stats_repository import StatsRepo
+
+logger = logging.getLogger(__name__)
+
+
+class StatsService:
+    def __init__(self, stats_repo: StatsRepo):
+        self.stats_repo = stats_repo
+
+    async def get_lender_dashboard(self, user_ctx) -> LenderDashboard:
+        try:
+            if user_ctx.get("role") not in ("lender",):
+                raise RuntimeError("unauthorized: only lenders have a dashboard")
+            lender_id = user_ctx.get("user_id")
+            if lender_id is None or int(lender_id) <= 0:
+                raise RuntimeError("invalid lender")
+            return await self.stats_repo.get_lender_dashboard(int(lender_id))
+        except Exception as e:
+            logger.exception("failed in service get_lender_dashboard")
+            raise e
+
+    async def get_user_summary(self, user_ctx) -> UserSummary:
+        try:
+            user_id = user_ctx.get("user_id")
+            if user_id is None or int(user_id) <= 0:
+                raise RuntimeError("invalid user")
+            return await self.stats_repo.get_user_summary(int(user_id))
+        except Exception as e:
+            logger.exception("failed in service get_user_summary")
+            raise e
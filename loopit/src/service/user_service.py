@@ -1,7 +1,8 @@
 
 import logging
-from typing import Optional, Dict, Any, List
+from typing import AsyncIterator, Optional, Dict, Any, List
 from repository.user.user_interface import UserRepo
+from helpers.fields import Fields
 
 logger = logging.getLogger(__name__)
 
@@ -27,20 +28,37 @@ class UserService:
             logger.exception("failed in service become_lender")
             raise e
 
-    async def get_all_users(self, filters: Optional[Dict[str, Any]]) -> List:
+    async def get_all_users(self, filters: Optional[Dict[str, Any]], fields: Fields = None) -> List:
         try:
             filters = filters or {}
-            users = await self.user_repo.find_all(filters)
+            users = await self.user_repo.find_all(filters, fields=fields)
             return users
         except Exception as e:
             logger.exception("failed in service get_all_users")
             raise e
 
-    async def get_user_by_id(self, user_id: int):
+    async def iter_users(self, filters: Optional[Dict[str, Any]], fields: Fields = None) -> AsyncIterator[List]:
+        try:
+            async for page in self.user_repo.iter_all(filters or {}, fields=fields):
+                yield page
+        except Exception as e:
+            logger.exception("failed in service iter_users")
+            raise e
+
+    async def get_user_version(self, user_id: int) -> Optional[int]:
+        try:
+            if int(user_id) <= 0:
+                raise RuntimeError("user ID must be a positive integer")
+            return await self.user_repo.get_version(int(user_id))
+        except Exception as e:
+            logger.exception("failed in service get_user_version")
+            raise e
+
+    async def get_user_by_id(self, user_id: int, fields: Fields = None):
         try:
             if int(user_id) <= 0:
                 raise RuntimeError("user ID must be a positive integer")
-            user = await self.user_repo.find_by_id(int(user_id))
+            user = await self.user_repo.find_by_id(int(user_id), fields=fields)
             return user
         except Exception as e:
             logger.exception("failed in service get_user_by_id")
@@ -0,0 +1,7 @@
+from database.connection import get_dynamodb
+from fastapi import Depends
+from repository.booking_repository import BookingRepo
+
+
+def get_booking_repo(dynamodb = Depends(get_dynamodb)) -> BookingRepo:
+    return BookingRepo(dynamodb)
@@ -10,6 +10,8 @@ from service.buy_request_service import BuyRequestService
 from setup.product_dependencies import get_product_repo
 from setup.category_dependency import get_category_repo
 from setup.order_dependencies import get_order_repo
+from setup.booking_dependencies import get_booking_repo
+from repository.booking_repository import BookingRepo
 
 
 def get_buyer_request_repo(dynamodb = Depends(get_dynamodb)) -> BuyRequestRepo:
@@ -20,10 +22,12 @@ def get_buyer_request_service(
     product_repo: Annotated[ProductRepo, Depends(get_product_repo)],
        order_repo: Annotated[OrderRepo, Depends(get_order_repo)],
     category_repo: Annotated[CategoryRepo, Depends(get_category_repo)],
+    booking_repo: Annotated[BookingRepo, Depends(get_booking_repo)],
 ) -> BuyRequestService:
     return BuyRequestService(
         product_repo= product_repo,
         order_repo= order_repo,
         buyer_request_repo= buyer_request_repo,
-        category_repo= category_repo
+        category_repo= category_repo,
+        booking_repo= booking_repo,
     )
\ No newline at end of file
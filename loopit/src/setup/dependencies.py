@@ -2,6 +2,7 @@
 from fastapi import Depends
 from typing import Annotated
 from repository.user.user_repository import UserDynamoRepo
+from repository.session_repository import SessionRepo
 from service.auth.auth_service import AuthServiceImple
 from service.auth.auth_interface import AuthService
 from database.connection import get_dynamodb
@@ -22,6 +23,13 @@ def get_user_repo(
     return UserDynamoRepo(dynamodb)
 
 
+def get_session_repo(
+    dynamodb = Depends(get_dynamodb)
+):
+    return SessionRepo(dynamodb)
+
+
 def get_auth_service( 
-        user_repo: Annotated[UserDynamoRepo, Depends(get_user_repo)]) -> AuthService:
-    return AuthServiceImple(user_repo)
+        user_repo: Annotated[UserDynamoRepo, Depends(get_user_repo)],
+        session_repo: Annotated[SessionRepo, Depends(get_session_repo)]) -> AuthService:
+    return AuthServiceImple(user_repo, session_repo)
@@ -8,6 +8,8 @@ from repository.category_repository import CategoryRepo
 from repository.user.user_interface import UserRepo
 from setup.dependencies import get_user_repo
 from setup.category_dependency import get_category_repo
+from setup.booking_dependencies import get_booking_repo
+from repository.booking_repository import BookingRepo
 
 def get_product_repo(
         user_repo:Annotated[UserRepo, Depends(get_user_repo)],
@@ -22,8 +24,10 @@ def get_product_repo(
 
 def get_product_service(
         product_repo: Annotated[ProductRepo, Depends(get_product_repo)],
-        user_repo:Annotated[UserRepo,Depends(get_user_repo)]) -> ProductService:
+        user_repo:Annotated[UserRepo,Depends(get_user_repo)],
+        booking_repo: Annotated[BookingRepo, Depends(get_booking_repo)]) -> ProductService:
     return ProductService(
         product_repo = product_repo,
-        user_repo = user_repo
+        user_repo = user_repo,
+        booking_repo = booking_repo,
         )
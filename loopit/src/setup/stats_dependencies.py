@@ -0,0 +1,14 @@
+from database.connection import get_dynamodb
+from fastapi import Depends
+from typing import Annotated
+from repository.stats_repository import StatsRepo
+from service.stats_service import StatsService
+
+
+def get_stats_repo(dynamodb = Depends(get_dynamodb)) -> StatsRepo:
+    return StatsRepo(dynamodb)
+
+def get_stats_service(
+    stats_repo: Annotated[StatsRepo, Depends(get_stats_repo)],
+) -> StatsService:
+    return StatsService(stats_repo)
@@ -6,12 +6,15 @@ from unittest.mock import MagicMock, AsyncMock
 from controller.auth_controller import login_controller, signup_controller
 from api.v1.routes.auth import router
 from setup.dependencies import get_auth_service
-from exception.user import UserAlreadyExistsError, InvalidCredentialsError, AuthServiceError
+from helpers.admission import admit_login
+from helpers.error_handler import auth_service_busy_handler
+from exception.user import UserAlreadyExistsError, InvalidCredentialsError, AuthServiceError, AuthServiceBusyError
 
 
 @pytest.fixture
 def app():
     app = FastAPI()
+    app.add_exception_handler(AuthServiceBusyError, auth_service_busy_handler)
     app.include_router(router)
     return app
 
@@ -24,14 +27,16 @@ def client(app):
 @pytest.fixture
 def auth_service_mock():
     service = MagicMock()
-    service.register = AsyncMock(return_value=None)
-    service.login = AsyncMock(
-        return_value=("mock-token", MagicMock(
-            id=1,
-            full_name="John",
-            role=MagicMock(value="user"),
-        ))
+    user = MagicMock(
+        id=1,
+        full_name="John",
+        role=MagicMock(value="user"),
     )
+    service.register = AsyncMock(return_value=("mock-token", user))
+    service.login = AsyncMock(return_value=("mock-token", user))
+    service.create_session = AsyncMock(return_value="sid.refresh")
+    service.refresh = AsyncMock(return_value=("new-token", "sid.rotated", user))
+    service.logout = AsyncMock(return_value=None)
     return service
 
 
@@ -136,3 +141,58 @@ def test_login_service_error(app, client, auth_service_mock):
     resp = client.post("/auth/login", json=payload)
 
     assert resp.status_code == 500
+
+
+def test_refresh_success(app, client, auth_service_mock):
+    app.dependency_overrides[get_auth_service] = lambda: auth_service_mock
+
+    resp = client.post("/auth/refresh", json={"refresh_token": "sid.refresh"})
+
+    assert resp.status_code == 200
+    assert resp.json()["token"] == "new-token"
+    assert resp.json()["refresh_token"] == "sid.rotated"
+    auth_service_mock.refresh.assert_awaited_once_with("sid.refresh")
+
+
+def test_refresh_invalid_token(app, client, auth_service_mock):
+    auth_service_mock.refresh.side_effect = InvalidCredentialsError("invalid")
+    app.dependency_overrides[get_auth_service] = lambda: auth_service_mock
+
+    resp = client.post("/auth/refresh", json={"refresh_token": "sid.stale"})
+
+    assert resp.status_code == 401
+
+
+def test_logout_success(app, client, auth_service_mock):
+    app.dependency_overrides[get_auth_service] = lambda: auth_service_mock
+
+    resp = client.post("/auth/logout", json={"refresh_token": "sid.refresh"})
+
+    assert resp.status_code == 200
+    auth_service_mock.logout.assert_awaited_once_with("sid.refresh")
+
+
+def test_login_rejected_by_admission(app, client, auth_service_mock):
+    async def reject():
+        raise AuthServiceBusyError("login is busy, please retry", retry_after=1.5)
+
+    app.dependency_overrides[get_auth_service] = lambda: auth_service_mock
+    app.dependency_overrides[admit_login] = reject
+
+    resp = client.post("/auth/login", json={"email": "a@b.com", "password": "secret"})
+
+    assert resp.status_code == 429
+    assert resp.headers["Retry-After"] == "2"
+    assert resp.json()["error"] == "login is busy, please retry"
+    auth_service_mock.login.assert_not_called()
+
+
+def test_login_rejected_when_password_pool_is_saturated(app, client, auth_service_mock):
+    auth_service_mock.login.side_effect = AuthServiceBusyError("authentication is busy, please retry", retry_after=2)
+    app.dependency_overrides[get_auth_service] = lambda: auth_service_mock
+
+    resp = client.post("/auth/login", json={"email": "a@b.com", "password": "secret"})
+
+    assert resp.status_code == 429
+    assert resp.headers["Retry-After"] == "2"
+    assert resp.json() == {"status": False, "status_code": 429, "error": "authentication is busy, please retry"}
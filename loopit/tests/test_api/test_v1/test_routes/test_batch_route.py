@@ -0,0 +1,76 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from jose import jwt
+from unittest.mock import MagicMock, AsyncMock
+
+from helpers.api_paths import ApiPaths
+from helpers.app_settings import AppSettings
+from api.v1.routes.batch import router as batch_router
+from api.v1.routes.category import router as category_router
+from setup.category_dependency import get_category_service
+from helpers.response_cache import response_cache
+
+
+@pytest.fixture
+def category_service():
+    svc = MagicMock()
+    svc.get_version = AsyncMock(return_value=1)
+    svc.get_all_categories = AsyncMock(return_value=[])
+    return svc
+
+
+@pytest.fixture
+def client(category_service, monkeypatch):
+    monkeypatch.setattr(AppSettings, "JWT_SECRET_KEY", "secret")
+    monkeypatch.setattr(AppSettings, "JWT_ALGORITHM", "HS256")
+    response_cache.clear()
+
+    app = FastAPI()
+    app.dependency_overrides[get_category_service] = lambda: category_service
+    app.include_router(batch_router)
+    app.include_router(category_router)
+    return TestClient(app)
+
+
+def _auth_header() -> dict:
+    now = datetime.now(timezone.utc)
+    payload = {"user_id": "1", "role": "admin", "iat": int(now.timestamp()), "exp": int((now + timedelta(minutes=5)).timestamp())}
+    return {"Authorization": f"Bearer {jwt.encode(payload, 'secret', algorithm='HS256')}"}
+
+
+def test_batch_runs_sub_requests_under_the_parent_auth(client):
+    resp = client.post(
+        ApiPaths.BATCH,
+        json={"requests": [
+            {"id": "cats", "path": ApiPaths.GET_CATEGORY},
+            {"id": "cached", "path": ApiPaths.GET_CATEGORY, "headers": {"If-None-Match": "*"}},
+            {"id": "write", "method": "POST", "path": ApiPaths.CREATE_CATEGORY},
+            {"id": "nested", "path": ApiPaths.BATCH},
+        ]},
+        headers=_auth_header(),
+    )
+
+    assert resp.status_code == 200
+    results = {entry["id"]: entry for entry in resp.json()["data"]}
+    assert results["cats"]["status"] == 200
+    assert results["cats"]["body"]["data"] == []
+    assert "etag" in results["cats"]["headers"]
+    assert results["cached"]["status"] == 304
+    assert results["cached"]["body"] is None
+    assert results["write"]["status"] == 405
+    assert results["nested"]["status"] == 400
+
+
+def test_batch_requires_auth(client, category_service):
+    resp = client.post(ApiPaths.BATCH, json={"requests": [{"path": ApiPaths.GET_CATEGORY}]})
+
+    assert resp.status_code == 401
+    category_service.get_all_categories.assert_not_called()
+
+
+def test_batch_rejects_empty_list(client):
+    resp = client.post(ApiPaths.BATCH, json={"requests": []}, headers=_auth_header())
+
+    assert resp.status_code == 422
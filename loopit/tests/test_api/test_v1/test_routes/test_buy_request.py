@@ -35,7 +35,9 @@ def buyer_request_service():
     svc = MagicMock()
     svc.create_buyer_request = AsyncMock()
     svc.get_all_buyer_requests = AsyncMock()
+    svc.get_lender_buyer_requests = AsyncMock()
     svc.update_buyer_request_status = AsyncMock()
+    svc.bulk_update_buyer_request_status = AsyncMock(return_value=[])
     return svc
 
 
@@ -43,6 +45,7 @@ def buyer_request_service():
 def product_service():
     svc = MagicMock()
     svc.get_product_by_id = AsyncMock()
+    svc.get_products_by_ids = AsyncMock(return_value={})
     return svc
 
 
@@ -80,13 +83,13 @@ def test_create_buyer_request_failure(client, buyer_request_service):
 
 def test_get_all_buyer_requests_success(client, buyer_request_service, product_service):
     mock_request = MagicMock()
-    mock_request.product_id = 1
+    mock_request.product_id = 10
     mock_request.model_dump.return_value = {"id": 1, "product_id": 10}
 
     buyer_request_service.get_all_buyer_requests.return_value = [mock_request]
-    product_service.get_product_by_id.return_value = MagicMock(
-        model_dump=lambda: {"id": 10, "name": "Phone"}
-    )
+    product_service.get_products_by_ids.return_value = {
+        10: MagicMock(model_dump=lambda: {"id": 10, "name": "Phone"})
+    }
 
     resp = client.get(
         ApiPaths.GET_BUYER_REQUESTS,
@@ -112,6 +115,19 @@ def test_get_all_buyer_requests_failure(client, buyer_request_service):
     assert resp.json()["status"] is False
 
 
+def test_get_lender_buyer_requests_success(client, buyer_request_service, product_service):
+    buyer_request_service.get_lender_buyer_requests.return_value = []
+
+    resp = client.get(
+        ApiPaths.GET_LENDER_BUYER_REQUESTS + "?status=Pending",
+        headers={"Authorization": "Bearer mocktoken"},
+    )
+
+    assert resp.status_code == 200
+    assert resp.json()["data"] == []
+    buyer_request_service.get_lender_buyer_requests.assert_awaited_once()
+
+
 def test_update_buyer_request_status_success(client, buyer_request_service):
     payload = {
         "status": "Approved"
@@ -142,3 +158,14 @@ def test_update_buyer_request_status_failure(client, buyer_request_service):
 
     assert resp.status_code == 400
     assert resp.json()["status"] is False
+
+
+def test_bulk_update_buyer_request_status_success(client, buyer_request_service):
+    resp = client.patch(
+        ApiPaths.BULK_UPDATE_BUYER_REQUEST_STATUS,
+        json={"request_ids": [1, 2], "status": "Approved"},
+        headers={"Authorization": "Bearer mocktoken"},
+    )
+
+    assert resp.status_code == 200
+    buyer_request_service.bulk_update_buyer_request_status.assert_awaited_once()
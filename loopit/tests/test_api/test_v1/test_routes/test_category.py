@@ -7,12 +7,14 @@ from helpers.api_paths import ApiPaths
 from helpers.auth_helper import AuthHelper
 from api.v1.routes.category import router
 from setup.category_dependency import get_category_service
+from helpers.response_cache import response_cache
 
 
 @pytest.fixture
 def category_service():
     svc = MagicMock()
     svc.create_category = AsyncMock()
+    svc.get_version = AsyncMock(return_value=1)
     svc.get_all_categories = AsyncMock()
     svc.update_category = AsyncMock()
     svc.delete_category = AsyncMock()
@@ -22,6 +24,7 @@ def category_service():
 @pytest.fixture
 def app(category_service):
     app = FastAPI()
+    response_cache.clear()
 
     async def mock_verify_jwt(request: Request):
         request.state.user = {"user_id": 1, "role": "admin"}
@@ -89,6 +92,16 @@ def test_get_all_category_success(client, category_service):
     assert isinstance(resp.json()["data"], list)
 
 
+def test_get_all_category_not_modified(client, category_service):
+    category_service.get_all_categories.return_value = []
+
+    first = client.get(ApiPaths.GET_CATEGORY)
+    resp = client.get(ApiPaths.GET_CATEGORY, headers={"If-None-Match": first.headers["etag"]})
+
+    assert resp.status_code == 304
+    category_service.get_all_categories.assert_awaited_once()
+
+
 def test_get_all_category_failure(client, category_service):
     category_service.get_all_categories.side_effect = Exception("err")
 
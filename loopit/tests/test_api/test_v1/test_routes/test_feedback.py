@@ -7,6 +7,7 @@ from helpers.api_paths import ApiPaths
 from helpers.auth_helper import AuthHelper
 from api.v1.routes.feedback import router
 from setup.feedback_dependencies import get_feedback_service
+from models.rating import LenderRating
 
 
 @pytest.fixture
@@ -19,6 +20,9 @@ def app():
 
     feedback_service = MagicMock()
     feedback_service.give_feedback = AsyncMock()
+    feedback_service.get_all_given_feedbacks = AsyncMock(return_value=([], None))
+    feedback_service.get_all_received_feedbacks = AsyncMock(return_value=([], None))
+    feedback_service.get_lender_rating = AsyncMock()
 
     app.dependency_overrides[AuthHelper.verify_jwt] = mock_verify_jwt
     app.dependency_overrides[get_feedback_service] = lambda: feedback_service
@@ -71,3 +75,62 @@ def test_give_feedback_failure(client, app):
 
     assert resp.status_code == 400
     assert resp.json()["status"] is False
+
+
+def test_get_given_feedbacks_passes_pagination(client, app):
+    resp = client.get(
+        ApiPaths.GET_GIVEN_FEEDBACKS,
+        params={"limit": "5", "cursor": "abc"},
+        headers={"Authorization": "Bearer mocktoken"},
+    )
+
+    assert resp.status_code == 200
+    assert resp.json()["data"] == {"feedbacks": [], "next_cursor": None}
+    app.state.feedback_service.get_all_given_feedbacks.assert_awaited_once_with({"user_id": 1, "role": "user"}, 5, "abc")
+
+
+@pytest.mark.parametrize("limit", ["abc", "0", "-3", "1000000"])
+def test_get_given_feedbacks_rejects_a_bad_limit(client, app, limit):
+    resp = client.get(
+        ApiPaths.GET_GIVEN_FEEDBACKS,
+        params={"limit": limit},
+        headers={"Authorization": "Bearer mocktoken"},
+    )
+
+    assert resp.status_code == 400
+    assert resp.json()["error"] == "invalid query"
+    app.state.feedback_service.get_all_given_feedbacks.assert_not_called()
+
+
+def test_get_received_feedbacks_rejects_a_bad_limit(client, app):
+    resp = client.get(
+        ApiPaths.GET_RECEIVED_FEEDBACKS,
+        params={"limit": "abc"},
+        headers={"Authorization": "Bearer mocktoken"},
+    )
+
+    assert resp.status_code == 400
+    app.state.feedback_service.get_all_received_feedbacks.assert_not_called()
+
+
+def test_get_received_feedbacks_success(client, app):
+    resp = client.get(
+        ApiPaths.GET_RECEIVED_FEEDBACKS,
+        headers={"Authorization": "Bearer mocktoken"},
+    )
+
+    assert resp.status_code == 200
+    app.state.feedback_service.get_all_received_feedbacks.assert_awaited_once()
+
+
+def test_get_lender_rating_success(client, app):
+    app.state.feedback_service.get_lender_rating.return_value = LenderRating(lender_id=4, count=1, total=5, average=5.0)
+
+    resp = client.get(
+        ApiPaths.GET_LENDER_RATING.format(id=4),
+        headers={"Authorization": "Bearer mocktoken"},
+    )
+
+    assert resp.status_code == 200
+    assert resp.json()["data"]["average"] == 5.0
+    app.state.feedback_service.get_lender_rating.assert_awaited_once_with(4)
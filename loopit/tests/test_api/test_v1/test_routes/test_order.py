@@ -22,6 +22,7 @@ def app():
     order_service.get_order_history = AsyncMock()
     order_service.mark_order_as_returned = AsyncMock()
     order_service.get_lender_orders = AsyncMock()
+    order_service.bulk_mark_orders_as_returned = AsyncMock(return_value=[])
 
     product_service = MagicMock()
     product_service.get_product_by_id = AsyncMock()
@@ -96,6 +97,29 @@ def test_mark_order_as_returned_success(client, app):
     app.state.order_service.mark_order_as_returned.assert_awaited_once()
 
 
+def test_bulk_mark_orders_as_returned_success(client, app):
+    resp = client.patch(
+        ApiPaths.BULK_RETURN_ORDERS,
+        json={"order_ids": [1, 2]},
+        headers={"Authorization": "Bearer mocktoken"},
+    )
+
+    assert resp.status_code == 200
+    app.state.order_service.bulk_mark_orders_as_returned.assert_awaited_once_with(
+        order_ids=[1, 2], user_ctx={"user_id": 1, "role": "user"}
+    )
+
+
+def test_bulk_mark_orders_as_returned_empty_payload(client):
+    resp = client.patch(
+        ApiPaths.BULK_RETURN_ORDERS,
+        json={"order_ids": []},
+        headers={"Authorization": "Bearer mocktoken"},
+    )
+
+    assert resp.status_code == 422
+
+
 def test_mark_order_as_returned_failure(client, app):
     app.state.order_service.mark_order_as_returned.side_effect = Exception("fail")
 
@@ -1,3 +1,4 @@
+import json
 import pytest
 from fastapi import FastAPI, Request
 from fastapi.testclient import TestClient
@@ -7,11 +8,15 @@ from helpers.api_paths import ApiPaths
 from helpers.auth_helper import AuthHelper
 from api.v1.routes.product import router
 from setup.product_dependencies import get_product_service
+from helpers.response_cache import response_cache
+from models.product import ProductChanges
+from exception.product import ProductChangesExpiredError
 
 
 @pytest.fixture
 def app():
     app = FastAPI()
+    response_cache.clear()
 
     # mock jwt dependency
     async def mock_verify_jwt(request: Request):
@@ -19,10 +24,14 @@ def app():
 
     mock_service = MagicMock()
     mock_service.get_all_products = AsyncMock()
+    mock_service.get_product_version = AsyncMock(return_value=1)
+    mock_service.booked_now = AsyncMock(return_value=False)
     mock_service.get_product_by_id = AsyncMock()
     mock_service.create_product = AsyncMock()
     mock_service.update_product = AsyncMock()
     mock_service.delete_product = AsyncMock()
+    mock_service.get_availability = AsyncMock(return_value={})
+    mock_service.get_product_changes = AsyncMock()
 
     app.dependency_overrides[AuthHelper.verify_jwt] = mock_verify_jwt
     app.dependency_overrides[get_product_service] = lambda: mock_service
@@ -79,6 +88,34 @@ def test_get_product_by_id_success(client, app):
     assert resp.json()["status"] is True
 
 
+def test_get_product_by_id_not_modified_skips_the_read(client, app):
+    app.state.product_service.get_product_by_id.return_value = {"id": 1}
+
+    first = client.get(ApiPaths.GET_PRODUCT_BY_ID.format(id=1), headers={"Authorization": "Bearer mocktoken"})
+    resp = client.get(
+        ApiPaths.GET_PRODUCT_BY_ID.format(id=1),
+        headers={"Authorization": "Bearer mocktoken", "If-None-Match": first.headers["etag"]},
+    )
+
+    assert resp.status_code == 304
+    assert resp.headers["etag"] == first.headers["etag"]
+    app.state.product_service.get_product_by_id.assert_awaited_once()
+
+
+def test_get_product_by_id_etag_changes_with_version(client, app):
+    app.state.product_service.get_product_by_id.return_value = {"id": 1}
+
+    first = client.get(ApiPaths.GET_PRODUCT_BY_ID.format(id=1), headers={"Authorization": "Bearer mocktoken"})
+    app.state.product_service.get_product_version.return_value = 2
+    resp = client.get(
+        ApiPaths.GET_PRODUCT_BY_ID.format(id=1),
+        headers={"Authorization": "Bearer mocktoken", "If-None-Match": first.headers["etag"]},
+    )
+
+    assert resp.status_code == 200
+    assert resp.headers["etag"] != first.headers["etag"]
+
+
 def test_get_product_by_id_not_found(client, app):
     app.state.product_service.get_product_by_id.side_effect = Exception("not found")
 
@@ -165,3 +202,145 @@ def test_delete_product_success(client, app):
 
     assert resp.status_code == 200
     app.state.product_service.delete_product.assert_awaited_once()
+
+
+def test_get_product_availability_not_shadowed_by_id_route(client, app):
+    app.state.product_service.get_availability.return_value = {1: True, 2: False}
+
+    resp = client.get(
+        ApiPaths.GET_PRODUCT_AVAILABILITY,
+        params={"product_ids": "1,2", "start": "2030-01-01T00:00:00Z", "end": "2030-01-03T00:00:00Z"},
+        headers={"Authorization": "Bearer mocktoken"},
+    )
+
+    assert resp.status_code == 200
+    assert resp.json()["data"] == [
+        {"product_id": 1, "available": True},
+        {"product_id": 2, "available": False},
+    ]
+    app.state.product_service.get_product_by_id.assert_not_called()
+
+
+def test_get_all_products_streams_ndjson(client, app):
+    async def pages(**kwargs):
+        yield [{"id": 1}, {"id": 2}]
+        yield [{"id": 3}]
+
+    app.state.product_service.iter_products = MagicMock(side_effect=pages)
+
+    resp = client.get(
+        ApiPaths.GET_PRODUCTS,
+        headers={"Authorization": "Bearer mocktoken", "Accept": "application/x-ndjson"},
+    )
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line)["id"] for line in resp.text.splitlines()] == [1, 2, 3]
+    app.state.product_service.get_all_products.assert_not_called()
+
+
+def test_get_all_products_streams_json_array(client, app):
+    async def pages(**kwargs):
+        yield [{"id": 1}]
+
+    app.state.product_service.iter_products = MagicMock(side_effect=pages)
+
+    resp = client.get(
+        ApiPaths.GET_PRODUCTS + "?stream=true",
+        headers={"Authorization": "Bearer mocktoken"},
+    )
+
+    assert resp.status_code == 200
+    assert resp.json() == {"data": [{"id": 1}], "status": True}
+
+
+def test_get_all_products_with_fields(client, app):
+    from models.product import Product, ProductResponse
+
+    product = Product.model_construct(id=1, name="Phone")
+    app.state.product_service.get_all_products.return_value = [ProductResponse.model_construct(product=product)]
+
+    resp = client.get(
+        ApiPaths.GET_PRODUCTS + "?fields=name",
+        headers={"Authorization": "Bearer mocktoken"},
+    )
+
+    assert resp.status_code == 200
+    assert resp.json()["data"] == [{"product": {"ID": 1, "Name": "Phone"}}]
+    assert app.state.product_service.get_all_products.call_args.kwargs["fields"] == {"id", "name"}
+    assert app.state.product_service.get_all_products.call_args.kwargs["include"] == frozenset()
+
+
+def test_get_all_products_with_include(client, app):
+    app.state.product_service.get_all_products.return_value = []
+
+    resp = client.get(
+        ApiPaths.GET_PRODUCTS + "?include=category",
+        headers={"Authorization": "Bearer mocktoken"},
+    )
+
+    assert resp.status_code == 200
+    assert app.state.product_service.get_all_products.call_args.kwargs["include"] == {"category"}
+
+
+def test_get_all_products_unknown_include(client, app):
+    resp = client.get(
+        ApiPaths.GET_PRODUCTS + "?include=owner",
+        headers={"Authorization": "Bearer mocktoken"},
+    )
+
+    assert resp.status_code == 400
+    app.state.product_service.get_all_products.assert_not_called()
+
+
+def test_get_all_products_unknown_field(client, app):
+    resp = client.get(
+        ApiPaths.GET_PRODUCTS + "?fields=name,secret",
+        headers={"Authorization": "Bearer mocktoken"},
+    )
+
+    assert resp.status_code == 400
+    app.state.product_service.get_all_products.assert_not_called()
+
+
+def test_get_product_changes_not_shadowed_by_id_route(client, app):
+    app.state.product_service.get_product_changes.return_value = ProductChanges(deleted=[7], watermark="42")
+
+    resp = client.get(ApiPaths.GET_PRODUCT_CHANGES, params={"since": "30"}, headers={"Authorization": "Bearer mocktoken"})
+
+    assert resp.status_code == 200
+    assert resp.json()["data"] == {"products": [], "deleted": [7], "watermark": "42", "has_more": False}
+    app.state.product_service.get_product_changes.assert_awaited_once_with("30", include=frozenset())
+    app.state.product_service.get_product_by_id.assert_not_called()
+
+
+def test_get_product_changes_expired_watermark(client, app):
+    app.state.product_service.get_product_changes.side_effect = ProductChangesExpiredError("too old")
+
+    resp = client.get(ApiPaths.GET_PRODUCT_CHANGES, params={"since": "1"}, headers={"Authorization": "Bearer mocktoken"})
+
+    assert resp.status_code == 410
+
+
+def test_get_product_changes_invalid_watermark(client, app):
+    resp = client.get(ApiPaths.GET_PRODUCT_CHANGES, params={"since": "yesterday"}, headers={"Authorization": "Bearer mocktoken"})
+
+    assert resp.status_code == 400
+    app.state.product_service.get_product_changes.assert_not_called()
+
+
+def test_get_product_changes_accepts_a_mid_log_cursor(client, app):
+    app.state.product_service.get_product_changes.return_value = ProductChanges(watermark="42")
+    cursor = f"{14:020d}#3"
+
+    resp = client.get(ApiPaths.GET_PRODUCT_CHANGES, params={"since": cursor}, headers={"Authorization": "Bearer mocktoken"})
+
+    assert resp.status_code == 200
+    app.state.product_service.get_product_changes.assert_awaited_once_with(cursor, include=frozenset())
+
+
+def test_get_product_changes_rejects_a_malformed_cursor(client, app):
+    resp = client.get(ApiPaths.GET_PRODUCT_CHANGES, params={"since": "14#three"}, headers={"Authorization": "Bearer mocktoken"})
+
+    assert resp.status_code == 400
+    app.state.product_service.get_product_changes.assert_not_called()
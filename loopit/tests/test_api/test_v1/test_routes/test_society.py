@@ -6,14 +6,17 @@ from unittest.mock import MagicMock, AsyncMock
 from helpers.api_paths import ApiPaths
 from api.v1.routes.society import router
 from setup.society_dependency import get_society_service
+from helpers.response_cache import response_cache
 
 
 @pytest.fixture
 def app():
     app = FastAPI()
+    response_cache.clear()
 
     mock_service = MagicMock()
     mock_service.create_society = AsyncMock()
+    mock_service.get_version = AsyncMock(return_value=1)
     mock_service.get_all_societies = AsyncMock()
     mock_service.update_society = AsyncMock()
     mock_service.delete_society = AsyncMock()
@@ -7,6 +7,8 @@ from helpers.api_paths import ApiPaths
 from helpers.auth_helper import AuthHelper
 from api.v1.routes.user import router
 from setup.user_dependencies import get_user_service
+from setup.stats_dependencies import get_stats_service
+from models.dashboard import LenderDashboard, UserSummary
 
 
 @pytest.fixture
@@ -14,13 +16,22 @@ def user_service():
     svc = MagicMock()
     svc.become_lender = AsyncMock()
     svc.get_all_users = AsyncMock()
+    svc.get_user_version = AsyncMock(return_value=1)
     svc.get_user_by_id = AsyncMock()
     svc.delete_user_by_id = AsyncMock()
     return svc
 
 
 @pytest.fixture
-def app(user_service):
+def stats_service():
+    svc = MagicMock()
+    svc.get_lender_dashboard = AsyncMock()
+    svc.get_user_summary = AsyncMock()
+    return svc
+
+
+@pytest.fixture
+def app(user_service, stats_service):
     app = FastAPI()
 
     async def mock_verify_jwt(request: Request):
@@ -29,6 +40,7 @@ def app(user_service):
 
     app.dependency_overrides[AuthHelper.verify_jwt] = mock_verify_jwt
     app.dependency_overrides[get_user_service] = lambda: user_service
+    app.dependency_overrides[get_stats_service] = lambda: stats_service
 
     app.include_router(router)
     return app
@@ -140,3 +152,29 @@ def test_delete_user_failure(client, user_service):
 
     assert resp.status_code == 500
     assert resp.json()["status"] is False
+
+
+def test_get_lender_dashboard_success(client, stats_service):
+    stats_service.get_lender_dashboard.return_value = LenderDashboard(lender_id=1, product_count=2, active_rentals=1)
+
+    resp = client.get(ApiPaths.GET_LENDER_DASHBOARD, headers={"Authorization": "Bearer test"})
+
+    assert resp.status_code == 200
+    stats_service.get_lender_dashboard.assert_awaited_once()
+
+
+def test_get_lender_dashboard_forbidden(client, stats_service):
+    stats_service.get_lender_dashboard.side_effect = RuntimeError("only lenders have a dashboard")
+
+    resp = client.get(ApiPaths.GET_LENDER_DASHBOARD, headers={"Authorization": "Bearer test"})
+
+    assert resp.status_code == 403
+
+
+def test_get_user_summary_success(client, stats_service):
+    stats_service.get_user_summary.return_value = UserSummary(user_id=1, active_rentals=2, feedback_to_give=1)
+
+    resp = client.get(ApiPaths.GET_USER_SUMMARY, headers={"Authorization": "Bearer test"})
+
+    assert resp.status_code == 200
+    stats_service.get_user_summary.assert_awaited_once()
@@ -2,13 +2,14 @@ import pytest
 from unittest.mock import AsyncMock, MagicMock
 from fastapi import HTTPException
 
-from controller.auth_controller import signup_controller, login_controller
+from controller.auth_controller import signup_controller, login_controller, refresh_controller, logout_controller
 from schemas.auth import RegisterRequest
 from models.user import User
 from exception.user import (
     UserAlreadyExistsError,
     InvalidCredentialsError,
     AuthServiceError,
+    AuthServiceBusyError,
 )
 from models.enums.user import Role
 
@@ -25,18 +26,22 @@ async def test_signup_controller_success():
     )
 
     auth_service = MagicMock()
-    auth_service.register = AsyncMock(return_value=None)
 
     mock_user = MagicMock(spec=User)
     mock_user.id = 1
     mock_user.full_name = "John Doe"
     mock_user.role = Role.user
 
-    auth_service.login = AsyncMock(return_value=("token123", mock_user))
+    auth_service.register = AsyncMock(return_value=("token123", mock_user))
+    auth_service.login = AsyncMock()
+    auth_service.create_session = AsyncMock(return_value="sid.refresh")
 
     resp = await signup_controller(payload, auth_service)
 
+    auth_service.login.assert_not_called()
+    auth_service.create_session.assert_awaited_once_with(mock_user)
     assert resp["token"] == "token123"
+    assert resp["refresh_token"] == "sid.refresh"
     assert resp["user"]["id"] == 1
     assert resp["user"]["name"] == "John Doe"
 
@@ -81,27 +86,6 @@ async def test_signup_controller_register_failure():
     assert exc.value.status_code == 500
 
 
-@pytest.mark.asyncio
-async def test_signup_controller_login_invalid_credentials():
-    payload = RegisterRequest(
-        fullname="John",
-        email="john@test.com",
-        phone_number="123",
-        address=None,
-        password="pass",
-        society_id=1,
-    )
-
-    auth_service = MagicMock()
-    auth_service.register = AsyncMock(return_value=None)
-    auth_service.login = AsyncMock(side_effect=InvalidCredentialsError())
-
-    with pytest.raises(HTTPException) as exc:
-        await signup_controller(payload, auth_service)
-
-    assert exc.value.status_code == 401
-
-
 @pytest.mark.asyncio
 async def test_login_controller_success():
     auth_service = MagicMock()
@@ -112,10 +96,12 @@ async def test_login_controller_success():
     mock_user.role = Role.user
 
     auth_service.login = AsyncMock(return_value=("tok", mock_user))
+    auth_service.create_session = AsyncMock(return_value="sid.refresh")
 
     resp = await login_controller("a@b.com", "pass", auth_service)
 
     assert resp["token"] == "tok"
+    assert resp["refresh_token"] == "sid.refresh"
     assert resp["user"]["id"] == 10
     assert resp["user"]["name"] == "Jane"
 
@@ -140,3 +126,40 @@ async def test_login_controller_service_error():
         await login_controller("a@b.com", "pass", auth_service)
 
     assert exc.value.status_code == 500
+
+
+@pytest.mark.asyncio
+async def test_login_controller_busy():
+    auth_service = MagicMock()
+    auth_service.login = AsyncMock(side_effect=AuthServiceBusyError("busy"))
+
+    # left to the app-level handler, which renders it like an admission rejection
+    with pytest.raises(AuthServiceBusyError):
+        await login_controller("a@test.com", "pwd", auth_service)
+
+
+@pytest.mark.asyncio
+async def test_refresh_controller_success():
+    mock_user = MagicMock(spec=User)
+    mock_user.id = 10
+    mock_user.full_name = "Jane"
+    mock_user.role = Role.user
+    auth_service = MagicMock()
+    auth_service.refresh = AsyncMock(return_value=("tok", "sid.new", mock_user))
+
+    resp = await refresh_controller("sid.old", auth_service)
+
+    assert resp["token"] == "tok"
+    assert resp["refresh_token"] == "sid.new"
+    assert resp["user"]["id"] == 10
+
+
+@pytest.mark.asyncio
+async def test_logout_controller_invalid_token():
+    auth_service = MagicMock()
+    auth_service.logout = AsyncMock(side_effect=InvalidCredentialsError())
+
+    with pytest.raises(HTTPException) as exc:
+        await logout_controller("garbage", auth_service)
+
+    assert exc.value.status_code == 401
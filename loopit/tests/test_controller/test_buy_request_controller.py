@@ -1,3 +1,4 @@
+import json
 import pytest
 from unittest.mock import MagicMock, AsyncMock
 
@@ -7,6 +8,8 @@ from controller.buy_request_controller import (
     create_buyer_request,
     update_buyer_request_status,
     get_all_buyer_requests,
+    get_lender_buyer_requests,
+    bulk_update_buyer_request_status,
 )
 from models.enums.buy_request import BuyRequestStatus
 
@@ -25,7 +28,7 @@ async def test_create_buyer_request_success():
     )
 
     assert resp.status_code == status.HTTP_201_CREATED
-    service.create_buyer_request.assert_called_once_with(10, user_ctx)
+    service.create_buyer_request.assert_called_once_with(10, user_ctx, None, None)
 
 
 @pytest.mark.asyncio
@@ -115,18 +118,57 @@ async def test_get_all_buyer_requests_success():
     mock_product = MagicMock()
     mock_product.model_dump.return_value = {"id": 10}
 
-    product_service.get_product_by_id = AsyncMock(return_value=mock_product)
+    product_service.get_products_by_ids = AsyncMock(return_value={10: mock_product})
 
     resp = await get_all_buyer_requests(
         product_id=None,
         status_str=None,
         buyer_request_service=buyer_service,
         product_service=product_service,
+        include="product",
     )
 
     assert resp.status_code == status.HTTP_200_OK
     body = resp.body.decode()
     assert "buyer request fetched successfully" in body
+    product_service.get_products_by_ids.assert_awaited_once_with([10], include=frozenset())
+
+
+@pytest.mark.asyncio
+async def test_get_all_buyer_requests_skips_products_unless_included():
+    buyer_service = MagicMock()
+    product_service = MagicMock()
+
+    mock_req = MagicMock()
+    mock_req.product_id = 10
+    mock_req.model_dump.return_value = {"id": 1}
+
+    buyer_service.get_all_buyer_requests = AsyncMock(return_value=[mock_req])
+    product_service.get_products_by_ids = AsyncMock()
+
+    resp = await get_all_buyer_requests(
+        product_id=None,
+        status_str=None,
+        buyer_request_service=buyer_service,
+        product_service=product_service,
+    )
+
+    assert resp.status_code == status.HTTP_200_OK
+    product_service.get_products_by_ids.assert_not_awaited()
+    assert json.loads(resp.body)["data"] == [{"buy_request": {"id": 1}, "product": None}]
+
+
+@pytest.mark.asyncio
+async def test_get_all_buyer_requests_rejects_unknown_include():
+    resp = await get_all_buyer_requests(
+        product_id=None,
+        status_str=None,
+        buyer_request_service=MagicMock(),
+        product_service=MagicMock(),
+        include="product.owner",
+    )
+
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
 
 
 @pytest.mark.asyncio
@@ -158,13 +200,123 @@ async def test_get_all_buyer_requests_product_fetch_error():
     mock_req.model_dump.return_value = {"id": 1}
 
     buyer_service.get_all_buyer_requests = AsyncMock(return_value=[mock_req])
-    product_service.get_product_by_id = AsyncMock(side_effect=Exception("product error"))
+    product_service.get_products_by_ids = AsyncMock(side_effect=Exception("product error"))
 
     resp = await get_all_buyer_requests(
         product_id=None,
         status_str=None,
         buyer_request_service=buyer_service,
         product_service=product_service,
+        include="product",
+    )
+
+    assert resp.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+
+
+@pytest.mark.asyncio
+async def test_get_all_buyer_requests_missing_product_degrades_row():
+    buyer_service = MagicMock()
+    product_service = MagicMock()
+
+    first = MagicMock(product_id=10)
+    first.model_dump.return_value = {"id": 1}
+    second = MagicMock(product_id=11)
+    second.model_dump.return_value = {"id": 2}
+    third = MagicMock(product_id=10)
+    third.model_dump.return_value = {"id": 3}
+
+    buyer_service.get_all_buyer_requests = AsyncMock(return_value=[first, second, third])
+
+    mock_product = MagicMock()
+    mock_product.model_dump.return_value = {"id": 10}
+    product_service.get_products_by_ids = AsyncMock(return_value={10: mock_product})
+
+    resp = await get_all_buyer_requests(
+        product_id=None,
+        status_str=None,
+        buyer_request_service=buyer_service,
+        product_service=product_service,
+        include="product",
+    )
+
+    assert resp.status_code == status.HTTP_200_OK
+    product_service.get_products_by_ids.assert_awaited_once()
+    assert sorted(product_service.get_products_by_ids.call_args[0][0]) == [10, 11]
+    body = json.loads(resp.body)
+    assert [row["product"] for row in body["data"]] == [{"id": 10}, None, {"id": 10}]
+
+
+@pytest.mark.asyncio
+async def test_get_lender_buyer_requests_success():
+    buyer_service = MagicMock()
+    product_service = MagicMock()
+
+    mock_req = MagicMock()
+    mock_req.product_id = 10
+    mock_req.model_dump.return_value = {"id": 1}
+
+    buyer_service.get_lender_buyer_requests = AsyncMock(return_value=[mock_req])
+
+    mock_product = MagicMock()
+    mock_product.model_dump.return_value = {"id": 10}
+    product_service.get_products_by_ids = AsyncMock(return_value={10: mock_product})
+
+    user_ctx = {"user_id": 7, "role": "lender"}
+
+    resp = await get_lender_buyer_requests(
+        status_str="Pending,Approved",
+        buyer_request_service=buyer_service,
+        product_service=product_service,
+        user_ctx=user_ctx,
+    )
+
+    assert resp.status_code == status.HTTP_200_OK
+    buyer_service.get_lender_buyer_requests.assert_called_once_with(user_ctx, ["Pending", "Approved"])
+
+
+@pytest.mark.asyncio
+async def test_get_lender_buyer_requests_service_error():
+    buyer_service = MagicMock()
+    product_service = MagicMock()
+    buyer_service.get_lender_buyer_requests = AsyncMock(side_effect=Exception("forbidden"))
+
+    resp = await get_lender_buyer_requests(
+        status_str=None,
+        buyer_request_service=buyer_service,
+        product_service=product_service,
+        user_ctx={"user_id": 7, "role": "user"},
     )
 
     assert resp.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+    assert "failed to fetch lender buyer requests" in resp.body.decode()
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_buyer_request_status_success():
+    service = MagicMock()
+    results = [{"id": 1, "success": True, "error": None}, {"id": 2, "success": False, "error": "buyer request not found"}]
+    service.bulk_update_buyer_request_status = AsyncMock(return_value=results)
+
+    resp = await bulk_update_buyer_request_status(
+        request_ids=[1, 2],
+        status_str="Rejected",
+        buyer_request_service=service,
+        user_ctx={"user_id": 1, "role": "lender"},
+    )
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert json.loads(resp.body)["data"] == results
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_buyer_request_status_invalid_status():
+    service = MagicMock()
+
+    resp = await bulk_update_buyer_request_status(
+        request_ids=[1],
+        status_str="not-a-real-status",
+        buyer_request_service=service,
+        user_ctx={"user_id": 1},
+    )
+
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
@@ -48,6 +48,7 @@ async def test_create_category_failure():
 @pytest.mark.asyncio
 async def test_get_all_category_success():
     service = MagicMock()
+    service.get_version = AsyncMock(return_value=1)
     service.get_all_categories = AsyncMock(
         return_value=[
             Category(id=1, name="Cat1", price=10, security=1),
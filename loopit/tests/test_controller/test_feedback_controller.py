@@ -1,3 +1,4 @@
+import json
 import pytest
 from unittest.mock import MagicMock, AsyncMock
 from fastapi import status
@@ -51,18 +52,22 @@ async def test_give_feedback_failure():
 async def test_get_all_given_feedbacks_success():
     service = MagicMock()
     service.get_all_given_feedbacks = AsyncMock(
-        return_value=[
-            {"id": 1, "text": "nice"},
-            {"id": 2, "text": "ok"},
-        ]
+        return_value=(
+            [
+                {"id": 1, "text": "nice"},
+                {"id": 2, "text": "ok"},
+            ],
+            "cursor-2",
+        )
     )
 
     user_ctx = {"user_id": 5}
 
-    resp = await get_all_given_feedbacks(service, user_ctx)
+    resp = await get_all_given_feedbacks(service, user_ctx, limit="2")
 
-    service.get_all_given_feedbacks.assert_awaited_once()
+    service.get_all_given_feedbacks.assert_awaited_once_with(user_ctx, 2, None)
     assert resp.status_code == status.HTTP_200_OK
+    assert json.loads(resp.body)["data"]["next_cursor"] == "cursor-2"
 
 
 @pytest.mark.asyncio
@@ -81,9 +86,12 @@ async def test_get_all_given_feedbacks_failure():
 async def test_get_all_received_feedbacks_success():
     service = MagicMock()
     service.get_all_received_feedbacks = AsyncMock(
-        return_value=[
-            {"id": 3, "text": "great"},
-        ]
+        return_value=(
+            [
+                {"id": 3, "text": "great"},
+            ],
+            None,
+        )
     )
 
     user_ctx = {"user_id": 7}
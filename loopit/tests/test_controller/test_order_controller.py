@@ -1,3 +1,4 @@
+import json
 import pytest
 from unittest.mock import MagicMock, AsyncMock
 from fastapi import status
@@ -6,6 +7,7 @@ from controller.order_controller import (
     get_order_history,
     mark_order_as_returned,
     get_lender_orders,
+    bulk_mark_orders_as_returned,
 )
 from models.enums.order_status import OrderStatus
 
@@ -141,3 +143,18 @@ async def test_get_lender_orders_failure():
     )
 
     assert resp.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+
+
+@pytest.mark.asyncio
+async def test_bulk_mark_orders_as_returned_success():
+    order_service = MagicMock()
+    order_service.bulk_mark_orders_as_returned = AsyncMock(return_value=[{"id": 1, "success": True, "error": None}])
+
+    resp = await bulk_mark_orders_as_returned(
+        order_ids=[1],
+        order_service=order_service,
+        user_ctx={"user_id": 99},
+    )
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert json.loads(resp.body)["data"] == [{"id": 1, "success": True, "error": None}]
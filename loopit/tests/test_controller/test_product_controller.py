@@ -8,6 +8,7 @@ from controller.product_controller import (
     create_product,
     update_product,
     delete_product,
+    get_product_availability,
 )
 from schemas.product import ProductRequest
 from models.enums.user import Role
@@ -49,6 +50,8 @@ async def test_get_all_products_failure():
 @pytest.mark.asyncio
 async def test_get_product_by_id_success():
     product_service = MagicMock()
+    product_service.get_product_version = AsyncMock(return_value=1)
+    product_service.booked_now = AsyncMock(return_value=False)
     product_service.get_product_by_id = AsyncMock(return_value={"id": 1})
 
     resp = await get_product_by_id(1, product_service)
@@ -174,3 +177,14 @@ async def test_delete_product_forbidden():
     )
 
     assert resp.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.asyncio
+async def test_get_product_availability_missing_dates():
+    product_service = MagicMock()
+    product_service.get_availability = AsyncMock()
+
+    resp = await get_product_availability("1,2", None, None, product_service)
+
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+    product_service.get_availability.assert_not_called()
@@ -47,6 +47,7 @@ async def test_create_society_failure():
 @pytest.mark.asyncio
 async def test_get_all_societies_success():
     service = MagicMock()
+    service.get_version = AsyncMock(return_value=1)
     service.get_all_societies = AsyncMock(return_value=[])
 
     resp = await get_all_societies(service)
@@ -98,6 +98,7 @@ async def test_get_all_users_unauthorized():
 @pytest.mark.asyncio
 async def test_get_user_by_id_success():
     service = MagicMock()
+    service.get_user_version = AsyncMock(return_value=1)
     service.get_user_by_id = AsyncMock(return_value={"id": 1, "name": "abc"})
 
     admin_ctx = {"role": "admin"}
@@ -115,6 +116,7 @@ async def test_get_user_by_id_success():
 @pytest.mark.asyncio
 async def test_get_user_by_id_not_found():
     service = MagicMock()
+    service.get_user_version = AsyncMock(return_value=None)
     service.get_user_by_id = AsyncMock(return_value=None)
 
     admin_ctx = {"role": "admin"}
@@ -0,0 +1,68 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from database.batch import batch_get_items, chunked, run_in_chunks
+
+
+def _key(i):
+    return {"pk": {"S": "PRODUCT"}, "sk": {"S": f"PRODUCT#{i}"}}
+
+
+def test_chunked():
+    assert chunked([1, 2, 3, 4, 5], 2) == [[1, 2], [3, 4], [5]]
+
+
+@pytest.mark.asyncio
+async def test_batch_get_items_splits_and_dedupes():
+    dynamodb = MagicMock()
+    dynamodb.batch_get_item.side_effect = lambda RequestItems: {
+        "Responses": {"test-table": [{"sk": k["sk"]} for k in RequestItems["test-table"]["Keys"]]}
+    }
+    keys = [_key(i) for i in range(150)] + [_key(0)]
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        items = await batch_get_items(dynamodb, "test-table", keys)
+
+    assert len(items) == 150
+    assert dynamodb.batch_get_item.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_get_items_retries_unprocessed_keys():
+    dynamodb = MagicMock()
+    dynamodb.batch_get_item.side_effect = [
+        {"Responses": {"test-table": [{"sk": {"S": "PRODUCT#1"}}]}, "UnprocessedKeys": {"test-table": {"Keys": [_key(2)]}}},
+        {"Responses": {"test-table": [{"sk": {"S": "PRODUCT#2"}}]}},
+    ]
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)), \
+            patch("asyncio.sleep", new=AsyncMock()):
+        items = await batch_get_items(dynamodb, "test-table", [_key(1), _key(2)])
+
+    assert len(items) == 2
+    assert dynamodb.batch_get_item.call_args_list[1].kwargs["RequestItems"] == {"test-table": {"Keys": [_key(2)]}}
+
+
+@pytest.mark.asyncio
+async def test_batch_get_items_empty():
+    dynamodb = MagicMock()
+
+    items = await batch_get_items(dynamodb, "test-table", [])
+
+    assert items == []
+    dynamodb.batch_get_item.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_run_in_chunks_collects_exceptions():
+    async def ok():
+        return "done"
+
+    async def boom():
+        raise RuntimeError("failed")
+
+    results = await run_in_chunks([ok, boom, ok], size=2)
+
+    assert results[0] == "done"
+    assert isinstance(results[1], RuntimeError)
+    assert results[2] == "done"
@@ -0,0 +1,42 @@
+import pytest
+from unittest.mock import MagicMock, patch
+
+from database.pagination import decode_cursor, encode_cursor, page_size, query_pages, MAX_PAGE_SIZE, DEFAULT_PAGE_SIZE
+
+
+def test_cursor_round_trip():
+    key = {"pk": {"S": "GIVENBY#1"}, "sk": {"S": "FEEDBACK#2"}}
+
+    assert decode_cursor(encode_cursor(key)) == key
+
+
+def test_empty_cursor():
+    assert encode_cursor(None) is None
+    assert decode_cursor(None) is None
+
+
+def test_invalid_cursor():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_page_size_bounds():
+    assert page_size(None) == DEFAULT_PAGE_SIZE
+    assert page_size(0) == 1
+    assert page_size(10_000) == MAX_PAGE_SIZE
+
+
+@pytest.mark.asyncio
+async def test_query_pages_follows_last_evaluated_key():
+    dynamodb = MagicMock()
+    dynamodb.query.side_effect = [
+        {"Items": [{"n": 1}], "LastEvaluatedKey": {"pk": {"S": "P"}, "sk": {"S": "1"}}},
+        {"Items": [{"n": 2}]},
+    ]
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        pages = [page async for page in query_pages(dynamodb, TableName="t")]
+
+    assert pages == [[{"n": 1}], [{"n": 2}]]
+    assert "ExclusiveStartKey" not in dynamodb.query.call_args_list[0].kwargs
+    assert dynamodb.query.call_args_list[1].kwargs["ExclusiveStartKey"] == {"pk": {"S": "P"}, "sk": {"S": "1"}}
@@ -0,0 +1,27 @@
+import pytest
+from unittest.mock import MagicMock, patch
+
+from database.versions import collection_version_key, read_version, with_version_bump
+
+
+def test_with_version_bump_extends_the_update():
+    update = with_version_bump({
+        "Key": {},
+        "UpdateExpression": "SET #r = :role",
+        "ExpressionAttributeValues": {":role": {"S": "lender"}},
+    })
+
+    assert update["UpdateExpression"] == "SET #r = :role ADD Version :versionStep"
+    assert update["ExpressionAttributeValues"] == {":role": {"S": "lender"}, ":versionStep": {"N": "1"}}
+
+
+@pytest.mark.asyncio
+async def test_read_version_projects_only_the_counter():
+    dynamodb = MagicMock()
+    dynamodb.get_item.side_effect = [{"Item": {"pk": {"S": "VERSION"}, "Version": {"N": "4"}}}, {"Item": {"pk": {"S": "USER"}}}, {}]
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        versions = [await read_version(dynamodb, "test-table", collection_version_key("CATEGORY")) for _ in range(3)]
+
+    assert versions == [4, 0, None]
+    assert dynamodb.get_item.call_args.kwargs["ProjectionExpression"] == "pk, Version"
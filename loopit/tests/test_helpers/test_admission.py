@@ -0,0 +1,74 @@
+import asyncio
+import pytest
+from exception.user import AuthServiceBusyError
+
+from helpers.admission import AdmissionController
+
+
+@pytest.mark.asyncio
+async def test_acquire_and_release_track_counts():
+    controller = AdmissionController(name="login", concurrency=2, max_queue=2, deadline=1)
+
+    started = await controller.acquire()
+    assert controller.stats()["active"] == 1
+    controller.release(started)
+
+    stats = controller.stats()
+    assert stats["active"] == 0
+    assert stats["admitted"] == 1
+
+
+@pytest.mark.asyncio
+async def test_rejects_immediately_when_queue_is_full():
+    controller = AdmissionController(name="login", concurrency=1, max_queue=0, deadline=5)
+    held = await controller.acquire()
+
+    with pytest.raises(AuthServiceBusyError) as exc:
+        await controller.acquire()
+
+    assert exc.value.retry_after == 0
+    assert controller.stats()["rejected"] == 1
+    controller.release(held)
+
+
+@pytest.mark.asyncio
+async def test_rejects_when_expected_wait_misses_deadline():
+    controller = AdmissionController(name="login", concurrency=1, max_queue=10, deadline=0.5)
+    held = await controller.acquire()
+    controller.service_time = 3.0
+
+    with pytest.raises(AuthServiceBusyError) as exc:
+        await controller.acquire()
+
+    assert exc.value.retry_after == 3.0
+    assert controller.stats()["waiting"] == 0
+    controller.release(held)
+
+
+@pytest.mark.asyncio
+async def test_queued_caller_admitted_when_slot_frees():
+    controller = AdmissionController(name="login", concurrency=1, max_queue=1, deadline=1)
+    held = await controller.acquire()
+
+    waiter = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+    assert controller.stats()["waiting"] == 1
+    controller.release(held)
+    started = await waiter
+
+    assert controller.stats()["active"] == 1
+    controller.release(started)
+
+
+@pytest.mark.asyncio
+async def test_times_out_in_queue():
+    controller = AdmissionController(name="login", concurrency=1, max_queue=1, deadline=0.01)
+    held = await controller.acquire()
+
+    with pytest.raises(AuthServiceBusyError) as exc:
+        await controller.acquire()
+
+    # no service time measured yet, so the hint is the floor the handler rounds up to one second
+    assert exc.value.retry_after == 0
+    assert controller.stats()["rejected"] == 1
+    controller.release(held)
@@ -1,10 +1,10 @@
 import pytest
 from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException
-from jose import jwt
-from unittest.mock import MagicMock
+from jose import ExpiredSignatureError, jwt
+from unittest.mock import MagicMock, patch
 
-from helpers.auth_helper import AuthHelper
+from helpers.auth_helper import AuthHelper, BATCH_CLAIMS_SCOPE_KEY
 from helpers.app_settings import AppSettings
 
 
@@ -16,6 +16,17 @@ def test_hash_password_success():
     assert hashed != password
 
 
+def test_hash_password_uses_configured_rounds(monkeypatch):
+    monkeypatch.setattr("helpers.auth_helper.AppSettings.BCRYPT_ROUNDS", "5")
+
+    hashed = AuthHelper.hash_password("secret123")
+
+    assert hashed.split("$")[2] == "05"
+    assert AuthHelper.needs_rehash(hashed) is False
+    monkeypatch.setattr("helpers.auth_helper.AppSettings.BCRYPT_ROUNDS", "6")
+    assert AuthHelper.needs_rehash(hashed) is True
+
+
 def test_verify_password_success():
     password = "secret123"
     hashed = AuthHelper.hash_password(password)
@@ -115,3 +126,67 @@ def test_verify_jwt_expired_token(monkeypatch):
         AuthHelper.verify_jwt(request)
 
     assert exc.value.status_code == 401
+
+
+def _signed_token(exp_delta: timedelta) -> str:
+    now = datetime.now(timezone.utc)
+    payload = {"user_id": "1", "role": "user", "iat": int(now.timestamp()), "exp": int((now + exp_delta).timestamp())}
+    return jwt.encode(payload, "secret", algorithm="HS256")
+
+
+def test_verify_jwt_reuses_cached_claims(monkeypatch):
+    monkeypatch.setattr(AppSettings, "JWT_SECRET_KEY", "secret")
+    monkeypatch.setattr(AppSettings, "JWT_ALGORITHM", "HS256")
+    token = _signed_token(timedelta(minutes=5))
+    request = MagicMock()
+    request.headers = {"Authorization": f"Bearer {token}"}
+
+    AuthHelper.verify_jwt(request)
+    hits_before = AuthHelper.claims_cache_stats()["hits"]
+    with patch("helpers.auth_helper.jwt.decode") as decode:
+        AuthHelper.verify_jwt(request)
+
+    decode.assert_not_called()
+    assert request.state.user["user_id"] == "1"
+    assert AuthHelper.claims_cache_stats()["hits"] == hits_before + 1
+
+
+def test_verify_jwt_does_not_serve_expired_cached_claims(monkeypatch):
+    monkeypatch.setattr(AppSettings, "JWT_SECRET_KEY", "secret")
+    monkeypatch.setattr(AppSettings, "JWT_ALGORITHM", "HS256")
+    token = _signed_token(timedelta(minutes=5))
+    request = MagicMock()
+    request.headers = {"Authorization": f"Bearer {token}"}
+    AuthHelper.verify_jwt(request)
+
+    with patch("helpers.auth_helper.time.time", return_value=datetime.now(timezone.utc).timestamp() + 600):
+        with patch("helpers.auth_helper.jwt.decode", side_effect=ExpiredSignatureError("expired")):
+            with pytest.raises(HTTPException) as exc:
+                AuthHelper.verify_jwt(request)
+
+    assert exc.value.status_code == 401
+
+
+def test_verify_jwt_cache_keyed_by_secret(monkeypatch):
+    monkeypatch.setattr(AppSettings, "JWT_SECRET_KEY", "secret")
+    monkeypatch.setattr(AppSettings, "JWT_ALGORITHM", "HS256")
+    token = _signed_token(timedelta(minutes=5))
+    request = MagicMock()
+    request.headers = {"Authorization": f"Bearer {token}"}
+    AuthHelper.verify_jwt(request)
+
+    monkeypatch.setattr(AppSettings, "JWT_SECRET_KEY", "rotated")
+    with pytest.raises(HTTPException):
+        AuthHelper.verify_jwt(request)
+
+
+def test_verify_jwt_trusts_claims_set_by_batch_dispatch():
+    request = MagicMock()
+    request.scope = {BATCH_CLAIMS_SCOPE_KEY: {"user_id": "1", "role": "user"}}
+    request.headers = {}
+
+    with patch("helpers.auth_helper.jwt.decode") as decode:
+        AuthHelper.verify_jwt(request)
+
+    decode.assert_not_called()
+    assert request.state.user == {"user_id": "1", "role": "user"}
@@ -0,0 +1,29 @@
+from fastapi.responses import JSONResponse
+
+from helpers.etag import conditional, etag_matches, make_etag
+
+
+def test_make_etag_is_strong_and_stable():
+    etag = make_etag("product", 1, 3, ["id", "name"])
+
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == make_etag("product", 1, 3, ["id", "name"])
+    assert etag != make_etag("product", 1, 4, ["id", "name"])
+
+
+def test_etag_matches_lists_weak_tags_and_star():
+    etag = make_etag("categories", 1)
+
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"other"', etag)
+
+
+def test_conditional_tags_by_body():
+    first = conditional(JSONResponse({"data": [1]}), None)
+    etag = first.headers["etag"]
+
+    assert first.status_code == 200
+    assert conditional(JSONResponse({"data": [1]}), etag).status_code == 304
+    assert conditional(JSONResponse({"data": [2]}), etag).status_code == 200
@@ -0,0 +1,40 @@
+import pytest
+from decimal import Decimal
+
+from helpers.fields import dump, nested_include, parse_fields, parse_include, partial, with_projection
+from models.product import Product, ProductResponse
+
+
+def test_parse_fields_adds_id_and_rejects_unknown():
+    assert parse_fields(None, Product) is None
+    assert parse_fields("name, image_url", Product) == {"id", "name", "image_url"}
+    with pytest.raises(ValueError):
+        parse_fields("name,password", Product)
+    with pytest.raises(ValueError):
+        parse_fields("name,category", Product)
+
+
+def test_parse_include_expands_nested_relations():
+    relations = ("product", "product.category", "product.lender")
+
+    assert parse_include(None, relations) == frozenset()
+    include = parse_include("product.category, product.lender", relations)
+    assert include == {"product", "product.category", "product.lender"}
+    assert nested_include(include, "product") == {"category", "lender"}
+    with pytest.raises(ValueError):
+        parse_include("product,owner", relations)
+
+
+def test_with_projection_uses_stored_attribute_names():
+    kwargs = with_projection({"TableName": "t", "ExpressionAttributeNames": {"#s": "Status"}}, Product, {"id", "image_url", "user"})
+
+    assert kwargs["ProjectionExpression"] == "#f0, #f1"
+    assert kwargs["ExpressionAttributeNames"] == {"#s": "Status", "#f0": "ID", "#f1": "ImageUrl"}
+
+
+def test_partial_sets_only_projected_fields():
+    product = partial(Product, {"ID": Decimal("7"), "Name": "Drill", "IsAvailable": True}, {"id", "name", "is_available"})
+    row = ProductResponse.model_construct(product=product)
+
+    assert product.id == 7
+    assert dump(row, {"product": {"id", "name"}, "category": True, "user": True}, by_alias=True) == {"product": {"ID": 7, "Name": "Drill"}}
@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+
+from helpers.interval_index import IntervalIndex
+
+
+def day(n):
+    return datetime(2024, 1, 1) + timedelta(days=n)
+
+
+def test_empty_index_is_free():
+    index = IntervalIndex()
+
+    assert len(index) == 0
+    assert index.is_free(day(0), day(1))
+
+
+def test_overlap_detection():
+    index = IntervalIndex([(day(10), day(12)), (day(0), day(5)), (day(20), day(21))])
+
+    assert index.overlaps(day(4), day(6))
+    assert index.overlaps(day(11), day(11) + timedelta(hours=1))
+    assert index.overlaps(day(-1), day(30))
+    assert index.is_free(day(5), day(10))
+    assert index.is_free(day(12), day(20))
+    assert index.is_free(day(21), day(25))
+
+
+def test_long_early_interval_is_not_missed():
+    # a long booking that starts first must still block later windows
+    index = IntervalIndex([(day(0), day(30)), (day(2), day(3))])
+
+    assert index.overlaps(day(10), day(11))
+    assert index.is_free(day(30), day(31))
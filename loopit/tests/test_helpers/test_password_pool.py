@@ -0,0 +1,55 @@
+import pytest
+
+from helpers.auth_helper import AuthHelper
+from helpers.password_pool import PasswordPool
+from exception.user import AuthServiceBusyError
+
+
+@pytest.mark.asyncio
+async def test_run_hashes_in_worker_process():
+    pool = PasswordPool(workers=1, max_pending=2, admission_timeout=5)
+    try:
+        hashed = await pool.run(AuthHelper.hash_password, "secret123")
+        assert await pool.run(AuthHelper.verify_password, "secret123", hashed) is True
+    finally:
+        pool.shutdown()
+
+    stats = pool.stats()
+    assert stats["completed"] == 2
+    assert stats["in_flight"] == 0
+    assert stats["waiting"] == 0
+
+
+@pytest.mark.asyncio
+async def test_run_rejects_when_no_slot_frees_up():
+    pool = PasswordPool(workers=1, max_pending=1, admission_timeout=0.01)
+    pool._ensure_started()
+    await pool._slots.acquire()
+    try:
+        with pytest.raises(AuthServiceBusyError):
+            await pool.run(AuthHelper.verify_password, "x", "y")
+    finally:
+        pool._slots.release()
+        pool.shutdown()
+
+    assert pool.stats()["rejected"] == 1
+    assert pool.stats()["waiting"] == 0
+
+
+def _fail():
+    raise ValueError("boom")
+
+
+@pytest.mark.asyncio
+async def test_failures_are_not_counted_as_completed():
+    pool = PasswordPool(workers=1, max_pending=2, admission_timeout=5)
+    pool.start()
+    try:
+        with pytest.raises(ValueError):
+            await pool.run(_fail)
+    finally:
+        pool.shutdown()
+
+    assert pool.stats()["completed"] == 0
+    assert pool.stats()["failed"] == 1
+    assert pool.stats()["in_flight"] == 0
@@ -0,0 +1,30 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+
+from helpers.request_scope import close_memo, memoized, open_memo
+
+
+@pytest.mark.asyncio
+async def test_memo_shares_one_load_between_concurrent_callers():
+    load = AsyncMock(return_value=[1, 2])
+    token = open_memo()
+    try:
+        results = await asyncio.gather(*(memoized("categories:all", load) for _ in range(3)))
+        other = await memoized("societies:all", AsyncMock(return_value=[3]))
+    finally:
+        close_memo(token)
+
+    assert results == [[1, 2]] * 3
+    assert other == [3]
+    load.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_without_a_memo_every_call_loads():
+    load = AsyncMock(return_value=1)
+
+    await memoized("categories:version", load)
+    await memoized("categories:version", load)
+
+    assert load.await_count == 2
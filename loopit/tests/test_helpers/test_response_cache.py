@@ -0,0 +1,95 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from helpers.response_cache import ResponseCache, scope_key
+
+
+def _request(query: str = "", headers=None, user=None) -> Request:
+    request = Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/products",
+        "query_string": query.encode(),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    })
+    request.state.user = user
+    return request
+
+
+@pytest.mark.asyncio
+async def test_hit_skips_the_build_and_ignores_query_order():
+    cache = ResponseCache(ttl=60, stale=60, max_entries=10)
+    build = AsyncMock(return_value=JSONResponse({"data": [1]}))
+
+    first = await cache.serve(_request("a=1&b=2"), "public", ("products",), build)
+    second = await cache.serve(_request("b=2&a=1"), "public", ("products",), build)
+
+    assert first.headers["x-cache"] == "MISS"
+    assert second.headers["x-cache"] == "HIT"
+    assert second.body == first.body
+    build.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_errors_are_not_cached():
+    cache = ResponseCache(ttl=60, stale=60, max_entries=10)
+    build = AsyncMock(return_value=JSONResponse({"status": False}, status_code=500))
+
+    await cache.serve(_request(), "public", ("products",), build)
+    await cache.serve(_request(), "public", ("products",), build)
+
+    assert build.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_is_served_and_refreshed_once():
+    cache = ResponseCache(ttl=0, stale=60, max_entries=10)
+    build = AsyncMock(side_effect=[JSONResponse({"data": [1]}), JSONResponse({"data": [2]})])
+
+    await cache.serve(_request(), "public", ("products",), build)
+    stale = await cache.serve(_request(), "public", ("products",), build)
+    await asyncio.sleep(0)
+
+    assert stale.headers["x-cache"] == "STALE"
+    assert stale.body == b'{"data":[1]}'
+    assert build.await_count == 2
+    assert next(iter(cache._entries.values())).body == b'{"data":[2]}'
+
+
+@pytest.mark.asyncio
+async def test_invalidate_drops_entries_and_discards_inflight_builds():
+    cache = ResponseCache(ttl=60, stale=60, max_entries=10)
+
+    async def build_during_write():
+        cache.invalidate("products")
+        return JSONResponse({"data": [1]})
+
+    await cache.serve(_request(), "public", ("products",), build_during_write)
+    assert cache.stats()["entries"] == 0
+
+    await cache.serve(_request(), "public", ("products",), AsyncMock(return_value=JSONResponse({"data": [1]})))
+    cache.invalidate("categories")
+    assert cache.stats()["entries"] == 1
+    cache.invalidate("products")
+    assert cache.stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_hit_answers_if_none_match_with_304():
+    cache = ResponseCache(ttl=60, stale=60, max_entries=10)
+    response = JSONResponse({"data": []}, headers={"ETag": '"v1"'})
+
+    await cache.serve(_request(), "public", ("categories",), AsyncMock(return_value=response))
+    hit = await cache.serve(_request(headers={"If-None-Match": '"v1"'}), "public", ("categories",), AsyncMock())
+
+    assert hit.status_code == 304
+
+
+def test_scope_key():
+    assert scope_key(_request(user={"user_id": "1"}), "public") == "public"
+    assert scope_key(_request(user={"user_id": "1"}), "user") == "user:1"
+    assert scope_key(_request(user={"user_id": "1", "society_id": 4}), "society") == "society:4"
+    assert scope_key(_request(user={"user_id": "1"}), "society") == "user:1"
@@ -0,0 +1,96 @@
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+import msgpack
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+
+import pytest
+from helpers.responses import ContentNegotiationMiddleware, FastJSONResponse, MsgPackResponse, dumps, packb, prefers_msgpack
+from helpers.success_handler import write_success_response
+from models.category import Category
+from models.enums.order_status import OrderStatus
+
+
+def test_dumps_matches_jsonable_encoder():
+    content = {
+        "price": Decimal("10.50"),
+        "count": Decimal("3"),
+        "at": datetime(2024, 1, 1, 12, 30, tzinfo=timezone.utc),
+        "status": OrderStatus.InUse,
+        "tags": ("a", "b"),
+        "category": Category(id=1, name="Tools", price=Decimal("5"), security=Decimal("2.5")),
+        1: "non-str key",
+    }
+
+    assert json.loads(dumps(content)) == json.loads(json.dumps(jsonable_encoder(content)))
+
+
+def test_write_success_response_renders_with_orjson():
+    resp = write_success_response(status_code=200, data=[{"price": Decimal("9.99")}], message="ok")
+
+    assert isinstance(resp, FastJSONResponse)
+    assert resp.headers["content-type"] == "application/json"
+    assert json.loads(resp.body) == {"status": True, "data": [{"price": 9.99}], "message": "ok"}
+
+
+def test_packb_matches_the_json_body():
+    content = {
+        "price": Decimal("10.50"),
+        "count": Decimal("3"),
+        "at": datetime(2024, 1, 1, 12, 30, tzinfo=timezone.utc),
+        "status": OrderStatus.InUse,
+        "tags": ("a", "b"),
+        "category": Category(id=1, name="Tools", price=Decimal("5"), security=Decimal("2.5")),
+    }
+
+    assert msgpack.unpackb(packb(content)) == json.loads(dumps(content))
+
+
+def _negotiating_app():
+    app = FastAPI()
+    app.add_middleware(ContentNegotiationMiddleware)
+
+    @app.get("/items")
+    async def items():
+        return write_success_response(status_code=200, data=[{"price": Decimal("9.99")}])
+
+    return TestClient(app)
+
+
+def test_accept_msgpack_renders_msgpack():
+    resp = _negotiating_app().get("/items", headers={"Accept": "application/msgpack"})
+
+    assert resp.headers["content-type"] == MsgPackResponse.media_type
+    assert msgpack.unpackb(resp.content) == {"status": True, "data": [{"price": 9.99}]}
+
+
+@pytest.mark.parametrize("accept, expected", [
+    ("application/msgpack", True),
+    ("application/x-msgpack, application/json;q=0.5", True),
+    ("application/json;q=0.9, application/vnd.msgpack", True),
+    ("application/msgpack;q=0, application/json", False),
+    ("application/msgpack;q=0", False),
+    ("application/msgpack;q=0.5, application/json", False),
+    ("application/msgpack, application/json", False),
+    ("application/msgpack;q=0.5, */*;q=0.1", True),
+    ("application/*", False),
+    ("*/*", False),
+    ("", False),
+])
+def test_prefers_msgpack_weighs_q_values(accept, expected):
+    assert prefers_msgpack(accept) is expected
+
+
+def test_refused_msgpack_renders_json():
+    resp = _negotiating_app().get("/items", headers={"Accept": "application/msgpack;q=0, application/json"})
+
+    assert resp.headers["content-type"] == "application/json"
+
+
+def test_json_stays_the_default():
+    resp = _negotiating_app().get("/items", headers={"Accept": "*/*"})
+
+    assert resp.headers["content-type"] == "application/json"
+    assert resp.json() == {"status": True, "data": [{"price": 9.99}]}
@@ -0,0 +1,82 @@
+import json
+import pytest
+from unittest.mock import MagicMock
+
+from helpers.streaming import NDJSON_MEDIA_TYPE, stream_format, stream_response
+from models.category import Category
+
+
+async def pages_of(*pages, fail_after=None):
+    for i, page in enumerate(pages):
+        if fail_after is not None and i == fail_after:
+            raise RuntimeError("db error")
+        yield page
+
+
+async def body(response) -> bytes:
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+def request(accept="", query=None):
+    req = MagicMock()
+    req.headers = {"accept": accept}
+    req.query_params = query or {}
+    return req
+
+
+def test_stream_format():
+    assert stream_format(request()) is None
+    assert stream_format(request(query={"stream": "true"})) == "json"
+    assert stream_format(request(accept=NDJSON_MEDIA_TYPE)) == "ndjson"
+
+
+@pytest.mark.asyncio
+async def test_json_array_matches_buffered_envelope():
+    response = await stream_response(
+        pages_of([{"id": 1}, Category(id=2, name="Tools", price=5, security=1)], [{"id": 3}]),
+        "json",
+        message="ok",
+    )
+
+    payload = json.loads(await body(response))
+
+    assert response.media_type == "application/json"
+    assert payload["status"] is True
+    assert payload["message"] == "ok"
+    assert [row.get("id", row.get("ID")) for row in payload["data"]] == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_ndjson_one_row_per_line():
+    response = await stream_response(pages_of([{"id": 1}, {"id": 2}], [{"id": 3}]), "ndjson")
+
+    lines = (await body(response)).splitlines()
+
+    assert response.media_type == NDJSON_MEDIA_TYPE
+    assert [json.loads(line)["id"] for line in lines] == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_empty_stream_is_valid_json():
+    response = await stream_response(pages_of(), "json")
+
+    assert json.loads(await body(response)) == {"data": [], "status": True}
+
+
+@pytest.mark.asyncio
+async def test_first_page_error_raises_before_response():
+    with pytest.raises(RuntimeError):
+        await stream_response(pages_of([{"id": 1}], fail_after=0), "json")
+
+
+@pytest.mark.asyncio
+async def test_mid_stream_error_ends_with_failed_trailer():
+    json_response = await stream_response(pages_of([{"id": 1}], [{"id": 2}], fail_after=1), "json")
+    ndjson_response = await stream_response(pages_of([{"id": 1}], [{"id": 2}], fail_after=1), "ndjson")
+
+    payload = json.loads(await body(json_response))
+    last_line = json.loads((await body(ndjson_response)).splitlines()[-1])
+
+    assert payload["data"] == [{"id": 1}]
+    assert payload["status"] is False
+    assert last_line == {"status": False, "error": "stream interrupted"}
@@ -0,0 +1,90 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from datetime import datetime, timezone
+
+from repository import booking_repository
+from repository.booking_repository import BookingRepo
+
+
+@pytest.fixture
+def dynamodb():
+    return MagicMock()
+
+
+@pytest.fixture
+def repo(dynamodb, monkeypatch):
+    monkeypatch.setattr("repository.booking_repository.settings.DDB_TABLE_NAME", "test-table")
+    booking_repository._calendar_cache.clear()
+    return BookingRepo(dynamodb=dynamodb)
+
+
+def _calendar_items(version):
+    return [
+        {"pk": {"S": "PRODUCT#1"}, "sk": {"S": "CALENDAR#VERSION"}, "Version": {"N": str(version)}},
+        {
+            "pk": {"S": "PRODUCT#1"},
+            "sk": {"S": "CALENDAR#BOOKING#2024-01-01T00:00:00Z#ORDER#9"},
+            "StartDate": {"S": "2024-01-01T00:00:00Z"},
+            "EndDate": {"S": "2024-01-05T00:00:00Z"},
+        },
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_calendar_loads_and_caches(repo, dynamodb):
+    dynamodb.get_item.return_value = {"Item": {"Version": {"N": "1"}}}
+    dynamodb.query.return_value = {"Items": _calendar_items(1)}
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        version, index = await repo.get_calendar(1)
+        again = await repo.get_calendar(1)
+
+    assert version == 1
+    assert index.overlaps(datetime(2024, 1, 4, tzinfo=timezone.utc), datetime(2024, 1, 6, tzinfo=timezone.utc))
+    assert again == (1, index)
+    dynamodb.query.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_get_calendar_reloads_on_version_change(repo, dynamodb):
+    dynamodb.get_item.side_effect = [{"Item": {"Version": {"N": "1"}}}, {"Item": {"Version": {"N": "2"}}}]
+    dynamodb.query.side_effect = [{"Items": _calendar_items(1)}, {"Items": _calendar_items(2)}]
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        await repo.get_calendar(1)
+        version, _ = await repo.get_calendar(1)
+
+    assert version == 2
+    assert dynamodb.query.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_get_calendars_batches_version_reads(repo, dynamodb):
+    dynamodb.batch_get_item.return_value = {
+        "Responses": {"test-table": [{"pk": {"S": "PRODUCT#1"}, "sk": {"S": "CALENDAR#VERSION"}, "Version": {"N": "1"}}]}
+    }
+    dynamodb.query.side_effect = [{"Items": _calendar_items(1)}, {"Items": []}]
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        calendars = await repo.get_calendars([1, 2])
+
+    assert calendars[1][0] == 1
+    assert len(calendars[1][1]) == 1
+    assert calendars[2][0] == 0
+    assert len(calendars[2][1]) == 0
+
+
+def test_booking_items_guard_calendar_version(repo):
+    items = repo.booking_items(1, 9, datetime(2024, 1, 1, tzinfo=timezone.utc), datetime(2024, 1, 5, tzinfo=timezone.utc), 3)
+
+    booking = items[0]["Put"]["Item"]
+    assert booking["sk"] == {"S": "CALENDAR#BOOKING#2024-01-01T00:00:00Z#ORDER#9"}
+    version = items[1]["Update"]
+    assert version["ExpressionAttributeValues"] == {":next": {"N": "4"}, ":expected": {"N": "3"}}
+
+
+def test_release_items_delete_the_booking_and_bump_the_version(repo):
+    items = repo.release_items(1, 9, datetime(2024, 1, 1))
+
+    assert items[0]["Delete"]["Key"] == {"pk": {"S": "PRODUCT#1"}, "sk": {"S": "CALENDAR#BOOKING#2024-01-01T00:00:00Z#ORDER#9"}}
+    assert items[1]["Update"]["UpdateExpression"] == "ADD Version :one"
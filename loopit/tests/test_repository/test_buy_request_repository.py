@@ -6,6 +6,8 @@ from datetime import datetime, timezone
 from repository.buy_request_repository import BuyRequestRepo
 from models.buy_request import BuyingRequest
 from models.enums.buy_request import BuyRequestStatus
+from exception.buy_request import BuyRequestAlreadyExistsError
+from repository.stats_repository import lender_counters_update
 
 
 @pytest.fixture
@@ -26,12 +28,45 @@ async def test_create_buyer_request_success(repo, dynamodb):
         product_id=1,
         requested_by=2,
         status=BuyRequestStatus.Pending,
+        start_date=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        end_date=datetime(2024, 1, 5, tzinfo=timezone.utc),
     )
 
     with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
         await repo.create_buyer_request(req)
 
     dynamodb.transact_write_items.assert_called_once()
+    items = dynamodb.transact_write_items.call_args.kwargs["TransactItems"]
+    sentinel = next(i["Put"] for i in items if "ConditionExpression" in i.get("Put", {}))
+    assert sentinel["Item"]["pk"] == {"S": "PRODUCT#1"}
+    assert items[-1]["Update"]["Key"] == {"pk": {"S": "USER#2"}, "sk": {"S": "SUMMARY"}}
+    assert sentinel["Item"]["sk"] == {"S": "BUYREQUEST#PENDING#USER#2"}
+    assert "attribute_not_exists" in sentinel["ConditionExpression"]
+    assert items[0]["Put"]["Item"]["StartDate"] == {"S": "2024-01-01T00:00:00Z"}
+    assert items[0]["Put"]["Item"]["EndDate"] == {"S": "2024-01-05T00:00:00Z"}
+
+
+@pytest.mark.asyncio
+async def test_create_buyer_request_duplicate_pending(repo, dynamodb):
+    req = MagicMock(
+        id=1,
+        product_id=1,
+        requested_by=2,
+        status=BuyRequestStatus.Pending,
+        start_date=None,
+        end_date=None,
+    )
+    dynamodb.transact_write_items.side_effect = botocore.exceptions.ClientError(
+        {
+            "Error": {"Code": "TransactionCanceledException", "Message": "cancelled"},
+            "CancellationReasons": [{"Code": "None"}, {"Code": "None"}, {"Code": "ConditionalCheckFailed"}],
+        },
+        "TransactWriteItems",
+    )
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        with pytest.raises(BuyRequestAlreadyExistsError):
+            await repo.create_buyer_request(req)
 
 
 @pytest.mark.asyncio
@@ -75,6 +110,81 @@ async def test_get_all_buyer_requests_success(repo, dynamodb):
     assert result[0].requested_by == 5
 
 
+@pytest.mark.asyncio
+async def test_create_buyer_request_writes_scoped_copies(repo, dynamodb):
+    req = BuyingRequest(product_id=10, requested_by=5, lender_id=7, status=BuyRequestStatus.Pending)
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        await repo.create_buyer_request(req)
+
+    items = dynamodb.transact_write_items.call_args.kwargs["TransactItems"]
+    keys = {(i["Put"]["Item"]["pk"]["S"], i["Put"]["Item"]["sk"]["S"]) for i in items if "Put" in i}
+    assert ("PRODUCT#10", f"BUYREQUEST#STATUS#Pending#ID#{req.id}") in keys
+    assert ("LENDER#7", f"BUYREQUEST#STATUS#Pending#ID#{req.id}") in keys
+    counters = next(i["Update"] for i in items if "Update" in i and i["Update"]["Key"]["pk"] == {"S": "LENDER#7"})
+    assert counters["Key"] == {"pk": {"S": "LENDER#7"}, "sk": {"S": "COUNTERS"}}
+    assert counters["ExpressionAttributeNames"] == {"#c0": "PendingBuyRequests"}
+    assert counters["ExpressionAttributeValues"] == {":c0": {"N": "1"}}
+
+
+@pytest.mark.asyncio
+async def test_get_all_buyer_requests_by_product_multi_status(repo, dynamodb):
+    def query(**kwargs):
+        prefix = kwargs["ExpressionAttributeValues"][":skPrefix"]["S"]
+        status_val = prefix.split("#")[2]
+        return {
+            "Items": [
+                {
+                    "ID": {"N": "1" if status_val == "Pending" else "2"},
+                    "ProductId": {"N": "10"},
+                    "RequestedBy": {"N": "5"},
+                    "Status": {"S": status_val},
+                    "CreatedAt": {"S": "2024-01-01T00:00:00Z"},
+                }
+            ]
+        }
+
+    dynamodb.query.side_effect = query
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        result = await repo.get_all_buyer_requests(
+            product_id=10,
+            filter_statuses=[BuyRequestStatus.Pending.value, BuyRequestStatus.Approved.value],
+        )
+
+    assert [r.status for r in result] == [BuyRequestStatus.Pending, BuyRequestStatus.Approved]
+    assert dynamodb.query.call_count == 2
+    pks = {c.kwargs["ExpressionAttributeValues"][":pk"]["S"] for c in dynamodb.query.call_args_list}
+    assert pks == {"PRODUCT#10"}
+
+
+@pytest.mark.asyncio
+async def test_get_lender_buyer_requests_follows_pagination(repo, dynamodb):
+    item = {
+        "ID": {"N": "1"},
+        "ProductId": {"N": "10"},
+        "RequestedBy": {"N": "5"},
+        "LenderID": {"N": "7"},
+        "Status": {"S": BuyRequestStatus.Pending.value},
+        "CreatedAt": {"S": "2024-01-01T00:00:00Z"},
+    }
+    second = {**item, "ID": {"N": "2"}}
+    dynamodb.query.side_effect = [
+        {"Items": [item], "LastEvaluatedKey": {"pk": {"S": "LENDER#7"}}},
+        {"Items": [second]},
+    ]
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        result = await repo.get_lender_buyer_requests(7)
+
+    assert [r.id for r in result] == [1, 2]
+    assert result[0].lender_id == 7
+    first_call = dynamodb.query.call_args_list[0].kwargs
+    assert first_call["ExpressionAttributeValues"][":pk"] == {"S": "LENDER#7"}
+    assert first_call["ExpressionAttributeValues"][":skPrefix"] == {"S": "BUYREQUEST#STATUS#"}
+    assert "ExclusiveStartKey" in dynamodb.query.call_args_list[1].kwargs
+
+
 @pytest.mark.asyncio
 async def test_get_all_buyer_requests_client_error(repo, dynamodb):
     dynamodb.query.side_effect = botocore.exceptions.ClientError(
@@ -91,7 +201,10 @@ async def test_update_status_buyer_request_success(repo, dynamodb):
     dynamodb.get_item.return_value = {
         "Item": {
             "ID": {"N": "1"},
+            "ProductId": {"N": "10"},
+            "RequestedBy": {"N": "5"},
             "Status": {"S": BuyRequestStatus.Pending.value},
+            "CreatedAt": {"S": "2024-01-01T00:00:00Z"},
         }
     }
 
@@ -99,6 +212,9 @@ async def test_update_status_buyer_request_success(repo, dynamodb):
         await repo.update_status_buyer_request(1, BuyRequestStatus.Approved.value)
 
     dynamodb.transact_write_items.assert_called_once()
+    items = dynamodb.transact_write_items.call_args.kwargs["TransactItems"]
+    deleted_keys = [i["Delete"]["Key"] for i in items if "Delete" in i]
+    assert {"pk": {"S": "PRODUCT#10"}, "sk": {"S": "BUYREQUEST#PENDING#USER#5"}} in deleted_keys
 
 
 @pytest.mark.asyncio
@@ -110,6 +226,57 @@ async def test_update_status_buyer_request_not_found(repo, dynamodb):
             await repo.update_status_buyer_request(1, BuyRequestStatus.Approved.value)
 
 
+@pytest.mark.asyncio
+async def test_change_status_includes_related_items(repo, dynamodb):
+    req = BuyingRequest(id=1, product_id=10, requested_by=5, status=BuyRequestStatus.Pending)
+    related = [{"Put": {"TableName": "test-table", "Item": {"pk": {"S": "ORDER"}}}}]
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        await repo.change_status(req, BuyRequestStatus.Approved.value, related)
+
+    dynamodb.transact_write_items.assert_called_once()
+    items = dynamodb.transact_write_items.call_args.kwargs["TransactItems"]
+    assert related[0] in items
+    summary = items[-1]["Update"]
+    assert summary["Key"] == {"pk": {"S": "USER#5"}, "sk": {"S": "SUMMARY"}}
+    assert summary["ExpressionAttributeValues"] == {":c0": {"N": "-1"}}
+    update = next(i["Update"] for i in items if "Update" in i)
+    assert update["ConditionExpression"] == "#s = :oldStatus"
+    assert update["ExpressionAttributeValues"][":oldStatus"] == {"S": BuyRequestStatus.Pending.value}
+    put_new = next(i["Put"] for i in items if "Put" in i)
+    assert put_new["Item"]["sk"] == {"S": f"STATUS#{BuyRequestStatus.Approved.value}#ID#1"}
+    assert put_new["Item"]["ProductId"] == {"N": "10"}
+
+
+def test_status_change_moves_scoped_copies(repo):
+    req = BuyingRequest(id=1, product_id=10, requested_by=5, lender_id=7, status=BuyRequestStatus.Pending)
+
+    items = repo._status_change_items(req, BuyRequestStatus.Rejected.value)
+
+    deleted = {(i["Delete"]["Key"]["pk"]["S"], i["Delete"]["Key"]["sk"]["S"]) for i in items if "Delete" in i}
+    put = {(i["Put"]["Item"]["pk"]["S"], i["Put"]["Item"]["sk"]["S"]) for i in items if "Put" in i}
+    assert ("LENDER#7", "BUYREQUEST#STATUS#Pending#ID#1") in deleted
+    assert ("PRODUCT#10", "BUYREQUEST#STATUS#Pending#ID#1") in deleted
+    assert ("LENDER#7", "BUYREQUEST#STATUS#Rejected#ID#1") in put
+    assert ("PRODUCT#10", "BUYREQUEST#STATUS#Rejected#ID#1") in put
+
+
+@pytest.mark.asyncio
+async def test_change_status_condition_failed(repo, dynamodb):
+    req = BuyingRequest(id=1, product_id=10, requested_by=5, status=BuyRequestStatus.Pending)
+    dynamodb.transact_write_items.side_effect = botocore.exceptions.ClientError(
+        {
+            "Error": {"Code": "TransactionCanceledException", "Message": "cancelled"},
+            "CancellationReasons": [{"Code": "ConditionalCheckFailed"}],
+        },
+        "TransactWriteItems",
+    )
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        with pytest.raises(RuntimeError, match="concurrently"):
+            await repo.change_status(req, BuyRequestStatus.Approved.value)
+
+
 @pytest.mark.asyncio
 async def test_get_buyer_request_by_id_success(repo, dynamodb):
     dynamodb.get_item.return_value = {
@@ -139,20 +306,196 @@ async def test_get_buyer_request_by_id_not_found(repo, dynamodb):
     assert req is None
 
 
+def _request_item(status):
+    return {
+        "Item": {
+            "ID": {"N": "1"},
+            "ProductId": {"N": "10"},
+            "RequestedBy": {"N": "5"},
+            "LenderID": {"N": "7"},
+            "Status": {"S": status},
+            "CreatedAt": {"S": "2024-01-01T00:00:00Z"},
+        }
+    }
+
+
+@pytest.mark.asyncio
+async def test_delete_buyer_request_removes_every_copy(repo, dynamodb):
+    dynamodb.get_item.return_value = _request_item(BuyRequestStatus.Pending.value)
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        await repo.delete_buyer_request(1)
+
+    dynamodb.delete_item.assert_not_called()
+    items = dynamodb.transact_write_items.call_args.kwargs["TransactItems"]
+    deleted = [(i["Delete"]["Key"]["pk"]["S"], i["Delete"]["Key"]["sk"]["S"]) for i in items if "Delete" in i]
+    assert deleted == [
+        ("BUYREQUEST", "ID#1"),
+        ("BUYREQUEST", "STATUS#Pending#ID#1"),
+        ("PRODUCT#10", "BUYREQUEST#STATUS#Pending#ID#1"),
+        ("LENDER#7", "BUYREQUEST#STATUS#Pending#ID#1"),
+        ("PRODUCT#10", "BUYREQUEST#PENDING#USER#5"),
+    ]
+    assert items[0]["Delete"]["ExpressionAttributeValues"] == {":status": {"S": "Pending"}}
+    counters = [i["Update"] for i in items if "Update" in i]
+    assert [c["Key"] for c in counters] == [
+        {"pk": {"S": "USER#5"}, "sk": {"S": "SUMMARY"}},
+        lender_counters_update("test-table", 7, {"PendingBuyRequests": -1})[0]["Update"]["Key"],
+    ]
+    assert all(c["ExpressionAttributeValues"] == {":c0": {"N": "-1"}} for c in counters)
+
+
 @pytest.mark.asyncio
-async def test_delete_buyer_request_success(repo, dynamodb):
+async def test_delete_buyer_request_leaves_pending_state_alone_once_decided(repo, dynamodb):
+    dynamodb.get_item.return_value = _request_item(BuyRequestStatus.Approved.value)
+
     with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
         await repo.delete_buyer_request(1)
 
-    dynamodb.delete_item.assert_called_once()
+    items = dynamodb.transact_write_items.call_args.kwargs["TransactItems"]
+    assert all("Delete" in i for i in items)
+    assert ("PRODUCT#10", "BUYREQUEST#PENDING#USER#5") not in [(i["Delete"]["Key"]["pk"]["S"], i["Delete"]["Key"]["sk"]["S"]) for i in items]
+
+
+@pytest.mark.asyncio
+async def test_delete_buyer_request_not_found(repo, dynamodb):
+    dynamodb.get_item.return_value = {}
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        await repo.delete_buyer_request(1)
+
+    dynamodb.transact_write_items.assert_not_called()
 
 
 @pytest.mark.asyncio
 async def test_delete_buyer_request_client_error(repo, dynamodb):
-    dynamodb.delete_item.side_effect = botocore.exceptions.ClientError(
+    dynamodb.get_item.return_value = _request_item(BuyRequestStatus.Pending.value)
+    dynamodb.transact_write_items.side_effect = botocore.exceptions.ClientError(
         {"Error": {"Code": "500", "Message": "err"}}, "op"
     )
 
     with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
         with pytest.raises(RuntimeError):
             await repo.delete_buyer_request(1)
+
+
+@pytest.mark.asyncio
+async def test_get_buyer_requests_by_ids_success(repo, dynamodb):
+    dynamodb.batch_get_item.return_value = {
+        "Responses": {
+            "test-table": [
+                {
+                    "ID": {"N": "1"},
+                    "ProductId": {"N": "10"},
+                    "RequestedBy": {"N": "5"},
+                    "Status": {"S": "Pending"},
+                    "CreatedAt": {"S": "2024-01-01T00:00:00Z"},
+                }
+            ]
+        }
+    }
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        result = await repo.get_buyer_requests_by_ids([1, 2])
+
+    assert list(result.keys()) == [1]
+    assert result[1].product_id == 10
+
+
+@pytest.mark.asyncio
+async def test_change_status_merges_lender_counter_updates(repo, dynamodb):
+    req = BuyingRequest(id=1, product_id=10, requested_by=5, lender_id=7, status=BuyRequestStatus.Pending)
+    related = lender_counters_update("test-table", 7, {"ActiveRentals": 1, "LifetimeEarnings": 50})
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        await repo.change_status(req, BuyRequestStatus.Approved.value, related)
+
+    items = dynamodb.transact_write_items.call_args.kwargs["TransactItems"]
+    counters = [i["Update"] for i in items if "Update" in i and i["Update"]["Key"]["sk"] == {"S": "COUNTERS"}]
+    assert len(counters) == 1
+    deltas = {
+        name: counters[0]["ExpressionAttributeValues"][":" + placeholder[1:]]["N"]
+        for placeholder, name in counters[0]["ExpressionAttributeNames"].items()
+    }
+    assert deltas == {"PendingBuyRequests": "-1", "ActiveRentals": "1", "LifetimeEarnings": "50"}
+
+
+@pytest.mark.asyncio
+async def test_iter_buyer_requests_streams_one_status_after_another(repo, dynamodb):
+    def query(**kwargs):
+        status_val = kwargs["ExpressionAttributeValues"][":skPrefix"]["S"].split("#")[1]
+        return {
+            "Items": [
+                {
+                    "ID": {"N": "1" if status_val == "Approved" else "2"},
+                    "ProductId": {"N": "10"},
+                    "RequestedBy": {"N": "5"},
+                    "Status": {"S": status_val},
+                    "CreatedAt": {"S": "2024-01-01T00:00:00Z"},
+                }
+            ]
+        }
+
+    dynamodb.query.side_effect = query
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        pages = [page async for page in repo.iter_buyer_requests(None, [BuyRequestStatus.Pending.value, BuyRequestStatus.Approved.value])]
+
+    assert [[r.status for r in page] for page in pages] == [[BuyRequestStatus.Pending], [BuyRequestStatus.Approved]]
+    pks = {c.kwargs["ExpressionAttributeValues"][":pk"]["S"] for c in dynamodb.query.call_args_list}
+    assert pks == {"BUYREQUEST"}
+
+
+def _pending_item(rid, product_id, requested_by):
+    return {
+        "pk": {"S": "BUYREQUEST"},
+        "sk": {"S": f"STATUS#Pending#ID#{rid}"},
+        "ID": {"N": str(rid)},
+        "ProductId": {"N": str(product_id)},
+        "RequestedBy": {"N": str(requested_by)},
+        "Status": {"S": "Pending"},
+        "CreatedAt": {"S": "2024-01-01T00:00:00Z"},
+    }
+
+
+@pytest.mark.asyncio
+async def test_backfill_pending_sentinels_keeps_one_per_requester(repo, dynamodb):
+    dynamodb.query.return_value = {"Items": [_pending_item(2, 1, 5), _pending_item(1, 1, 5), _pending_item(3, 4, 5)]}
+    claimed = set()
+
+    def put_item(**kwargs):
+        key = (kwargs["Item"]["pk"]["S"], kwargs["Item"]["sk"]["S"])
+        if key in claimed:
+            raise botocore.exceptions.ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "PutItem")
+        claimed.add(key)
+
+    dynamodb.put_item.side_effect = put_item
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        written = await repo.backfill_pending_sentinels()
+
+    assert written == 2
+    first = dynamodb.put_item.call_args_list[0].kwargs["Item"]
+    assert first["sk"] == {"S": "BUYREQUEST#PENDING#USER#5"}
+    assert first["ID"] == {"N": "1"}
+
+
+@pytest.mark.asyncio
+async def test_backfill_scoped_copies_resolves_the_lender(repo, dynamodb):
+    legacy = {**_pending_item(1, 10, 5), "sk": {"S": "ID#1"}}
+    dynamodb.query.return_value = {"Items": [legacy]}
+    dynamodb.batch_get_item.return_value = {"Responses": {"test-table": [{"ID": {"N": "10"}, "LenderID": {"N": "7"}}]}}
+    dynamodb.batch_write_item.return_value = {}
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        written = await repo.backfill_scoped_copies()
+
+    assert written == 4
+    puts = [r["PutRequest"]["Item"] for r in dynamodb.batch_write_item.call_args.kwargs["RequestItems"]["test-table"]]
+    assert [(p["pk"]["S"], p["sk"]["S"]) for p in puts] == [
+        ("BUYREQUEST", "ID#1"),
+        ("BUYREQUEST", "STATUS#Pending#ID#1"),
+        ("PRODUCT#10", "BUYREQUEST#STATUS#Pending#ID#1"),
+        ("LENDER#7", "BUYREQUEST#STATUS#Pending#ID#1"),
+    ]
+    assert all(p["LenderID"] == {"N": "7"} for p in puts)
@@ -36,6 +36,7 @@ async def test_create_category_success(repo, dynamodb):
 
     assert category.id is not None
     dynamodb.put_item.assert_called_once()
+    assert dynamodb.update_item.call_args.kwargs["Key"] == {"pk": {"S": "VERSION"}, "sk": {"S": "CATEGORY"}}
 
 
 @pytest.mark.asyncio
@@ -171,3 +172,21 @@ async def test_delete_category_client_error(repo, dynamodb):
     with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
         with pytest.raises(RuntimeError):
             await repo.delete_category(1)
+
+
+@pytest.mark.asyncio
+async def test_find_by_ids_success(repo, dynamodb):
+    dynamodb.batch_get_item.return_value = {
+        "Responses": {
+            "test-table": [
+                {"ID": {"N": "1"}, "Name": {"S": "Electronics"}, "Price": {"N": "100"}, "Security": {"N": "10"}},
+            ]
+        }
+    }
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        result = await repo.find_by_ids([1])
+
+    assert result[1].name == "Electronics"
+    keys = dynamodb.batch_get_item.call_args.kwargs["RequestItems"]["test-table"]["Keys"]
+    assert keys == [{"pk": {"S": "CATEGORY"}, "sk": {"S": "ID#1"}}]
@@ -34,7 +34,37 @@ async def test_create_feedback_success(repo, dynamodb):
     with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
         await repo.create_feedback(feedback)
 
-    dynamodb.put_item.assert_called_once()
+    dynamodb.transact_write_items.assert_called_once()
+    items = dynamodb.transact_write_items.call_args.kwargs["TransactItems"]
+    assert [i["Put"]["Item"]["pk"]["S"] for i in items[:3]] == ["FEEDBACK", "GIVENBY#1", "GIVENTO#2"]
+    rating = items[3]["Update"]
+    assert rating["Key"] == {"pk": {"S": "LENDER#2"}, "sk": {"S": "RATING"}}
+    assert rating["UpdateExpression"] == "ADD RatingCount :one, RatingSum :rating, #star :one"
+    assert rating["ExpressionAttributeNames"] == {"#star": "Star5"}
+
+
+@pytest.mark.asyncio
+async def test_create_feedback_settles_due_review(repo, dynamodb):
+    feedback = Feedback(given_by=1, given_to=2, text="good", rating=4)
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        await repo.create_feedback(feedback, due_order_id=9)
+
+    items = dynamodb.transact_write_items.call_args.kwargs["TransactItems"]
+    marker = items[4]["Delete"]
+    assert marker["Key"] == {"pk": {"S": "USER#1"}, "sk": {"S": "FEEDBACKDUE#ORDER#9"}}
+    assert marker["ConditionExpression"] == "attribute_exists(pk)"
+    assert items[5]["Update"]["Key"] == {"pk": {"S": "USER#1"}, "sk": {"S": "SUMMARY"}}
+    assert items[5]["Update"]["ExpressionAttributeValues"] == {":c0": {"N": "-1"}}
+
+
+@pytest.mark.asyncio
+async def test_is_feedback_due(repo, dynamodb):
+    dynamodb.get_item.side_effect = [{"Item": {"OrderID": {"N": "9"}}}, {}]
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        assert await repo.is_feedback_due(1, 9) is True
+        assert await repo.is_feedback_due(1, 10) is False
 
 
 @pytest.mark.asyncio
@@ -47,9 +77,9 @@ async def test_create_feedback_client_error(repo, dynamodb):
     feedback.rating = 2
     feedback.created_at = datetime(2024, 1, 1)
 
-    dynamodb.put_item.side_effect = botocore.exceptions.ClientError(
+    dynamodb.transact_write_items.side_effect = botocore.exceptions.ClientError(
         {"Error": {"Code": "500", "Message": "err"}},
-        "PutItem",
+        "TransactWriteItems",
     )
 
     with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
@@ -96,6 +126,110 @@ async def test_get_all_feedbacks_client_error(repo, dynamodb):
             await repo.get_all_feedbacks()
 
 
+def _feedback_item(fid, given_by, given_to):
+    return {
+        "ID": {"N": str(fid)},
+        "GivenBy": {"N": str(given_by)},
+        "GivenTo": {"N": str(given_to)},
+        "Text": {"S": "nice"},
+        "Rating": {"N": "4"},
+        "CreatedAt": {"S": "2024-01-01T00:00:00"},
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_feedbacks_given_by_pages(repo, dynamodb):
+    dynamodb.query.return_value = {
+        "Items": [_feedback_item(2, 1, 3)],
+        "LastEvaluatedKey": {"pk": {"S": "GIVENBY#1"}, "sk": {"S": "FEEDBACK#2"}},
+    }
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        feedbacks, cursor = await repo.get_feedbacks_given_by(1, limit=1)
+        await repo.get_feedbacks_given_by(1, limit=1, cursor=cursor)
+
+    assert feedbacks[0].given_to == 3
+    first, second = dynamodb.query.call_args_list
+    assert first.kwargs["ExpressionAttributeValues"][":pk"] == {"S": "GIVENBY#1"}
+    assert first.kwargs["Limit"] == 1
+    assert "ExclusiveStartKey" not in first.kwargs
+    assert second.kwargs["ExclusiveStartKey"] == {"pk": {"S": "GIVENBY#1"}, "sk": {"S": "FEEDBACK#2"}}
+
+
+@pytest.mark.asyncio
+async def test_get_feedbacks_given_to_last_page(repo, dynamodb):
+    dynamodb.query.return_value = {"Items": [_feedback_item(2, 1, 3)]}
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        feedbacks, cursor = await repo.get_feedbacks_given_to(3)
+
+    assert len(feedbacks) == 1
+    assert cursor is None
+    assert dynamodb.query.call_args.kwargs["ExpressionAttributeValues"][":pk"] == {"S": "GIVENTO#3"}
+
+
+@pytest.mark.asyncio
+async def test_backfill_user_partitions(repo, dynamodb):
+    dynamodb.query.side_effect = [
+        {"Items": [_feedback_item(1, 1, 2)], "LastEvaluatedKey": {"pk": {"S": "FEEDBACK"}, "sk": {"S": "FEEDBACK#1"}}},
+        {"Items": [_feedback_item(2, 3, 4)]},
+    ]
+    dynamodb.batch_write_item.return_value = {}
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        written = await repo.backfill_user_partitions()
+
+    assert written == 4
+    first_batch = dynamodb.batch_write_item.call_args_list[0].kwargs["RequestItems"]["test-table"]
+    assert [r["PutRequest"]["Item"]["pk"]["S"] for r in first_batch] == ["GIVENBY#1", "GIVENTO#2"]
+
+
+@pytest.mark.asyncio
+async def test_get_lender_rating(repo, dynamodb):
+    dynamodb.get_item.return_value = {
+        "Item": {
+            "RatingCount": {"N": "3"},
+            "RatingSum": {"N": "13"},
+            "Star4": {"N": "2"},
+            "Star5": {"N": "1"},
+        }
+    }
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        rating = await repo.get_lender_rating(2)
+
+    assert rating.count == 3
+    assert rating.average == 4.33
+    assert rating.histogram == {1: 0, 2: 0, 3: 0, 4: 2, 5: 1}
+
+
+@pytest.mark.asyncio
+async def test_get_lender_rating_without_feedback(repo, dynamodb):
+    dynamodb.get_item.return_value = {}
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        rating = await repo.get_lender_rating(2)
+
+    assert rating.count == 0
+    assert rating.average == 0.0
+
+
+@pytest.mark.asyncio
+async def test_backfill_lender_ratings(repo, dynamodb):
+    dynamodb.query.return_value = {"Items": [_feedback_item(1, 1, 2), _feedback_item(2, 3, 2)]}
+    dynamodb.batch_write_item.return_value = {}
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        written = await repo.backfill_lender_ratings()
+
+    assert written == 1
+    item = dynamodb.batch_write_item.call_args.kwargs["RequestItems"]["test-table"][0]["PutRequest"]["Item"]
+    assert item["pk"] == {"S": "LENDER#2"}
+    assert item["RatingCount"] == {"N": "2"}
+    assert item["RatingSum"] == {"N": "8"}
+    assert item["Star4"] == {"N": "2"}
+
+
 @pytest.mark.asyncio
 async def test_save_no_op(repo):
     await repo.save()
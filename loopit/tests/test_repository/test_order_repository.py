@@ -50,6 +50,31 @@ async def test_create_order_success(repo, dynamodb, product_repo):
     dynamodb.transact_write_items.assert_called_once()
 
 
+def test_order_put_items(repo):
+    order = Order(
+        product_id=10,
+        user_id=5,
+        start_date=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        end_date=datetime(2024, 1, 2, tzinfo=timezone.utc),
+        total_amount=Decimal("100.5"),
+        security_amount=Decimal("20"),
+        status=OrderStatus.InUse,
+    )
+
+    items = repo.order_put_items(order, lender_id=99)
+
+    assert order.id is not None
+    puts, counters = items[:3], items[3]["Update"]
+    pks = [i["Put"]["Item"]["pk"]["S"] for i in puts]
+    assert pks == ["USER#5", "LENDER#99", "ORDER"]
+    assert all(i["Put"]["Item"]["ID"] == {"N": str(order.id)} for i in puts)
+    assert counters["Key"] == {"pk": {"S": "LENDER#99"}, "sk": {"S": "COUNTERS"}}
+    assert counters["ExpressionAttributeNames"] == {"#c0": "ActiveRentals", "#c1": "LifetimeEarnings"}
+    assert counters["ExpressionAttributeValues"] == {":c0": {"N": "1"}, ":c1": {"N": "100.5"}}
+    assert items[4]["Update"]["Key"] == {"pk": {"S": "USER#5"}, "sk": {"S": "SUMMARY"}}
+    assert items[4]["Update"]["ExpressionAttributeNames"] == {"#c0": "ActiveRentals"}
+
+
 @pytest.mark.asyncio
 async def test_create_order_product_not_found(repo, product_repo):
     order = MagicMock(spec=Order)
@@ -205,3 +230,108 @@ async def test_get_order_by_id_not_found(repo, dynamodb):
         order = await repo.get_order_by_id(1)
 
     assert order is None
+
+
+@pytest.mark.asyncio
+async def test_apply_status_change_writes_all_copies(repo, dynamodb):
+    order = MagicMock(id=1, user_id=5)
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        await repo.apply_status_change(order, 99, OrderStatus.Returned.value)
+
+    items = dynamodb.transact_write_items.call_args.kwargs["TransactItems"]
+    assert [i["Update"]["Key"]["pk"]["S"] for i in items[:3]] == ["USER#5", "LENDER#99", "ORDER"]
+
+
+@pytest.mark.asyncio
+async def test_get_orders_by_ids_success(repo, dynamodb):
+    dynamodb.batch_get_item.return_value = {
+        "Responses": {
+            "test-table": [
+                {
+                    "ID": {"N": "1"},
+                    "ProductID": {"N": "10"},
+                    "UserID": {"N": "5"},
+                    "StartDate": {"S": "2024-01-01T00:00:00Z"},
+                    "EndDate": {"S": "2024-01-05T00:00:00Z"},
+                    "TotalAmount": {"N": "100"},
+                    "SecurityAmount": {"N": "20"},
+                    "Status": {"S": "Return Requested"},
+                    "CreatedAt": {"S": "2024-01-01T00:00:00Z"},
+                }
+            ]
+        }
+    }
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        result = await repo.get_orders_by_ids([1, 2])
+
+    assert list(result.keys()) == [1]
+    assert result[1].status == OrderStatus.ReturnRequested
+
+
+def test_status_update_items_moves_counters(repo):
+    order = MagicMock(id=1, user_id=5, status=OrderStatus.ReturnRequested)
+
+    items = repo.status_update_items(order, 99, OrderStatus.Returned.value)
+
+    assert items[3]["Put"]["Item"]["sk"] == {"S": "FEEDBACKDUE#ORDER#1"}
+    counters = items[4]["Update"]
+    assert counters["ExpressionAttributeNames"] == {"#c0": "ActiveRentals", "#c1": "PendingReturns"}
+    assert counters["ExpressionAttributeValues"] == {":c0": {"N": "-1"}, ":c1": {"N": "-1"}}
+    summary = items[5]["Update"]
+    assert summary["Key"] == {"pk": {"S": "USER#5"}, "sk": {"S": "SUMMARY"}}
+    assert summary["ExpressionAttributeNames"] == {"#c0": "ActiveRentals", "#c1": "FeedbackToGive"}
+    assert summary["ExpressionAttributeValues"] == {":c0": {"N": "-1"}, ":c1": {"N": "1"}}
+
+
+@pytest.mark.asyncio
+async def test_iter_lender_orders_yields_pages(repo, dynamodb):
+    def order(oid):
+        return {
+            "ID": {"N": str(oid)},
+            "ProductID": {"N": "10"},
+            "UserID": {"N": "5"},
+            "StartDate": {"S": "2024-01-01T00:00:00Z"},
+            "EndDate": {"S": "2024-01-02T00:00:00Z"},
+            "TotalAmount": {"N": "100"},
+            "SecurityAmount": {"N": "20"},
+            "Status": {"S": OrderStatus.InUse.value},
+            "CreatedAt": {"S": "2024-01-01T00:00:00Z"},
+        }
+
+    dynamodb.query.side_effect = [
+        {"Items": [order(1)], "LastEvaluatedKey": {"pk": {"S": "LENDER#99"}, "sk": {"S": "ORDER#1"}}},
+        {"Items": [order(2)]},
+    ]
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        pages = [page async for page in repo.iter_lender_orders(99)]
+
+    assert [[o.id for o in page] for page in pages] == [[1], [2]]
+    assert dynamodb.query.call_args_list[0].kwargs["ExpressionAttributeValues"][":pk"] == {"S": "LENDER#99"}
+
+
+def test_status_update_items_guard_the_old_status(repo):
+    order = MagicMock(id=1, user_id=5, status=OrderStatus.ReturnRequested)
+
+    items = repo.status_update_items(order, 99, OrderStatus.Returned.value)
+
+    primary = items[2]["Update"]
+    assert primary["Key"] == {"pk": {"S": "ORDER"}, "sk": {"S": "ID#1"}}
+    assert primary["ConditionExpression"] == "#s = :old"
+    assert primary["ExpressionAttributeValues"][":old"] == {"S": "Return Requested"}
+    assert all("ConditionExpression" not in i["Update"] for i in items[:2])
+
+
+@pytest.mark.asyncio
+async def test_apply_status_change_reports_a_racing_transition(repo, dynamodb):
+    order = MagicMock(id=1, user_id=5, status=OrderStatus.ReturnRequested)
+    dynamodb.transact_write_items.side_effect = botocore.exceptions.ClientError(
+        {"Error": {"Code": "TransactionCanceledException"}, "CancellationReasons": [{"Code": "None"}, {"Code": "None"}, {"Code": "ConditionalCheckFailed"}]},
+        "TransactWriteItems",
+    )
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        with pytest.raises(RuntimeError, match="concurrently"):
+            await repo.apply_status_change(order, 99, OrderStatus.Returned.value)
@@ -236,3 +236,230 @@ async def test_create_product_unexpected_error(repo, dynamodb):
 ):
         with pytest.raises(RuntimeError):
             await repo.create(product)
+
+
+@pytest.mark.asyncio
+async def test_find_product_skips_hydration(repo, dynamodb, category_repo, user_repo):
+    dynamodb.get_item.return_value = {
+        "Item": {
+            "ID": {"N": "1"},
+            "LenderID": {"N": "2"},
+            "CategoryID": {"N": "3"},
+            "Name": {"S": "Phone"},
+            "Description": {"S": "Nice"},
+            "Duration": {"N": "10"},
+            "IsAvailable": {"BOOL": True},
+            "CreatedAt": {"S": "2024-01-01T00:00:00Z"},
+        }
+    }
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        product = await repo.find_product(1)
+
+    assert product.id == 1
+    assert product.lender_id == 2
+    category_repo.find_by_id.assert_not_called()
+    user_repo.find_by_id.assert_not_called()
+
+
+def test_availability_update_items(repo):
+    product = Product(id=1, lender_id=2, category_id=3, name="Phone", description="Nice", duration=10)
+
+    items = repo.availability_update_items(product, False)
+    updates, change = items[:4], items[4]
+
+    assert len(items) == 5
+    primary = updates[0]["Update"]
+    assert primary["Key"] == {"pk": {"S": "PRODUCT"}, "sk": {"S": "PRODUCT#1"}}
+    assert primary["ConditionExpression"] == "IsAvailable = :wasAvailable"
+    assert primary["ExpressionAttributeValues"][":wasAvailable"] == {"BOOL": True}
+    assert all(i["Update"]["ExpressionAttributeValues"][":isAvailable"] == {"BOOL": False} for i in updates)
+    assert all("ConditionExpression" not in i["Update"] for i in updates[1:])
+    assert change["Put"]["Item"]["pk"] == {"S": "PRODUCTCHANGE"}
+    assert change["Put"]["Item"]["ProductID"] == {"N": "1"}
+
+
+@pytest.mark.asyncio
+async def test_find_by_ids_batches_related_reads(repo, dynamodb, category_repo, user_repo):
+    dynamodb.batch_get_item.return_value = {
+        "Responses": {
+            "test-table": [
+                {
+                    "ID": {"N": "1"},
+                    "LenderID": {"N": "2"},
+                    "CategoryID": {"N": "3"},
+                    "Name": {"S": "Phone"},
+                    "Description": {"S": "Nice"},
+                    "Duration": {"N": "10"},
+                    "IsAvailable": {"BOOL": True},
+                    "CreatedAt": {"S": "2024-01-01T00:00:00Z"},
+                }
+            ]
+        }
+    }
+    category = Category(id=3, name="Electronics", price=100, security=10)
+    category_repo.find_by_ids = AsyncMock(return_value={3: category})
+    user_repo.find_by_ids = AsyncMock(return_value={})
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        result = await repo.find_by_ids([1, 99], include={"category", "lender"})
+
+    assert list(result.keys()) == [1]
+    assert result[1].product.name == "Phone"
+    category_repo.find_by_ids.assert_awaited_once_with([3])
+    user_repo.find_by_ids.assert_awaited_once_with([2])
+    dynamodb.batch_get_item.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_find_by_ids_skips_relations_unless_included(repo, dynamodb, category_repo, user_repo):
+    dynamodb.batch_get_item.return_value = {
+        "Responses": {
+            "test-table": [{
+                "ID": {"N": "1"}, "LenderID": {"N": "2"}, "CategoryID": {"N": "3"},
+                "Name": {"S": "Phone"}, "Description": {"S": "d"}, "Duration": {"N": "5"},
+                "IsAvailable": {"BOOL": True}, "CreatedAt": {"S": "2024-01-01T00:00:00"},
+            }]
+        }
+    }
+    category_repo.find_by_ids = AsyncMock(return_value={})
+    user_repo.find_by_ids = AsyncMock(return_value={})
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        result = await repo.find_by_ids([1])
+
+    assert result[1].product.name == "Phone"
+    assert result[1].category is None and result[1].user is None
+    category_repo.find_by_ids.assert_not_called()
+    user_repo.find_by_ids.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_iter_all_hydrates_each_page_in_batches(repo, dynamodb, category_repo, user_repo):
+    def product(pid, name):
+        return {
+            "ID": {"N": str(pid)},
+            "LenderID": {"N": "2"},
+            "CategoryID": {"N": "3"},
+            "Name": {"S": name},
+            "Description": {"S": "Nice"},
+            "Duration": {"N": "10"},
+            "IsAvailable": {"BOOL": True},
+            "CreatedAt": {"S": "2024-01-01T00:00:00Z"},
+        }
+
+    dynamodb.query.side_effect = [
+        {"Items": [product(1, "Phone"), product(2, "Drill")], "LastEvaluatedKey": {"pk": {"S": "PRODUCT"}, "sk": {"S": "PRODUCT#2"}}},
+        {"Items": [product(3, "Phone case")]},
+    ]
+    category_repo.find_by_ids = AsyncMock(return_value={3: Category(id=3, name="Electronics", price=100, security=10)})
+    user_repo.find_by_ids = AsyncMock(return_value={})
+    category_repo.find_by_id = AsyncMock()
+
+    filters = ProductFilter(search="phone", lender_id=None, category_id=None, is_available=None)
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        pages = [page async for page in repo.iter_all(filters, include={"category"})]
+
+    assert [[r.product.id for r in page] for page in pages] == [[1], [3]]
+    assert pages[0][0].category.name == "Electronics"
+    assert category_repo.find_by_ids.await_count == 2
+    category_repo.find_by_id.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_find_all_with_fields_projects_and_skips_unrequested_relations(repo, dynamodb, category_repo, user_repo):
+    dynamodb.query.return_value = {
+        "Items": [{"ID": {"N": "1"}, "Name": {"S": "Phone"}, "ImageUrl": {"S": "p.jpg"}, "IsAvailable": {"BOOL": True}}]
+    }
+    category_repo.find_by_ids = AsyncMock(return_value={})
+    user_repo.find_by_ids = AsyncMock(return_value={})
+
+    filters = ProductFilter(search=None, lender_id=None, category_id=None, is_available=None)
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        results = await repo.find_all(filters, fields=frozenset({"id", "name", "image_url", "is_available"}))
+
+    kwargs = dynamodb.query.call_args.kwargs
+    assert set(kwargs["ExpressionAttributeNames"].values()) == {"ID", "Name", "ImageUrl", "IsAvailable"}
+    assert results[0].product.model_fields_set == {"id", "name", "image_url", "is_available"}
+    category_repo.find_by_ids.assert_not_called()
+    user_repo.find_by_ids.assert_not_called()
+
+
+def _product_item(pid):
+    return {
+        "ID": {"N": str(pid)},
+        "LenderID": {"N": "2"},
+        "CategoryID": {"N": "3"},
+        "Name": {"S": "Phone"},
+        "Description": {"S": "Nice"},
+        "Duration": {"N": "10"},
+        "IsAvailable": {"BOOL": True},
+        "CreatedAt": {"S": "2024-01-01T00:00:00Z"},
+    }
+
+
+@pytest.mark.asyncio
+async def test_delete_product_writes_a_tombstone(repo, dynamodb):
+    dynamodb.get_item.return_value = {"Item": {"Name": {"S": "Phone"}, "LenderID": {"N": "10"}, "CategoryID": {"N": "20"}}}
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        await repo.delete(1)
+
+    items = dynamodb.transact_write_items.call_args.kwargs["TransactItems"]
+    change = items[-1]["Put"]["Item"]
+    assert change["pk"] == {"S": "PRODUCTCHANGE"}
+    assert change["sk"]["S"].endswith("#1")
+    assert change["Deleted"] == {"BOOL": True}
+    assert "TTL" in change
+
+
+@pytest.mark.asyncio
+async def test_find_changes_collapses_to_the_latest_write_per_product(repo, dynamodb):
+    def change(ts, pid, deleted=False):
+        return {"sk": {"S": f"{ts:020d}#{pid}"}, "ProductID": {"N": str(pid)}, "Deleted": {"BOOL": deleted}}
+
+    dynamodb.query.return_value = {
+        "Items": [change(11, 1), change(12, 2), change(13, 1, deleted=True), change(14, 3)],
+        "LastEvaluatedKey": {"pk": {"S": "PRODUCTCHANGE"}, "sk": {"S": f"{14:020d}#3"}},
+    }
+    dynamodb.batch_get_item.return_value = {"Responses": {"test-table": [_product_item(2)]}}
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        changes = await repo.find_changes("10")
+
+    query = dynamodb.query.call_args.kwargs
+    assert query["ExpressionAttributeValues"][":from"] == {"S": f"{11:020d}"}
+    assert [r.product.id for r in changes.products] == [2]
+    assert sorted(changes.deleted) == [1, 3]
+    assert "ExclusiveStartKey" not in query
+    assert changes.watermark == f"{14:020d}#3"
+    assert changes.has_more is True
+
+
+@pytest.mark.asyncio
+async def test_find_changes_resumes_after_the_last_entry_served(repo, dynamodb):
+    # a page that ended mid-timestamp must not skip the later writes sharing that timestamp
+    dynamodb.query.return_value = {
+        "Items": [{"sk": {"S": f"{14:020d}#5"}, "ProductID": {"N": "5"}, "Deleted": {"BOOL": True}}],
+    }
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        changes = await repo.find_changes(f"{14:020d}#3")
+
+    query = dynamodb.query.call_args.kwargs
+    assert query["ExpressionAttributeValues"][":from"] == {"S": f"{14:020d}#3"}
+    assert query["ExclusiveStartKey"] == {"pk": {"S": "PRODUCTCHANGE"}, "sk": {"S": f"{14:020d}#3"}}
+    assert changes.deleted == [5]
+    assert changes.has_more is False
+    assert int(changes.watermark) > 14
+
+
+@pytest.mark.asyncio
+async def test_find_changes_holds_back_unsettled_writes(repo, dynamodb):
+    since = str(repo.current_watermark() + 10**9)
+
+    changes = await repo.find_changes(since)
+
+    assert changes.watermark == since
+    assert changes.products == [] and changes.deleted == []
+    dynamodb.query.assert_not_called()
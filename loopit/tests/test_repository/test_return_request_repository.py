@@ -36,6 +36,32 @@ async def test_create_return_request_success(repo, dynamodb):
     dynamodb.put_item.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_create_return_request_counts_for_borrower(repo, dynamodb):
+    rr = ReturnRequest(id=1, order_id=10, requested_by=5, status=ReturnStatus.Pending)
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        await repo.create_return_request(rr, borrower_id=8)
+
+    dynamodb.put_item.assert_not_called()
+    items = dynamodb.transact_write_items.call_args.kwargs["TransactItems"]
+    assert items[0]["Put"]["Item"]["sk"] == {"S": "ID#1"}
+    assert items[1]["Update"]["Key"] == {"pk": {"S": "USER#8"}, "sk": {"S": "SUMMARY"}}
+    assert items[1]["Update"]["ExpressionAttributeValues"] == {":c0": {"N": "1"}}
+
+
+@pytest.mark.asyncio
+async def test_update_return_request_status_settles_borrower_count(repo, dynamodb):
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        await repo.update_return_request_status(1, ReturnStatus.Approved.value, borrower_id=8)
+
+    dynamodb.update_item.assert_not_called()
+    items = dynamodb.transact_write_items.call_args.kwargs["TransactItems"]
+    assert items[0]["Update"]["ConditionExpression"] == "#s = :pending"
+    assert items[1]["Update"]["Key"] == {"pk": {"S": "USER#8"}, "sk": {"S": "SUMMARY"}}
+    assert items[1]["Update"]["ExpressionAttributeValues"] == {":c0": {"N": "-1"}}
+
+
 @pytest.mark.asyncio
 async def test_create_return_request_client_error(repo, dynamodb):
     rr = MagicMock(spec=ReturnRequest)
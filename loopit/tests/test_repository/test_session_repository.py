@@ -0,0 +1,89 @@
+import pytest
+from unittest.mock import MagicMock, patch
+import botocore.exceptions
+
+from repository.session_repository import SessionRepo
+from models.session import Session
+
+
+@pytest.fixture
+def dynamodb():
+    return MagicMock()
+
+
+@pytest.fixture
+def repo(dynamodb, monkeypatch):
+    monkeypatch.setattr("repository.session_repository.settings.DDB_TABLE_NAME", "test-table")
+    return SessionRepo(dynamodb=dynamodb)
+
+
+@pytest.mark.asyncio
+async def test_create_session(repo, dynamodb):
+    session = Session(id="abc", user_id=1, token_hash="h", expires_at=2000000000)
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        await repo.create_session(session)
+
+    kwargs = dynamodb.put_item.call_args.kwargs
+    assert kwargs["Item"]["pk"] == {"S": "SESSION#abc"}
+    assert kwargs["Item"]["TokenHash"] == {"S": "h"}
+    assert kwargs["Item"]["TTL"] == {"N": "2000000000"}
+    assert kwargs["ConditionExpression"] == "attribute_not_exists(pk)"
+
+
+@pytest.mark.asyncio
+async def test_get_session(repo, dynamodb):
+    dynamodb.get_item.return_value = {
+        "Item": {
+            "ID": {"S": "abc"},
+            "UserID": {"N": "1"},
+            "TokenHash": {"S": "h"},
+            "ExpiresAt": {"N": "2000000000"},
+            "Revoked": {"BOOL": True},
+        }
+    }
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        session = await repo.get_session("abc")
+
+    assert session.user_id == 1
+    assert session.revoked is True
+
+
+@pytest.mark.asyncio
+async def test_get_session_not_found(repo, dynamodb):
+    dynamodb.get_item.return_value = {}
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        assert await repo.get_session("abc") is None
+
+
+@pytest.mark.asyncio
+async def test_rotate_session_is_compare_and_swap(repo, dynamodb):
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        assert await repo.rotate_session("abc", "old", "new", 2000000000) is True
+
+    kwargs = dynamodb.update_item.call_args.kwargs
+    assert kwargs["ConditionExpression"] == "TokenHash = :old AND attribute_not_exists(Revoked)"
+    assert kwargs["ExpressionAttributeValues"][":new"] == {"S": "new"}
+
+
+@pytest.mark.asyncio
+async def test_rotate_session_lost_race(repo, dynamodb):
+    dynamodb.update_item.side_effect = botocore.exceptions.ClientError(
+        {"Error": {"Code": "ConditionalCheckFailedException", "Message": "no"}}, "UpdateItem"
+    )
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        assert await repo.rotate_session("abc", "old", "new", 2000000000) is False
+
+
+@pytest.mark.asyncio
+async def test_revoke_session_client_error(repo, dynamodb):
+    dynamodb.update_item.side_effect = botocore.exceptions.ClientError(
+        {"Error": {"Code": "500", "Message": "err"}}, "UpdateItem"
+    )
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        with pytest.raises(RuntimeError):
+            await repo.revoke_session("abc")
@@ -0,0 +1,168 @@
+import pytest
+from unittest.mock import MagicMock, patch
+import botocore.exceptions
+
+from repository.stats_repository import StatsRepo, lender_counters_update, merge_counter_updates, user_summary_update
+
+
+@pytest.fixture
+def dynamodb():
+    return MagicMock()
+
+
+@pytest.fixture
+def repo(dynamodb, monkeypatch):
+    monkeypatch.setattr("repository.stats_repository.settings.DDB_TABLE_NAME", "test-table")
+    return StatsRepo(dynamodb=dynamodb)
+
+
+def test_lender_counters_update_skips_zero_deltas():
+    assert lender_counters_update("test-table", 1, {"ActiveRentals": 0}) == []
+
+    items = lender_counters_update("test-table", 1, {"ActiveRentals": 0, "PendingReturns": -1})
+
+    assert items[0]["Update"]["UpdateExpression"] == "ADD #c0 :c0"
+    assert items[0]["Update"]["ExpressionAttributeNames"] == {"#c0": "PendingReturns"}
+
+
+def test_merge_counter_updates_folds_same_lender():
+    other = {"Put": {"TableName": "test-table", "Item": {}}}
+    items = (
+        [other]
+        + lender_counters_update("test-table", 1, {"PendingBuyRequests": -1})
+        + lender_counters_update("test-table", 1, {"ActiveRentals": 1, "PendingBuyRequests": 1})
+        + lender_counters_update("test-table", 2, {"ActiveRentals": 1})
+    )
+
+    merged = merge_counter_updates(items)
+
+    assert merged[0] == other
+    assert len(merged) == 3
+    lender_1 = merged[1]["Update"]
+    assert lender_1["ExpressionAttributeNames"] == {"#c0": "ActiveRentals"}
+    assert merged[2]["Update"]["Key"]["pk"] == {"S": "LENDER#2"}
+
+
+def test_merge_counter_updates_keeps_lender_and_user_items_apart():
+    items = (
+        lender_counters_update("test-table", 1, {"ActiveRentals": 1})
+        + user_summary_update("test-table", 1, {"ActiveRentals": 1})
+        + user_summary_update("test-table", 1, {"PendingBuyRequests": -1})
+    )
+
+    merged = merge_counter_updates(items)
+
+    assert [m["Update"]["Key"]["sk"]["S"] for m in merged] == ["COUNTERS", "SUMMARY"]
+    assert merged[1]["Update"]["ExpressionAttributeNames"] == {"#c0": "ActiveRentals", "#c1": "PendingBuyRequests"}
+
+
+@pytest.mark.asyncio
+async def test_get_lender_dashboard(repo, dynamodb):
+    dynamodb.get_item.return_value = {
+        "Item": {
+            "ProductCount": {"N": "3"},
+            "ActiveRentals": {"N": "1"},
+            "LifetimeEarnings": {"N": "250.5"},
+        }
+    }
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        dashboard = await repo.get_lender_dashboard(7)
+
+    assert dashboard.product_count == 3
+    assert dashboard.pending_buy_requests == 0
+    assert dashboard.active_rentals == 1
+    assert dashboard.lifetime_earnings == 250.5
+    dynamodb.get_item.assert_called_once_with(
+        TableName="test-table", Key={"pk": {"S": "LENDER#7"}, "sk": {"S": "COUNTERS"}}
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_lender_dashboard_client_error(repo, dynamodb):
+    dynamodb.get_item.side_effect = botocore.exceptions.ClientError(
+        {"Error": {"Code": "500", "Message": "err"}}, "GetItem"
+    )
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        with pytest.raises(RuntimeError):
+            await repo.get_lender_dashboard(7)
+
+
+@pytest.mark.asyncio
+async def test_get_user_summary(repo, dynamodb):
+    dynamodb.get_item.return_value = {"Item": {"ActiveRentals": {"N": "2"}, "FeedbackToGive": {"N": "1"}}}
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        summary = await repo.get_user_summary(5)
+
+    assert summary.user_id == 5
+    assert summary.active_rentals == 2
+    assert summary.pending_returns == 0
+    assert summary.feedback_to_give == 1
+    dynamodb.get_item.assert_called_once_with(
+        TableName="test-table", Key={"pk": {"S": "USER#5"}, "sk": {"S": "SUMMARY"}}
+    )
+
+
+def _partitions(by_pk):
+    def query(**kwargs):
+        return {"Items": by_pk.get(kwargs["ExpressionAttributeValues"][":pk"]["S"], [])}
+    return query
+
+
+@pytest.mark.asyncio
+async def test_backfill_lender_counters_recomputes_from_global_partitions(repo, dynamodb):
+    dynamodb.query.side_effect = _partitions({
+        "USER": [
+            {"ID": {"N": "7"}, "Role": {"S": "lender"}},
+            {"ID": {"N": "8"}, "Role": {"S": "lender"}},
+            {"ID": {"N": "5"}, "Role": {"S": "user"}},
+        ],
+        "PRODUCT": [{"ID": {"N": "10"}, "LenderID": {"N": "7"}}, {"ID": {"N": "11"}, "LenderID": {"N": "7"}}],
+        "ORDER": [
+            {"ProductID": {"N": "10"}, "Status": {"S": "Return Requested"}, "TotalAmount": {"N": "100"}},
+            {"ProductID": {"N": "11"}, "Status": {"S": "Returned"}, "TotalAmount": {"N": "50.5"}},
+        ],
+        "BUYREQUEST": [{"ProductId": {"N": "11"}, "Status": {"S": "Pending"}}],
+    })
+    dynamodb.batch_write_item.return_value = {}
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        written = await repo.backfill_lender_counters()
+
+    assert written == 2
+    items = {i["PutRequest"]["Item"]["pk"]["S"]: i["PutRequest"]["Item"] for i in dynamodb.batch_write_item.call_args.kwargs["RequestItems"]["test-table"]}
+    assert items["LENDER#7"]["ProductCount"] == {"N": "2"}
+    assert items["LENDER#7"]["ActiveRentals"] == {"N": "1"}
+    assert items["LENDER#7"]["PendingReturns"] == {"N": "1"}
+    assert items["LENDER#7"]["PendingBuyRequests"] == {"N": "1"}
+    assert items["LENDER#7"]["LifetimeEarnings"] == {"N": "150.5"}
+    assert items["LENDER#8"]["ProductCount"] == {"N": "0"}
+
+
+@pytest.mark.asyncio
+async def test_backfill_user_summaries_recomputes_from_global_partitions(repo, dynamodb):
+    dynamodb.query.side_effect = _partitions({
+        "USER": [{"ID": {"N": "5"}, "Role": {"S": "user"}}, {"ID": {"N": "6"}, "Role": {"S": "user"}}],
+        "ORDER": [
+            {"ID": {"N": "1"}, "UserID": {"N": "5"}, "Status": {"S": "Return Requested"}},
+            {"ID": {"N": "2"}, "UserID": {"N": "5"}, "Status": {"S": "Returned"}},
+        ],
+        "BUYREQUEST": [{"RequestedBy": {"N": "6"}, "Status": {"S": "Pending"}}],
+        "RETURNREQUEST": [{"OrderID": {"N": "1"}, "Status": {"S": "Pending"}}],
+        "USER#5": [{"sk": {"S": "FEEDBACKDUE#ORDER#2"}}],
+    })
+    dynamodb.batch_write_item.return_value = {}
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        written = await repo.backfill_user_summaries()
+
+    assert written == 2
+    items = {i["PutRequest"]["Item"]["pk"]["S"]: i["PutRequest"]["Item"] for i in dynamodb.batch_write_item.call_args.kwargs["RequestItems"]["test-table"]}
+    assert items["USER#5"]["sk"] == {"S": "SUMMARY"}
+    assert items["USER#5"]["ActiveRentals"] == {"N": "1"}
+    assert items["USER#5"]["PendingReturns"] == {"N": "1"}
+    assert items["USER#5"]["FeedbackToGive"] == {"N": "1"}
+    assert items["USER#6"]["PendingBuyRequests"] == {"N": "1"}
+    assert items["USER#6"]["FeedbackToGive"] == {"N": "0"}
@@ -27,7 +27,8 @@ def repo(dynamodb, monkeypatch):
     return UserDynamoRepo(dynamodb)
 
 
-def test_find_by_email_success(repo, dynamodb):
+@pytest.mark.asyncio
+async def test_find_by_email_success(repo, dynamodb):
     dynamodb.get_item.return_value = {
         "Item": {
             "ID": {"N": "1"},
@@ -42,28 +43,34 @@ def test_find_by_email_success(repo, dynamodb):
         }
     }
 
-    user = repo.find_by_email("a@b.com")
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        user = await repo.find_by_email("a@b.com")
 
     assert isinstance(user, User)
     assert user.email == "a@b.com"
     assert user.id == 1
 
 
-def test_find_by_email_not_found(repo, dynamodb):
+@pytest.mark.asyncio
+async def test_find_by_email_not_found(repo, dynamodb):
     dynamodb.get_item.return_value = {}
 
-    with pytest.raises(UserNotFoundError):
-        repo.find_by_email("x@y.com")
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        with pytest.raises(UserNotFoundError):
+            await repo.find_by_email("x@y.com")
 
 
-def test_find_by_email_repo_error(repo, dynamodb):
+@pytest.mark.asyncio
+async def test_find_by_email_repo_error(repo, dynamodb):
     dynamodb.get_item.side_effect = Exception("ddb error")
 
-    with pytest.raises(UserRepositoryError):
-        repo.find_by_email("a@b.com")
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        with pytest.raises(UserRepositoryError):
+            await repo.find_by_email("a@b.com")
 
 
-def test_create_user_success(repo, dynamodb):
+@pytest.mark.asyncio
+async def test_create_user_success(repo, dynamodb):
     user = User(
         id=None,
         full_name="John",
@@ -76,13 +83,15 @@ def test_create_user_success(repo, dynamodb):
         created_at=datetime.now(),
     )
 
-    repo.create(user)
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        await repo.create(user)
 
     assert user.id is not None
     dynamodb.transact_write_items.assert_called_once()
 
 
-def test_create_user_already_exists(repo, dynamodb):
+@pytest.mark.asyncio
+async def test_create_user_already_exists(repo, dynamodb):
     dynamodb.transact_write_items.side_effect = botocore.exceptions.ClientError(
         {"Error": {"Code": "TransactionCanceledException"}},
         "TransactWriteItems",
@@ -100,11 +109,13 @@ def test_create_user_already_exists(repo, dynamodb):
         created_at=datetime.now(),
     )
 
-    with pytest.raises(UserAlreadyExistsError):
-        repo.create(user)
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        with pytest.raises(UserAlreadyExistsError):
+            await repo.create(user)
 
 
-def test_create_user_repo_error(repo, dynamodb):
+@pytest.mark.asyncio
+async def test_create_user_repo_error(repo, dynamodb):
     dynamodb.transact_write_items.side_effect = botocore.exceptions.ClientError(
         {"Error": {"Code": "InternalError"}},
         "TransactWriteItems",
@@ -122,8 +133,32 @@ def test_create_user_repo_error(repo, dynamodb):
         created_at=datetime.now(),
     )
 
-    with pytest.raises(UserRepositoryError):
-        repo.create(user)
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        with pytest.raises(UserRepositoryError):
+            await repo.create(user)
+
+
+@pytest.mark.asyncio
+async def test_update_password_hash_is_conditional(repo, dynamodb):
+    user = User(
+        id=7,
+        full_name="John",
+        email="a@b.com",
+        phone_number="123",
+        address="addr",
+        password_hash="old",
+        society_id=1,
+        role=Role.user,
+    )
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        await repo.update_password_hash(user, "new")
+
+    items = dynamodb.transact_write_items.call_args.kwargs["TransactItems"]
+    assert [i["Update"]["Key"]["sk"]["S"] for i in items] == ["ID#7", "EMAIL#a@b.com"]
+    assert all(i["Update"]["ConditionExpression"] == "PasswordHash = :old" for i in items)
+    assert items[0]["Update"]["ExpressionAttributeValues"] == {":new": {"S": "new"}, ":old": {"S": "old"}, ":versionStep": {"N": "1"}}
+    assert items[0]["Update"]["UpdateExpression"] == "SET PasswordHash = :new ADD Version :versionStep"
 
 
 @pytest.mark.asyncio
@@ -233,3 +268,68 @@ async def test_delete_by_id_not_found(repo, dynamodb):
         await repo.delete_by_id(1)
 
     dynamodb.transact_write_items.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_find_by_ids_success(repo, dynamodb):
+    dynamodb.batch_get_item.return_value = {
+        "Responses": {
+            "test-table": [
+                {
+                    "ID": {"N": "1"},
+                    "FullName": {"S": "John Doe"},
+                    "Email": {"S": "a@b.com"},
+                    "PhoneNumber": {"S": "123"},
+                    "Address": {"S": "addr"},
+                    "PasswordHash": {"S": "hash"},
+                    "SocietyID": {"N": "10"},
+                    "Role": {"S": "lender"},
+                    "CreatedAt": {"S": "2024-01-01T00:00:00Z"},
+                }
+            ]
+        }
+    }
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        result = await repo.find_by_ids([1, 2])
+
+    assert list(result.keys()) == [1]
+    assert result[1].role == Role.lender
+
+
+@pytest.mark.asyncio
+async def test_iter_all_filters_name_search_per_page(repo, dynamodb):
+    def user(uid, name):
+        return {
+            "ID": {"N": str(uid)},
+            "FullName": {"S": name},
+            "Email": {"S": f"{uid}@b.com"},
+            "PhoneNumber": {"S": "123"},
+            "Address": {"S": "addr"},
+            "PasswordHash": {"S": "hash"},
+            "SocietyID": {"N": "1"},
+            "Role": {"S": "user"},
+            "CreatedAt": {"S": "2024-01-01T00:00:00Z"},
+        }
+
+    dynamodb.query.side_effect = [
+        {"Items": [user(1, "John"), user(2, "Jane")], "LastEvaluatedKey": {"pk": {"S": "USER"}, "sk": {"S": "NAME#j#2"}}},
+        {"Items": [user(3, "Johnny")]},
+    ]
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        pages = [page async for page in repo.iter_all({"search": "john"})]
+
+    assert [[u.id for u in page] for page in pages] == [[1], [3]]
+    assert dynamodb.query.call_args_list[0].kwargs["ExpressionAttributeValues"][":sk"] == {"S": "NAME#john"}
+
+
+@pytest.mark.asyncio
+async def test_find_by_id_with_fields_projects(repo, dynamodb):
+    dynamodb.get_item.return_value = {"Item": {"ID": {"N": "1"}, "FullName": {"S": "John"}}}
+
+    with patch("asyncio.to_thread", side_effect=lambda function_to_run, **function_kwargs: function_to_run(**function_kwargs)):
+        user = await repo.find_by_id(1, fields=frozenset({"id", "full_name"}))
+
+    assert dynamodb.get_item.call_args.kwargs["ProjectionExpression"] == "#f0, #f1"
+    assert user.model_dump(exclude_unset=True) == {"id": 1, "full_name": "John"}
@@ -1,8 +1,10 @@
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from service.auth.auth_service import AuthServiceImple
 from models.user import User
+from models.session import Session
+from helpers.auth_helper import AuthHelper
 from exception.user import (
     UserAlreadyExistsError,
     InvalidCredentialsError,
@@ -13,31 +15,46 @@ from exception.user import (
 
 @pytest.fixture
 def user_repo():
-    return MagicMock()
+    return AsyncMock()
 
 
 @pytest.fixture
-def service(user_repo):
-    return AuthServiceImple(user_repo=user_repo)
+def session_repo():
+    return AsyncMock()
+
+
+@pytest.fixture
+def service(user_repo, session_repo):
+    return AuthServiceImple(user_repo=user_repo, session_repo=session_repo)
 
 
 @pytest.mark.asyncio
 async def test_register_success(service, user_repo, monkeypatch):
     user = MagicMock(spec=User)
+    user.id = 1
+    user.role = MagicMock(value="user")
     user.email = "test@example.com"
     user.password_hash = "plain"
 
     user_repo.find_by_email.side_effect = UserNotFoundError()
 
     monkeypatch.setattr(
-        "helpers.auth_helper.AuthHelper.hash_password",
-        lambda pwd: "hashed",
+        "helpers.auth_helper.AuthHelper.hash_password_async",
+        AsyncMock(return_value="hashed"),
+    )
+
+    monkeypatch.setattr(
+        "helpers.auth_helper.AuthHelper.create_token",
+        lambda uid, role: "token123",
     )
 
-    await service.register(user)
+    token, created = await service.register(user)
 
+    assert token == "token123"
+    assert created is user
     assert user.password_hash == "hashed"
-    user_repo.create.assert_called_once_with(user)
+    user_repo.find_by_email.assert_awaited_once_with("test@example.com")
+    user_repo.create.assert_awaited_once_with(user)
 
 
 @pytest.mark.asyncio
@@ -72,8 +89,8 @@ async def test_login_success(service, user_repo, monkeypatch):
     user_repo.find_by_email.return_value = user
 
     monkeypatch.setattr(
-        "helpers.auth_helper.AuthHelper.verify_password",
-        lambda pwd, hashed: True,
+        "helpers.auth_helper.AuthHelper.verify_password_async",
+        AsyncMock(return_value=True),
     )
     monkeypatch.setattr(
         "helpers.auth_helper.AuthHelper.create_token",
@@ -102,8 +119,8 @@ async def test_login_invalid_password(service, user_repo, monkeypatch):
     user_repo.find_by_email.return_value = user
 
     monkeypatch.setattr(
-        "helpers.auth_helper.AuthHelper.verify_password",
-        lambda pwd, hashed: False,
+        "helpers.auth_helper.AuthHelper.verify_password_async",
+        AsyncMock(return_value=False),
     )
 
     with pytest.raises(InvalidCredentialsError):
@@ -120,8 +137,8 @@ async def test_login_token_generation_failure(service, user_repo, monkeypatch):
     user_repo.find_by_email.return_value = user
 
     monkeypatch.setattr(
-        "helpers.auth_helper.AuthHelper.verify_password",
-        lambda pwd, hashed: True,
+        "helpers.auth_helper.AuthHelper.verify_password_async",
+        AsyncMock(return_value=True),
     )
     monkeypatch.setattr(
         "helpers.auth_helper.AuthHelper.create_token",
@@ -130,3 +147,117 @@ async def test_login_token_generation_failure(service, user_repo, monkeypatch):
 
     with pytest.raises(AuthServiceError):
         await service.login("a@b.com", "pwd")
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_outdated_cost(service, user_repo, monkeypatch):
+    user = MagicMock(spec=User)
+    user.id = 1
+    user.role = MagicMock(value="user")
+    user.password_hash = "$2b$04$" + "a" * 53
+
+    user_repo.find_by_email.return_value = user
+
+    monkeypatch.setattr("helpers.auth_helper.AppSettings.BCRYPT_ROUNDS", "12")
+    monkeypatch.setattr("helpers.auth_helper.AuthHelper.verify_password_async", AsyncMock(return_value=True))
+    monkeypatch.setattr("helpers.auth_helper.AuthHelper.hash_password_async", AsyncMock(return_value="$2b$12$new"))
+    monkeypatch.setattr("helpers.auth_helper.AuthHelper.create_token", lambda uid, role: "token123")
+
+    token, _ = await service.login("a@b.com", "pwd")
+
+    assert token == "token123"
+    user_repo.update_password_hash.assert_awaited_once_with(user, "$2b$12$new")
+
+
+@pytest.mark.asyncio
+async def test_login_rehash_failure_still_logs_in(service, user_repo, monkeypatch):
+    user = MagicMock(spec=User)
+    user.id = 1
+    user.role = MagicMock(value="user")
+    user.password_hash = "$2b$04$" + "a" * 53
+
+    user_repo.find_by_email.return_value = user
+    user_repo.update_password_hash.side_effect = Exception("conflict")
+
+    monkeypatch.setattr("helpers.auth_helper.AppSettings.BCRYPT_ROUNDS", "12")
+    monkeypatch.setattr("helpers.auth_helper.AuthHelper.verify_password_async", AsyncMock(return_value=True))
+    monkeypatch.setattr("helpers.auth_helper.AuthHelper.hash_password_async", AsyncMock(return_value="$2b$12$new"))
+    monkeypatch.setattr("helpers.auth_helper.AuthHelper.create_token", lambda uid, role: "token123")
+
+    token, _ = await service.login("a@b.com", "pwd")
+
+    assert token == "token123"
+
+
+@pytest.mark.asyncio
+async def test_create_session_stores_only_hash(service, session_repo):
+    user = MagicMock(spec=User)
+    user.id = 7
+
+    token = await service.create_session(user)
+
+    session = session_repo.create_session.call_args[0][0]
+    session_id, secret = token.split(".", 1)
+    assert session.id == session_id
+    assert session.user_id == 7
+    assert session.token_hash == AuthHelper.hash_refresh_secret(secret)
+    assert secret not in session.token_hash
+
+
+@pytest.mark.asyncio
+async def test_refresh_rotates_token(service, user_repo, session_repo, monkeypatch):
+    session_repo.get_session.return_value = Session(
+        id="sid", user_id=7, token_hash=AuthHelper.hash_refresh_secret("secret"), expires_at=4000000000
+    )
+    session_repo.rotate_session.return_value = True
+    user = MagicMock(spec=User)
+    user.id = 7
+    user.role = MagicMock(value="user")
+    user_repo.find_by_id.return_value = user
+    monkeypatch.setattr("helpers.auth_helper.AuthHelper.create_token", lambda uid, role: "token123")
+
+    token, refresh_token, returned = await service.refresh("sid.secret")
+
+    assert token == "token123"
+    assert returned is user
+    assert refresh_token.startswith("sid.") and refresh_token != "sid.secret"
+    args = session_repo.rotate_session.call_args[0]
+    assert args[:2] == ("sid", AuthHelper.hash_refresh_secret("secret"))
+    assert args[2] == AuthHelper.hash_refresh_secret(refresh_token.split(".", 1)[1])
+
+
+@pytest.mark.asyncio
+async def test_refresh_reused_token_revokes_session(service, session_repo):
+    session_repo.get_session.return_value = Session(
+        id="sid", user_id=7, token_hash=AuthHelper.hash_refresh_secret("current"), expires_at=4000000000
+    )
+
+    with pytest.raises(InvalidCredentialsError):
+        await service.refresh("sid.stale")
+
+    session_repo.revoke_session.assert_awaited_once_with("sid")
+    session_repo.rotate_session.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_refresh_expired_or_revoked(service, session_repo):
+    session_repo.get_session.return_value = Session(
+        id="sid", user_id=7, token_hash=AuthHelper.hash_refresh_secret("secret"), expires_at=1
+    )
+
+    with pytest.raises(InvalidCredentialsError):
+        await service.refresh("sid.secret")
+
+    with pytest.raises(InvalidCredentialsError):
+        await service.refresh("malformed")
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_session(service, session_repo):
+    session_repo.get_session.return_value = Session(
+        id="sid", user_id=7, token_hash=AuthHelper.hash_refresh_secret("secret"), expires_at=4000000000
+    )
+
+    await service.logout("sid.secret")
+
+    session_repo.revoke_session.assert_awaited_once_with("sid")
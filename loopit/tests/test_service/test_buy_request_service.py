@@ -3,10 +3,14 @@ from unittest.mock import AsyncMock, MagicMock
 from datetime import datetime, timezone
 
 from service.buy_request_service import BuyRequestService
+from service.order_service import OrderService
+from models.product import Product
 from models.buy_request import BuyingRequest
 from models.orders import Order
 from models.enums.buy_request import BuyRequestStatus
 from models.enums.order_status import OrderStatus
+from exception.buy_request import BuyRequestAlreadyExistsError
+from helpers.interval_index import IntervalIndex
 
 @pytest.fixture
 def product_repo():
@@ -25,12 +29,21 @@ def order_repo():
     return AsyncMock()
 
 @pytest.fixture
-def service(product_repo, buyer_request_repo, category_repo, order_repo):
+def booking_repo():
+    repo = AsyncMock()
+    repo.get_calendar.return_value = (0, IntervalIndex())
+    repo.get_calendars.return_value = {}
+    repo.booking_items = MagicMock(return_value=[{"Put": "booking"}])
+    return repo
+
+@pytest.fixture
+def service(product_repo, buyer_request_repo, category_repo, order_repo, booking_repo):
     return BuyRequestService(
         product_repo=product_repo,
         buyer_request_repo=buyer_request_repo,
         category_repo=category_repo,
         order_repo=order_repo,
+        booking_repo=booking_repo,
     )
 
 @pytest.mark.asyncio
@@ -41,8 +54,6 @@ async def test_create_buyer_request_success(service, product_repo, buyer_request
             lender_id=2
         )
     )
-    buyer_request_repo.get_all_buyer_requests.return_value = []
-
     user_ctx = {"user_id": 1}
 
     await service.create_buyer_request(product_id=10, user_ctx=user_ctx)
@@ -52,6 +63,7 @@ async def test_create_buyer_request_success(service, product_repo, buyer_request
 
     assert created_req.product_id == 10
     assert created_req.requested_by == 1
+    assert created_req.lender_id == 2
     assert created_req.status == BuyRequestStatus.Pending.value
 
 @pytest.mark.asyncio
@@ -76,13 +88,13 @@ async def test_create_buyer_request_duplicate_pending(service, product_repo, buy
         product=MagicMock(is_available=True, lender_id=2)
     )
 
-    buyer_request_repo.get_all_buyer_requests.return_value = [
-        MagicMock(requested_by=1)
-    ]
+    buyer_request_repo.create_buyer_request.side_effect = BuyRequestAlreadyExistsError("duplicate")
 
-    with pytest.raises(RuntimeError):
+    with pytest.raises(BuyRequestAlreadyExistsError):
         await service.create_buyer_request(1, {"user_id": 1})
 
+    buyer_request_repo.get_all_buyer_requests.assert_not_called()
+
 @pytest.mark.asyncio
 async def test_update_request_unauthorized(service):
     with pytest.raises(RuntimeError):
@@ -101,37 +113,70 @@ async def test_update_request_invalid_status(service):
             user_ctx={"role": "lender"},
         )
 
+def _pending_request():
+    return BuyingRequest(
+        id=1,
+        product_id=10,
+        requested_by=5,
+        status=BuyRequestStatus.Pending,
+    )
+
 @pytest.mark.asyncio
-async def test_update_request_rejected(service, buyer_request_repo):
-    buyer_request_repo.get_all_buyer_requests.return_value = [
-        MagicMock(id=1)
-    ]
+async def test_update_request_rejected(service, buyer_request_repo, product_repo):
+    req = _pending_request()
+    buyer_request_repo.get_buyer_request_by_id.return_value = req
+    product_repo.find_product.return_value = MagicMock(lender_id=7)
 
     await service.update_buyer_request_status(
         request_id=1,
         updated_status=BuyRequestStatus.Rejected.value,
-        user_ctx={"role": "lender"},
+        user_ctx={"role": "lender", "user_id": 7},
     )
 
-    buyer_request_repo.update_status_buyer_request.assert_called_once_with(
-        1, BuyRequestStatus.Rejected.value
+    buyer_request_repo.change_status.assert_called_once_with(
+        req, BuyRequestStatus.Rejected.value
     )
+    buyer_request_repo.get_all_buyer_requests.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_update_request_not_pending(service, buyer_request_repo):
+    req = _pending_request()
+    req.status = BuyRequestStatus.Approved
+    buyer_request_repo.get_buyer_request_by_id.return_value = req
+
+    with pytest.raises(RuntimeError):
+        await service.update_buyer_request_status(
+            request_id=1,
+            updated_status=BuyRequestStatus.Approved.value,
+            user_ctx={"role": "lender", "user_id": 7},
+        )
+
+    buyer_request_repo.change_status.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_update_request_not_product_owner(service, buyer_request_repo, product_repo):
+    buyer_request_repo.get_buyer_request_by_id.return_value = _pending_request()
+    product_repo.find_product.return_value = MagicMock(lender_id=8)
+
+    with pytest.raises(RuntimeError):
+        await service.update_buyer_request_status(
+            request_id=1,
+            updated_status=BuyRequestStatus.Approved.value,
+            user_ctx={"role": "lender", "user_id": 7},
+        )
+
+    buyer_request_repo.change_status.assert_not_called()
 
 @pytest.mark.asyncio
 async def test_update_request_approved(
     service, buyer_request_repo, product_repo, category_repo, order_repo
 ):
-    buyer_request_repo.get_all_buyer_requests.return_value = [
-        MagicMock(
-            id=1,
-            product_id=10,
-            requested_by=5
-        )
-    ]
-
-    product_repo.find_by_id.return_value = MagicMock(
-        category=MagicMock(id=3)
-    )
+    req = _pending_request()
+    buyer_request_repo.get_buyer_request_by_id.return_value = req
+    product = MagicMock(lender_id=7, category_id=3, is_available=True)
+    product_repo.find_product.return_value = product
+    product_repo.availability_update_items = MagicMock(return_value=[{"Update": "product"}])
+    order_repo.order_put_items = MagicMock(return_value=[{"Put": "order"}])
 
     category_repo.find_by_id.return_value = MagicMock(
         price=100.0,
@@ -141,13 +186,35 @@ async def test_update_request_approved(
     await service.update_buyer_request_status(
         request_id=1,
         updated_status=BuyRequestStatus.Approved.value,
-        user_ctx={"role": "lender"},
+        user_ctx={"role": "lender", "user_id": 7},
     )
 
-    order_repo.create_order.assert_called_once()
-    buyer_request_repo.update_status_buyer_request.assert_called_once_with(
-        1, BuyRequestStatus.Approved.value
+    new_order = order_repo.order_put_items.call_args[0][0]
+    assert new_order.product_id == 10
+    assert new_order.user_id == 5
+    assert new_order.total_amount == 100
+    # the booking alone takes the product out for its window; the stored flag is left alone
+    product_repo.availability_update_items.assert_not_called()
+    assert new_order.end_date > new_order.start_date
+    buyer_request_repo.change_status.assert_called_once_with(
+        req, BuyRequestStatus.Approved.value, [{"Put": "order"}, {"Put": "booking"}]
     )
+    order_repo.create_order.assert_not_called()
+    product_repo.find_by_id.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_update_request_approved_product_unavailable(service, buyer_request_repo, product_repo):
+    buyer_request_repo.get_buyer_request_by_id.return_value = _pending_request()
+    product_repo.find_product.return_value = MagicMock(lender_id=7, is_available=False)
+
+    with pytest.raises(RuntimeError):
+        await service.update_buyer_request_status(
+            request_id=1,
+            updated_status=BuyRequestStatus.Approved.value,
+            user_ctx={"role": "lender", "user_id": 7},
+        )
+
+    buyer_request_repo.change_status.assert_not_called()
 
 @pytest.mark.asyncio
 async def test_get_all_buyer_requests(service, buyer_request_repo):
@@ -157,3 +224,167 @@ async def test_get_all_buyer_requests(service, buyer_request_repo):
 
     assert result == ["req1", "req2"]
     buyer_request_repo.get_all_buyer_requests.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_get_lender_buyer_requests(service, buyer_request_repo):
+    buyer_request_repo.get_lender_buyer_requests.return_value = ["req1"]
+
+    result = await service.get_lender_buyer_requests({"role": "lender", "user_id": 7}, ["Pending"])
+
+    assert result == ["req1"]
+    buyer_request_repo.get_lender_buyer_requests.assert_called_once_with(7, ["Pending"])
+
+@pytest.mark.asyncio
+async def test_get_lender_buyer_requests_not_lender(service, buyer_request_repo):
+    with pytest.raises(RuntimeError):
+        await service.get_lender_buyer_requests({"role": "user", "user_id": 7}, [])
+
+    buyer_request_repo.get_lender_buyer_requests.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_buyer_request_status_per_item_results(service, buyer_request_repo, product_repo, category_repo, order_repo):
+    def pending(rid, product_id):
+        return BuyingRequest(id=rid, product_id=product_id, requested_by=5, lender_id=2, status="Pending", created_at=datetime.now(timezone.utc))
+
+    buyer_request_repo.get_buyer_requests_by_ids.return_value = {
+        1: pending(1, 10),
+        2: pending(2, 10),
+        3: pending(3, 30),
+    }
+    product_repo.find_products_by_ids.return_value = {
+        10: MagicMock(id=10, lender_id=2, category_id=7, is_available=True),
+        30: MagicMock(id=30, lender_id=99, category_id=7, is_available=True),
+    }
+    category_repo.find_by_ids.return_value = {7: MagicMock(price=100.0, security=20.0)}
+    order_repo.order_put_items = MagicMock(return_value=[{"Put": "order"}])
+    product_repo.availability_update_items = MagicMock(return_value=[{"Update": "product"}])
+
+    results = await service.bulk_update_buyer_request_status([1, 2, 3, 4], "Approved", {"user_id": 2, "role": "lender"})
+
+    assert results == [
+        {"id": 1, "success": True, "error": None},
+        {"id": 2, "success": False, "error": "product is already booked for the requested dates"},
+        {"id": 3, "success": False, "error": "you can only update requests for your own products"},
+        {"id": 4, "success": False, "error": "buyer request not found"},
+    ]
+    buyer_request_repo.get_buyer_requests_by_ids.assert_called_once_with([1, 2, 3, 4])
+    buyer_request_repo.change_status.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_buyer_request_status_reports_transaction_failure(service, buyer_request_repo, product_repo):
+    buyer_request_repo.get_buyer_requests_by_ids.return_value = {
+        1: BuyingRequest(id=1, product_id=10, requested_by=5, status="Pending", created_at=datetime.now(timezone.utc)),
+    }
+    product_repo.find_products_by_ids.return_value = {10: MagicMock(id=10, lender_id=2, is_available=True)}
+    buyer_request_repo.change_status.side_effect = RuntimeError("buyer request or product changed concurrently, please retry")
+
+    results = await service.bulk_update_buyer_request_status([1], "Rejected", {"user_id": 2, "role": "lender"})
+
+    assert results == [{"id": 1, "success": False, "error": "buyer request or product changed concurrently, please retry"}]
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_buyer_request_status_unauthorized(service):
+    with pytest.raises(RuntimeError):
+        await service.bulk_update_buyer_request_status([1], "Approved", {"user_id": 2, "role": "user"})
+
+
+@pytest.mark.asyncio
+async def test_create_buyer_request_conflicting_dates(service, product_repo, buyer_request_repo, booking_repo):
+    product_repo.find_by_id.return_value = MagicMock(product=MagicMock(is_available=True, lender_id=2, duration=3))
+    booked = (datetime(2030, 1, 1, tzinfo=timezone.utc), datetime(2030, 1, 10, tzinfo=timezone.utc))
+    booking_repo.get_calendar.return_value = (1, IntervalIndex([booked]))
+
+    with pytest.raises(RuntimeError, match="already booked"):
+        await service.create_buyer_request(
+            product_id=10,
+            user_ctx={"user_id": 1},
+            start_date=datetime(2030, 1, 8, tzinfo=timezone.utc),
+        )
+
+    buyer_request_repo.create_buyer_request.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_create_buyer_request_future_window_ignores_current_rental(service, product_repo, buyer_request_repo):
+    product_repo.find_by_id.return_value = MagicMock(product=MagicMock(is_available=False, lender_id=2, duration=3))
+
+    await service.create_buyer_request(
+        product_id=10,
+        user_ctx={"user_id": 1},
+        start_date=datetime(2030, 1, 1, tzinfo=timezone.utc),
+    )
+
+    created_req = buyer_request_repo.create_buyer_request.call_args[0][0]
+    assert created_req.start_date == datetime(2030, 1, 1, tzinfo=timezone.utc)
+    assert created_req.end_date == datetime(2030, 1, 4, tzinfo=timezone.utc)
+
+
+@pytest.mark.asyncio
+async def test_bulk_approve_same_product_disjoint_windows(service, buyer_request_repo, product_repo, category_repo, booking_repo, order_repo):
+    def request(rid, start, end):
+        return BuyingRequest(id=rid, product_id=10, requested_by=5, status="Pending", start_date=start, end_date=end)
+
+    jan = lambda d: datetime(2030, 1, d, tzinfo=timezone.utc)
+    buyer_request_repo.get_buyer_requests_by_ids.return_value = {
+        1: request(1, jan(1), jan(5)),
+        2: request(2, jan(3), jan(7)),
+        3: request(3, jan(10), jan(12)),
+    }
+    product_repo.find_products_by_ids.return_value = {10: MagicMock(id=10, lender_id=2, category_id=7, is_available=True)}
+    category_repo.find_by_ids.return_value = {7: MagicMock(price=1.0, security=1.0)}
+    booking_repo.get_calendars.return_value = {10: (4, IntervalIndex())}
+    order_repo.order_put_items = MagicMock(return_value=[])
+
+    results = await service.bulk_update_buyer_request_status([1, 2, 3], "Approved", {"user_id": 2, "role": "lender"})
+
+    assert [r["success"] for r in results] == [True, False, True]
+    assert results[1]["error"] == "product is already booked for the requested dates"
+    versions = [c.args[4] for c in booking_repo.booking_items.call_args_list]
+    assert versions == [4, 5]
+
+
+@pytest.mark.asyncio
+async def test_product_can_be_requested_again_after_return(service, buyer_request_repo, product_repo, category_repo, order_repo, booking_repo):
+    product = Product(id=10, lender_id=7, category_id=3, name="Drill", description="Cordless", duration=3)
+    product_repo.find_product.return_value = product
+    product_repo.find_by_id.return_value = MagicMock(product=product)
+    category_repo.find_by_id.return_value = MagicMock(price=100.0, security=20.0)
+    order_repo.order_put_items = MagicMock(return_value=[])
+    buyer_request_repo.get_buyer_request_by_id.return_value = _pending_request()
+    # the calendar as the committed transactions leave it
+    bookings = {}
+    booking_repo.booking_items = MagicMock(side_effect=lambda pid, oid, start, end, version: bookings.update({oid: (start, end)}) or [])
+    booking_repo.release_items = MagicMock(side_effect=lambda pid, oid, start: bookings.pop(oid) and [])
+    booking_repo.get_calendar.side_effect = lambda pid: (len(bookings), IntervalIndex(bookings.values()))
+
+    # approve: the rental starts now, so its booking covers the requested window
+    await service.update_buyer_request_status(1, BuyRequestStatus.Approved.value, {"role": "lender", "user_id": 7})
+    with pytest.raises(RuntimeError, match="already booked"):
+        await service.create_buyer_request(product_id=10, user_ctx={"user_id": 6})
+
+    # return: the same transaction frees the window
+    orders = OrderService(order_repo=order_repo, product_repo=product_repo, return_request_repo=AsyncMock(), booking_repo=booking_repo)
+    order_repo.get_order_by_id.return_value = order_repo.order_put_items.call_args[0][0]
+    await orders.mark_order_as_returned(99, {"user_id": 7})
+    assert bookings == {}
+
+    # request again
+    await service.create_buyer_request(product_id=10, user_ctx={"user_id": 6})
+    assert buyer_request_repo.create_buyer_request.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_create_buyer_request_rejects_past_start_date(service, product_repo, buyer_request_repo):
+    product_repo.find_by_id.return_value = MagicMock(product=MagicMock(is_available=True, lender_id=2, duration=3))
+
+    with pytest.raises(RuntimeError, match="past"):
+        await service.create_buyer_request(
+            product_id=10,
+            user_ctx={"user_id": 1},
+            start_date=datetime(2020, 1, 1, tzinfo=timezone.utc),
+        )
+
+    buyer_request_repo.create_buyer_request.assert_not_called()
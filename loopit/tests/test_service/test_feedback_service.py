@@ -54,6 +54,29 @@ async def test_give_feedback_success(service, feedback_repo, product_repo, order
     assert feedback.text == "great"
 
 
+@pytest.mark.asyncio
+async def test_give_feedback_settles_due_review(service, feedback_repo, product_repo, order_repo):
+    order_repo.get_order_by_id.return_value = MagicMock(product_id=10, user_id=1)
+    product_repo.find_by_id.return_value = MagicMock(product=MagicMock(lender_id=99))
+    feedback_repo.is_feedback_due.return_value = True
+
+    await service.give_feedback(order_id=5, feedback_text="great", rating=5, user_ctx={"user_id": 1})
+
+    feedback_repo.is_feedback_due.assert_awaited_once_with(1, 5)
+    assert feedback_repo.create_feedback.call_args.kwargs["due_order_id"] == 5
+
+
+@pytest.mark.asyncio
+async def test_give_feedback_not_borrower_skips_due_check(service, feedback_repo, product_repo, order_repo):
+    order_repo.get_order_by_id.return_value = MagicMock(product_id=10, user_id=3)
+    product_repo.find_by_id.return_value = MagicMock(product=MagicMock(lender_id=99))
+
+    await service.give_feedback(order_id=5, feedback_text="great", rating=5, user_ctx={"user_id": 1})
+
+    feedback_repo.is_feedback_due.assert_not_called()
+    assert feedback_repo.create_feedback.call_args.kwargs["due_order_id"] is None
+
+
 @pytest.mark.asyncio
 async def test_give_feedback_invalid_user(service):
     with pytest.raises(RuntimeError):
@@ -87,16 +110,15 @@ async def test_give_feedback_to_self(service, order_repo, product_repo):
 
 @pytest.mark.asyncio
 async def test_get_all_given_feedbacks_success(service, feedback_repo):
-    feedback_repo.get_all_feedbacks.return_value = [
-        MagicMock(given_by=1),
-        MagicMock(given_by=2),
-        MagicMock(given_by=1),
-    ]
+    page = [MagicMock(given_by=1), MagicMock(given_by=1)]
+    feedback_repo.get_feedbacks_given_by.return_value = (page, "next")
 
-    result = await service.get_all_given_feedbacks({"user_id": 1})
+    result, cursor = await service.get_all_given_feedbacks({"user_id": 1}, 2, None)
 
-    assert len(result) == 2
-    assert all(int(f.given_by) == 1 for f in result)
+    assert result == page
+    assert cursor == "next"
+    feedback_repo.get_feedbacks_given_by.assert_called_once_with(1, 2, None)
+    feedback_repo.get_all_feedbacks.assert_not_called()
 
 
 @pytest.mark.asyncio
@@ -107,19 +129,31 @@ async def test_get_all_given_feedbacks_invalid_user(service):
 
 @pytest.mark.asyncio
 async def test_get_all_received_feedbacks_success(service, feedback_repo):
-    feedback_repo.get_all_feedbacks.return_value = [
-        MagicMock(given_to=1),
-        MagicMock(given_to=2),
-        MagicMock(given_to=1),
-    ]
+    page = [MagicMock(given_to=1)]
+    feedback_repo.get_feedbacks_given_to.return_value = (page, None)
 
-    result = await service.get_all_received_feedbacks({"user_id": 1})
+    result, cursor = await service.get_all_received_feedbacks({"user_id": 1}, None, "abc")
 
-    assert len(result) == 2
-    assert all(int(f.given_to) == 1 for f in result)
+    assert result == page
+    assert cursor is None
+    feedback_repo.get_feedbacks_given_to.assert_called_once_with(1, None, "abc")
 
 
 @pytest.mark.asyncio
 async def test_get_all_received_feedbacks_invalid_user(service):
     with pytest.raises(RuntimeError):
         await service.get_all_received_feedbacks({"user_id": None})
+
+
+@pytest.mark.asyncio
+async def test_get_lender_rating(service, feedback_repo):
+    feedback_repo.get_lender_rating.return_value = "rating"
+
+    assert await service.get_lender_rating(4) == "rating"
+    feedback_repo.get_lender_rating.assert_called_once_with(4)
+
+
+@pytest.mark.asyncio
+async def test_get_lender_rating_invalid_lender(service):
+    with pytest.raises(RuntimeError):
+        await service.get_lender_rating(0)
@@ -14,7 +14,9 @@ def order_repo():
 
 @pytest.fixture
 def product_repo():
-    return AsyncMock()
+    repo = AsyncMock()
+    repo.availability_update_items = MagicMock(return_value=[{"Update": "available"}])
+    return repo
 
 
 @pytest.fixture
@@ -23,11 +25,19 @@ def return_request_repo():
 
 
 @pytest.fixture
-def service(order_repo, product_repo, return_request_repo):
+def booking_repo():
+    repo = AsyncMock()
+    repo.release_items = MagicMock(return_value=[{"Delete": "booking"}])
+    return repo
+
+
+@pytest.fixture
+def service(order_repo, product_repo, return_request_repo, booking_repo):
     return OrderService(
         order_repo=order_repo,
         product_repo=product_repo,
         return_request_repo=return_request_repo,
+        booking_repo=booking_repo,
     )
 
 
@@ -67,7 +77,7 @@ async def test_get_lender_orders_success(service, order_repo):
     order_repo.get_lender_orders.return_value = ["o1"]
     result = await service.get_lender_orders(user_ctx)
     assert result == ["o1"]
-    order_repo.get_lender_orders.assert_called_once_with(10)
+    order_repo.get_lender_orders.assert_called_once_with(10, fields=None)
 
 
 @pytest.mark.asyncio
@@ -86,10 +96,37 @@ async def test_get_lender_orders_invalid_lender(service):
 async def test_mark_order_as_returned_success(service, order_repo, product_repo):
     order_repo.get_order_by_id.return_value = MagicMock(product_id=20)
     product_repo.find_by_id.return_value = MagicMock(
-        product=MagicMock(lender_id=5)
+        product=MagicMock(lender_id=5, is_available=True)
     )
     await service.mark_order_as_returned(1, {"user_id": 5})
-    order_repo.update_order_status.assert_called_once_with(1, OrderStatus.Returned.value)
+    order_repo.apply_status_change.assert_called_once_with(
+        order_repo.get_order_by_id.return_value, 5, OrderStatus.Returned.value, [{"Delete": "booking"}]
+    )
+
+
+@pytest.mark.asyncio
+async def test_mark_order_as_returned_makes_product_available_again(service, order_repo, product_repo):
+    product = MagicMock(lender_id=5, is_available=False)
+    order_repo.get_order_by_id.return_value = MagicMock(product_id=20)
+    product_repo.find_by_id.return_value = MagicMock(product=product)
+
+    await service.mark_order_as_returned(1, {"user_id": 5})
+
+    product_repo.availability_update_items.assert_called_once_with(product, True)
+    assert order_repo.apply_status_change.call_args.args[3] == [{"Delete": "booking"}, {"Update": "available"}]
+
+
+@pytest.mark.asyncio
+async def test_update_order_status_returned_makes_product_available_again(service, order_repo, product_repo):
+    order = MagicMock(product_id=20, status=OrderStatus.ReturnRequested)
+    product = MagicMock(lender_id=5, is_available=False)
+    order_repo.get_order_by_id.return_value = order
+    product_repo.find_product.return_value = product
+
+    await service.update_order_status(1, OrderStatus.Returned)
+
+    order_repo.apply_status_change.assert_called_once_with(order, 5, OrderStatus.Returned.value, [{"Delete": "booking"}, {"Update": "available"}])
+    order_repo.update_order_status.assert_not_called()
 
 
 @pytest.mark.asyncio
@@ -115,3 +152,66 @@ async def test_mark_order_as_returned_unauthorized_lender(service, order_repo, p
     )
     with pytest.raises(RuntimeError):
         await service.mark_order_as_returned(1, {"user_id": 5})
+
+
+@pytest.mark.asyncio
+async def test_bulk_mark_orders_as_returned(service, order_repo, product_repo):
+    order_repo.get_orders_by_ids.return_value = {
+        1: MagicMock(id=1, product_id=10, status=OrderStatus.ReturnRequested),
+        2: MagicMock(id=2, product_id=20, status=OrderStatus.ReturnRequested),
+        3: MagicMock(id=3, product_id=10, status=OrderStatus.Returned),
+        5: MagicMock(id=5, product_id=10, status=OrderStatus.InUse),
+    }
+    product_repo.find_products_by_ids.return_value = {
+        10: MagicMock(lender_id=7),
+        20: MagicMock(lender_id=8),
+    }
+
+    results = await service.bulk_mark_orders_as_returned([1, 2, 3, 4, 5, 1], {"user_id": 7})
+
+    assert results == [
+        {"id": 1, "success": True, "error": None},
+        {"id": 2, "success": False, "error": "unauthorized lender"},
+        {"id": 3, "success": False, "error": "order already returned"},
+        {"id": 4, "success": False, "error": "order not found"},
+        {"id": 5, "success": False, "error": "order must be in return_requested status to mark as returned"},
+    ]
+    order_repo.apply_status_change.assert_called_once_with(
+        order_repo.get_orders_by_ids.return_value[1], 7, OrderStatus.Returned.value, [{"Delete": "booking"}]
+    )
+
+
+@pytest.mark.asyncio
+async def test_bulk_mark_orders_as_returned_restocks_with_the_first_return_that_commits(service, order_repo, product_repo):
+    first = MagicMock(id=1, product_id=10, status=OrderStatus.ReturnRequested)
+    second = MagicMock(id=2, product_id=10, status=OrderStatus.ReturnRequested)
+    order_repo.get_orders_by_ids.return_value = {1: first, 2: second}
+    product = MagicMock(lender_id=7, is_available=False)
+    product_repo.find_products_by_ids.return_value = {10: product}
+    order_repo.apply_status_change.side_effect = [RuntimeError("order status changed concurrently, please retry"), None]
+
+    results = await service.bulk_mark_orders_as_returned([1, 2], {"user_id": 7})
+
+    assert results == [
+        {"id": 1, "success": False, "error": "order status changed concurrently, please retry"},
+        {"id": 2, "success": True, "error": None},
+    ]
+    # the same product's returns run one after another, and the one that committed put the product back
+    calls = order_repo.apply_status_change.call_args_list
+    assert [c.args[0] for c in calls] == [first, second]
+    assert calls[1].args[3] == [{"Delete": "booking"}, {"Update": "available"}]
+    assert product.is_available is True
+
+
+@pytest.mark.asyncio
+async def test_bulk_mark_orders_as_returned_restocks_a_product_once(service, order_repo, product_repo):
+    order_repo.get_orders_by_ids.return_value = {
+        1: MagicMock(id=1, product_id=10, status=OrderStatus.ReturnRequested),
+        2: MagicMock(id=2, product_id=10, status=OrderStatus.ReturnRequested),
+    }
+    product_repo.find_products_by_ids.return_value = {10: MagicMock(lender_id=7, is_available=False)}
+
+    await service.bulk_mark_orders_as_returned([1, 2], {"user_id": 7})
+
+    calls = order_repo.apply_status_change.call_args_list
+    assert [c.args[3] for c in calls] == [[{"Delete": "booking"}, {"Update": "available"}], [{"Delete": "booking"}]]
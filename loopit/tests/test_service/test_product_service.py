@@ -1,11 +1,14 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 from service.product_service import ProductService
 from models.enums.user import Role
-from models.product import Product, ProductFilter
+from models.product import Product, ProductFilter, ProductResponse
 from schemas.product import ProductRequest
+from helpers.interval_index import IntervalIndex
+from models.product import ProductChanges
+from exception.product import ProductChangesExpiredError
 
 
 @pytest.fixture
@@ -19,30 +22,78 @@ def user_repo():
 
 
 @pytest.fixture
-def service(product_repo, user_repo):
-    return ProductService(product_repo=product_repo, user_repo=user_repo)
+def booking_repo():
+    return AsyncMock()
+
+
+@pytest.fixture
+def service(product_repo, user_repo, booking_repo):
+    return ProductService(product_repo=product_repo, user_repo=user_repo, booking_repo=booking_repo)
+
+
+def _row(pid, is_available=True):
+    product = Product(id=pid, lender_id=7, category_id=3, name="Drill", description="Cordless", duration=3, is_available=is_available, created_at=datetime(2024, 1, 1))
+    return ProductResponse(product=product)
 
 
 @pytest.mark.asyncio
-async def test_get_all_products_success(service, product_repo):
-    product_repo.find_all.return_value = ["p1", "p2"]
+async def test_get_all_products_success(service, product_repo, booking_repo):
+    rows = [_row(1), _row(2)]
+    product_repo.find_all.return_value = rows
+    booking_repo.get_calendars.return_value = {}
     result = await service.get_all_products(
         search="test",
         lender_id="1",
         category_id="2",
         is_available="true",
     )
-    assert result == ["p1", "p2"]
+    assert result == rows
     product_repo.find_all.assert_called_once()
     filters = product_repo.find_all.call_args[0][0]
     assert isinstance(filters, ProductFilter)
 
 
 @pytest.mark.asyncio
-async def test_get_product_by_id_success(service, product_repo):
-    product_repo.find_by_id.return_value = "product"
+async def test_get_all_products_reads_availability_off_the_calendar(service, product_repo, booking_repo):
+    now = datetime.now(timezone.utc)
+    rented, booked_later, listed, withdrawn = _row(1), _row(2), _row(3), _row(4, is_available=False)
+    product_repo.find_all.return_value = [rented, booked_later, listed, withdrawn]
+    booking_repo.get_calendars.return_value = {
+        1: (1, IntervalIndex([(now - timedelta(days=1), now + timedelta(days=1))])),
+        2: (1, IntervalIndex([(now + timedelta(days=1), now + timedelta(days=2))])),
+        3: (0, IntervalIndex()),
+    }
+
+    available = await service.get_all_products(None, None, None, is_available="true")
+
+    assert available == [booked_later, listed]
+    assert rented.product.is_available is False
+    booking_repo.get_calendars.assert_awaited_once_with([1, 2, 3])
+
+
+@pytest.mark.asyncio
+async def test_get_all_products_skips_the_calendar_when_availability_is_not_read(service, product_repo, booking_repo):
+    product_repo.find_all.return_value = [_row(1)]
+
+    await service.get_all_products(None, None, None, None, fields=frozenset({"id", "name"}))
+
+    booking_repo.get_calendars.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_product_by_id_success(service, product_repo, booking_repo):
+    product_repo.find_by_id.return_value = _row(1)
+    booking_repo.get_calendars.return_value = {1: (0, IntervalIndex())}
     result = await service.get_product_by_id(1)
-    assert result == "product"
+    assert result == _row(1)
+
+
+@pytest.mark.asyncio
+async def test_booked_now(service, booking_repo):
+    now = datetime.now(timezone.utc)
+    booking_repo.get_calendar.return_value = (1, IntervalIndex([(now - timedelta(hours=1), now + timedelta(hours=1))]))
+
+    assert await service.booked_now(1) is True
 
 
 @pytest.mark.asyncio
@@ -155,3 +206,82 @@ async def test_delete_product_not_owner(service, product_repo):
     )
     with pytest.raises(RuntimeError):
         await service.delete_product(1, {"user_id": 5})
+
+
+@pytest.mark.asyncio
+async def test_get_products_by_ids_dedupes(service, product_repo):
+    product_repo.find_by_ids.return_value = {1: "p1"}
+
+    result = await service.get_products_by_ids([1, 1, 0])
+
+    assert result == {1: "p1"}
+    product_repo.find_by_ids.assert_called_once_with([1], include=())
+
+
+@pytest.mark.asyncio
+async def test_get_products_by_ids_empty(service, product_repo):
+    result = await service.get_products_by_ids([])
+
+    assert result == {}
+    product_repo.find_by_ids.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_availability(service, product_repo, booking_repo):
+    start = datetime(2030, 1, 6, tzinfo=timezone.utc)
+    end = datetime(2030, 1, 8, tzinfo=timezone.utc)
+    product_repo.find_products_by_ids.return_value = {
+        1: MagicMock(is_available=False),
+        2: MagicMock(is_available=True),
+    }
+    booking_repo.get_calendars.return_value = {
+        1: (0, IntervalIndex()),
+        2: (1, IntervalIndex([(datetime(2030, 1, 7, tzinfo=timezone.utc), datetime(2030, 1, 9, tzinfo=timezone.utc))])),
+        3: (0, IntervalIndex()),
+    }
+
+    result = await service.get_availability([1, 2, 3], start, end)
+
+    assert result == {1: True, 2: False}
+
+
+@pytest.mark.asyncio
+async def test_get_product_changes_without_since_only_returns_a_watermark(service, product_repo):
+    product_repo.current_watermark = MagicMock(return_value=50)
+    product_repo.oldest_watermark = MagicMock(return_value=10)
+
+    changes = await service.get_product_changes(None)
+
+    assert changes == ProductChanges(watermark="50")
+    product_repo.find_changes.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_product_changes_rejects_expired_watermark(service, product_repo):
+    product_repo.oldest_watermark = MagicMock(return_value=10)
+
+    with pytest.raises(ProductChangesExpiredError):
+        await service.get_product_changes("5")
+
+    product_repo.find_changes.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_product_changes_reads_the_log(service, product_repo):
+    product_repo.oldest_watermark = MagicMock(return_value=10)
+    product_repo.find_changes.return_value = ProductChanges(deleted=[1], watermark="40")
+
+    changes = await service.get_product_changes("20", include={"category"})
+
+    product_repo.find_changes.assert_awaited_once_with("20", include={"category"})
+    assert changes.deleted == [1]
+
+
+@pytest.mark.asyncio
+async def test_get_product_changes_checks_expiry_on_a_cursor_timestamp(service, product_repo):
+    product_repo.oldest_watermark = MagicMock(return_value=10)
+
+    with pytest.raises(ProductChangesExpiredError):
+        await service.get_product_changes(f"{5:020d}#3")
+
+    product_repo.find_changes.assert_not_called()
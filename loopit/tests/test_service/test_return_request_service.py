@@ -111,7 +111,7 @@ async def test_update_return_request_status_success(service, order_repo, return_
     )
 
     return_request_repo.update_return_request_status.assert_called_once_with(
-        1, ReturnStatus.Approved.value
+        1, ReturnStatus.Approved.value, borrower_id=5
     )
 
 
@@ -0,0 +1,48 @@
+import pytest
+from unittest.mock import AsyncMock
+
+from service.stats_service import StatsService
+
+
+@pytest.fixture
+def stats_repo():
+    return AsyncMock()
+
+
+@pytest.fixture
+def service(stats_repo):
+    return StatsService(stats_repo=stats_repo)
+
+
+@pytest.mark.asyncio
+async def test_get_lender_dashboard(service, stats_repo):
+    stats_repo.get_lender_dashboard.return_value = "dashboard"
+
+    result = await service.get_lender_dashboard({"user_id": 7, "role": "lender"})
+
+    assert result == "dashboard"
+    stats_repo.get_lender_dashboard.assert_called_once_with(7)
+
+
+@pytest.mark.asyncio
+async def test_get_lender_dashboard_not_lender(service, stats_repo):
+    with pytest.raises(RuntimeError):
+        await service.get_lender_dashboard({"user_id": 7, "role": "user"})
+
+    stats_repo.get_lender_dashboard.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_user_summary(service, stats_repo):
+    stats_repo.get_user_summary.return_value = "summary"
+
+    result = await service.get_user_summary({"user_id": 5, "role": "user"})
+
+    assert result == "summary"
+    stats_repo.get_user_summary.assert_called_once_with(5)
+
+
+@pytest.mark.asyncio
+async def test_get_user_summary_invalid_user(service, stats_repo):
+    with pytest.raises(RuntimeError):
+        await service.get_user_summary({})
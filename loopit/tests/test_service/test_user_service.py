@@ -44,7 +44,7 @@ async def test_get_all_users_success(service, user_repo):
     user_repo.find_all.return_value = ["u1", "u2"]
     result = await service.get_all_users(None)
     assert result == ["u1", "u2"]
-    user_repo.find_all.assert_called_once_with({})
+    user_repo.find_all.assert_called_once_with({}, fields=None)
 
 
 @pytest.mark.asyncio
@@ -59,7 +59,7 @@ async def test_get_user_by_id_success(service, user_repo):
     user_repo.find_by_id.return_value = "user"
     result = await service.get_user_by_id(1)
     assert result == "user"
-    user_repo.find_by_id.assert_called_once_with(1)
+    user_repo.find_by_id.assert_called_once_with(1, fields=None)
 
 
 @pytest.mark.asyncio